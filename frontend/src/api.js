@@ -30,11 +30,28 @@ axios.interceptors.response.use(
   }
 );
 
+// Full lists are revalidated with If-None-Match; a 304 reuses the cached copy
+const listCache = new Map();
+
+const getList = async (url) => {
+  const cached = listCache.get(url);
+  const response = await axios.get(url, {
+    headers: cached ? { 'If-None-Match': cached.etag } : {},
+    validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
+  });
+  if (response.status === 304) {
+    return cached.data;
+  }
+  if (response.headers.etag) {
+    listCache.set(url, { etag: response.headers.etag, data: response.data });
+  }
+  return response.data;
+};
+
 export const api = {
   // Collections CRUD
   getCollections: async () => {
-    const response = await axios.get(`${API_BASE}/api/collections/`);
-    return response.data;
+    return getList(`${API_BASE}/api/collections/`);
   },
 
   getCollection: async (slug) => {
@@ -56,10 +73,45 @@ export const api = {
     await axios.delete(`${API_BASE}/api/collections/${slug}/`);
   },
 
+  cloneCollection: async (slug, data) => {
+    const response = await axios.post(`${API_BASE}/api/collections/${slug}/clone/`, data);
+    return response.data;
+  },
+
+  // Releases: frozen copies served at /{slug}@{number}/
+  getReleases: async (slug) => {
+    const response = await axios.get(`${API_BASE}/api/collections/${slug}/releases/`);
+    return response.data;
+  },
+
+  createRelease: async (slug, notes = '') => {
+    const response = await axios.post(`${API_BASE}/api/collections/${slug}/releases/`, { notes });
+    return response.data;
+  },
+
+  // Serve a release at /{slug}/, or the live endpoints again with null
+  rollbackCollection: async (slug, release) => {
+    const response = await axios.post(`${API_BASE}/api/collections/${slug}/rollback/`, { release });
+    return response.data;
+  },
+
   // Endpoints CRUD
+  // Lightweight listing (no bodies or responses); follows every page
   getEndpoints: async (collectionSlug) => {
+    const endpoints = [];
+    let url = `${API_BASE}/api/endpoints/?collection=${collectionSlug}&view=summary&page_size=500`;
+    while (url) {
+      const page = await getList(url);
+      endpoints.push(...page.results);
+      url = page.next;
+    }
+    return endpoints;
+  },
+
+  // Endpoints and responses changed after a collection config_version
+  getChanges: async (collectionSlug, since) => {
     const response = await axios.get(
-      `${API_BASE}/api/endpoints/?collection=${collectionSlug}`
+      `${API_BASE}/api/collections/${collectionSlug}/changes/?since=${since}`
     );
     return response.data;
   },
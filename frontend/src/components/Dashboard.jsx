@@ -1,9 +1,34 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import Sidebar from './Sidebar';
 import EndpointList from './EndpointList';
 import EndpointDetail from './EndpointDetail';
 import { api } from '../api';
 
+const byPositionAndPath = (a, b) =>
+  a.position - b.position || a.path.localeCompare(b.path) || a.id - b.id;
+
+// Apply a change feed delta to the endpoint summaries
+const applyEndpointChanges = (endpoints, changes) => {
+  const gone = new Set([
+    ...changes.deleted.endpoints,
+    ...changes.endpoints.map((endpoint) => endpoint.id),
+  ]);
+  return endpoints
+    .filter((endpoint) => !gone.has(endpoint.id))
+    .concat(changes.endpoints)
+    .sort(byPositionAndPath);
+};
+
+// Whether a delta adds, changes, moves or deletes one of the endpoint's responses
+const touchesResponses = (endpoint, changes) => {
+  const own = new Set((endpoint.responses || []).map((response) => response.id));
+  return (
+    changes.responses.some(
+      (response) => response.endpoint === endpoint.id || own.has(response.id)
+    ) || changes.deleted.responses.some((id) => own.has(id))
+  );
+};
+
 export default function Dashboard({ user, onLogout }) {
   const [collections, setCollections] = useState([]);
   const [selectedCollection, setSelectedCollection] = useState(null);
@@ -11,6 +36,8 @@ export default function Dashboard({ user, onLogout }) {
   const [selectedEndpoint, setSelectedEndpoint] = useState(null);
   const [loading, setLoading] = useState(true);
   const [sidebarCollapsed, setSidebarCollapsed] = useState(false);
+  // config_version the endpoint list is known to be current with
+  const endpointsVersion = useRef(null);
 
   useEffect(() => {
     loadCollections();
@@ -43,21 +70,64 @@ export default function Dashboard({ user, onLogout }) {
 
   const loadEndpoints = async (slug) => {
     try {
+      // Read the version first; edits made meanwhile come again in the next sync
+      const { config_version } = await api.getCollection(slug);
       const data = await api.getEndpoints(slug);
+      endpointsVersion.current = config_version;
       setEndpoints(data);
     } catch (error) {
       console.error('Failed to load endpoints:', error);
+      endpointsVersion.current = null;
       setEndpoints([]);
     }
   };
 
+  // Fetch only what changed since the last load or sync
+  const syncEndpoints = async (slug) => {
+    if (endpointsVersion.current === null) {
+      return loadEndpoints(slug);
+    }
+    try {
+      const changes = await api.getChanges(slug, endpointsVersion.current);
+      if (changes.reset) {
+        return loadEndpoints(slug);
+      }
+      endpointsVersion.current = changes.version;
+      setEndpoints((current) => applyEndpointChanges(current, changes));
+      setSelectedCollection(changes.collection);
+
+      if (selectedEndpoint) {
+        if (changes.deleted.endpoints.includes(selectedEndpoint.id)) {
+          setSelectedEndpoint(null);
+        } else if (
+          changes.endpoints.some((e) => e.id === selectedEndpoint.id) ||
+          touchesResponses(selectedEndpoint, changes)
+        ) {
+          setSelectedEndpoint(await api.getEndpoint(selectedEndpoint.id));
+        }
+      }
+    } catch (error) {
+      console.error('Failed to sync endpoints:', error);
+      return loadEndpoints(slug);
+    }
+  };
+
   const handleRefreshCollections = () => {
     loadCollections();
   };
 
+  // The endpoint list is a summary; load the full endpoint when selected
+  const handleSelectEndpoint = async (endpoint) => {
+    try {
+      setSelectedEndpoint(await api.getEndpoint(endpoint.id));
+    } catch (error) {
+      console.error('Failed to load endpoint:', error);
+    }
+  };
+
   const handleRefreshEndpoints = () => {
     if (selectedCollection) {
-      loadEndpoints(selectedCollection.slug);
+      syncEndpoints(selectedCollection.slug);
     }
   };
 
@@ -82,7 +152,7 @@ export default function Dashboard({ user, onLogout }) {
           collection={selectedCollection}
           endpoints={endpoints}
           selectedEndpoint={selectedEndpoint}
-          onSelectEndpoint={setSelectedEndpoint}
+          onSelectEndpoint={handleSelectEndpoint}
           onRefresh={handleRefreshEndpoints}
         />
         {selectedEndpoint && (
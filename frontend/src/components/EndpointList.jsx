@@ -25,10 +25,16 @@ export default function EndpointList({
   const [deleteLoading, setDeleteLoading] = useState(false);
   const [endpointsExpanded, setEndpointsExpanded] = useState(true);
 
-  const handleEdit = (e, endpoint) => {
+  const handleEdit = async (e, endpoint) => {
     e.stopPropagation();
-    setEditingEndpoint(endpoint);
-    setShowEndpointForm(true);
+    try {
+      // List items are summaries without bodies and headers
+      setEditingEndpoint(await api.getEndpoint(endpoint.id));
+      setShowEndpointForm(true);
+    } catch (error) {
+      console.error('Failed to load endpoint:', error);
+      alert('Failed to load endpoint');
+    }
   };
 
   const handleDelete = (e, endpoint) => {
@@ -1,4 +1,7 @@
+import math
+
 import nested_admin
+from django.conf import settings
 from django.contrib import admin
 from django.db.models import Count
 from django.urls import reverse
@@ -6,6 +9,28 @@ from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 
 from .models import Collection, EndpointResponse, MockEndpoint
+from .openapi_utils import cached_openapi_schema
+
+# Query parameter selecting the page of endpoint inlines
+PAGE_VAR = "endpoints_page"
+
+
+def inline_endpoint_limit():
+    return getattr(settings, "MOCKAPI_ADMIN_INLINE_ENDPOINTS", 50)
+
+
+def inline_page_size():
+    return getattr(settings, "MOCKAPI_ADMIN_INLINE_PAGE_SIZE", 20)
+
+
+def endpoint_page(request, count):
+    """The ``(number, pages)`` of the endpoint inline page ``request`` asks for."""
+    pages = max(1, math.ceil(count / inline_page_size()))
+    try:
+        number = int(request.GET.get(PAGE_VAR, 1))
+    except ValueError:
+        number = 1
+    return min(max(number, 1), pages), pages
 
 
 class EndpointResponseInline(nested_admin.NestedTabularInline):
@@ -30,6 +55,30 @@ class MockEndpointInline(nested_admin.NestedTabularInline):
     ordering = ["position", "path"]
     inlines = [EndpointResponseInline]
 
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        number, pages = getattr(obj, "endpoints_page", (1, 1))
+        if pages == 1:
+            return formset
+        size = inline_page_size()
+        start = (number - 1) * size
+
+        class EndpointPageFormSet(formset):
+            """Only the endpoints of one page get forms (and nested forms)."""
+
+            def get_queryset(self):
+                queryset = super().get_queryset()
+                if self.is_bound:
+                    # nested_admin already limits it to the submitted forms
+                    return queryset
+                if not hasattr(self, "_page"):
+                    # Filtered rather than sliced: pk fields look rows up in it
+                    page = queryset.values_list("pk", flat=True)[start : start + size]
+                    self._page = queryset.filter(pk__in=list(page))
+                return self._page
+
+        return EndpointPageFormSet
+
 
 @admin.register(Collection)
 class CollectionAdmin(nested_admin.NestedModelAdmin):
@@ -56,7 +105,38 @@ class CollectionAdmin(nested_admin.NestedModelAdmin):
                 "description": "View or manage the OpenAPI schema for this collection",
             },
         ),
-        ("Settings", {"fields": ("is_active", "created_by")}),
+        (
+            "CORS",
+            {
+                "fields": (
+                    "cors_enabled",
+                    "cors_allowed_origins",
+                    "cors_allowed_headers",
+                    "cors_allow_credentials",
+                    "cors_max_age",
+                ),
+                "classes": ("collapse",),
+                "description": "Preflight and response headers for mock traffic",
+            },
+        ),
+        (
+            "Proxy",
+            {
+                "fields": ("proxy_mode", "upstream_url", "record_filters"),
+                "classes": ("collapse",),
+                "description": "Forward requests that match no mock, and record "
+                "the responses as mocks",
+            },
+        ),
+        (
+            "Request Validation",
+            {
+                "fields": ("validate_requests", "validation_status"),
+                "classes": ("collapse",),
+                "description": "Check mock requests against the OpenAPI schema",
+            },
+        ),
+        ("Settings", {"fields": ("is_active", "log_sink", "created_by")}),
         (
             "Metadata",
             {"fields": ("created_at", "updated_at"), "classes": ("collapse",)},
@@ -68,8 +148,44 @@ class CollectionAdmin(nested_admin.NestedModelAdmin):
         "updated_at",
         "openapi_schema_display",
         "openapi_actions",
+        "endpoints_link",
     )
 
+    def has_endpoint_inlines(self, obj):
+        """Whether ``obj`` is small enough to edit its endpoints inline."""
+        if obj is None:
+            return True
+        count = getattr(obj, "endpoints_count", None)
+        if count is None:
+            count = obj.endpoints.count()
+        return count <= inline_endpoint_limit()
+
+    def get_object(self, request, object_id, from_field=None):
+        obj = super().get_object(request, object_id, from_field)
+        if obj is not None:
+            obj.endpoints_page = endpoint_page(request, obj.endpoints_count)
+        return obj
+
+    def get_inlines(self, request, obj):
+        # Large collections would render every endpoint and response form
+        if not self.has_endpoint_inlines(obj):
+            return []
+        return super().get_inlines(request, obj)
+
+    def get_fieldsets(self, request, obj=None):
+        fieldsets = super().get_fieldsets(request, obj)
+        if not self.has_endpoint_inlines(obj):
+            description = "This collection has too many endpoints to edit here"
+        elif getattr(obj, "endpoints_page", (1, 1))[1] > 1:
+            description = "Endpoints are edited below one page at a time"
+        else:
+            return fieldsets
+        return (
+            fieldsets[0],
+            ("Endpoints", {"fields": ("endpoints_link",), "description": description}),
+            *fieldsets[1:],
+        )
+
     def slug_link(self, obj):
         url = reverse("admin:domains_collection_change", args=[obj.pk])
         return format_html(
@@ -80,7 +196,7 @@ class CollectionAdmin(nested_admin.NestedModelAdmin):
     slug_link.admin_order_field = "slug"
 
     def endpoint_count(self, obj):
-        count = obj.endpoints.count()
+        count = obj.endpoints_count
         if count > 0:
             url = (
                 reverse("admin:domains_mockendpoint_changelist")
@@ -90,6 +206,35 @@ class CollectionAdmin(nested_admin.NestedModelAdmin):
         return "0 endpoints"
 
     endpoint_count.short_description = "Endpoints"
+    endpoint_count.admin_order_field = "endpoints_count"
+
+    def endpoints_link(self, obj):
+        """Link to the endpoint changelist, filtered to this collection."""
+        url = (
+            reverse("admin:domains_mockendpoint_changelist")
+            + f"?collection__id__exact={obj.id}"
+        )
+        add_url = reverse("admin:domains_mockendpoint_add") + f"?collection={obj.id}"
+        links = format_html(
+            '<a href="{}">Browse {} endpoints</a> &middot; '
+            '<a href="{}">Add endpoint</a>',
+            url,
+            obj.endpoints_count,
+            add_url,
+        )
+        number, pages = getattr(obj, "endpoints_page", (1, 1))
+        if pages == 1 or not self.has_endpoint_inlines(obj):
+            return links
+        pager = [format_html("Page {} of {}", number, pages)]
+        if number > 1:
+            pager.append(
+                format_html('<a href="?{}={}">Previous</a>', PAGE_VAR, number - 1)
+            )
+        if number < pages:
+            pager.append(format_html('<a href="?{}={}">Next</a>', PAGE_VAR, number + 1))
+        return format_html("{}<br>{}", mark_safe(" &middot; ".join(pager)), links)
+
+    endpoints_link.short_description = "Endpoints"
 
     def openapi_status(self, obj):
         """Display OpenAPI schema status."""
@@ -101,19 +246,38 @@ class CollectionAdmin(nested_admin.NestedModelAdmin):
     openapi_status.short_description = "OpenAPI Status"
 
     def openapi_schema_display(self, obj):
-        """Display OpenAPI schema in a readonly textarea."""
+        """
+        Display OpenAPI schema in a readonly textarea.
+
+        The schema is cached per ``config_version``; for large collections
+        only the first lines are shown, with a link to the full document.
+        """
         if not obj.pk:
             return "Save the collection first to view OpenAPI schema."
-        from .openapi_utils import generate_openapi_schema
-
         try:
-            schema = generate_openapi_schema(obj)
-            return mark_safe(
-                f'<textarea rows="20" cols="100" readonly style="width:100%;">{schema}</textarea>'
-            )
+            schema = cached_openapi_schema(obj)
         except Exception as e:
             return f"Error: {e}"
 
+        limit = getattr(settings, "MOCKAPI_ADMIN_SCHEMA_PREVIEW_LINES", 200)
+        lines = schema.splitlines()
+        if self.has_endpoint_inlines(obj) or len(lines) <= limit:
+            return format_html(
+                '<textarea rows="20" cols="100" readonly style="width:100%;">'
+                "{}</textarea>",
+                schema,
+            )
+        return format_html(
+            '<textarea rows="20" cols="100" readonly style="width:100%;">'
+            "{}\n...</textarea><p>Showing {} of {} lines. "
+            '<a href="/api/collections/{}/openapi-schema/?format=yaml">'
+            "Download the full schema</a></p>",
+            "\n".join(lines[:limit]),
+            limit,
+            len(lines),
+            obj.slug,
+        )
+
     openapi_schema_display.short_description = "OpenAPI Schema (readonly)"
 
     def openapi_actions(self, obj):
@@ -179,6 +343,14 @@ class MockEndpointAdmin(nested_admin.NestedModelAdmin):
             "Request Configuration",
             {"fields": ("path", "http_method", "get_full_path", "test_endpoint_link")},
         ),
+        (
+            "Endpoint Type",
+            {
+                "fields": ("endpoint_type", "resource_config"),
+                "description": "Resources serve in-memory CRUD at the path and "
+                "path/{id}, seeded with the response body (a JSON array)",
+            },
+        ),
         (
             "Default Response Configuration",
             {
@@ -187,6 +359,7 @@ class MockEndpointAdmin(nested_admin.NestedModelAdmin):
                     "content_type",
                     "content_encoding",
                     "response_body",
+                    "response_file",
                     "custom_headers",
                 ),
                 "description": "Default response (can add more responses below)",
@@ -199,6 +372,8 @@ class MockEndpointAdmin(nested_admin.NestedModelAdmin):
                     "enable_dynamic_response",
                     "enable_request_logger",
                     "response_delay",
+                    "enable_compression",
+                    "enable_conditional_requests",
                 )
             },
         ),
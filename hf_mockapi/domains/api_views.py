@@ -1,17 +1,157 @@
+import base64
+import hashlib
+import json
+
 from django.contrib.auth.models import User
+from django.db.models import Count, Q
 from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.http import parse_etags
 from rest_framework import status, viewsets
 from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-
-from .models import Collection, EndpointResponse, MockEndpoint
-from .openapi_utils import (generate_openapi_schema, import_openapi_schema,
+from rest_framework.utils.urls import replace_query_param
+
+from .bulk import BulkMutationMixin
+from .changes import changes_since, stamp_endpoints, stamp_responses
+from .importers import ImportFormatError, import_traffic
+from .models import (Collection, CollectionRelease, EndpointResponse,
+                     MockEndpoint, Tombstone)
+from .openapi_utils import (cached_openapi_schema, import_openapi_schema,
                             validate_openapi_schema)
-from .serializers import (CollectionSerializer, EndpointResponseSerializer,
+from .releases import clone_collection, create_release, pin_release
+from .serializers import (CollectionCloneSerializer,
+                          CollectionReleaseSerializer, CollectionSerializer,
+                          EndpointResponseSerializer,
                           MockEndpointDetailSerializer, MockEndpointSerializer,
-                          UserSerializer)
+                          MockEndpointSummarySerializer, UserSerializer)
+
+# Endpoint columns only loaded when the serializer asks for them
+DEFERRABLE_ENDPOINT_FIELDS = ("description", "response_body", "custom_headers")
+
+
+class EndpointCursorPagination(BasePagination):
+    """
+    Keyset pagination over ``(position, path, id)``.
+
+    ``?cursor=`` is the opaque value from ``next``; every page costs one
+    indexed range query however deep it is. Responses have the shape
+    ``{"next": url-or-null, "results": [...]}``.
+    """
+
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+    cursor_query_param = "cursor"
+    ordering = ("position", "path", "id")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            position, path, pk = cursor
+            queryset = queryset.filter(
+                Q(position__gt=position)
+                | Q(position=position, path__gt=path)
+                | Q(position=position, path=path, id__gt=pk)
+            )
+        rows = list(queryset[: page_size + 1])
+        self.next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last = rows[-1]
+            self.next_cursor = self.encode_cursor(last.position, last.path, last.pk)
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def decode_cursor(self, request):
+        value = request.query_params.get(self.cursor_query_param)
+        if not value:
+            return None
+        try:
+            position, path, pk = json.loads(base64.urlsafe_b64decode(value))
+            return int(position), str(path), int(pk)
+        except (TypeError, ValueError):
+            raise NotFound("Invalid cursor")
+
+    def encode_cursor(self, *values):
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+
+def versioned_response(request, versions, build):
+    """
+    Answer 304 if ``If-None-Match`` matches, otherwise ``build()``.
+
+    The ETag is derived from the request URL and ``versions`` (collection
+    ``config_version`` values), which change with every edit to the data
+    being listed, so the list itself is only built when it changed.
+    """
+    key = repr((request.get_full_path(), versions)).encode()
+    etag = f'"{hashlib.sha1(key).hexdigest()}"'
+    if etag in parse_etags(request.headers.get("If-None-Match", "")):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = build()
+    response["ETag"] = etag
+    return response
+
+
+def endpoint_queryset(queryset, serializer_class, request):
+    """
+    Load what ``serializer_class`` will output for ``request`` and no more.
+
+    The collection is joined, nested responses are prefetched in one query
+    only when requested, and unrequested text columns are deferred, so a
+    listing takes a constant number of queries.
+    """
+    names = set(serializer_class.Meta.fields)
+    names -= serializer_class.omitted_fields(request, names)
+    queryset = queryset.select_related("collection")
+    if "responses" in names:
+        queryset = queryset.prefetch_related("responses")
+    deferred = [name for name in DEFERRABLE_ENDPOINT_FIELDS if name not in names]
+    return queryset.defer(*deferred) if deferred else queryset
+
+
+def endpoint_serializer_class(request, default):
+    """``?view=summary`` selects the lightweight listing serializer."""
+    if request.query_params.get("view") == "summary":
+        return MockEndpointSummarySerializer
+    return default
+
+
+def schema_content(request):
+    """
+    The ``schema`` of an OpenAPI upload: the text field, or the bytes of an
+    uploaded file (multipart), which are parsed without another copy.
+    """
+    content = request.data.get("schema")
+    if hasattr(content, "read"):
+        content = content.read()
+    return content
 
 
 class CollectionViewSet(viewsets.ModelViewSet):
@@ -22,7 +162,11 @@ class CollectionViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         queryset = Collection.objects.filter(is_active=True)
-        return queryset.order_by("slug")
+        return (
+            queryset.select_related("pinned_release")
+            .annotate(endpoints_count=Count("endpoints"))
+            .order_by("slug")
+        )
 
     def get_object(self):
         slug = self.kwargs.get(self.lookup_field)
@@ -30,24 +174,139 @@ class CollectionViewSet(viewsets.ModelViewSet):
         self.check_object_permissions(self.request, obj)
         return obj
 
+    def list(self, request, *args, **kwargs):
+        versions = list(
+            Collection.objects.filter(is_active=True)
+            .order_by("pk")
+            .values_list("pk", "config_version")
+        )
+        return versioned_response(
+            request, versions, lambda: super(CollectionViewSet, self).list(request)
+        )
+
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
     @action(detail=True, methods=["get"])
     def endpoints(self, request, slug=None):
+        """
+        Active endpoints of the collection, a cursor-paginated page at a time.
+
+        Supports ``?view=summary`` and ``?fields=``/``?exclude=``.
+        """
+        collection = self.get_object()
+        serializer_class = endpoint_serializer_class(request, MockEndpointSerializer)
+
+        def build():
+            endpoints = endpoint_queryset(
+                collection.endpoints.filter(is_active=True), serializer_class, request
+            )
+            paginator = EndpointCursorPagination()
+            page = paginator.paginate_queryset(endpoints, request, view=self)
+            serializer = serializer_class(page, many=True, context={"request": request})
+            return paginator.get_paginated_response(serializer.data)
+
+        return versioned_response(request, [collection.config_version], build)
+
+    @action(detail=True, methods=["get"])
+    def changes(self, request, slug=None):
+        """
+        What changed after ``?since=<config_version>`` (see domains.changes).
+
+        Endpoints come in the summary format. When ``reset`` is set, the
+        client has to reload the collection instead.
+        """
         collection = self.get_object()
-        endpoints = collection.endpoints.filter(is_active=True).order_by(
-            "position", "path"
+        try:
+            since = int(request.query_params.get("since", ""))
+            if since < 0:
+                raise ValueError
+        except ValueError:
+            return Response(
+                {"error": "since must be a non-negative integer"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        changes = changes_since(collection, since)
+        if changes["reset"]:
+            return Response(changes)
+        return Response(
+            {
+                **changes,
+                "collection": CollectionSerializer(collection).data,
+                "endpoints": MockEndpointSummarySerializer(
+                    changes["endpoints"], many=True
+                ).data,
+                "responses": EndpointResponseSerializer(
+                    changes["responses"], many=True
+                ).data,
+            }
         )
-        serializer = MockEndpointSerializer(endpoints, many=True)
-        return Response(serializer.data)
+
+    @action(detail=True, methods=["post"])
+    def clone(self, request, slug=None):
+        """Copy the collection, endpoints and responses to a new ``slug``."""
+        collection = self.get_object()
+        serializer = CollectionCloneSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        clone = clone_collection(
+            collection, user=request.user, **serializer.validated_data
+        )
+        return Response(
+            CollectionSerializer(clone).data, status=status.HTTP_201_CREATED
+        )
+
+    @action(detail=True, methods=["get", "post"])
+    def releases(self, request, slug=None):
+        """
+        List the collection's releases, newest first, or freeze its live
+        endpoints as the next one (served at ``/{slug}@{number}/``).
+        """
+        collection = self.get_object()
+        if request.method == "POST":
+            serializer = CollectionReleaseSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            release = create_release(
+                collection, serializer.validated_data.get("notes", ""), request.user
+            )
+            return Response(
+                CollectionReleaseSerializer(release).data,
+                status=status.HTTP_201_CREATED,
+            )
+        releases = (
+            collection.releases.select_related("collection")
+            .defer("routes", "resources", "cors")
+            .order_by("-number")
+        )
+        return Response(CollectionReleaseSerializer(releases, many=True).data)
+
+    @action(detail=True, methods=["post"])
+    def rollback(self, request, slug=None):
+        """
+        Serve release ``{"release": <number>}`` at ``/{slug}/``, or the live
+        endpoints again with ``{"release": null}``.
+        """
+        collection = self.get_object()
+        number = request.data.get("release", "")
+        if number is not None and (type(number) is not int or number < 1):
+            return Response(
+                {"error": "release must be a release number, or null"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        release = None
+        if number is not None:
+            release = get_object_or_404(
+                CollectionRelease, collection=collection, number=number
+            )
+        pin_release(collection, release)
+        return Response(CollectionSerializer(collection).data)
 
     @action(detail=True, methods=["get"], url_path="openapi-schema")
     def openapi_schema(self, request, slug=None):
         """Get OpenAPI schema for this collection."""
         try:
             collection = self.get_object()
-            schema = generate_openapi_schema(collection)
+            schema = cached_openapi_schema(collection)
 
             format_type = request.query_params.get("format", "download")
 
@@ -78,7 +337,7 @@ class CollectionViewSet(viewsets.ModelViewSet):
     def import_openapi(self, request, slug=None):
         """Import OpenAPI schema to update collection and endpoints."""
         collection = self.get_object()
-        yaml_content = request.data.get("schema")
+        yaml_content = schema_content(request)
 
         if not yaml_content:
             return Response(
@@ -86,18 +345,51 @@ class CollectionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        success, message = import_openapi_schema(collection, yaml_content)
+        try:
+            seed = int(request.data.get("seed", 0))
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "seed must be an integer"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        success, message = import_openapi_schema(collection, yaml_content, seed)
 
         if success:
             return Response({"message": message}, status=status.HTTP_200_OK)
         else:
             return Response({"error": message}, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=True, methods=["post"], url_path="import-traffic")
+    def import_traffic(self, request, slug=None):
+        """
+        Add the requests in an uploaded HAR file or Postman collection
+        (``file``, with ``format`` "har" or "postman") as endpoints and
+        responses. ``strip_prefix`` drops a leading path such as ``api/v1``.
+        """
+        collection = self.get_object()
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response(
+                {"error": "Upload the file as 'file'"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            result = import_traffic(
+                collection,
+                upload,
+                request.data.get("format", "har"),
+                request.data.get("strip_prefix", ""),
+            )
+        except ImportFormatError as error:
+            return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result.as_dict())
+
     @action(detail=True, methods=["put"], url_path="update-openapi")
     def update_openapi(self, request, slug=None):
         """Update the custom OpenAPI schema for this collection."""
         collection = self.get_object()
-        yaml_content = request.data.get("schema")
+        yaml_content = schema_content(request)
 
         if not yaml_content:
             return Response(
@@ -109,6 +401,8 @@ class CollectionViewSet(viewsets.ModelViewSet):
         if not is_valid:
             return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
 
+        if isinstance(yaml_content, bytes):
+            yaml_content = yaml_content.decode("utf-8-sig")
         collection.openapi_schema = yaml_content
         collection.save()
 
@@ -124,10 +418,48 @@ class CollectionViewSet(viewsets.ModelViewSet):
         return Response({"message": "OpenAPI schema reset successfully"})
 
 
-class MockEndpointViewSet(viewsets.ModelViewSet):
+class MockEndpointViewSet(BulkMutationMixin, viewsets.ModelViewSet):
+    """
+    Mock endpoints, optionally narrowed with ``?collection=<slug>``.
+
+    Lists are cursor-paginated. ``?view=summary`` lists endpoints without
+    bodies and responses, and ``?fields=``/``?exclude=`` pick fields.
+    ``bulk/`` and ``reorder/`` change many endpoints at once (see
+    ``domains.bulk``).
+    """
+
     queryset = MockEndpoint.objects.all()
     serializer_class = MockEndpointDetailSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = EndpointCursorPagination
+    bulk_relation = "collection"
+    change_kind = Tombstone.ENDPOINT
+    stamp_versions = staticmethod(stamp_endpoints)
+
+    def get_collection_id(self, obj):
+        return obj.collection_id
+
+    def collections_changed(self, instances, previous=None, stamp=True):
+        moved = super().collections_changed(instances, previous, stamp)
+        # Responses of a moved endpoint are new to its collection
+        stamp_responses(EndpointResponse.objects.filter(endpoint_id__in=moved))
+        return moved
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return endpoint_serializer_class(self.request, self.serializer_class)
+        return self.serializer_class
+
+    def list(self, request, *args, **kwargs):
+        # Every endpoint change bumps its collection's version
+        collections = Collection.objects.order_by("pk")
+        slug = request.query_params.get("collection")
+        if slug:
+            collections = collections.filter(slug=slug)
+        versions = list(collections.values_list("pk", "config_version"))
+        return versioned_response(
+            request, versions, lambda: super(MockEndpointViewSet, self).list(request)
+        )
 
     def get_queryset(self):
         queryset = MockEndpoint.objects.filter(is_active=True)
@@ -136,17 +468,22 @@ class MockEndpointViewSet(viewsets.ModelViewSet):
         if collection_slug:
             queryset = queryset.filter(collection__slug=collection_slug)
 
-        return (
-            queryset.select_related("collection")
-            .prefetch_related("responses")
-            .order_by("position", "path")
+        queryset = endpoint_queryset(
+            queryset, self.get_serializer_class(), self.request
         )
+        return queryset.order_by("position", "path")
 
 
-class EndpointResponseViewSet(viewsets.ModelViewSet):
+class EndpointResponseViewSet(BulkMutationMixin, viewsets.ModelViewSet):
     queryset = EndpointResponse.objects.all()
     serializer_class = EndpointResponseSerializer
     permission_classes = [IsAuthenticated]
+    bulk_relation = "endpoint"
+    change_kind = Tombstone.RESPONSE
+    stamp_versions = staticmethod(stamp_responses)
+
+    def get_collection_id(self, obj):
+        return obj.endpoint.collection_id
 
     def get_queryset(self):
         queryset = EndpointResponse.objects.all()
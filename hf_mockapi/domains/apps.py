@@ -5,3 +5,6 @@ class DomainsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "domains"
     verbose_name = "Mock Domains & Collections"
+
+    def ready(self):
+        from . import signals  # noqa: F401
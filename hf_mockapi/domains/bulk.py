@@ -0,0 +1,360 @@
+"""
+Bulk create, update, delete and reorder for the endpoint and response APIs.
+
+A batch is validated as a whole: items are checked against each other and
+against the database with a fixed number of queries, and nothing is
+written unless every item is valid. Writes then use ``bulk_create`` /
+``bulk_update`` (or a single ``UPDATE`` for reordering) in one transaction.
+Model signals do not fire for bulk writes, so the affected collections get
+their ``config_version`` bumped, and the rows their change feed version,
+explicitly.
+
+Responses list one result per item, in request order::
+
+    {"results": [{"index": 0, "status": "created", "id": 12}, ...]}
+
+A rejected batch answers 400 with the errors of each invalid item.
+"""
+
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Case, IntegerField, Value, When
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.validators import UniqueTogetherValidator
+
+from .changes import record_deletion
+from .models import Collection
+from .routing import invalidate_route_tables
+
+# Largest batch accepted by one request
+BULK_MAX_ITEMS = 1000
+
+
+class PreloadedRelatedField(serializers.PrimaryKeyRelatedField):
+    """Primary key field resolved against objects loaded once per batch."""
+
+    def __init__(self, objects, **kwargs):
+        self.objects = objects
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            return self.objects[int(data)]
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+
+class BulkMutationMixin:
+    """
+    Adds ``/bulk/`` (POST creates, PATCH updates, DELETE deletes) and
+    ``/reorder/`` to a model viewset.
+
+    ``bulk_relation`` names the foreign key that is loaded for the whole
+    batch; ``get_collection_id`` maps an instance to its collection.
+    ``change_kind`` and ``stamp_versions`` record changes for the change
+    feed (see ``domains.changes``).
+    """
+
+    bulk_relation = None
+    change_kind = None
+    stamp_versions = None
+
+    def get_collection_id(self, obj):
+        raise NotImplementedError
+
+    @action(detail=False, methods=["post", "patch", "delete"], url_path="bulk")
+    def bulk(self, request):
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return self.bulk_error("Expected a non-empty list of items")
+        if len(items) > BULK_MAX_ITEMS:
+            return self.bulk_error(f"At most {BULK_MAX_ITEMS} items per request")
+        if request.method == "POST":
+            return self.bulk_create(items)
+        if request.method == "PATCH":
+            return self.bulk_update(items)
+        return self.bulk_delete(items)
+
+    @action(detail=False, methods=["post"])
+    def reorder(self, request):
+        """
+        Set ``position`` to each id's index in the posted list, in one
+        ``UPDATE`` statement.
+        """
+        ids = request.data
+        if not isinstance(ids, list) or not ids:
+            return self.bulk_error("Expected a non-empty list of ids")
+        if len(ids) > BULK_MAX_ITEMS:
+            return self.bulk_error(f"At most {BULK_MAX_ITEMS} items per request")
+        instances, errors = self.load_items(ids)
+        if any(errors):
+            return self.bulk_rejected(errors)
+
+        model = self.get_queryset().model
+        with transaction.atomic():
+            self.collections_changed(instances.values(), stamp=False)
+            # The version stamp goes into the same statement
+            self.stamp_versions(
+                model.objects.filter(pk__in=ids),
+                position=Case(
+                    *[When(pk=pk, then=Value(index)) for index, pk in enumerate(ids)],
+                    output_field=IntegerField(),
+                ),
+                updated_at=timezone.now(),
+            )
+        return Response(
+            {
+                "results": [
+                    {"index": index, "status": "updated", "id": pk, "position": index}
+                    for index, pk in enumerate(ids)
+                ]
+            }
+        )
+
+    def bulk_create(self, items):
+        related = self.preload_related(items)
+        item_serializers = [self.bulk_serializer(related, data=item) for item in items]
+        errors = [self.item_errors(serializer) for serializer in item_serializers]
+        model = self.get_queryset().model
+        instances = [
+            model(**serializer.validated_data) if not error else None
+            for serializer, error in zip(item_serializers, errors)
+        ]
+        self.check_unique(instances, errors)
+        if any(errors):
+            return self.bulk_rejected(errors)
+
+        with transaction.atomic():
+            model.objects.bulk_create(instances)
+            self.collections_changed(instances)
+        return Response(
+            {
+                "results": [
+                    {"index": index, "status": "created", "id": instance.pk}
+                    for index, instance in enumerate(instances)
+                ]
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    def bulk_update(self, items):
+        ids = [item.get("id") if isinstance(item, dict) else None for item in items]
+        instances, errors = self.load_items(ids)
+        related = self.preload_related(items)
+        item_serializers = []
+        for index, item in enumerate(items):
+            instance = instances.get(ids[index])
+            if errors[index]:
+                item_serializers.append(None)
+                continue
+            serializer = self.bulk_serializer(
+                related, instance=instance, data=item, partial=True
+            )
+            errors[index] = self.item_errors(serializer)
+            item_serializers.append(serializer)
+
+        # Items moved to another collection change both collections
+        previous = {
+            pk: self.get_collection_id(instances[pk])
+            for pk, error in zip(ids, errors)
+            if not error
+        }
+
+        changed = {"updated_at"}
+        updated = []
+        now = timezone.now()
+        for serializer, error in zip(item_serializers, errors):
+            if error:
+                updated.append(None)
+                continue
+            instance = serializer.instance
+            for name, value in serializer.validated_data.items():
+                setattr(instance, name, value)
+                changed.add(name)
+            instance.updated_at = now
+            updated.append(instance)
+        self.check_unique(updated, errors)
+        if any(errors):
+            return self.bulk_rejected(errors)
+
+        model = self.get_queryset().model
+        with transaction.atomic():
+            model.objects.bulk_update(updated, sorted(changed))
+            self.collections_changed(updated, previous)
+        return Response(
+            {
+                "results": [
+                    {"index": index, "status": "updated", "id": instance.pk}
+                    for index, instance in enumerate(updated)
+                ]
+            }
+        )
+
+    def bulk_delete(self, items):
+        ids = [item.get("id") if isinstance(item, dict) else item for item in items]
+        instances, errors = self.load_items(ids)
+        if any(errors):
+            return self.bulk_rejected(errors)
+
+        model = self.get_queryset().model
+        with transaction.atomic():
+            # QuerySet.delete sends the delete signals, which bump versions
+            model.objects.filter(pk__in=ids).delete()
+        return Response(
+            {
+                "results": [
+                    {"index": index, "status": "deleted", "id": pk}
+                    for index, pk in enumerate(ids)
+                ]
+            }
+        )
+
+    def bulk_serializer(self, related, **kwargs):
+        """Serializer for one item, without per-item database lookups."""
+        serializer = self.get_serializer(**kwargs)
+        field = serializer.fields.get(self.bulk_relation)
+        if field is not None and not field.read_only:
+            serializer.fields[self.bulk_relation] = PreloadedRelatedField(
+                related, queryset=field.queryset
+            )
+        # Uniqueness is checked for the whole batch in check_unique
+        serializer.validators = [
+            validator
+            for validator in serializer.validators
+            if not isinstance(validator, UniqueTogetherValidator)
+        ]
+        return serializer
+
+    def preload_related(self, items):
+        """Load the ``bulk_relation`` objects referenced by ``items``."""
+        model = self.get_queryset().model
+        related_model = model._meta.get_field(self.bulk_relation).related_model
+        pks = set()
+        for item in items:
+            value = item.get(self.bulk_relation) if isinstance(item, dict) else None
+            if isinstance(value, int) and not isinstance(value, bool):
+                pks.add(value)
+        return related_model.objects.in_bulk(pks)
+
+    def load_items(self, ids):
+        """
+        Load existing objects by id; returns ``(objects, errors)``.
+
+        Lookups go through the viewset queryset, so objects the single-item
+        API hides (inactive endpoints) are not found here either.
+        """
+        valid = [pk for pk in ids if isinstance(pk, int) and not isinstance(pk, bool)]
+        instances = (
+            self.get_queryset().select_related(self.bulk_relation).in_bulk(valid)
+            if valid
+            else {}
+        )
+        counts = Counter(ids)
+        errors = []
+        for pk in ids:
+            if pk not in valid:
+                errors.append({"id": ["A valid integer id is required."]})
+            elif counts[pk] > 1:
+                errors.append({"id": ["Listed more than once."]})
+            elif pk not in instances:
+                errors.append({"id": ["Not found."]})
+            else:
+                errors.append(None)
+        return instances, errors
+
+    def check_unique(self, instances, errors):
+        """
+        Record ``unique_together`` violations, within the batch and against
+        the database, in ``errors``.
+        """
+        model = self.get_queryset().model
+        for names in model._meta.unique_together:
+            fields = [model._meta.get_field(name) for name in names]
+            keys = [
+                (
+                    tuple(getattr(obj, field.attname) for field in fields)
+                    if obj is not None
+                    else None
+                )
+                for obj in instances
+            ]
+            wanted = {key for key in keys if key is not None}
+            if not wanted:
+                continue
+            lookup = {
+                f"{field.attname}__in": {key[position] for key in wanted}
+                for position, field in enumerate(fields)
+            }
+            # Unique indexes are checked row by row during the UPDATE, so a
+            # key still held by another row is taken even if that row is in
+            # the batch (swapping two paths needs two requests)
+            owners = {}
+            for *key, pk in model.objects.filter(**lookup).values_list(
+                *[field.attname for field in fields], "pk"
+            ):
+                owners.setdefault(tuple(key), set()).add(pk)
+            counts = Counter(key for key in keys if key is not None)
+            message = f"The fields {', '.join(names)} must make a unique set."
+            for index, key in enumerate(keys):
+                if key is None or errors[index]:
+                    continue
+                if counts[key] > 1 or owners.get(key, set()) - {instances[index].pk}:
+                    errors[index] = {"non_field_errors": [message]}
+
+    def collections_changed(self, instances, previous=None, stamp=True):
+        """
+        Bump and invalidate the collections of ``instances``, and (unless
+        ``stamp`` is false) stamp the instances for the change feed.
+
+        ``previous`` maps ids to the collection they were in before; items
+        that moved leave a tombstone there. Returns the ids that moved.
+        """
+        current = {obj.pk: self.get_collection_id(obj) for obj in instances}
+        moved = {
+            pk: collection_id
+            for pk, collection_id in (previous or {}).items()
+            if collection_id != current[pk]
+        }
+        collection_ids = {*current.values(), *moved.values()}
+        Collection.bump_config_version(*collection_ids)
+        for collection_id in collection_ids:
+            invalidate_route_tables(collection_id=collection_id)
+
+        if stamp:
+            model = self.get_queryset().model
+            self.stamp_versions(model.objects.filter(pk__in=list(current)))
+        for pk, collection_id in moved.items():
+            record_deletion(collection_id, self.change_kind, pk)
+        return list(moved)
+
+    @staticmethod
+    def item_errors(serializer):
+        return None if serializer.is_valid() else serializer.errors
+
+    @staticmethod
+    def bulk_error(message):
+        return Response({"error": message}, status=status.HTTP_400_BAD_REQUEST)
+
+    @staticmethod
+    def bulk_rejected(errors):
+        return Response(
+            {
+                "results": [
+                    (
+                        {"index": index, "status": "invalid", "errors": error}
+                        if error
+                        else {"index": index, "status": "valid"}
+                    )
+                    for index, error in enumerate(errors)
+                ]
+            },
+            status=status.HTTP_400_BAD_REQUEST,
+        )
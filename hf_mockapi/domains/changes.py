@@ -0,0 +1,98 @@
+"""
+Change feed for a collection's endpoints and responses.
+
+Every change bumps ``Collection.config_version``; the changed endpoint or
+response is then stamped with the new value in its ``version`` column, and
+deletions leave a ``Tombstone`` carrying it. A client that has seen version
+``V`` catches up with the rows and tombstones whose version is above ``V``.
+Bumps lock the collection row until commit, so versions become visible in
+order and a change is never skipped.
+"""
+
+from django.db.models import OuterRef, Subquery
+
+from .models import Collection, EndpointResponse, MockEndpoint, Tombstone
+
+
+def stamp_endpoints(queryset, **changes):
+    """
+    Set ``version`` of the endpoints in ``queryset`` to their collection's,
+    in one ``UPDATE`` that also applies ``changes``.
+    """
+    queryset.update(
+        version=Subquery(
+            Collection.objects.filter(pk=OuterRef("collection_id")).values(
+                "config_version"
+            )[:1]
+        ),
+        **changes,
+    )
+
+
+def stamp_responses(queryset, **changes):
+    """Like ``stamp_endpoints``, for responses."""
+    queryset.update(
+        version=Subquery(
+            Collection.objects.filter(endpoints=OuterRef("endpoint_id")).values(
+                "config_version"
+            )[:1]
+        ),
+        **changes,
+    )
+
+
+def record_deletion(collection_id, kind, object_id):
+    """Leave a tombstone at the collection's current version."""
+    version = (
+        Collection.objects.filter(pk=collection_id)
+        .values_list("config_version", flat=True)
+        .first()
+    )
+    if version is not None:
+        Tombstone.objects.create(
+            collection_id=collection_id,
+            kind=kind,
+            object_id=object_id,
+            version=version,
+        )
+
+
+def changes_since(collection, since):
+    """
+    Return the changes to ``collection`` after version ``since``.
+
+    ``endpoints`` and ``responses`` are the current state of rows created or
+    changed since then; ``deleted`` lists ids to drop, including endpoints
+    that were deactivated. With ``reset`` set the client should reload
+    everything: ``since`` is newer than the collection, which means it was
+    recreated.
+    """
+    version = collection.config_version
+    if since > version:
+        return {"version": version, "reset": True}
+
+    endpoints = list(
+        MockEndpoint.objects.filter(collection=collection, version__gt=since)
+        .select_related("collection")
+        .defer("description", "response_body", "custom_headers")
+        .order_by("position", "path", "id")
+    )
+    responses = list(
+        EndpointResponse.objects.filter(
+            endpoint__collection=collection, version__gt=since
+        ).order_by("endpoint_id", "position", "created_at")
+    )
+    deleted = {"endpoints": [], "responses": []}
+    for kind, object_id in Tombstone.objects.filter(
+        collection=collection, version__gt=since
+    ).values_list("kind", "object_id"):
+        deleted[f"{kind}s"].append(object_id)
+    deleted["endpoints"] += [e.pk for e in endpoints if not e.is_active]
+
+    return {
+        "version": version,
+        "reset": False,
+        "endpoints": [endpoint for endpoint in endpoints if endpoint.is_active],
+        "responses": responses,
+        "deleted": deleted,
+    }
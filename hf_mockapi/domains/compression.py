@@ -0,0 +1,147 @@
+"""Content-Encoding support for mock response bodies."""
+
+import gzip
+import zlib
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on installed extras
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+try:
+    from compression import zstd
+except ImportError:  # pragma: no cover - Python < 3.14
+    try:
+        import zstandard as zstd
+    except ImportError:
+        zstd = None
+
+
+def _gzip(data):
+    # mtime=0 keeps the output (and therefore its ETag) stable
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def _brotli(data):
+    return brotli.compress(data, quality=5)
+
+
+def _zstd(data):
+    if hasattr(zstd, "ZstdCompressor"):
+        return zstd.ZstdCompressor(level=6).compress(data)
+    return zstd.compress(data)
+
+
+# Server preference order, best ratio first
+CODECS = {}
+if brotli is not None:
+    CODECS["br"] = _brotli
+if zstd is not None:
+    CODECS["zstd"] = _zstd
+CODECS["gzip"] = _gzip
+
+
+def compress(data, coding):
+    """Compress ``data`` with the named content coding."""
+    return CODECS[coding](data)
+
+
+def _unzstd(data):
+    decompressor = zstd.ZstdDecompressor()
+    if hasattr(decompressor, "decompressobj"):  # zstandard
+        # Frames written by a stream do not record their size
+        return decompressor.decompressobj().decompress(data)
+    return zstd.decompress(data)
+
+
+# Every coding in CODECS, plus deflate, which is decoded but never served
+DECODERS = {"gzip": gzip.decompress, "deflate": zlib.decompress}
+if brotli is not None:
+    DECODERS["br"] = brotli.decompress
+if zstd is not None:
+    DECODERS["zstd"] = _unzstd
+
+
+def decompress(data, content_encoding):
+    """
+    Undo a Content-Encoding header's codings, applied in the order listed.
+
+    Raises ValueError for a coding that is not supported here.
+    """
+    codings = [
+        coding.strip().lower()
+        for coding in content_encoding.split(",")
+        if coding.strip()
+    ]
+    for coding in reversed(codings):
+        if coding == "identity":
+            continue
+        if coding not in DECODERS:
+            raise ValueError(f"Unsupported Content-Encoding {coding!r}")
+        data = DECODERS[coding](data)
+    return data
+
+
+def build_variants(data, codings=None):
+    """
+    Precompute compressed variants of a body.
+
+    Only variants that are actually smaller than the original are kept, and
+    bodies below ``MOCKAPI_COMPRESSION_MIN_SIZE`` are not compressed at all.
+    """
+    if codings is None:
+        if len(data) < getattr(settings, "MOCKAPI_COMPRESSION_MIN_SIZE", 1024):
+            return {}
+        codings = CODECS
+
+    variants = {}
+    for coding in codings:
+        compressed = compress(data, coding)
+        if len(compressed) < len(data):
+            variants[coding] = compressed
+    return variants
+
+
+def parse_accept_encoding(header):
+    """Parse an Accept-Encoding header into a ``{coding: qvalue}`` dict."""
+    accepted = {}
+    for item in header.split(","):
+        parts = item.strip().split(";")
+        coding = parts[0].strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in parts[1:]:
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def negotiate_encoding(header, available):
+    """
+    Pick the content coding to serve for an Accept-Encoding header.
+
+    ``available`` is an iterable of codings in server preference order.
+    Returns None when the identity representation should be served.
+    """
+    if not header or not available:
+        return None
+
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*")
+    best, best_quality = None, 0.0
+    for coding in available:
+        quality = accepted.get(coding, wildcard if wildcard is not None else 0.0)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
@@ -0,0 +1,74 @@
+"""Per-collection CORS policies for mock traffic."""
+
+from dataclasses import dataclass
+
+from django.conf import settings
+
+
+@dataclass(frozen=True)
+class CorsPolicy:
+    """
+    CORS settings of a collection, resolved once per route table build.
+
+    Empty collection fields fall back to the project-wide ``CORS_*`` settings
+    used by django-cors-headers for the management API.
+    """
+
+    enabled: bool
+    allowed_origins: tuple
+    allowed_headers: tuple
+    allow_credentials: bool
+    max_age: int
+
+    @classmethod
+    def for_collection(cls, collection):
+        """Build the policy of a Collection instance."""
+        origins = collection.cors_allowed_origins or getattr(
+            settings, "CORS_ALLOWED_ORIGINS", []
+        )
+        headers = collection.cors_allowed_headers or getattr(
+            settings, "CORS_ALLOW_HEADERS", []
+        )
+        return cls(
+            enabled=collection.cors_enabled,
+            allowed_origins=tuple(origin.rstrip("/") for origin in origins),
+            allowed_headers=tuple(header.lower() for header in headers),
+            allow_credentials=collection.cors_allow_credentials,
+            max_age=collection.cors_max_age,
+        )
+
+    def allow_origin(self, origin):
+        """Return the Access-Control-Allow-Origin value for ``origin``, if any."""
+        if not self.enabled or not origin:
+            return None
+        if "*" in self.allowed_origins:
+            # Credentialed requests may not use the wildcard
+            return origin if self.allow_credentials else "*"
+        if origin.rstrip("/") in self.allowed_origins:
+            return origin
+        return None
+
+    def response_headers(self, origin):
+        """Headers added to actual (non-preflight) cross-origin responses."""
+        allowed = self.allow_origin(origin)
+        if allowed is None:
+            return {}
+        headers = {"Access-Control-Allow-Origin": allowed}
+        if self.allow_credentials:
+            headers["Access-Control-Allow-Credentials"] = "true"
+        return headers
+
+    def preflight_headers(self, origin, methods, request_headers=""):
+        """Headers answering a preflight for a path served with ``methods``."""
+        headers = self.response_headers(origin)
+        if not headers:
+            return {}
+        if "*" in self.allowed_headers:
+            allowed_headers = request_headers
+        else:
+            allowed_headers = ", ".join(self.allowed_headers)
+        headers["Access-Control-Allow-Methods"] = ", ".join(methods)
+        if allowed_headers:
+            headers["Access-Control-Allow-Headers"] = allowed_headers
+        headers["Access-Control-Max-Age"] = str(self.max_age)
+        return headers
@@ -0,0 +1,296 @@
+"""
+Framework-independent mock matching and response selection.
+
+Both the Django view (``views.mock_api_handler``) and the standalone server
+(``server.MockServer``) go through these functions, so routing, default
+response selection, content negotiation, conditional requests and CORS
+behave identically in both runtimes.
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+
+from django.utils import timezone
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+
+from .file_bodies import file_validators
+from .rendering import render_body
+from .resources import ResourceRoute, handle
+
+# "table" is the slug, or "<slug>@<number>" for a release
+MOCK_PATH_RE = re.compile(
+    r"^/(?P<table>(?P<collection_slug>[-\w]+)(?:@(?P<release>\d+))?)"
+    r"/(?P<endpoint_path>.*)$"
+)
+
+# Sent with responses served at release URLs
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@dataclass
+class MockResult:
+    """The outcome of a mock request, independent of the HTTP server."""
+
+    status: int
+    headers: dict
+    body: bytes = b""
+    file: str = ""
+    log_body: object = ""
+    route: object = None
+    vary: list = field(default_factory=list)
+
+
+def match_route(table, method, path):
+    """
+    Find the route for a request; HEAD falls back to the matching GET, and
+    paths without a route to a resource endpoint (except for OPTIONS).
+    """
+    route = table.match(method, path)
+    if route is None and method == "HEAD":
+        route = table.match("GET", path)
+    if route is None and method != "OPTIONS":
+        route = table.match_resource(path)
+    return route
+
+
+def not_found_result(table, method, path, origin=None):
+    """JSON 404 for a path/method without a mock."""
+    error_message = {
+        "error": "Endpoint not found",
+        "details": f"No mock found for {method} /{table.slug}/{path}",
+    }
+    result = _json_result(404, error_message)
+    result.headers.update(table.cors.response_headers(origin))
+    if table.cors.enabled:
+        result.vary.append("Origin")
+    return result
+
+
+def validation_error_result(table, route, errors, origin=None):
+    """JSON error for a request that does not match the OpenAPI schema."""
+    result = _json_result(
+        table.validation_status,
+        {"error": "Request validation failed", "details": errors},
+    )
+    result.route = route
+    result.headers.update(table.cors.response_headers(origin))
+    if table.cors.enabled:
+        result.vary.append("Origin")
+    return result
+
+
+def options_result(table, path, headers):
+    """
+    Answer OPTIONS for a path without an explicit OPTIONS mock.
+
+    CORS preflights are answered from the route table and the collection's
+    CORS policy, so they never touch the database.
+    """
+    methods = table.allowed_methods(path)
+    result = MockResult(status=204, headers={"Allow": ", ".join(methods)})
+
+    origin = headers.get("Origin")
+    if origin and headers.get("Access-Control-Request-Method"):
+        result.headers.update(
+            table.cors.preflight_headers(
+                origin, methods, headers.get("Access-Control-Request-Headers", "")
+            )
+        )
+        result.vary.append("Origin")
+    return result
+
+
+def build_result(table, route, method, headers, path="", query=None, body=b""):
+    """
+    Select and encode the response of a matched route.
+
+    ``headers`` is any case-insensitive mapping of request headers. File
+    bodies are not read: ``result.file`` names the stored file and the caller
+    streams it (FileResponse, sendfile, ...). Resource endpoints also need
+    the request ``path``, ``query`` (each name mapped to its list of values)
+    and ``body``, as does request validation when the collection enables it.
+    """
+    if table.validator is not None:
+        errors = table.validator.validate(method, path, query or {}, headers, body)
+        if errors:
+            return validation_error_result(table, route, errors, headers.get("Origin"))
+
+    if isinstance(route, ResourceRoute):
+        return resource_result(table, route, method, headers, path, query, body)
+
+    spec = route.response
+    origin = headers.get("Origin")
+
+    # Prepare response headers
+    response_headers = {"Content-Type": spec.content_type}
+    if route.content_encoding:
+        response_headers["Content-Encoding"] = route.content_encoding
+
+    # Add custom headers
+    response_headers.update(spec.custom_headers)
+    response_headers.update(table.cors.response_headers(origin))
+    if table.immutable and not any(
+        key.lower() == "cache-control" for key in spec.custom_headers
+    ):
+        response_headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+
+    # Resolve the representation and its validators before building a body
+    result = MockResult(status=spec.status, headers=response_headers, route=route)
+    if spec.response_file:
+        try:
+            etag, last_modified, content_length = file_validators(spec.response_file)
+        except FileNotFoundError:
+            return _json_result(
+                500,
+                {
+                    "error": "Response body file not found",
+                    "details": f"Missing file {spec.response_file} for {route}",
+                },
+            )
+        result.file = spec.response_file
+        result.log_body = f"<file {spec.response_file}>"
+    else:
+        rendered = render_body(spec, route.content_encoding, route.enable_compression)
+        coding, payload = rendered.select(headers.get("Accept-Encoding", ""))
+        if coding:
+            response_headers["Content-Encoding"] = coding
+        if rendered.negotiable:
+            result.vary.append("Accept-Encoding")
+        etag = rendered.etag(coding)
+        last_modified = route.last_modified
+        content_length = len(payload)
+        result.body = payload
+        # Snapshot routes only carry the encoded body; it is decoded if logged
+        result.log_body = spec.response_body if spec.rendered is None else payload
+
+    if table.cors.enabled:
+        result.vary.append("Origin")
+
+    # Answer conditional requests without copying the body; only successful
+    # responses are representations a client can validate (RFC 9110 13.2.1)
+    if route.enable_conditional_requests and 200 <= spec.status < 300:
+        response_headers["ETag"] = etag
+        response_headers["Last-Modified"] = http_date(last_modified)
+        if method in ("GET", "HEAD"):
+            status = evaluate_preconditions(headers, etag, int(last_modified))
+            if status is not None:
+                validators = ("ETag", "Last-Modified", "Cache-Control")
+                kept = {
+                    key: value
+                    for key, value in response_headers.items()
+                    if key in validators or key.startswith("Access-Control-")
+                }
+                return MockResult(
+                    status=status, headers=kept, route=route, vary=result.vary
+                )
+
+    if method == "HEAD":
+        # Same headers and length as the GET, without the body
+        response_headers["Content-Length"] = str(content_length)
+        result.body = b""
+        result.file = ""
+        result.log_body = ""
+    return result
+
+
+def resource_result(table, resource, method, headers, path, query, body):
+    """Carry out a request on a resource endpoint (see ``domains.resources``)."""
+    # Resources read the last value of repeated parameters
+    query = {name: values[-1] for name, values in (query or {}).items()}
+    status, data, extra_headers = handle(resource, method, path, query, body)
+    payload = b"" if data is None else json.dumps(data).encode("utf-8")
+    response_headers = {"Content-Type": "application/json"}
+    response_headers.update(resource.custom_headers)
+    response_headers.update(extra_headers)
+    response_headers.update(table.cors.response_headers(headers.get("Origin")))
+    result = MockResult(
+        status=status,
+        headers=response_headers,
+        body=payload,
+        log_body=payload,
+        route=resource,
+    )
+    if table.cors.enabled:
+        result.vary.append("Origin")
+    if method == "HEAD":
+        response_headers["Content-Length"] = str(len(payload))
+        result.body = b""
+    return result
+
+
+def evaluate_preconditions(headers, etag, last_modified):
+    """
+    Evaluate conditional request headers for a GET or HEAD request.
+
+    Follows the same precedence as ``django.utils.cache`` (RFC 9110 section
+    13.2.2). Returns 304 or 412, or None when the full response is due.
+    """
+    if_match = headers.get("If-Match")
+    if_unmodified_since = parse_http_date_safe(headers.get("If-Unmodified-Since") or "")
+    if_none_match = headers.get("If-None-Match")
+    if_modified_since = parse_http_date_safe(headers.get("If-Modified-Since") or "")
+
+    if if_match:
+        tags = parse_etags(if_match)
+        if "*" not in tags and etag not in tags:
+            return 412
+    elif if_unmodified_since and last_modified > if_unmodified_since:
+        return 412
+
+    if if_none_match:
+        tags = parse_etags(if_none_match)
+        weak_etag = etag.removeprefix("W/")
+        if "*" in tags or any(tag.removeprefix("W/") == weak_etag for tag in tags):
+            return 304
+    elif if_modified_since and last_modified <= if_modified_since:
+        return 304
+    return None
+
+
+def merge_vary(existing, additions):
+    """Combine a Vary header value with extra header names."""
+    names = [name.strip() for name in (existing or "").split(",") if name.strip()]
+    lowered = {name.lower() for name in names}
+    for name in additions:
+        if name.lower() not in lowered:
+            names.append(name)
+            lowered.add(name.lower())
+    return ", ".join(names)
+
+
+def log_fields(route, result, method, path, query_params, request_headers, body):
+    """RequestLog field values shared by every runtime."""
+    try:
+        request_body = body.decode("utf-8")
+    except UnicodeDecodeError:
+        request_body = ""
+    return {
+        "endpoint_id": route.endpoint_id,
+        "method": method,
+        "path": path,
+        "query_params": query_params,
+        "request_headers": request_headers,
+        "request_body": request_body,
+        "response_status": result.status,
+        "response_headers": result.headers,
+        "response_body": logged_body(result),
+        "timestamp": timezone.now(),
+    }
+
+
+def logged_body(result):
+    """The response body of a result as request logs store it."""
+    if isinstance(result.log_body, str):
+        return result.log_body
+    return bytes(result.log_body).decode("utf-8", "replace")
+
+
+def _json_result(status, data):
+    body = json.dumps(data).encode("utf-8")
+    return MockResult(
+        status=status,
+        headers={"Content-Type": "application/json"},
+        body=body,
+        log_body=body.decode("utf-8"),
+    )
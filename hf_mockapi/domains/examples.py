@@ -0,0 +1,288 @@
+"""
+Example bodies synthesized from JSON Schemas, for OpenAPI imports.
+
+``ExampleSynthesizer`` turns the schema of a response into a plausible
+value: explicit ``example``/``examples``/``default`` values win, then
+``const`` and ``enum``, then a value generated from ``type``, ``format``,
+the property name and the ``minimum``/``maximum``/``minLength``/
+``maxLength``/``minItems`` limits. ``allOf`` members are merged, and the
+first ``oneOf``/``anyOf`` alternative is used.
+
+Generation is deterministic: every value is drawn from a random generator
+seeded with the import seed and where the schema sits, so importing the
+same document twice gives the same bodies. Examples of ``$ref`` targets are
+generated once per document and shared, which keeps imports of large
+specifications with shared components fast.
+"""
+
+import base64
+import math
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+FIRST_NAMES = ("Ada", "Grace", "Alan", "Linus", "Barbara", "Ken", "Margaret")
+LAST_NAMES = ("Lovelace", "Hopper", "Turing", "Torvalds", "Liskov", "Thompson")
+CITIES = ("Lisbon", "Osaka", "Toronto", "Nairobi", "Oslo", "Austin")
+COUNTRIES = ("PT", "JP", "CA", "KE", "NO", "US")
+WORDS = ("alpha", "delta", "orbit", "ember", "harbor", "lumen", "quartz", "vertex")
+
+# Timestamps fall in the year after this
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+# Arrays get this many items unless minItems/maxItems say otherwise
+ARRAY_LENGTH = 2
+
+# Marks a value that cannot be generated (a recursive reference)
+_OMIT = object()
+
+
+class ExampleSynthesizer:
+    """Generate example values from the schemas of one OpenAPI document."""
+
+    def __init__(self, document, seed=0):
+        self.document = document
+        self.seed = seed
+        self._refs = {}
+        self._active = set()
+
+    def example(self, schema, key=""):
+        """An example of ``schema``; ``key`` names its place in the document."""
+        value = self.generate(schema, self.random(key), "")
+        return None if value is _OMIT else value
+
+    def media_example(self, media, key=""):
+        """The example of an OpenAPI media type object, given or generated."""
+        media = self.deref(media) or {}
+        if "example" in media:
+            return media["example"]
+        for example in (media.get("examples") or {}).values():
+            example = self.deref(example) or {}
+            if "value" in example:
+                return example["value"]
+        if "schema" in media:
+            return self.example(media["schema"], key)
+        return None
+
+    def random(self, key):
+        # String seeds are hashed with SHA-512, the same in every process
+        return random.Random(f"{self.seed}:{key}")
+
+    def resolve(self, ref):
+        node = self.document
+        for part in ref.lstrip("#").split("/")[1:]:
+            part = part.replace("~1", "/").replace("~0", "~")
+            node = node[int(part)] if isinstance(node, list) else node[part]
+        return node
+
+    def deref(self, node):
+        seen = set()
+        while isinstance(node, dict) and "$ref" in node and node["$ref"] not in seen:
+            seen.add(node["$ref"])
+            node = self.resolve(node["$ref"])
+        return node
+
+    def generate(self, schema, rng, name):
+        if not isinstance(schema, dict):
+            return None
+        if "$ref" in schema:
+            return self.reference(schema["$ref"])
+        for keyword in ("example", "default", "const"):
+            if keyword in schema:
+                return schema[keyword]
+        if isinstance(schema.get("examples"), list) and schema["examples"]:
+            return schema["examples"][0]
+        if schema.get("enum"):
+            return rng.choice(schema["enum"])
+
+        if "allOf" in schema:
+            return self.merge(schema, rng, name)
+        for keyword in ("oneOf", "anyOf"):
+            if schema.get(keyword):
+                return self.generate(schema[keyword][0], rng, name)
+
+        kind = schema.get("type")
+        if isinstance(kind, list):
+            kind = next((item for item in kind if item != "null"), "null")
+        if kind is None:
+            if "properties" in schema:
+                kind = "object"
+            elif "items" in schema:
+                kind = "array"
+        if kind == "object":
+            return self.object(schema, rng)
+        if kind == "array":
+            return self.array(schema, rng, name)
+        if kind == "string":
+            return self.string(schema, rng, name)
+        if kind == "integer":
+            return self.integer(schema, rng)
+        if kind == "number":
+            return self.number(schema, rng)
+        if kind == "boolean":
+            return rng.random() < 0.5
+        return None
+
+    def reference(self, ref):
+        """The shared example of a ``$ref`` target (generated once)."""
+        if ref in self._refs:
+            return self._refs[ref]
+        if ref in self._active:
+            return _OMIT  # Recursive schemas stop at the first repetition
+        self._active.add(ref)
+        try:
+            value = self.generate(self.resolve(ref), self.random(ref), _ref_name(ref))
+        except (KeyError, IndexError, TypeError, ValueError):
+            value = None  # Unresolvable references give null
+        finally:
+            self._active.discard(ref)
+        if value is not _OMIT:
+            self._refs[ref] = value
+        return value
+
+    def merge(self, schema, rng, name):
+        merged = {}
+        for member in schema["allOf"]:
+            value = self.generate(member, rng, name)
+            if not isinstance(value, dict):
+                return value
+            merged.update(value)
+        extra = {key: value for key, value in schema.items() if key != "allOf"}
+        if extra.get("properties"):
+            merged.update(self.object(extra, rng))
+        return merged
+
+    def object(self, schema, rng):
+        value = {}
+        for name, subschema in (schema.get("properties") or {}).items():
+            item = self.generate(subschema, rng, name)
+            if item is not _OMIT:
+                value[name] = item
+        return value
+
+    def array(self, schema, rng, name):
+        count = max(schema.get("minItems", 0), ARRAY_LENGTH)
+        if schema.get("maxItems") is not None:
+            count = min(count, schema["maxItems"])
+        items = []
+        for _ in range(count):
+            item = self.generate(schema.get("items"), rng, name)
+            if item is _OMIT:
+                break
+            items.append(item)
+        return items
+
+    def string(self, schema, rng, name):
+        value = _formatted(schema.get("format"), rng) or _named(name.lower(), rng)
+        min_length = schema.get("minLength", 0)
+        if len(value) < min_length:
+            value += "".join(rng.choice("abcdefghij") for _ in range(min_length))
+            value = value[:min_length]
+        if schema.get("maxLength") is not None:
+            value = value[: schema["maxLength"]]
+        return value
+
+    def integer(self, schema, rng):
+        low, high = _bounds(schema, 1)
+        low, high = math.ceil(low), max(math.ceil(low), math.floor(high))
+        value = rng.randint(low, high)
+        step = schema.get("multipleOf")
+        if isinstance(step, int) and step > 0:
+            value = value // step * step
+            if value < low:
+                value += step
+        return value
+
+    def number(self, schema, rng):
+        low, high = _bounds(schema, 0.01)
+        return round(rng.uniform(low, high), 2)
+
+
+def _bounds(schema, gap):
+    """The inclusive range of a numeric schema, 1-1000 by default."""
+    low, high = schema.get("minimum"), schema.get("maximum")
+    exclusive_low = schema.get("exclusiveMinimum")
+    exclusive_high = schema.get("exclusiveMaximum")
+    # OpenAPI 3.0 marks exclusive limits with booleans, 3.1 gives numbers
+    if exclusive_low is True and low is not None:
+        low += gap
+    elif _is_number(exclusive_low):
+        low = exclusive_low + gap
+    if exclusive_high is True and high is not None:
+        high -= gap
+    elif _is_number(exclusive_high):
+        high = exclusive_high - gap
+    if low is None:
+        low = 1 if high is None or high >= 1 else high - 999
+    if high is None:
+        high = low + 999
+    return low, max(low, high)
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _formatted(kind, rng):
+    if kind == "date-time":
+        moment = EPOCH + timedelta(seconds=rng.randrange(365 * 86400))
+        return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+    if kind == "date":
+        return (EPOCH + timedelta(days=rng.randrange(365))).strftime("%Y-%m-%d")
+    if kind == "time":
+        return f"{rng.randrange(24):02d}:{rng.randrange(60):02d}:00"
+    if kind == "email":
+        return _email(rng)
+    if kind == "uuid":
+        return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+    if kind in ("uri", "url", "uri-reference", "iri"):
+        return f"https://example.com/{rng.choice(WORDS)}/{rng.randint(1, 999)}"
+    if kind == "hostname":
+        return f"{rng.choice(WORDS)}.example.com"
+    if kind == "ipv4":
+        return f"192.0.2.{rng.randint(1, 254)}"
+    if kind == "ipv6":
+        return f"2001:db8::{rng.randint(1, 0xFFFF):x}"
+    if kind in ("byte", "binary"):
+        return base64.b64encode(rng.randbytes(12)).decode("ascii")
+    if kind == "password":
+        return "".join(rng.choice("abcdefghjkmnpqrstuvwxyz23456789") for _ in range(12))
+    return None
+
+
+def _named(name, rng):
+    """A string fitting a property name, e.g. an email address for ``email``."""
+    if "email" in name:
+        return _email(rng)
+    if name in ("first_name", "firstname", "given_name"):
+        return rng.choice(FIRST_NAMES)
+    if name in ("last_name", "lastname", "surname", "family_name"):
+        return rng.choice(LAST_NAMES)
+    if name == "name" or name.endswith(("_name", "username")):
+        return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    if "city" in name:
+        return rng.choice(CITIES)
+    if "country" in name:
+        return rng.choice(COUNTRIES)
+    if "phone" in name:
+        return f"+1-555-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}"
+    if name.endswith(("url", "uri", "link", "website")):
+        return _formatted("uri", rng)
+    if name in ("id", "uid") or name.endswith("_id"):
+        return f"{rng.getrandbits(48):012x}"
+    if name in ("description", "summary", "bio", "comment", "message"):
+        words = [rng.choice(WORDS) for _ in range(6)]
+        return " ".join(words).capitalize() + "."
+    if name in ("title", "label"):
+        return f"{rng.choice(WORDS).capitalize()} {rng.choice(WORDS)}"
+    return f"{rng.choice(WORDS)}-{rng.randint(1, 999)}"
+
+
+def _email(rng):
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    return f"{first.lower()}.{last.lower()}@example.com"
+
+
+def _ref_name(ref):
+    """The last part of a reference, which stands in for a property name."""
+    return ref.rpartition("/")[2]
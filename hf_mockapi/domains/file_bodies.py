@@ -0,0 +1,170 @@
+"""Serving of file-backed mock response bodies."""
+
+import os
+import re
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse
+from django.utils.http import parse_http_date_safe
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+DELIVERY_DJANGO = "django"
+DELIVERY_X_ACCEL_REDIRECT = "x-accel-redirect"
+DELIVERY_X_SENDFILE = "x-sendfile"
+
+
+class RangeNotSatisfiable(Exception):
+    """Raised when a Range header cannot be satisfied for a file."""
+
+
+def parse_range_header(header, size):
+    """
+    Parse a single-range ``Range`` header.
+
+    Returns an inclusive ``(start, end)`` tuple, or None when the header is
+    absent, malformed or asks for several ranges (in which case the whole
+    file is served, as RFC 9110 allows). Raises RangeNotSatisfiable when the
+    range lies outside the file.
+    """
+    if not header:
+        return None
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if size == 0:
+        # No byte of an empty file can be selected
+        raise RangeNotSatisfiable(header)
+
+    if not first:
+        # Suffix range: the last N bytes of the file
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable(header)
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise RangeNotSatisfiable(header)
+    return start, min(end, size - 1)
+
+
+def if_range_matches(header, etag, last_modified):
+    """
+    Whether a ``Range`` may be served given the request's ``If-Range``.
+
+    An absent header matches; an entity tag must equal the (strong) ETag and
+    a date the Last-Modified second. Otherwise the whole file is sent.
+    """
+    if not header:
+        return True
+    header = header.strip()
+    if header.startswith(('"', "W/")):
+        return header == etag
+    return parse_http_date_safe(header) == int(last_modified)
+
+
+class FileRange:
+    """
+    The ``length`` bytes of an open file starting at ``start``, for
+    ``FileResponse``.
+
+    The underlying file is positioned at ``start`` and its ``fileno`` is
+    exposed, so servers that send ``wsgi.file_wrapper`` responses with
+    sendfile (gunicorn sends ``Content-Length`` bytes from the current
+    offset) serve the range zero-copy. Other servers read it in blocks.
+    """
+
+    def __init__(self, file_obj, start, length):
+        file_obj.seek(start)
+        self.file = file_obj
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size) if size else b""
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def file_validators(name):
+    """
+    Return the ``(etag, last_modified, size)`` of a stored body file.
+
+    The strong ETag is derived from the file's mtime and size, so it is
+    computed from a single ``stat`` call without reading the file.
+    """
+    stat = os.stat(default_storage.path(name))
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    return etag, stat.st_mtime, stat.st_size
+
+
+def serve_body_file(request, name, status, content_type):
+    """
+    Build a response for a file-backed mock body.
+
+    Depending on ``MOCKAPI_FILE_DELIVERY`` the file is either streamed by
+    Django (``FileResponse``, which uses ``wsgi.file_wrapper``/sendfile when
+    the server supports it) or handed off to a fronting proxy through
+    ``X-Accel-Redirect`` (nginx) or ``X-Sendfile`` (Apache, lighttpd).
+    """
+    path = default_storage.path(name)
+    delivery = getattr(settings, "MOCKAPI_FILE_DELIVERY", DELIVERY_DJANGO)
+
+    if delivery == DELIVERY_X_ACCEL_REDIRECT:
+        prefix = getattr(settings, "MOCKAPI_X_ACCEL_PREFIX", "/protected-mock-bodies/")
+        response = HttpResponse(status=status, content_type=content_type)
+        response["X-Accel-Redirect"] = prefix.rstrip("/") + "/" + name
+        return response
+
+    if delivery == DELIVERY_X_SENDFILE:
+        response = HttpResponse(status=status, content_type=content_type)
+        response["X-Sendfile"] = path
+        return response
+
+    etag, last_modified, size = file_validators(name)
+    byte_range = None
+    if status == 200:
+        range_header = request.headers.get("Range")
+        if not if_range_matches(request.headers.get("If-Range"), etag, last_modified):
+            range_header = None  # Changed since: the whole file
+        try:
+            byte_range = parse_range_header(range_header, size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416, content_type=content_type)
+            response["Content-Range"] = f"bytes */{size}"
+            response["Accept-Ranges"] = "bytes"
+            return response
+
+    if byte_range is None:
+        response = FileResponse(
+            open(path, "rb"), status=status, content_type=content_type
+        )
+        response["Content-Length"] = str(size)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = FileResponse(
+            FileRange(open(path, "rb"), start, length),
+            status=206,
+            content_type=content_type,
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = str(length)
+
+    if status == 200:
+        response["Accept-Ranges"] = "bytes"
+    return response
@@ -0,0 +1,551 @@
+"""
+Importing captured traffic (HAR files, Postman collections) as mocks.
+
+Files are parsed as a stream: only the array of entries is located (HAR
+``log.entries``, Postman ``item``) and its elements are decoded one at a
+time with ``JSONDecoder.raw_decode``, so memory depends on the largest
+entry, not on the file.
+
+Entries are deduplicated by method and path (the query string is
+ignored). The first response seen for a method and path becomes the
+``MockEndpoint``; every different response after it becomes an
+``EndpointResponse`` variant, and identical ones are skipped. Paths that
+already have an endpoint in the collection get variants only. Binary bodies
+are stored under a name derived from their content, and compared by it.
+Rows are written with ``bulk_create`` in batches, in one transaction; like
+``domains.bulk``, the import then bumps ``config_version`` and stamps the
+new rows for the change feed itself.
+"""
+
+import codecs
+import hashlib
+import json
+import re
+from base64 import b64decode
+from binascii import Error as BinasciiError
+from dataclasses import dataclass
+from urllib.parse import unquote, urlsplit
+from wsgiref.util import is_hop_by_hop
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from .changes import stamp_endpoints, stamp_responses
+from .models import Collection, EndpointResponse, MockEndpoint
+from .proxy import NOT_RECORDED_HEADERS
+from .routing import invalidate_route_tables
+
+# Rows are inserted in batches of this size
+BATCH_SIZE = 500
+
+# Bytes read from the file at a time
+CHUNK_SIZE = 256 * 1024
+
+METHODS = {method for method, _ in MockEndpoint.HTTP_METHODS}
+
+# Postman's "{{baseUrl}}" style variables in front of a path
+POSTMAN_VARIABLE_RE = re.compile(r"^\{\{[^}]*\}\}")
+
+
+class ImportFormatError(ValueError):
+    """A file that is not a HAR file or Postman collection."""
+
+
+@dataclass
+class ImportResult:
+    """Counts of what an import did."""
+
+    entries: int = 0
+    endpoints: int = 0
+    responses: int = 0
+    duplicates: int = 0
+    skipped: int = 0
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+@dataclass
+class CapturedResponse:
+    """One request/response pair, in the terms of a mock."""
+
+    method: str
+    path: str
+    name: str = ""
+    status: int = None
+    content_type: str = "application/json"
+    body: bytes = None
+    headers: dict = None
+
+    def fields(self):
+        """
+        Mock field values. Binary bodies get ``response_file``, a name
+        derived from their digest; the file is not written here.
+        """
+        body = self.body or b""
+        fields = {
+            "response_status": self.status or 200,
+            "content_type": (self.content_type or "application/json")[:100],
+            "custom_headers": self.headers or {},
+        }
+        try:
+            fields["response_body"] = body.decode("utf-8")
+        except UnicodeDecodeError:
+            # Binary bodies are served from a file
+            fields["response_body"] = ""
+            fields["response_file"] = _file_name(body)
+        return fields
+
+    @property
+    def signature(self):
+        """
+        What makes two responses the same: status, type and body (the
+        digest of a text body, the file name of a binary one).
+        """
+        body = self.body or b""
+        try:
+            body.decode("utf-8")
+        except UnicodeDecodeError:
+            content = _file_name(body)
+        else:
+            content = hashlib.sha1(body).digest()
+        return (
+            self.status or 200,
+            (self.content_type or "application/json")[:100],
+            content,
+        )
+
+
+class JsonStream:
+    """
+    Incremental reader of one JSON document from a binary file.
+
+    Values are decoded with ``raw_decode`` from a buffer that grows only
+    until the value is complete, and consumed text is dropped.
+    """
+
+    def __init__(self, file_obj, chunk_size=CHUNK_SIZE):
+        self.file = file_obj
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self.json = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, size):
+        """Add at least ``size`` characters to the buffer; False at the end."""
+        if self.pos > self.chunk_size:
+            # Drop what was consumed
+            self.buffer = self.buffer[self.pos :]
+            self.pos = 0
+        parts = [self.buffer]
+        added = 0
+        while added < size and not self.eof:
+            data = self.file.read(max(size - added, self.chunk_size))
+            self.eof = not data
+            try:
+                text = self.decoder.decode(data, final=self.eof)
+            except UnicodeDecodeError as error:
+                raise ImportFormatError(f"Not UTF-8 text: {error}")
+            parts.append(text)
+            added += len(text)
+        self.buffer = "".join(parts)
+        return added > 0
+
+    def peek(self):
+        """The next character that is not whitespace, or "" at the end."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill(1):
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ImportFormatError(f"Expected {char!r} at offset {self.pos}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next value."""
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self.json.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as error:
+                if self.eof:
+                    raise ImportFormatError(f"Invalid JSON: {error}")
+            else:
+                # A number may continue past the end of the buffer
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            # Grow geometrically, so a large value is not rescanned often
+            self.fill(size)
+            size = max(size, len(self.buffer) - self.pos)
+
+    def enter(self, key):
+        """Move into the value of ``key`` in the object that starts here."""
+        self.expect("{")
+        while self.peek() != "}":
+            name = self.value()
+            self.expect(":")
+            if name == key:
+                return
+            self.value()  # Skip a value before the one wanted
+            if self.peek() == ",":
+                self.pos += 1
+        raise ImportFormatError(f"No {key!r} found")
+
+    def items(self):
+        """Decode the elements of the array that starts here, one at a time."""
+        self.expect("[")
+        if self.peek() == "]":
+            return
+        while True:
+            yield self.value()
+            separator = self.peek()
+            self.pos += 1
+            if separator == "]":
+                return
+            if separator != ",":
+                raise ImportFormatError(f"Expected ',' at offset {self.pos - 1}")
+
+
+def iter_har(file_obj):
+    """The ``CapturedResponse`` of each HAR entry."""
+    stream = JsonStream(file_obj)
+    stream.enter("log")
+    stream.enter("entries")
+    for entry in stream.items():
+        entry = _object(entry, "HAR entries")
+        request = _object(entry.get("request"), "HAR requests")
+        response = _object(entry.get("response"), "HAR responses")
+        content = _object(response.get("content"), "HAR response content")
+        headers = _headers(response.get("headers"))
+        body = content.get("text")
+        if body is not None:
+            body = _decode_text(str(body), content.get("encoding"))
+        yield CapturedResponse(
+            method=str(request.get("method", "")).upper(),
+            path=urlsplit(str(request.get("url", ""))).path,
+            # 0 for requests that got no response
+            status=response.get("status", 0),
+            content_type=_media_type(content.get("mimeType"), headers),
+            body=body,
+            headers=_kept_headers(headers),
+        )
+
+
+def iter_postman(file_obj):
+    """The ``CapturedResponse`` of each saved response of a Postman collection."""
+    stream = JsonStream(file_obj)
+    stream.enter("item")
+    for item in stream.items():
+        yield from _postman_item(item)
+
+
+def _postman_item(item):
+    item = _object(item, "Postman items")
+    # Folders hold more items
+    for child in _array(item.get("item"), "Postman folder items"):
+        yield from _postman_item(child)
+    request = item.get("request")
+    if request is None:
+        return
+    if isinstance(request, str):
+        request = {"url": request}
+    request = _object(request, "Postman requests")
+    method = str(request.get("method", "GET")).upper()
+    path = _postman_path(request.get("url"))
+    name = item.get("name") or ""
+    responses = _array(item.get("response"), "Postman responses")
+    if not responses:
+        yield CapturedResponse(method=method, path=path, name=name, content_type="")
+    for response in responses:
+        response = _object(response, "Postman responses")
+        headers = _headers(response.get("header"))
+        body = response.get("body")
+        yield CapturedResponse(
+            method=method,
+            path=path,
+            name=response.get("name") or name,
+            status=response.get("code") or None,
+            content_type=_media_type(None, headers),
+            body=None if body is None else str(body).encode("utf-8"),
+            headers=_kept_headers(headers),
+        )
+
+
+def _postman_path(url):
+    if isinstance(url, dict):
+        if isinstance(url.get("path"), list):
+            return "/".join(str(part) for part in url["path"])
+        url = url.get("raw", "")
+    url = POSTMAN_VARIABLE_RE.sub("", str(url or ""))
+    return urlsplit(url).path if "://" in url else url.partition("?")[0]
+
+
+def _object(value, what):
+    """A JSON object, {} when missing; raises ImportFormatError otherwise."""
+    if value is None:
+        return {}
+    if not isinstance(value, dict):
+        raise ImportFormatError(f"{what} must be objects")
+    return value
+
+
+def _array(value, what):
+    """A JSON array, [] when missing; raises ImportFormatError otherwise."""
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        raise ImportFormatError(f"{what} must be arrays")
+    return value
+
+
+def _headers(value):
+    """A list of header objects (HAR and Postman use the same shape)."""
+    return [_object(header, "Headers") for header in _array(value, "Headers")]
+
+
+def _file_name(body):
+    """Storage name of a binary body, derived from its content."""
+    return f"mock_bodies/imported-{hashlib.sha1(body).hexdigest()[:20]}"
+
+
+def _decode_text(text, encoding):
+    if encoding == "base64":
+        try:
+            return b64decode(text)
+        except (BinasciiError, ValueError):
+            return None
+    return text.encode("utf-8")
+
+
+def _media_type(mime_type, headers):
+    if not mime_type:
+        for header in headers or ():
+            if str(header.get("name") or header.get("key", "")).lower() == (
+                "content-type"
+            ):
+                mime_type = header.get("value")
+                break
+    return (mime_type or "application/octet-stream").strip()
+
+
+def _kept_headers(headers):
+    """Response headers worth replaying (as in recordings, see domains.proxy)."""
+    kept = {}
+    for header in headers or ():
+        name = str(header.get("name") or header.get("key") or "")
+        if name.startswith(":") or not name:
+            continue  # HTTP/2 pseudo-headers
+        if name.lower() in NOT_RECORDED_HEADERS or is_hop_by_hop(name):
+            continue
+        kept[name] = str(header.get("value", ""))
+    return kept
+
+
+class TrafficImporter:
+    """Write captured responses to a collection, deduplicated, in batches."""
+
+    def __init__(self, collection, strip_prefix="", max_body_bytes=None):
+        self.collection = collection
+        self.strip_prefix = strip_prefix.strip("/")
+        self.max_body_bytes = max_body_bytes
+        self.result = ImportResult()
+        # (method, path) -> [endpoint pk (or pending endpoint), signatures, count]
+        self.seen = {}
+        # States of the collection's endpoints, loaded on first use
+        self.existing = None
+        self.pending_endpoints = []
+        self.pending_responses = []
+        self.endpoint_ids = []
+        self.response_ids = []
+        # Files written by this import, removed again if it fails
+        self.saved_files = []
+
+    def add(self, captured):
+        self.result.entries += 1
+        path = self.normalize(captured.path)
+        too_large = (
+            self.max_body_bytes is not None
+            and captured.body is not None
+            and len(captured.body) > self.max_body_bytes
+        )
+        if (
+            captured.method not in METHODS
+            or captured.status == 0
+            or path is None
+            or too_large
+        ):
+            self.result.skipped += 1
+            return
+
+        key = (captured.method, path)
+        state = self.seen.get(key)
+        if state is None:
+            if self.existing is None:
+                self.existing = self.load_existing()
+            state = self.existing.pop(key, None)
+            if state is None:
+                self.new_endpoint(key, captured)
+                return
+            self.seen[key] = state
+        endpoint, signatures, count = state
+        signature = captured.signature
+        if signature in signatures:
+            self.result.duplicates += 1
+            return
+        signatures.add(signature)
+        fields = self.fields(captured)
+        self.pending_responses.append(
+            EndpointResponse(
+                name=(captured.name or f"Captured {fields['response_status']}")[:200],
+                position=count,
+                **(
+                    {"endpoint_id": endpoint}
+                    if isinstance(endpoint, int)
+                    else {"endpoint": endpoint}
+                ),
+                **fields,
+            )
+        )
+        state[2] += 1
+        self.result.responses += 1
+        if len(self.pending_responses) >= BATCH_SIZE:
+            self.flush()
+
+    def load_existing(self):
+        """
+        States of the endpoints already in the collection, in two queries.
+        Bodies are reduced to digests as they are read; files are compared
+        by name.
+        """
+        states = {}
+        by_pk = {}
+        endpoints = self.collection.endpoints.values_list(
+            "pk", "http_method", "path", *SIGNATURE_FIELDS
+        )
+        for pk, method, path, *values in endpoints.iterator():
+            state = states[method, path] = by_pk[pk] = [pk, set(), 0]
+            _add_stored(state, values)
+        responses = EndpointResponse.objects.filter(
+            endpoint__collection=self.collection
+        ).values_list("endpoint_id", *SIGNATURE_FIELDS)
+        for endpoint_id, *values in responses.iterator():
+            _add_stored(by_pk[endpoint_id], values)
+        return states
+
+    def new_endpoint(self, key, captured):
+        """Start the state of a method and path seen for the first time."""
+        method, path = key
+        endpoint = MockEndpoint(
+            collection=self.collection,
+            display_name=(captured.name or f"{method} /{path}")[:255],
+            path=path,
+            http_method=method,
+            **self.fields(captured),
+        )
+        self.pending_endpoints.append(endpoint)
+        self.result.endpoints += 1
+        self.seen[key] = [endpoint, {captured.signature}, 1]
+        if len(self.pending_endpoints) >= BATCH_SIZE:
+            self.flush()
+
+    def fields(self, captured):
+        """``captured.fields()``, with a binary body written to its file."""
+        fields = captured.fields()
+        name = fields.get("response_file")
+        if name and not default_storage.exists(name):
+            fields["response_file"] = default_storage.save(
+                name, ContentFile(captured.body)
+            )
+            self.saved_files.append(fields["response_file"])
+        return fields
+
+    def normalize(self, path):
+        path = unquote(path).strip("/")
+        if self.strip_prefix:
+            if path != self.strip_prefix and not path.startswith(
+                f"{self.strip_prefix}/"
+            ):
+                return None
+            path = path[len(self.strip_prefix) :].strip("/")
+        return path[:500]
+
+    def flush(self):
+        if self.pending_endpoints:
+            created = MockEndpoint.objects.bulk_create(self.pending_endpoints)
+            for endpoint in created:
+                self.endpoint_ids.append(endpoint.pk)
+                # Keep the id, not the instance with its body
+                self.seen[endpoint.http_method, endpoint.path][0] = endpoint.pk
+            self.pending_endpoints = []
+        if self.pending_responses:
+            created = EndpointResponse.objects.bulk_create(self.pending_responses)
+            self.response_ids.extend(response.pk for response in created)
+            self.pending_responses = []
+
+    def finish(self):
+        """Write what is left; bulk inserts send no signals, so bump and stamp."""
+        self.flush()
+        if not (self.endpoint_ids or self.response_ids):
+            return
+        Collection.bump_config_version(self.collection.pk)
+        for start in range(0, len(self.endpoint_ids), BATCH_SIZE):
+            ids = self.endpoint_ids[start : start + BATCH_SIZE]
+            stamp_endpoints(MockEndpoint.objects.filter(pk__in=ids))
+        for start in range(0, len(self.response_ids), BATCH_SIZE):
+            ids = self.response_ids[start : start + BATCH_SIZE]
+            stamp_responses(EndpointResponse.objects.filter(pk__in=ids))
+
+    def discard_files(self):
+        """Delete the files this import wrote (after a rollback)."""
+        for name in self.saved_files:
+            default_storage.delete(name)
+        self.saved_files = []
+
+
+FORMATS = {"har": iter_har, "postman": iter_postman}
+
+
+def import_traffic(collection, file_obj, format, strip_prefix="", max_body_bytes=None):
+    """
+    Import a HAR file or Postman collection (``format`` is "har" or
+    "postman") from a binary file into ``collection``; returns an
+    ``ImportResult``. Raises ``ImportFormatError`` for unreadable files,
+    in which case nothing is written.
+    """
+    try:
+        entries = FORMATS[format]
+    except KeyError:
+        raise ImportFormatError(f"Unknown format {format!r} (use har or postman)")
+    importer = TrafficImporter(collection, strip_prefix, max_body_bytes)
+    try:
+        with transaction.atomic():
+            for captured in entries(file_obj):
+                importer.add(captured)
+            importer.finish()
+    except BaseException:
+        importer.discard_files()
+        raise
+    invalidate_route_tables(collection_id=collection.pk)
+    return importer.result
+
+
+# Columns of a stored endpoint or response that make up its signature
+SIGNATURE_FIELDS = ("response_status", "content_type", "response_body", "response_file")
+
+
+def _add_stored(state, values):
+    """Count a stored endpoint or response in a state, with its signature."""
+    status, content_type, body, response_file = values
+    content = response_file or hashlib.sha1(body.encode("utf-8")).digest()
+    state[1].add((status, content_type, content))
+    state[2] += 1
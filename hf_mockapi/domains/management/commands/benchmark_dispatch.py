@@ -0,0 +1,69 @@
+"""Benchmark mock request dispatch with and without the fast path."""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from domains.models import Collection, MockEndpoint
+
+FAST_PATH = "domains.middleware.MockFastPathMiddleware"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure per-request overhead of the full MIDDLEWARE stack versus "
+        "the mock fast path. Runs against a throwaway collection that is "
+        "rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=5000)
+        parser.add_argument("--warmup", type=int, default=200)
+
+    def handle(self, *args, **options):
+        full_stack = [m for m in settings.MIDDLEWARE if m != FAST_PATH]
+        variants = [
+            ("full middleware stack", full_stack),
+            ("mock fast path", [FAST_PATH] + full_stack),
+        ]
+
+        with transaction.atomic():
+            collection = Collection.objects.create(slug="__bench__", name="Bench")
+            MockEndpoint.objects.create(
+                collection=collection,
+                display_name="Bench",
+                path="items",
+                response_body='{"ok": true}',
+                enable_request_logger=False,
+            )
+
+            results = []
+            for label, middleware in variants:
+                with override_settings(MIDDLEWARE=middleware):
+                    results.append((label, *self.measure(options)))
+            transaction.set_rollback(True)
+
+        baseline = results[0][1]
+        for label, per_request, queries in results:
+            self.stdout.write(
+                f"{label:<24} {per_request * 1e6:8.1f} us/request "
+                f"{queries:3d} queries/request "
+                f"({baseline / per_request:4.2f}x)"
+            )
+
+    def measure(self, options):
+        client = Client()
+        for _ in range(options["warmup"]):
+            client.get("/__bench__/items")
+
+        with CaptureQueriesContext(connection) as queries:
+            client.get("/__bench__/items")
+
+        count = options["requests"]
+        start = time.perf_counter()
+        for _ in range(count):
+            client.get("/__bench__/items")
+        return (time.perf_counter() - start) / count, len(queries)
@@ -0,0 +1,64 @@
+"""Import a HAR file or Postman collection into a collection."""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from domains.importers import FORMATS, ImportFormatError, import_traffic
+from domains.models import Collection
+
+
+class Command(BaseCommand):
+    help = (
+        "Add the requests captured in a HAR file or Postman collection to a "
+        "collection: one endpoint per method and path, with every distinct "
+        "response kept as a variant. The file is read as a stream, so it can "
+        "be larger than memory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("collection", help="Slug of the collection")
+        parser.add_argument("file", help="HAR file or Postman collection (JSON)")
+        parser.add_argument(
+            "--format",
+            choices=sorted(FORMATS),
+            default="har",
+            help="File format (default: har)",
+        )
+        parser.add_argument(
+            "--strip-prefix",
+            default="",
+            help="Leading path to drop, e.g. api/v1; other paths are skipped",
+        )
+        parser.add_argument(
+            "--max-body-bytes",
+            type=int,
+            default=None,
+            help="Skip responses with larger bodies",
+        )
+
+    def handle(self, *args, **options):
+        collection = Collection.objects.filter(slug=options["collection"]).first()
+        if collection is None:
+            raise CommandError(f"Unknown collection: {options['collection']}")
+
+        start = time.monotonic()
+        try:
+            with open(options["file"], "rb") as file_obj:
+                result = import_traffic(
+                    collection,
+                    file_obj,
+                    options["format"],
+                    options["strip_prefix"],
+                    options["max_body_bytes"],
+                )
+        except (OSError, ImportFormatError) as error:
+            raise CommandError(str(error))
+        elapsed = time.monotonic() - start
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {result.entries} entries in {elapsed:.1f}s: "
+                f"{result.endpoints} endpoints, {result.responses} responses, "
+                f"{result.duplicates} duplicates, {result.skipped} skipped"
+            )
+        )
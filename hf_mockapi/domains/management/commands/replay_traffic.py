@@ -0,0 +1,146 @@
+"""Replay logged requests against a collection and report what changed."""
+
+import gzip
+import itertools
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from domains.replay import (HttpTarget, InProcessTarget, logged_exchanges,
+                            ndjson_exchanges, replay)
+from domains.routing import get_route_table
+from logger.export import filter_logs
+
+
+class Command(BaseCommand):
+    help = (
+        "Send logged requests again, concurrently, to the collection's current "
+        "mocks and compare status, body and logged headers with the logged "
+        "answers. Requests come from the request log or an NDJSON export and "
+        "go through the engine in this process, or to --url over HTTP."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "collection", help="Slug of the collection to replay against"
+        )
+        parser.add_argument(
+            "--input", help="NDJSON export (.ndjson or .ndjson.gz) to read instead"
+        )
+        parser.add_argument(
+            "--source", help="Replay the logs of this collection (default: the same)"
+        )
+        parser.add_argument("--since", help="Only logs at or after this ISO date/time")
+        parser.add_argument("--until", help="Only logs before this ISO date/time")
+        parser.add_argument("--status", type=int, help="Only logs with this status")
+        parser.add_argument("--method", help="Only logs with this HTTP method")
+        parser.add_argument("--limit", type=int, help="Replay at most this many")
+        parser.add_argument(
+            "--url", help="Base URL of a running server, e.g. http://localhost:8000"
+        )
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--rate", type=float, help="Requests per second")
+        parser.add_argument(
+            "--ignore-header",
+            action="append",
+            default=[],
+            help="Response header not to compare (repeatable)",
+        )
+        parser.add_argument("--max-diffs", type=int, default=100)
+        parser.add_argument("--report", help="Write the full report as JSON here")
+        parser.add_argument(
+            "--fail-on-diff",
+            action="store_true",
+            help="Exit with an error when anything changed or failed",
+        )
+
+    def handle(self, *args, **options):
+        slug = options["collection"]
+        if options["concurrency"] < 1:
+            raise CommandError("--concurrency must be at least 1")
+        if options["url"]:
+            target = HttpTarget(options["url"], slug, pool_size=options["concurrency"])
+        else:
+            table = get_route_table(slug)
+            if table is None:
+                raise CommandError(f"Unknown or inactive collection: {slug}")
+            target = InProcessTarget(table)
+
+        try:
+            if options["input"]:
+                opener = gzip.open if options["input"].endswith(".gz") else open
+                with opener(options["input"], "rt", encoding="utf-8") as lines:
+                    report = self.replay(ndjson_exchanges(lines), target, options)
+            else:
+                queryset = filter_logs(
+                    since=options["since"],
+                    until=options["until"],
+                    collection=options["source"] or slug,
+                    status=options["status"],
+                    method=options["method"],
+                )
+                report = self.replay(logged_exchanges(queryset), target, options)
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+        finally:
+            if isinstance(target, HttpTarget):
+                target.close()
+
+        self.write_summary(report)
+        if options["report"]:
+            with open(options["report"], "w", encoding="utf-8") as output:
+                json.dump(report.as_dict(), output, indent=2)
+        if options["fail_on_diff"] and (report.changed or report.failed):
+            raise CommandError(
+                f"{report.changed} changed and {report.failed} failed requests"
+            )
+
+    def replay(self, exchanges, target, options):
+        if options["limit"] is not None:
+            exchanges = itertools.islice(exchanges, options["limit"])
+        return replay(
+            exchanges,
+            target,
+            concurrency=options["concurrency"],
+            rate=options["rate"],
+            ignore_headers=options["ignore_header"],
+            max_diffs=options["max_diffs"],
+        )
+
+    def write_summary(self, report):
+        data = report.as_dict()
+        style = (
+            self.style.SUCCESS
+            if report.matched == report.requests
+            else self.style.WARNING
+        )
+        self.stdout.write(
+            style(
+                f"Replayed {report.requests} requests in {report.elapsed:.1f}s: "
+                f"{report.matched} matched, {report.changed} changed, "
+                f"{report.failed} failed"
+            )
+        )
+        for label, key in (("now", "latency_ms"), ("logged", "logged_latency_ms")):
+            stats = data[key]
+            if stats["count"]:
+                self.stdout.write(
+                    f"  latency {label:<6} p50 {stats['p50']:.1f} ms  "
+                    f"p90 {stats['p90']:.1f} ms  p99 {stats['p99']:.1f} ms  "
+                    f"max {stats['max']:.1f} ms"
+                )
+        for diff in report.diffs:
+            self.stdout.write(f"{diff['method']} /{diff['path']} (log {diff['id']})")
+            if "status" in diff:
+                self.stdout.write(
+                    f"  status {diff['status'][0]} -> {diff['status'][1]}"
+                )
+            for name, (old, new) in diff.get("headers", {}).items():
+                self.stdout.write(f"  header {name}: {old!r} -> {new!r}")
+            for line in diff.get("body", []):
+                self.stdout.write(f"  {line}")
+        for error in report.errors:
+            self.stdout.write(
+                self.style.ERROR(
+                    f"{error['method']} /{error['path']}: {error['error']}"
+                )
+            )
@@ -0,0 +1,255 @@
+"""Serve mock collections with the standalone asyncio server."""
+
+import asyncio
+import os
+import shutil
+import signal
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from domains.models import Collection
+from domains.prefork import Supervisor, listen_socket, reserve_port
+from domains.routing import (config_versions, load_route_tables,
+                             refresh_route_tables)
+from domains.server import MockServer
+from domains.snapshots import SnapshotError, export_snapshot, load_snapshots
+from logger.sinks import (DEFAULT_SINK, QueuedDatabaseSink, close_sinks,
+                          get_sink, sink_names)
+
+
+class Command(BaseCommand):
+    help = (
+        "Load collections into memory and answer mock traffic with a minimal "
+        "asyncio HTTP/1.1 server. The Django app remains the control plane; "
+        "edits are picked up through each collection's config version, and "
+        "SIGHUP reloads everything from the database. With "
+        "--snapshot, collections are mapped from snapshot files instead and "
+        "swapped in whenever a file is replaced. --workers N forks N "
+        "processes sharing the port (SO_REUSEPORT) and one mapped snapshot."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "collections",
+            nargs="*",
+            help="Collection slugs to serve (default: all active collections)",
+        )
+        parser.add_argument("--host", default="0.0.0.0")
+        parser.add_argument("--port", type=int, default=8009)
+        parser.add_argument(
+            "--no-log",
+            action="store_true",
+            help="Do not write request logs",
+        )
+        parser.add_argument(
+            "--snapshot",
+            action="append",
+            default=[],
+            metavar="PATH",
+            help="Serve from a snapshot file (see snapshot_collection); repeatable",
+        )
+        parser.add_argument(
+            "--watch-interval",
+            type=float,
+            default=1.0,
+            help="Seconds between checks for changed collections or snapshot files",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of worker processes (more than 1 enables prefork mode)",
+        )
+        parser.add_argument(
+            "--grace",
+            type=float,
+            default=10.0,
+            help="Seconds a stopping worker may take to finish open requests",
+        )
+
+    def handle(self, *args, **options):
+        slugs = options["collections"]
+        self.snapshots = options["snapshot"]
+        if options["workers"] > 1:
+            return self.handle_prefork(slugs, options)
+
+        tables = self.load(slugs)
+        server = self.make_server(tables, options)
+        try:
+            asyncio.run(self.run(server, slugs, options))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close_logs(server)
+
+    def handle_prefork(self, slugs, options):
+        try:
+            reserved = reserve_port(options["host"], options["port"])
+        except OSError as exc:
+            raise CommandError(
+                f"Cannot bind {options['host']}:{options['port']}: {exc}"
+            )
+        options["port"] = reserved.getsockname()[1]
+
+        runtime_dir = None
+        if self.snapshots:
+            # Roll the workers whenever a snapshot file is replaced
+            prepare = None
+            stamp = self.snapshot_stamps
+            self.load(slugs)
+        else:
+            # Export the database once; every worker maps the same file and
+            # the workers are rolled when a collection's version changes
+            runtime_dir = tempfile.mkdtemp(prefix="mockapi-")
+            self.snapshots = [os.path.join(runtime_dir, "routes.snap")]
+
+            def stamp():
+                return config_versions(slugs)
+
+            def prepare():
+                collections = Collection.objects.filter(is_active=True)
+                if slugs:
+                    collections = collections.filter(slug__in=slugs)
+                export_snapshot(collections, self.snapshots[0])
+                self.load(slugs)
+
+        def worker(ready):
+            server = self.make_server(self.load(slugs), options)
+            sock = listen_socket(options["host"], options["port"])
+            try:
+                asyncio.run(self.run(server, slugs, options, sock, ready))
+            finally:
+                self.close_logs(server)
+
+        supervisor = Supervisor(
+            worker,
+            options["workers"],
+            prepare=prepare,
+            stamp=stamp,
+            interval=options["watch_interval"],
+            grace=options["grace"],
+            stdout=self.stdout,
+        )
+        self.stdout.write(
+            f"Serving mocks on http://{options['host']}:{options['port']}/ "
+            f"with {options['workers']} workers"
+        )
+        try:
+            supervisor.run()
+        finally:
+            reserved.close()
+            if runtime_dir is not None:
+                shutil.rmtree(runtime_dir, ignore_errors=True)
+
+    def make_server(self, tables, options):
+        if options["no_log"]:
+            return MockServer(tables)
+        # Database logs are batched off the event loop; other sinks as configured
+        sinks = {name: get_sink(name) for name in sink_names() if name != DEFAULT_SINK}
+        return MockServer(tables, log_sink=QueuedDatabaseSink(), log_sinks=sinks)
+
+    def close_logs(self, server):
+        if server.log_sink is not None:
+            server.log_sink.close()
+        close_sinks()
+
+    def load(self, slugs):
+        if self.snapshots:
+            try:
+                tables = load_snapshots(self.snapshots)
+            except (OSError, SnapshotError) as exc:
+                raise CommandError(f"Cannot load snapshot: {exc}")
+            if slugs:
+                tables = {
+                    key: table
+                    for key, table in tables.items()
+                    if key.partition("@")[0] in slugs
+                }
+        else:
+            tables = load_route_tables(slugs)
+        missing = set(slugs) - set(tables)
+        if missing:
+            raise CommandError(f"Unknown collections: {', '.join(sorted(missing))}")
+        routes = sum(len(table.routes) for table in tables.values())
+        releases = sum("@" in key for key in tables)
+        self.stdout.write(
+            f"Loaded {len(tables) - releases} collections, {releases} releases "
+            f"({routes} routes)"
+        )
+        return tables
+
+    async def run(self, server, slugs, options, sock=None, ready=None):
+        host, port = options["host"], options["port"]
+        loop = asyncio.get_running_loop()
+        listener = await server.start(host, port, sock=sock)
+        stop = asyncio.Event()
+
+        async def reload():
+            try:
+                tables = await loop.run_in_executor(None, self.load, slugs)
+            except CommandError as exc:
+                # Keep serving the previous tables
+                self.stderr.write(str(exc))
+                return
+            server.set_tables(tables)
+
+        loop.add_signal_handler(signal.SIGTERM, stop.set)
+        loop.add_signal_handler(signal.SIGINT, stop.set)
+        if ready is not None:
+            # Prefork worker: the supervisor handles reloads
+            ready()
+        else:
+            loop.add_signal_handler(signal.SIGHUP, lambda: loop.create_task(reload()))
+            if self.snapshots:
+                loop.create_task(self.watch(reload, options["watch_interval"]))
+            else:
+                loop.create_task(self.refresh(server, slugs, options["watch_interval"]))
+            self.stdout.write(f"Serving mocks on http://{host}:{port}/")
+
+        try:
+            await stop.wait()
+        finally:
+            # Stop accepting, then let open requests finish
+            listener.close()
+            server.close_idle()
+            try:
+                await asyncio.wait_for(listener.wait_closed(), options["grace"])
+            except asyncio.TimeoutError:
+                pass
+
+    async def watch(self, reload, interval):
+        """Hot-swap the tables whenever a snapshot file is replaced."""
+        seen = self.snapshot_stamps()
+        while True:
+            await asyncio.sleep(interval)
+            stamps = self.snapshot_stamps()
+            if stamps != seen:
+                seen = stamps
+                await reload()
+
+    async def refresh(self, server, slugs, interval):
+        """Rebuild collections whose config version changed."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                tables = await loop.run_in_executor(
+                    None, refresh_route_tables, server.tables, slugs
+                )
+            except Exception as exc:
+                self.stderr.write(f"Cannot check collection versions: {exc}")
+                continue
+            if tables is not server.tables:
+                server.set_tables(tables)
+
+    def snapshot_stamps(self):
+        stamps = []
+        for path in self.snapshots:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                stamps.append(None)
+            else:
+                # export_snapshot replaces the file, so the inode changes too
+                stamps.append((stat.st_ino, stat.st_mtime_ns, stat.st_size))
+        return stamps
@@ -0,0 +1,40 @@
+"""Export collections to a snapshot file for the standalone server."""
+
+from django.core.management.base import BaseCommand, CommandError
+from domains.models import Collection
+from domains.snapshots import export_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the active endpoints of one or more collections, with bodies "
+        "pre-encoded and pre-compressed, to a snapshot file that "
+        "'serve --snapshot' maps into memory. The file is replaced "
+        "atomically, so running servers pick it up safely."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="Snapshot file to write")
+        parser.add_argument(
+            "collections",
+            nargs="*",
+            help="Collection slugs to export (default: all active collections)",
+        )
+
+    def handle(self, *args, **options):
+        slugs = options["collections"]
+        collections = Collection.objects.filter(is_active=True).order_by("slug")
+        if slugs:
+            collections = collections.filter(slug__in=slugs)
+            missing = set(slugs) - set(collections.values_list("slug", flat=True))
+            if missing:
+                raise CommandError(f"Unknown collections: {', '.join(sorted(missing))}")
+
+        collections = list(collections)
+        routes = export_snapshot(collections, options["output"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {len(collections)} collections ({routes} routes) "
+                f"to {options['output']}"
+            )
+        )
@@ -0,0 +1,50 @@
+"""Middleware dispatching mock traffic ahead of the full middleware stack."""
+
+from django.conf import settings
+from django.core.handlers.exception import convert_exception_to_response
+from django.utils.module_loading import import_string
+
+from .engine import MOCK_PATH_RE
+from .views import mock_api_handler
+
+
+class MockFastPathMiddleware:
+    """
+    Send mock-collection requests straight to ``mock_api_handler``.
+
+    Must be the first entry in ``MIDDLEWARE``. Requests whose first path
+    segment is not listed in ``MOCKAPI_RESERVED_PREFIXES`` skip sessions,
+    CSRF, authentication, messages, clickjacking protection and URL
+    resolution, and only pass through ``MOCKAPI_FAST_PATH_MIDDLEWARE``.
+    Admin and ``/api/`` traffic continues down the full stack.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, "MOCKAPI_FAST_PATH", True)
+        self.reserved = frozenset(getattr(settings, "MOCKAPI_RESERVED_PREFIXES", ()))
+
+        handler = convert_exception_to_response(self.dispatch)
+        for middleware_path in reversed(
+            getattr(settings, "MOCKAPI_FAST_PATH_MIDDLEWARE", [])
+        ):
+            middleware = import_string(middleware_path)
+            handler = convert_exception_to_response(middleware(handler))
+        self.mock_handler = handler
+
+    def __call__(self, request):
+        if self.enabled:
+            match = MOCK_PATH_RE.match(request.path_info)
+            if match is not None and match["collection_slug"] not in self.reserved:
+                return self.mock_handler(request)
+        return self.get_response(request)
+
+    def dispatch(self, request):
+        match = MOCK_PATH_RE.match(request.path_info)
+        response = mock_api_handler(
+            request, match["collection_slug"], match["endpoint_path"], match["release"]
+        )
+        # Normally set by CommonMiddleware
+        if not response.streaming and not response.has_header("Content-Length"):
+            response["Content-Length"] = str(len(response.content))
+        return response
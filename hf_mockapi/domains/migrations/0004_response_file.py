@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("domains", "0003_collection_openapi_schema"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="endpointresponse",
+            name="response_file",
+            field=models.FileField(
+                blank=True,
+                help_text="Serve this file as the response body instead of response_body",
+                upload_to="mock_bodies/",
+            ),
+        ),
+        migrations.AddField(
+            model_name="mockendpoint",
+            name="response_file",
+            field=models.FileField(
+                blank=True,
+                help_text="Serve this file as the response body instead of response_body",
+                upload_to="mock_bodies/",
+            ),
+        ),
+    ]
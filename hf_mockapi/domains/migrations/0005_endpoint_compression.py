@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("domains", "0004_response_file"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mockendpoint",
+            name="enable_compression",
+            field=models.BooleanField(
+                default=True,
+                help_text="Compress bodies for clients that send Accept-Encoding",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="mockendpoint",
+            name="content_encoding",
+            field=models.CharField(
+                blank=True,
+                help_text="Content-Encoding header (gzip, br or zstd compress the body; leave blank to negotiate from Accept-Encoding)",
+                max_length=50,
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("domains", "0005_endpoint_compression"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mockendpoint",
+            name="enable_conditional_requests",
+            field=models.BooleanField(
+                default=True,
+                help_text="Send ETag/Last-Modified and answer conditional GETs with 304",
+            ),
+        ),
+    ]
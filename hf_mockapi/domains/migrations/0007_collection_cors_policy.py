@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("domains", "0006_endpoint_conditional_requests"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="collection",
+            name="cors_allow_credentials",
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name="collection",
+            name="cors_allowed_headers",
+            field=models.JSONField(
+                blank=True,
+                default=list,
+                help_text='Allowed request headers (["*"] echoes whatever is requested)',
+            ),
+        ),
+        migrations.AddField(
+            model_name="collection",
+            name="cors_allowed_origins",
+            field=models.JSONField(
+                blank=True,
+                default=list,
+                help_text='Allowed origins (e.g., ["https://app.example.com"] or ["*"])',
+            ),
+        ),
+        migrations.AddField(
+            model_name="collection",
+            name="cors_enabled",
+            field=models.BooleanField(
+                default=True, help_text="Answer CORS preflights for this collection"
+            ),
+        ),
+        migrations.AddField(
+            model_name="collection",
+            name="cors_max_age",
+            field=models.IntegerField(
+                default=86400,
+                help_text="Access-Control-Max-Age for preflights, in seconds",
+            ),
+        ),
+    ]
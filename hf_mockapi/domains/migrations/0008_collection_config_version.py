@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("domains", "0007_collection_cors_policy"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="collection",
+            name="config_version",
+            field=models.PositiveBigIntegerField(
+                default=1,
+                editable=False,
+                help_text="Incremented on every change to the collection or its mocks",
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("domains", "0008_collection_config_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="collection",
+            name="log_sink",
+            field=models.CharField(
+                default="database",
+                help_text="Where request logs go: a name from MOCKAPI_LOG_SINKS (database, file, stdout, null)",
+                max_length=50,
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("domains", "0009_collection_log_sink"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="mockendpoint",
+            index=models.Index(
+                fields=["collection", "position", "path", "id"],
+                name="endpoint_list_order",
+            ),
+        ),
+    ]
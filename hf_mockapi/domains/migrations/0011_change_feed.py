@@ -0,0 +1,84 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("domains", "0010_mockendpoint_list_order_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Tombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("endpoint", "Endpoint"), ("response", "Response")],
+                        max_length=10,
+                    ),
+                ),
+                ("object_id", models.PositiveBigIntegerField()),
+                (
+                    "version",
+                    models.PositiveBigIntegerField(
+                        help_text="Collection config_version that recorded the deletion"
+                    ),
+                ),
+                ("deleted_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="endpointresponse",
+            name="version",
+            field=models.PositiveBigIntegerField(
+                db_index=True,
+                default=0,
+                editable=False,
+                help_text="Collection config_version of the last change (see domains.changes)",
+            ),
+        ),
+        migrations.AddField(
+            model_name="mockendpoint",
+            name="version",
+            field=models.PositiveBigIntegerField(
+                default=0,
+                editable=False,
+                help_text="Collection config_version of the last change (see domains.changes)",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="mockendpoint",
+            index=models.Index(
+                fields=["collection", "version"], name="endpoint_changes"
+            ),
+        ),
+        migrations.AddField(
+            model_name="tombstone",
+            name="collection",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="tombstones",
+                to="domains.collection",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tombstone",
+            index=models.Index(
+                fields=["collection", "version"], name="tombstone_changes"
+            ),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("domains", "0011_change_feed"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CollectionRelease",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("number", models.PositiveIntegerField()),
+                ("notes", models.CharField(blank=True, max_length=200)),
+                (
+                    "routes",
+                    models.JSONField(
+                        default=list,
+                        editable=False,
+                        help_text="Compiled routes with their bodies",
+                    ),
+                ),
+                (
+                    "cors",
+                    models.JSONField(
+                        default=list,
+                        editable=False,
+                        help_text="CORS policy at release time",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "collection",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="releases",
+                        to="domains.collection",
+                    ),
+                ),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="collection_releases",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["collection", "-number"],
+                "unique_together": {("collection", "number")},
+            },
+        ),
+        migrations.AddField(
+            model_name="collection",
+            name="pinned_release",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="Serve this release at /{slug}/ instead of the live endpoints",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="domains.collectionrelease",
+            ),
+        ),
+    ]
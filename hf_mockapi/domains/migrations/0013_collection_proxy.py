@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:46
+
+import domains.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("domains", "0012_collection_releases"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="collection",
+            name="proxy_mode",
+            field=models.CharField(
+                choices=[
+                    ("off", "Off (answer 404)"),
+                    ("passthrough", "Forward to the upstream"),
+                    ("record", "Forward and record as mocks"),
+                ],
+                default="off",
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="collection",
+            name="record_filters",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text='Responses to record, e.g. {"methods": ["GET"], "include": ["users/*"], "exclude": ["*/health"], "statuses": ["2xx"], "max_body_bytes": 1048576}',
+                validators=[domains.models.validate_record_filters],
+            ),
+        ),
+        migrations.AddField(
+            model_name="collection",
+            name="upstream_url",
+            field=models.URLField(
+                blank=True,
+                help_text="Base URL unmatched requests are forwarded to (e.g., https://api.example.com/v1)",
+            ),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:50
+
+import domains.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("domains", "0013_collection_proxy"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mockendpoint",
+            name="endpoint_type",
+            field=models.CharField(
+                choices=[
+                    ("static", "Static response"),
+                    ("resource", "Stateful resource (in-memory CRUD)"),
+                ],
+                default="static",
+                help_text="Resources answer every method at path and path/{id} from an in-memory store seeded with response_body (see domains.resources)",
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="mockendpoint",
+            name="resource_config",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text='Resource settings, e.g. {"id_field": "id", "indexes": ["email"], "persist": true, "page_size": 100}',
+                validators=[domains.models.validate_resource_config],
+            ),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("domains", "0014_resource_endpoints"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="collection",
+            name="validate_requests",
+            field=models.BooleanField(
+                default=False,
+                help_text="Reject requests whose parameters or body do not match the operation in the OpenAPI schema",
+            ),
+        ),
+        migrations.AddField(
+            model_name="collection",
+            name="validation_status",
+            field=models.PositiveSmallIntegerField(
+                choices=[(400, "400 Bad Request"), (422, "422 Unprocessable Content")],
+                default=400,
+                help_text="Status of responses to requests that fail validation",
+            ),
+        ),
+    ]
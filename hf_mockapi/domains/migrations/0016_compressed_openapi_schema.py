@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:02
+
+import domains.models
+from django.db import migrations
+
+
+def compress_schemas(apps, schema_editor):
+    Collection = apps.get_model("domains", "Collection")
+    schemas = (
+        Collection.objects.exclude(openapi_schema="")
+        .values_list("pk", "openapi_schema")
+        .iterator()
+    )
+    for pk, schema in schemas:
+        Collection.objects.filter(pk=pk).update(compressed_openapi_schema=schema)
+
+
+def decompress_schemas(apps, schema_editor):
+    Collection = apps.get_model("domains", "Collection")
+    schemas = Collection.objects.values_list("pk", "compressed_openapi_schema")
+    for pk, schema in schemas.iterator():
+        if schema:
+            Collection.objects.filter(pk=pk).update(openapi_schema=schema)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("domains", "0015_request_validation"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="collection",
+            name="compressed_openapi_schema",
+            field=domains.models.CompressedTextField(blank=True, default=""),
+        ),
+        migrations.RunPython(compress_schemas, decompress_schemas),
+        migrations.RemoveField(
+            model_name="collection",
+            name="openapi_schema",
+        ),
+        migrations.RenameField(
+            model_name="collection",
+            old_name="compressed_openapi_schema",
+            new_name="openapi_schema",
+        ),
+        migrations.AlterField(
+            model_name="collection",
+            name="openapi_schema",
+            field=domains.models.CompressedTextField(
+                blank=True,
+                default="",
+                help_text="Custom OpenAPI YAML or JSON schema for this collection",
+            ),
+        ),
+    ]
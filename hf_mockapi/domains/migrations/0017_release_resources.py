@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("domains", "0016_compressed_openapi_schema"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="collectionrelease",
+            name="resources",
+            field=models.JSONField(
+                default=list, editable=False, help_text="Compiled resource endpoints"
+            ),
+        ),
+    ]
@@ -1,8 +1,89 @@
 """Models for Domains."""
 
 import json
+import re
+import zlib
 
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import F
+
+# Keys of Collection.record_filters (see domains.proxy)
+RECORD_FILTER_LISTS = ("methods", "include", "exclude", "statuses")
+RECORD_STATUS_RE = re.compile(r"^[1-5](\d\d|xx)$")
+
+
+def validate_record_filters(value):
+    """Check the shape of ``Collection.record_filters``."""
+    if not isinstance(value, dict):
+        raise ValidationError("Record filters must be a JSON object")
+    unknown = set(value) - {*RECORD_FILTER_LISTS, "max_body_bytes"}
+    if unknown:
+        raise ValidationError(f"Unknown record filters: {', '.join(sorted(unknown))}")
+    for key in RECORD_FILTER_LISTS:
+        items = value.get(key, [])
+        if not isinstance(items, list) or not all(isinstance(i, str) for i in items):
+            raise ValidationError(f"{key} must be a list of strings")
+    for status in value.get("statuses", []):
+        if not RECORD_STATUS_RE.match(status):
+            raise ValidationError(f"Invalid status {status!r} (use e.g. 200 or 2xx)")
+    limit = value.get("max_body_bytes", 0)
+    if isinstance(limit, bool) or not isinstance(limit, int) or limit < 0:
+        raise ValidationError("max_body_bytes must be a non-negative integer")
+
+
+RESOURCE_CONFIG_TYPES = {
+    "id_field": str,
+    "indexes": list,
+    "persist": bool,
+    "page_size": int,
+}
+
+
+def validate_resource_config(value):
+    """Check the shape of ``MockEndpoint.resource_config``."""
+    if not isinstance(value, dict):
+        raise ValidationError("Resource settings must be a JSON object")
+    unknown = set(value) - set(RESOURCE_CONFIG_TYPES)
+    if unknown:
+        raise ValidationError(
+            f"Unknown resource settings: {', '.join(sorted(unknown))}"
+        )
+    for key, expected in RESOURCE_CONFIG_TYPES.items():
+        if key in value and (
+            not isinstance(value[key], expected)
+            or (expected is int and isinstance(value[key], bool))
+        ):
+            raise ValidationError(f"{key} must be of type {expected.__name__}")
+    if not all(isinstance(field, str) for field in value.get("indexes", [])):
+        raise ValidationError("indexes must be a list of field names")
+    if value.get("page_size", 1) < 1:
+        raise ValidationError("page_size must be positive")
+
+
+class CompressedTextField(models.TextField):
+    """
+    Text kept zlib-compressed in a binary column.
+
+    Reads and writes ``str`` like a ``TextField`` (forms and serializers
+    treat it as one); large, repetitive documents such as OpenAPI schemas
+    take a fraction of the space in the row.
+    """
+
+    def get_internal_type(self):
+        return "BinaryField"
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if not prepared:
+            value = self.get_prep_value(value)
+        if value is None:
+            return None
+        return connection.Database.Binary(zlib.compress(value.encode("utf-8")))
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return zlib.decompress(value).decode("utf-8")
 
 
 class Collection(models.Model):
@@ -21,10 +102,78 @@ class Collection(models.Model):
         max_length=200, help_text="Display name for this collection"
     )
     description = models.TextField(blank=True)
-    openapi_schema = models.TextField(
-        blank=True, help_text="Custom OpenAPI YAML schema for this collection"
+    openapi_schema = CompressedTextField(
+        blank=True,
+        default="",
+        help_text="Custom OpenAPI YAML or JSON schema for this collection",
     )
     is_active = models.BooleanField(default=True)
+
+    # CORS policy for mock traffic (empty lists fall back to project settings)
+    cors_enabled = models.BooleanField(
+        default=True, help_text="Answer CORS preflights for this collection"
+    )
+    cors_allowed_origins = models.JSONField(
+        default=list,
+        blank=True,
+        help_text='Allowed origins (e.g., ["https://app.example.com"] or ["*"])',
+    )
+    cors_allowed_headers = models.JSONField(
+        default=list,
+        blank=True,
+        help_text='Allowed request headers (["*"] echoes whatever is requested)',
+    )
+    cors_allow_credentials = models.BooleanField(default=True)
+    cors_max_age = models.IntegerField(
+        default=86400, help_text="Access-Control-Max-Age for preflights, in seconds"
+    )
+    log_sink = models.CharField(
+        max_length=50,
+        default="database",
+        help_text="Where request logs go: a name from MOCKAPI_LOG_SINKS "
+        "(database, file, stdout, null)",
+    )
+
+    # Forwarding of requests that match no mock (see domains.proxy)
+    PROXY_OFF = "off"
+    PROXY_PASSTHROUGH = "passthrough"
+    PROXY_RECORD = "record"
+    PROXY_MODES = [
+        (PROXY_OFF, "Off (answer 404)"),
+        (PROXY_PASSTHROUGH, "Forward to the upstream"),
+        (PROXY_RECORD, "Forward and record as mocks"),
+    ]
+    proxy_mode = models.CharField(max_length=20, choices=PROXY_MODES, default=PROXY_OFF)
+    upstream_url = models.URLField(
+        blank=True,
+        help_text="Base URL unmatched requests are forwarded to "
+        "(e.g., https://api.example.com/v1)",
+    )
+    record_filters = models.JSONField(
+        default=dict,
+        blank=True,
+        validators=[validate_record_filters],
+        help_text='Responses to record, e.g. {"methods": ["GET"], "include": '
+        '["users/*"], "exclude": ["*/health"], "statuses": ["2xx"], '
+        '"max_body_bytes": 1048576}',
+    )
+
+    # Checking of mock requests against openapi_schema (see domains.validation)
+    VALIDATION_STATUSES = [
+        (400, "400 Bad Request"),
+        (422, "422 Unprocessable Content"),
+    ]
+    validate_requests = models.BooleanField(
+        default=False,
+        help_text="Reject requests whose parameters or body do not match the "
+        "operation in the OpenAPI schema",
+    )
+    validation_status = models.PositiveSmallIntegerField(
+        choices=VALIDATION_STATUSES,
+        default=400,
+        help_text="Status of responses to requests that fail validation",
+    )
+
     created_by = models.ForeignKey(
         "auth.User",
         on_delete=models.SET_NULL,
@@ -34,6 +183,19 @@ class Collection(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    config_version = models.PositiveBigIntegerField(
+        default=1,
+        editable=False,
+        help_text="Incremented on every change to the collection or its mocks",
+    )
+    pinned_release = models.ForeignKey(
+        "CollectionRelease",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        help_text="Serve this release at /{slug}/ instead of the live endpoints",
+    )
 
     class Meta:
         """Meta class."""
@@ -46,6 +208,35 @@ class Collection(models.Model):
         """Give string representation."""
         return f"{self.slug} - {self.name}"
 
+    def save(self, *args, **kwargs):
+        """Save, bumping ``config_version`` in the same UPDATE statement."""
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+
+        # Never write back a stale in-memory version
+        self.config_version = F("config_version") + 1
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "config_version"}
+        super().save(*args, **kwargs)
+        self.refresh_from_db(fields=["config_version"])
+
+    @classmethod
+    def bump_config_version(cls, *pks):
+        """
+        Mark collections as changed for every serving process.
+
+        Runs as a single UPDATE, so it commits or rolls back together with
+        the surrounding transaction. ``save`` and the model signals take
+        care of this; code using ``QuerySet.update`` or ``bulk_*`` must call
+        it.
+        """
+        pks = [pk for pk in pks if pk is not None]
+        if pks:
+            cls.objects.filter(pk__in=pks).update(
+                config_version=F("config_version") + 1
+            )
+
 
 class MockEndpoint(models.Model):
     """
@@ -90,9 +281,30 @@ class MockEndpoint(models.Model):
         ("application/x-www-form-urlencoded", "application/x-www-form-urlencoded"),
     ]
 
+    STATIC = "static"
+    RESOURCE = "resource"
+    ENDPOINT_TYPES = [
+        (STATIC, "Static response"),
+        (RESOURCE, "Stateful resource (in-memory CRUD)"),
+    ]
+
     collection = models.ForeignKey(
         Collection, on_delete=models.CASCADE, related_name="endpoints"
     )
+    endpoint_type = models.CharField(
+        max_length=20,
+        choices=ENDPOINT_TYPES,
+        default=STATIC,
+        help_text="Resources answer every method at path and path/{id} from an "
+        "in-memory store seeded with response_body (see domains.resources)",
+    )
+    resource_config = models.JSONField(
+        default=dict,
+        blank=True,
+        validators=[validate_resource_config],
+        help_text='Resource settings, e.g. {"id_field": "id", "indexes": '
+        '["email"], "persist": true, "page_size": 100}',
+    )
     display_name = models.CharField(
         max_length=255, help_text="Display name for this endpoint"
     )
@@ -111,12 +323,20 @@ class MockEndpoint(models.Model):
         max_length=100, choices=CONTENT_TYPES, default="application/json"
     )
     content_encoding = models.CharField(
-        max_length=50, blank=True, help_text="Content-Encoding header"
+        max_length=50,
+        blank=True,
+        help_text="Content-Encoding header (gzip, br or zstd compress the body; "
+        "leave blank to negotiate from Accept-Encoding)",
     )
     response_body = models.TextField(
         default='{"msg": "Hello World"}',
         help_text="Response body (JSON, XML, text, etc.)",
     )
+    response_file = models.FileField(
+        upload_to="mock_bodies/",
+        blank=True,
+        help_text="Serve this file as the response body instead of response_body",
+    )
 
     # Additional Headers (stored as JSON)
     custom_headers = models.JSONField(
@@ -135,12 +355,25 @@ class MockEndpoint(models.Model):
     response_delay = models.IntegerField(
         default=0, help_text="Response delay in seconds"
     )
+    enable_compression = models.BooleanField(
+        default=True,
+        help_text="Compress bodies for clients that send Accept-Encoding",
+    )
+    enable_conditional_requests = models.BooleanField(
+        default=True,
+        help_text="Send ETag/Last-Modified and answer conditional GETs with 304",
+    )
 
     # Metadata
     position = models.IntegerField(default=0, help_text="Order position in collection")
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveBigIntegerField(
+        default=0,
+        editable=False,
+        help_text="Collection config_version of the last change (see domains.changes)",
+    )
 
     class Meta:
         """Meta Class."""
@@ -149,6 +382,14 @@ class MockEndpoint(models.Model):
         verbose_name = "Mock Endpoint"
         verbose_name_plural = "Mock Endpoints"
         unique_together = ["collection", "path", "http_method"]
+        indexes = [
+            # Keyset pagination of a collection's endpoints (see api_views)
+            models.Index(
+                fields=["collection", "position", "path", "id"],
+                name="endpoint_list_order",
+            ),
+            models.Index(fields=["collection", "version"], name="endpoint_changes"),
+        ]
 
     def __str__(self):
         """Give string representation."""
@@ -201,6 +442,11 @@ class EndpointResponse(models.Model):
     response_body = models.TextField(
         default='{"message": "Success"}', help_text="Response body"
     )
+    response_file = models.FileField(
+        upload_to="mock_bodies/",
+        blank=True,
+        help_text="Serve this file as the response body instead of response_body",
+    )
     custom_headers = models.JSONField(
         default=dict, blank=True, help_text="Custom headers for this response"
     )
@@ -212,6 +458,12 @@ class EndpointResponse(models.Model):
     position = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveBigIntegerField(
+        default=0,
+        db_index=True,
+        editable=False,
+        help_text="Collection config_version of the last change (see domains.changes)",
+    )
 
     class Meta:
         """Meta class."""
@@ -223,3 +475,82 @@ class EndpointResponse(models.Model):
     def __str__(self):
         """Give string representation."""
         return f"{self.endpoint.display_name} - {self.name} ({self.response_status})"
+
+
+class Tombstone(models.Model):
+    """
+    A deleted endpoint or response, kept for the change feed.
+
+    ``collection`` has no database constraint: tombstones are written while
+    a collection is being deleted and removed with it by a signal handler.
+    """
+
+    ENDPOINT = "endpoint"
+    RESPONSE = "response"
+    KINDS = [(ENDPOINT, "Endpoint"), (RESPONSE, "Response")]
+
+    collection = models.ForeignKey(
+        Collection,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="tombstones",
+    )
+    kind = models.CharField(max_length=10, choices=KINDS)
+    object_id = models.PositiveBigIntegerField()
+    version = models.PositiveBigIntegerField(
+        help_text="Collection config_version that recorded the deletion"
+    )
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        """Meta class."""
+
+        indexes = [
+            models.Index(fields=["collection", "version"], name="tombstone_changes")
+        ]
+
+    def __str__(self):
+        """Give string representation."""
+        return f"{self.kind} {self.object_id} (version {self.version})"
+
+
+class CollectionRelease(models.Model):
+    """
+    An immutable, numbered copy of a collection's served routes.
+
+    Served at ``/{slug}@{number}/``; pinning a release on the collection
+    serves it at ``/{slug}/`` as well (see ``domains.releases``).
+    """
+
+    collection = models.ForeignKey(
+        Collection, on_delete=models.CASCADE, related_name="releases"
+    )
+    number = models.PositiveIntegerField()
+    notes = models.CharField(max_length=200, blank=True)
+    routes = models.JSONField(
+        default=list, editable=False, help_text="Compiled routes with their bodies"
+    )
+    resources = models.JSONField(
+        default=list, editable=False, help_text="Compiled resource endpoints"
+    )
+    cors = models.JSONField(
+        default=list, editable=False, help_text="CORS policy at release time"
+    )
+    created_by = models.ForeignKey(
+        "auth.User",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="collection_releases",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        """Meta class."""
+
+        ordering = ["collection", "-number"]
+        unique_together = ["collection", "number"]
+
+    def __str__(self):
+        """Give string representation."""
+        return f"{self.collection.slug}@{self.number}"
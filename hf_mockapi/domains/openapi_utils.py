@@ -1,8 +1,17 @@
 """Utilities for OpenAPI schema generation and parsing."""
 
+import json
 from typing import Any, Dict
 
 import yaml
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .examples import ExampleSynthesizer
+
+# libyaml's loader is several times faster than the pure-Python one
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
 
 def generate_openapi_schema(collection) -> str:
@@ -92,6 +101,21 @@ def generate_openapi_schema(collection) -> str:
     return yaml.dump(schema, default_flow_style=False, sort_keys=False)
 
 
+def cached_openapi_schema(collection) -> str:
+    """
+    Return ``generate_openapi_schema(collection)`` from the cache.
+
+    Entries are keyed by ``config_version``, which every edit to the
+    collection or its mocks increments, so they never need invalidating.
+    """
+    key = f"mockapi:openapi-schema:{collection.pk}:{collection.config_version}"
+    schema = cache.get(key)
+    if schema is None:
+        schema = generate_openapi_schema(collection)
+        cache.set(key, schema, timeout=None)
+    return schema
+
+
 def _parse_response_body(body: str, content_type: str) -> Any:
     """Parse response body based on content type."""
     import json
@@ -104,60 +128,116 @@ def _parse_response_body(body: str, content_type: str) -> Any:
     return body
 
 
-def validate_openapi_schema(yaml_content: str) -> tuple[bool, str]:
+def parse_openapi_document(content) -> Any:
     """
-    Validate OpenAPI YAML schema.
+    Parse an OpenAPI document, once.
 
     Args:
-        yaml_content: YAML string to validate
+        content: YAML or JSON, as text, bytes or a file object
+
+    Returns:
+        The parsed document. JSON goes through the json module; YAML uses
+        libyaml's loader when PyYAML was built with it, and a file object
+        is then read in chunks instead of all at once.
+    """
+    if hasattr(content, "read"):
+        if content.seekable():
+            start = content.read(1)
+            content.seek(0)
+            if start not in ("{", b"{"):
+                return yaml.load(content, Loader=YAML_LOADER)
+        content = content.read()
+    if isinstance(content, bytes):
+        content = content.decode("utf-8-sig")
+    if content.lstrip().startswith("{"):
+        try:
+            return json.loads(content)
+        except ValueError:
+            pass  # YAML flow mappings start with "{" too
+    return yaml.load(content, Loader=YAML_LOADER)
+
+
+def check_openapi_document(schema: Any) -> tuple[bool, str]:
+    """
+    Validate a parsed OpenAPI document.
+
+    Args:
+        schema: Document returned by ``parse_openapi_document``
 
     Returns:
         Tuple of (is_valid, error_message)
     """
-    try:
-        schema = yaml.safe_load(yaml_content)
+    if not isinstance(schema, dict):
+        return False, "Schema must be a valid YAML object"
+
+    # Check for required OpenAPI fields
+    if "openapi" not in schema:
+        return False, "Missing required field: openapi"
 
-        if not isinstance(schema, dict):
-            return False, "Schema must be a valid YAML object"
+    if "info" not in schema:
+        return False, "Missing required field: info"
 
-        # Check for required OpenAPI fields
-        if "openapi" not in schema:
-            return False, "Missing required field: openapi"
+    if "paths" not in schema:
+        return False, "Missing required field: paths"
 
-        if "info" not in schema:
-            return False, "Missing required field: info"
+    return True, ""
 
-        if "paths" not in schema:
-            return False, "Missing required field: paths"
 
-        return True, ""
+def validate_openapi_schema(yaml_content: str) -> tuple[bool, str]:
+    """
+    Validate OpenAPI YAML schema.
+
+    Args:
+        yaml_content: YAML string to validate
 
+    Returns:
+        Tuple of (is_valid, error_message)
+    """
+    try:
+        return check_openapi_document(parse_openapi_document(yaml_content))
     except yaml.YAMLError as e:
         return False, f"Invalid YAML: {str(e)}"
     except Exception as e:
         return False, f"Validation error: {str(e)}"
 
 
-def import_openapi_schema(collection, yaml_content: str) -> tuple[bool, str]:
+def import_openapi_schema(
+    collection, yaml_content, seed: int = 0, document: Any = None
+) -> tuple[bool, str]:
     """
     Import OpenAPI schema and create/update endpoints.
 
+    Every declared response with a numeric status becomes a mock: the first
+    one the endpoint itself, the others ``EndpointResponse`` variants
+    (matched by status on re-import). Bodies come from the response's
+    ``example``/``examples``, or are synthesized from its schema (see
+    ``domains.examples``); ``seed`` makes the synthesized values differ.
+
     Args:
         collection: Collection model instance
-        yaml_content: OpenAPI YAML content
+        yaml_content: OpenAPI YAML or JSON content (text or bytes)
+        seed: Seed for synthesized example values
+        document: ``yaml_content`` already parsed, if the caller has it
 
     Returns:
         Tuple of (success, message)
     """
-    from .models import MockEndpoint
+    from .changes import stamp_responses
+    from .models import Collection, EndpointResponse, MockEndpoint
+    from .routing import invalidate_route_tables
 
     try:
-        schema = yaml.safe_load(yaml_content)
+        # Parsed once; validation and import share the document
+        schema = document
+        if schema is None:
+            schema = parse_openapi_document(yaml_content)
 
         # Validate schema
-        is_valid, error = validate_openapi_schema(yaml_content)
+        is_valid, error = check_openapi_document(schema)
         if not is_valid:
             return False, error
+        if isinstance(yaml_content, bytes):
+            yaml_content = yaml_content.decode("utf-8-sig")
 
         # Update collection info if provided
         if "info" in schema:
@@ -174,9 +254,13 @@ def import_openapi_schema(collection, yaml_content: str) -> tuple[bool, str]:
         # Import endpoints from paths
         created_count = 0
         updated_count = 0
+        synthesizer = ExampleSynthesizer(schema, seed)
+        new_variants = []
+        changed_variants = []
+        now = timezone.now()
 
-        if "paths" in schema:
-            for path, methods in schema["paths"].items():
+        with transaction.atomic():
+            for path, methods in (schema.get("paths") or {}).items():
                 # Clean up path
                 path = path.strip("/")
 
@@ -209,43 +293,106 @@ def import_openapi_schema(collection, yaml_content: str) -> tuple[bool, str]:
                         )
                         updated_count += 1
 
-                    # Get response info from first response
-                    if "responses" in operation:
-                        for status_code, response_data in operation[
-                            "responses"
-                        ].items():
-                            try:
-                                status = int(status_code)
-                                endpoint.response_status = status
-
-                                # Get content type and body
-                                if "content" in response_data:
-                                    for content_type, content_data in response_data[
-                                        "content"
-                                    ].items():
-                                        endpoint.content_type = content_type
-                                        if "example" in content_data:
-                                            import json
-
-                                            if content_type == "application/json":
-                                                endpoint.response_body = json.dumps(
-                                                    content_data["example"], indent=2
-                                                )
-                                            else:
-                                                endpoint.response_body = str(
-                                                    content_data["example"]
-                                                )
-                                        break
-                                break
-                            except (ValueError, KeyError):
-                                continue
-
+                    responses = _declared_responses(
+                        synthesizer, method.upper(), path, operation
+                    )
+                    if responses:
+                        first = responses[0]
+                        endpoint.response_status = first["response_status"]
+                        endpoint.content_type = first["content_type"]
+                        endpoint.response_body = first["response_body"]
                     endpoint.save()
 
-        message = f"Successfully imported schema. Created {created_count} endpoints, updated {updated_count} endpoints."
+                    existing = {}
+                    if not created:
+                        for variant in endpoint.responses.all():
+                            existing.setdefault(variant.response_status, variant)
+                    for position, fields in enumerate(responses[1:], start=1):
+                        variant = existing.get(fields["response_status"])
+                        if variant is None:
+                            new_variants.append(
+                                EndpointResponse(
+                                    endpoint=endpoint, position=position, **fields
+                                )
+                            )
+                        else:
+                            for name, value in fields.items():
+                                setattr(variant, name, value)
+                            variant.updated_at = now
+                            changed_variants.append(variant)
+
+            # Variants are written in bulk, which sends no signals
+            EndpointResponse.objects.bulk_create(new_variants, batch_size=500)
+            # bulk_update skips auto_now, so updated_at is set above
+            EndpointResponse.objects.bulk_update(
+                changed_variants, [*RESPONSE_FIELDS, "updated_at"], batch_size=500
+            )
+            if new_variants or changed_variants:
+                Collection.bump_config_version(collection.pk)
+                # Only the variants written here changed
+                ids = [variant.pk for variant in (*new_variants, *changed_variants)]
+                for start in range(0, len(ids), 500):
+                    stamp_responses(
+                        EndpointResponse.objects.filter(pk__in=ids[start : start + 500])
+                    )
+        invalidate_route_tables(collection_id=collection.pk)
+
+        message = f"Successfully imported schema. Created {created_count} endpoints, updated {updated_count} endpoints, with {len(new_variants) + len(changed_variants)} extra responses."
         return True, message
 
     except yaml.YAMLError as e:
         return False, f"Invalid YAML: {str(e)}"
     except Exception as e:
         return False, f"Import error: {str(e)}"
+
+
+# EndpointResponse fields set by import_openapi_schema
+RESPONSE_FIELDS = (
+    "name",
+    "description",
+    "response_status",
+    "content_type",
+    "response_body",
+)
+
+
+def _declared_responses(synthesizer, method, path, operation):
+    """The mock fields of each response of an operation with a numeric status."""
+    responses = []
+    for status_code, response in (operation.get("responses") or {}).items():
+        try:
+            status = int(status_code)
+        except ValueError:
+            continue  # "default" and "2XX" ranges
+        response = synthesizer.deref(response) or {}
+        content = response.get("content") or {}
+        # Prefer JSON when several media types are offered
+        content_type = next(
+            (media for media in content if media.split(";")[0] == "application/json"),
+            next(iter(content), "application/json"),
+        )
+        if content:
+            example = synthesizer.media_example(
+                content[content_type], f"{method} /{path} {status}"
+            )
+            if content_type.split(";")[0] == "application/json" or (
+                content_type.endswith("+json")
+            ):
+                body = json.dumps(example, indent=2)
+            elif isinstance(example, str):
+                body = example
+            else:
+                body = "" if example is None else json.dumps(example, indent=2)
+        else:
+            body = ""  # e.g. 204 No Content
+        description = response.get("description") or ""
+        responses.append(
+            {
+                "name": (description.splitlines() or [str(status)])[0][:200],
+                "description": description,
+                "response_status": status,
+                "content_type": content_type[:100],
+                "response_body": body,
+            }
+        )
+    return responses
@@ -0,0 +1,261 @@
+"""
+Prefork supervisor for the standalone mock server.
+
+The supervisor forks worker processes that each bind the same address with
+``SO_REUSEPORT``, so the kernel spreads connections across them. Workers map
+the same snapshot file (see ``snapshots``), so the route data and bodies
+live once in the page cache no matter how many workers run. Crashed
+workers are replaced, and configuration changes are rolled out one worker
+at a time: a replacement is started and ready before the old one drains.
+"""
+
+import logging
+import os
+import select
+import signal
+import socket
+import time
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+def reserve_port(host, port):
+    """
+    Bind (without listening) a ``SO_REUSEPORT`` socket on ``host:port``.
+
+    Keeping it open pins the port for the supervisor's lifetime, which also
+    resolves ``port=0`` to a concrete port shared by every worker.
+    """
+    if not hasattr(socket, "SO_REUSEPORT"):
+        raise OSError("SO_REUSEPORT is not supported on this platform")
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    return sock
+
+
+def listen_socket(host, port, backlog=1024):
+    """Create a listening socket that shares ``host:port`` with the others."""
+    sock = reserve_port(host, port)
+    sock.listen(backlog)
+    sock.setblocking(False)
+    return sock
+
+
+class Supervisor:
+    """
+    Run ``workers`` copies of ``worker`` in forked processes.
+
+    ``worker(ready)`` runs in the child and must call ``ready()`` once it
+    accepts connections; its return value is the exit status. ``prepare()``
+    runs in the supervisor before the first start and before every rolling
+    restart (e.g. to export a fresh snapshot). ``stamp()`` returns a value
+    that changes with the configuration; a change, or SIGHUP, triggers a
+    rolling restart. SIGTERM and SIGINT stop all workers.
+    """
+
+    def __init__(
+        self,
+        worker,
+        workers,
+        prepare=None,
+        stamp=None,
+        interval=1.0,
+        grace=10.0,
+        ready_timeout=30.0,
+        stdout=None,
+    ):
+        self.worker = worker
+        self.workers = workers
+        self.prepare = prepare
+        self.stamp = stamp
+        self.interval = interval
+        self.grace = grace
+        self.ready_timeout = ready_timeout
+        self.stdout = stdout
+        self.children = {}
+        self.retiring = {}
+        self.failures = 0
+        # Monotonic time before which crashed workers are not replaced
+        self.next_spawn = 0.0
+        self._reload = False
+        self._stop = False
+
+    def run(self):
+        """Supervise workers until SIGTERM or SIGINT."""
+        previous = {
+            signum: signal.signal(signum, self._on_signal)
+            for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT)
+        }
+        try:
+            # Read the stamp first so changes made during prepare() are seen
+            seen = self.stamp() if self.stamp is not None else None
+            if self.prepare is not None:
+                self.prepare()
+            for _ in range(self.workers):
+                self.spawn()
+
+            next_check = time.monotonic() + self.interval
+            while not self._stop:
+                self.reap()
+                if len(self.children) < self.workers and not self._stop:
+                    self.respawn()
+                if time.monotonic() >= next_check:
+                    next_check = time.monotonic() + self.interval
+                    if self.stamp is not None:
+                        try:
+                            stamp = self.stamp()
+                        except Exception:
+                            logger.exception("Configuration check failed")
+                            stamp = seen
+                        if stamp != seen:
+                            seen = stamp
+                            self._reload = True
+                if self._reload:
+                    self._reload = False
+                    self.roll()
+                time.sleep(0.05)
+        finally:
+            self.shutdown()
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+
+    def spawn(self):
+        """Fork one worker and wait until it reports ready."""
+        # Connections and threads do not survive fork(); start clean
+        connections.close_all()
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+                signal.signal(signum, signal.SIG_DFL)
+
+            def ready():
+                os.write(write_fd, b"1")
+                os.close(write_fd)
+
+            status = 1
+            try:
+                status = self.worker(ready) or 0
+            except BaseException:
+                logger.exception("Worker %d failed", os.getpid())
+            finally:
+                os._exit(status)
+
+        os.close(write_fd)
+        try:
+            readable, _, _ = select.select([read_fd], [], [], self.ready_timeout)
+            ready = bool(readable) and os.read(read_fd, 1) == b"1"
+        finally:
+            os.close(read_fd)
+        self.children[pid] = time.monotonic()
+        if ready:
+            self.log(f"Worker {pid} started")
+        else:
+            self.log(f"Worker {pid} did not become ready")
+        return pid, ready
+
+    def respawn(self):
+        # Back off when workers keep dying right after starting, without
+        # blocking the loop that handles signals and reloads
+        if time.monotonic() < self.next_spawn:
+            return
+        self.spawn()
+        if self.failures:
+            self.next_spawn = time.monotonic() + self.backoff()
+
+    def backoff(self):
+        return min(0.5 * 2 ** (self.failures - 1), 30)
+
+    def reap(self):
+        """Collect exited workers."""
+        while self.children or self.retiring:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if self.retiring.pop(pid, None) is not None:
+                continue
+            started = self.children.pop(pid, None)
+            if started is None:
+                continue
+            self.log(f"Worker {pid} exited ({self._describe(status)})")
+            if time.monotonic() - started < 5:
+                self.failures += 1
+                self.next_spawn = time.monotonic() + self.backoff()
+            else:
+                self.failures = 0
+                self.next_spawn = 0.0
+
+    def roll(self):
+        """Replace workers one at a time without dropping the listen queue."""
+        if self.prepare is not None:
+            try:
+                self.prepare()
+            except Exception:
+                logger.exception("Reload failed; keeping the current workers")
+                return
+        self.failures = 0
+        self.next_spawn = 0.0
+        for pid in list(self.children):
+            _, ready = self.spawn()
+            if not ready:
+                self.log("Replacement worker not ready; aborting rolling restart")
+                return
+            self.retire(pid)
+
+    def retire(self, pid):
+        """Ask a worker to stop accepting connections and drain."""
+        if self.children.pop(pid, None) is None:
+            return
+        self.retiring[pid] = time.monotonic()
+        self._kill(pid, signal.SIGTERM)
+
+    def shutdown(self):
+        """Stop every worker, waiting up to ``grace`` seconds."""
+        for pid in list(self.children):
+            self.retire(pid)
+        deadline = time.monotonic() + self.grace
+        while self.retiring and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.05)
+        for pid in list(self.retiring):
+            self._kill(pid, signal.SIGKILL)
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+            del self.retiring[pid]
+
+    def log(self, message):
+        if self.stdout is not None:
+            self.stdout.write(message)
+            self.stdout.flush()
+        else:
+            logger.info(message)
+
+    def _on_signal(self, signum, frame):
+        if signum == signal.SIGHUP:
+            self._reload = True
+        else:
+            self._stop = True
+
+    @staticmethod
+    def _kill(pid, signum):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    @staticmethod
+    def _describe(status):
+        if os.WIFSIGNALED(status):
+            return f"signal {os.WTERMSIG(status)}"
+        return f"status {os.waitstatus_to_exitcode(status)}"
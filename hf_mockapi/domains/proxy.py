@@ -0,0 +1,443 @@
+"""
+Forwarding of unmatched mock requests to an upstream, and recording.
+
+A collection in ``passthrough`` or ``record`` mode sends requests that match
+no mock to its ``upstream_url`` and streams the answer back. In ``record``
+mode, responses selected by ``Collection.record_filters`` also become mocks:
+a new ``MockEndpoint``, or an ``EndpointResponse`` for an endpoint that
+already exists (inactive, or recorded concurrently). Identical responses
+are recorded once.
+
+Upstream connections are HTTP/1.1 keep-alive connections held in a
+per-process pool and shared by all threads.
+"""
+
+import hashlib
+import http.client
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from urllib.parse import urlsplit
+from wsgiref.util import is_hop_by_hop
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from .engine import MockResult
+from .models import Collection, EndpointResponse, MockEndpoint
+
+logger = logging.getLogger(__name__)
+
+# Bodies are streamed in pieces of this size
+CHUNK_SIZE = 64 * 1024
+
+# Request bodies larger than this are streamed to the upstream (and a
+# request on a stale pooled connection is then not retried)
+STREAM_REQUEST_BODY_SIZE = 64 * 1024
+
+# Default of record_filters["max_body_bytes"]
+DEFAULT_RECORD_MAX_BODY = 1024 * 1024
+
+# Response headers that the mock sets itself, or that describe one response
+NOT_RECORDED_HEADERS = {
+    "content-type",
+    "content-length",
+    "content-encoding",
+    "date",
+    "server",
+    "etag",
+    "last-modified",
+    "set-cookie",
+    "vary",
+    "age",
+}
+
+
+@dataclass(frozen=True)
+class ProxyPolicy:
+    """Proxy settings of a collection, resolved once per route table build."""
+
+    mode: str
+    upstream: str
+    methods: frozenset
+    include: tuple
+    exclude: tuple
+    statuses: tuple
+    max_body_bytes: int
+
+    @classmethod
+    def for_collection(cls, collection):
+        """Build the policy of a Collection, or None when it does not proxy."""
+        if collection.proxy_mode == Collection.PROXY_OFF or not collection.upstream_url:
+            return None
+        filters = collection.record_filters or {}
+        methods = filters.get("methods") or dict(MockEndpoint.HTTP_METHODS)
+        return cls(
+            mode=collection.proxy_mode,
+            upstream=collection.upstream_url.rstrip("/"),
+            methods=frozenset(method.upper() for method in methods),
+            include=tuple(filters.get("include") or ["*"]),
+            exclude=tuple(filters.get("exclude") or []),
+            statuses=tuple(filters.get("statuses") or ["2xx"]),
+            max_body_bytes=filters.get("max_body_bytes", DEFAULT_RECORD_MAX_BODY),
+        )
+
+    @property
+    def recording(self):
+        return self.mode == Collection.PROXY_RECORD
+
+    def url(self, path, query=""):
+        """The upstream URL of a mock path."""
+        url = f"{self.upstream}/{path}"
+        return f"{url}?{query}" if query else url
+
+    def records(self, method, path, status, content_length=None):
+        """Whether a response is recorded under the filters."""
+        if not self.recording:
+            return False
+        if method not in self.methods or method not in dict(MockEndpoint.HTTP_METHODS):
+            return False
+        if not any(fnmatchcase(path, pattern) for pattern in self.include):
+            return False
+        if any(fnmatchcase(path, pattern) for pattern in self.exclude):
+            return False
+        code = str(status)
+        if not any(
+            pattern == code or pattern == f"{code[0]}xx" for pattern in self.statuses
+        ):
+            return False
+        return content_length is None or content_length <= self.max_body_bytes
+
+
+class UpstreamPool:
+    """
+    Keep-alive connections to upstream hosts, at most ``max_idle`` idle
+    connections per host.
+    """
+
+    def __init__(self, max_idle=10, timeout=30.0):
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def request(self, method, url, headers, body=None):
+        """
+        Send a request and return its ``UpstreamResponse`` once the status
+        line and headers have arrived.
+
+        A pooled connection the upstream closed in the meantime is replaced
+        and the request sent again, unless the body was a stream.
+        """
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+        while True:
+            connection, reused = self.acquire(key)
+            try:
+                connection.request(method, target, body=body, headers=headers)
+                response = connection.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionError):
+                connection.close()
+                if reused and not hasattr(body, "read"):
+                    continue
+                raise
+            except Exception:
+                connection.close()
+                raise
+            return UpstreamResponse(self, key, connection, response)
+
+    def acquire(self, key):
+        """Return ``(connection, reused)``."""
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        scheme, netloc = key
+        connection_class = (
+            http.client.HTTPSConnection
+            if scheme == "https"
+            else http.client.HTTPConnection
+        )
+        return connection_class(netloc, timeout=self.timeout), False
+
+    def release(self, key, connection):
+        """Put a connection whose response was read completely back."""
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def clear(self):
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+
+class UpstreamResponse:
+    """
+    A response being read from the upstream.
+
+    Iterating streams the body and then returns the connection to the pool;
+    closing a response that was not read to the end drops its connection.
+    """
+
+    def __init__(self, pool, key, connection, response):
+        self.pool = pool
+        self.key = key
+        self.connection = connection
+        self.response = response
+        self.status = response.status
+        self.headers = response.getheaders()
+        self._released = False
+
+    def header(self, name, default=None):
+        return self.response.getheader(name, default)
+
+    @property
+    def content_length(self):
+        try:
+            return int(self.header("Content-Length"))
+        except (TypeError, ValueError):
+            return None
+
+    def __iter__(self):
+        while True:
+            chunk = self.response.read1(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+        self.release()
+
+    def release(self):
+        if self._released:
+            return
+        self._released = True
+        if self.response.will_close:
+            self.connection.close()
+        else:
+            self.pool.release(self.key, self.connection)
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            self.connection.close()
+
+
+class RecordingStream:
+    """
+    Stream an upstream response and pass the body to ``record`` once it was
+    read completely (unless it turned out larger than ``limit``).
+    ``done`` is called when the stream is closed.
+    """
+
+    def __init__(self, upstream, limit, record, done):
+        self.upstream = upstream
+        self.limit = limit
+        self.record = record
+        self.done = done
+
+    def __iter__(self):
+        chunks = []
+        size = 0
+        for chunk in self.upstream:
+            if chunks is not None:
+                size += len(chunk)
+                if size <= self.limit:
+                    chunks.append(chunk)
+                else:
+                    chunks = None
+            yield chunk
+        if chunks is not None:
+            try:
+                self.record(b"".join(chunks))
+            except Exception:
+                logger.exception("Could not record %s", self.upstream.key)
+
+    def close(self):
+        self.upstream.close()
+        if self.done is not None:
+            self.done()
+            self.done = None
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_recording = set()
+_recording_lock = threading.Lock()
+
+
+def get_pool():
+    """The process-wide ``UpstreamPool``."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = UpstreamPool(
+                max_idle=getattr(settings, "MOCKAPI_PROXY_POOL_SIZE", 10),
+                timeout=getattr(settings, "MOCKAPI_PROXY_TIMEOUT", 30),
+            )
+        return _pool
+
+
+def forward(policy, method, path, query, headers, body=None, identity=False):
+    """
+    Send a request to the upstream of ``policy``.
+
+    ``headers`` are the client's request headers; hop-by-hop headers and
+    ``Host`` are dropped. ``identity`` asks for an uncompressed body.
+    """
+    upstream_headers = {
+        name: value
+        for name, value in headers.items()
+        if not is_hop_by_hop(name) and name.lower() != "host"
+    }
+    if identity:
+        upstream_headers = {
+            name: value
+            for name, value in upstream_headers.items()
+            if name.lower() != "accept-encoding"
+        }
+        upstream_headers["Accept-Encoding"] = "identity"
+    return get_pool().request(method, policy.url(path, query), upstream_headers, body)
+
+
+def response_headers(upstream, cors_headers):
+    """Upstream response headers to send on, with the collection's CORS."""
+    headers = {
+        name: value for name, value in upstream.headers if not is_hop_by_hop(name)
+    }
+    if not any(name.lower() == "access-control-allow-origin" for name in headers):
+        headers.update(cors_headers)
+    return headers
+
+
+def proxy_body(table, method, path, upstream):
+    """
+    The body iterable of a proxied response: the upstream response itself,
+    or a ``RecordingStream`` when it is to be recorded.
+
+    Only one request per method and path is recorded at a time in a
+    process; the database keeps one endpoint per method and path.
+    """
+    policy = table.proxy
+    if upstream.header("Content-Encoding", "identity") != "identity":
+        return upstream
+    if not policy.records(method, path, upstream.status, upstream.content_length):
+        return upstream
+
+    key = (table.collection_id, method, path)
+    with _recording_lock:
+        if key in _recording:
+            return upstream
+        _recording.add(key)
+
+    def record_body(body):
+        record(table, method, path, upstream.status, upstream.headers, body)
+
+    def done():
+        with _recording_lock:
+            _recording.discard(key)
+
+    return RecordingStream(upstream, policy.max_body_bytes, record_body, done)
+
+
+def record(table, method, path, status, headers, body):
+    """
+    Save an upstream response as a mock; returns the created endpoint or
+    response, or None when an identical one exists.
+
+    Binary bodies are stored under a name derived from their digest, after
+    the duplicate check, and only when no file of that name exists yet.
+    """
+    values = {name.lower(): value for name, value in headers}
+    try:
+        text = body.decode("utf-8")
+        file_name = ""
+    except UnicodeDecodeError:
+        # Binary bodies are served from a file
+        text = ""
+        file_name = f"mock_bodies/recorded-{hashlib.sha1(body).hexdigest()[:20]}"
+    fields = {
+        "response_status": status,
+        "content_type": values.get("content-type", "application/octet-stream")[:100],
+        "response_body": text,
+        "response_file": file_name,
+        "custom_headers": {
+            name: value
+            for name, value in headers
+            if name.lower() not in NOT_RECORDED_HEADERS and not is_hop_by_hop(name)
+        },
+    }
+
+    with transaction.atomic():
+        endpoint = MockEndpoint.objects.filter(
+            collection_id=table.collection_id, path=path, http_method=method
+        ).first()
+        existing = [endpoint, *endpoint.responses.all()] if endpoint else []
+        signature = _signature(fields)
+        if any(_signature(vars(obj)) == signature for obj in existing):
+            return None
+
+        if file_name:
+            fields["response_file"] = _store_body(file_name, body)
+        if endpoint is None:
+            endpoint, created = MockEndpoint.objects.get_or_create(
+                collection_id=table.collection_id,
+                path=path,
+                http_method=method,
+                defaults={
+                    "display_name": f"{method} /{path}"[:255],
+                    "description": f"Recorded from {table.proxy.url(path)}",
+                    **fields,
+                },
+            )
+            if created:
+                return endpoint
+            # Recorded by another process in the meantime
+            existing = [endpoint, *endpoint.responses.all()]
+            if any(_signature(vars(obj)) == signature for obj in existing):
+                return None
+        return EndpointResponse.objects.create(
+            endpoint=endpoint,
+            name=f"Recorded {status}",
+            position=len(existing),
+            **fields,
+        )
+
+
+def _store_body(name, body):
+    """Save a recorded body under ``name`` unless that file exists already."""
+    if default_storage.exists(name):
+        return name
+    return default_storage.save(name, ContentFile(body))
+
+
+def upstream_error_result(table, error, origin=None):
+    """JSON 502 for an upstream that could not be reached."""
+    body = json.dumps(
+        {"error": "Upstream request failed", "details": str(error) or repr(error)}
+    ).encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+    headers.update(table.cors.response_headers(origin))
+    return MockResult(status=502, headers=headers, body=body, log_body=body)
+
+
+def _signature(fields):
+    response_file = fields["response_file"]
+    return (
+        fields["response_status"],
+        fields["content_type"],
+        fields["response_body"],
+        getattr(response_file, "name", response_file) or "",
+    )
@@ -0,0 +1,108 @@
+"""
+Collection clones and releases.
+
+A clone copies a collection with its endpoints and responses in a few bulk
+statements. A release freezes what a collection serves, bodies included,
+under the next number; it is served at ``/{slug}@{number}/`` with
+``Cache-Control: immutable``, and pinning it (``Collection.pinned_release``)
+serves it at ``/{slug}/`` too, which is how a collection is rolled back.
+Response files are referenced by name, not copied.
+"""
+
+from django.db import transaction
+from django.db.models import Max
+
+from .changes import stamp_endpoints, stamp_responses
+from .models import (Collection, CollectionRelease, EndpointResponse,
+                     MockEndpoint)
+from .routing import build_route_table, release_resources, release_routes
+
+# Collection fields copied by clone_collection
+CLONED_FIELDS = (
+    "description",
+    "openapi_schema",
+    "cors_enabled",
+    "cors_allowed_origins",
+    "cors_allowed_headers",
+    "cors_allow_credentials",
+    "cors_max_age",
+    "log_sink",
+    "proxy_mode",
+    "upstream_url",
+    "record_filters",
+)
+
+
+def clone_collection(source, slug, name=None, user=None):
+    """
+    Copy ``source`` and its endpoints and responses to a new collection.
+
+    Runs a fixed number of statements however large the collection is
+    (bulk inserts are batched by the database backend).
+    """
+    with transaction.atomic():
+        clone = Collection.objects.create(
+            slug=slug,
+            name=name or source.name,
+            created_by=user,
+            **{field: getattr(source, field) for field in CLONED_FIELDS},
+        )
+
+        endpoints = list(source.endpoints.order_by("pk"))
+        originals = [endpoint.pk for endpoint in endpoints]
+        for endpoint in endpoints:
+            endpoint.pk = None
+            endpoint._state.adding = True
+            endpoint.collection = clone
+        MockEndpoint.objects.bulk_create(endpoints)
+        new_ids = dict(zip(originals, (endpoint.pk for endpoint in endpoints)))
+
+        responses = list(EndpointResponse.objects.filter(endpoint__collection=source))
+        for response in responses:
+            response.pk = None
+            response._state.adding = True
+            response.endpoint_id = new_ids[response.endpoint_id]
+        EndpointResponse.objects.bulk_create(responses)
+
+        # Bulk inserts send no signals
+        Collection.bump_config_version(clone.pk)
+        stamp_endpoints(MockEndpoint.objects.filter(collection=clone))
+        stamp_responses(EndpointResponse.objects.filter(endpoint__collection=clone))
+    clone.refresh_from_db(fields=["config_version"])
+    return clone
+
+
+def create_release(collection, notes="", user=None):
+    """Freeze the live routes of ``collection`` as its next release."""
+    with transaction.atomic():
+        # Lock the collection so concurrent releases get distinct numbers
+        collection = Collection.objects.select_for_update().get(pk=collection.pk)
+        table = build_route_table(collection, live=True)
+        last = collection.releases.aggregate(last=Max("number"))["last"] or 0
+        # Servers that preload releases (serve) reload the collection
+        Collection.bump_config_version(collection.pk)
+        return CollectionRelease.objects.create(
+            collection=collection,
+            number=last + 1,
+            notes=notes,
+            routes=release_routes(table),
+            resources=release_resources(table),
+            cors=[
+                table.cors.enabled,
+                list(table.cors.allowed_origins),
+                list(table.cors.allowed_headers),
+                table.cors.allow_credentials,
+                table.cors.max_age,
+            ],
+            created_by=user,
+        )
+
+
+def pin_release(collection, release):
+    """
+    Serve ``release`` at ``/{slug}/`` (rollback), or the live endpoints
+    again when ``release`` is None.
+    """
+    collection.pinned_release = release
+    # Bumps config_version, so every worker switches within a check interval
+    collection.save(update_fields=["pinned_release", "updated_at"])
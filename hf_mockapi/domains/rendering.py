@@ -0,0 +1,105 @@
+"""Pre-rendered mock response bodies and their compressed variants."""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .compression import CODECS, build_variants, compress, negotiate_encoding
+
+
+@dataclass(frozen=True)
+class RenderedBody:
+    """An encoded response body plus its precomputed compressed variants."""
+
+    body: bytes
+    variants: dict = field(default_factory=dict)
+    forced_coding: str = ""
+    digest: str = ""
+
+    def __post_init__(self):
+        if not self.digest:
+            digest = hashlib.blake2b(self.body, digest_size=16).hexdigest()
+            object.__setattr__(self, "digest", digest)
+
+    @property
+    def negotiable(self):
+        """Whether the served representation depends on Accept-Encoding."""
+        return bool(self.variants) and not self.forced_coding
+
+    def etag(self, coding=None):
+        """Strong ETag of the representation served with ``coding``."""
+        if coding:
+            return f'"{self.digest}-{coding}"'
+        return f'"{self.digest}"'
+
+    def select(self, accept_encoding):
+        """Return the ``(coding, payload)`` pair to send for a request."""
+        if self.forced_coding:
+            return self.forced_coding, self.variants[self.forced_coding]
+        coding = negotiate_encoding(accept_encoding, self.variants)
+        if coding is None:
+            return None, self.body
+        return coding, self.variants[coding]
+
+
+def encode_body(response_body, content_type):
+    """
+    Encode a stored body exactly as the mock handler sends it.
+
+    JSON bodies are re-serialized the way ``JsonResponse`` does; anything
+    else (including invalid JSON) is sent as-is.
+    """
+    if content_type == "application/json":
+        try:
+            data = json.loads(response_body)
+        except json.JSONDecodeError:
+            pass
+        else:
+            return json.dumps(data, cls=DjangoJSONEncoder).encode("utf-8")
+    return response_body.encode("utf-8")
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def render_body(source, content_encoding="", enable_compression=True):
+    """
+    Render the body of a route's response (see ``routing.ResponseSpec``).
+
+    Results are cached per row version (``source.cache_key`` includes
+    ``updated_at``), so the JSON re-serialization and compression run once
+    per edit rather than on every request. A ``content_encoding`` naming a
+    supported coding forces that coding; otherwise variants for every
+    available coding are negotiated.
+    """
+    if source.rendered is not None:
+        return source.rendered
+
+    key = (source.cache_key, content_encoding, enable_compression)
+    with _cache_lock:
+        rendered = _cache.get(key)
+        if rendered is not None:
+            _cache.move_to_end(key)
+            return rendered
+
+    body = encode_body(source.response_body, source.content_type)
+    if content_encoding in CODECS:
+        variants = {content_encoding: compress(body, content_encoding)}
+        rendered = RenderedBody(body, variants, content_encoding)
+    elif enable_compression and not content_encoding:
+        rendered = RenderedBody(body, build_variants(body))
+    else:
+        rendered = RenderedBody(body)
+
+    with _cache_lock:
+        _cache[key] = rendered
+        max_size = getattr(settings, "MOCKAPI_RENDER_CACHE_SIZE", 1024)
+        while len(_cache) > max_size:
+            _cache.popitem(last=False)
+    return rendered
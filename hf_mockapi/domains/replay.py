@@ -0,0 +1,336 @@
+"""
+Replay of logged mock traffic, for regression checks.
+
+Requests recorded in ``RequestLog`` (or exported as NDJSON by
+``export_request_logs``) are sent again to the current configuration of a
+collection, and each answer is compared with the logged one: status, body
+(JSON bodies as values, so formatting does not count) and the response
+headers that were logged.
+
+Requests go either through the engine in this process (``InProcessTarget``,
+the same code path as ``serve``, without delays or logging) or over HTTP to
+a running server (``HttpTarget``). ``replay`` sends them from a thread pool,
+optionally paced to a fixed rate, and reads its source lazily, so any number
+of logs can be replayed.
+"""
+
+import difflib
+import json
+import math
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from urllib.parse import quote, urlencode
+from wsgiref.util import is_hop_by_hop
+
+from django.utils.datastructures import CaseInsensitiveMapping
+from logger.export import EXPORT_FIELDS, iter_rows
+
+from .compression import decompress
+from .engine import (MOCK_PATH_RE, build_result, logged_body, match_route,
+                     not_found_result, options_result)
+from .proxy import UpstreamPool
+
+# Response headers that differ between runs or servers by nature. Validators
+# follow the exact body bytes and edit time; the body itself is compared.
+IGNORED_HEADERS = {
+    "connection",
+    "content-length",
+    "date",
+    "etag",
+    "keep-alive",
+    "last-modified",
+    "server",
+    "transfer-encoding",
+    "vary",
+}
+
+# Changed bodies are reported with at most this many diff lines
+DIFF_LINES = 20
+
+
+@dataclass
+class LoggedExchange:
+    """A logged request and the answer it got."""
+
+    id: int
+    method: str
+    path: str  # Inside the collection, without the slug
+    query: dict  # Name to list of values
+    headers: dict
+    body: bytes
+    status: int
+    response_headers: dict
+    response_body: str
+    response_time_ms: int = 0
+
+    @classmethod
+    def from_log(cls, data):
+        """Build from a dict of ``EXPORT_FIELDS`` (a row or an NDJSON line)."""
+        path = data.get("path") or ""
+        match = MOCK_PATH_RE.match(path)
+        query = {
+            name: values if isinstance(values, list) else [values]
+            for name, values in (data.get("query_params") or {}).items()
+        }
+        return cls(
+            id=data.get("id"),
+            method=data["method"],
+            path=(match["endpoint_path"] if match else path).strip("/"),
+            query=query,
+            headers=data.get("request_headers") or {},
+            body=(data.get("request_body") or "").encode("utf-8"),
+            status=data["response_status"],
+            response_headers=data.get("response_headers") or {},
+            response_body=data.get("response_body") or "",
+            response_time_ms=data.get("response_time_ms") or 0,
+        )
+
+
+def logged_exchanges(queryset, chunk_size=2000):
+    """The exchanges of a ``RequestLog`` queryset, in primary key order."""
+    for row in iter_rows(queryset, chunk_size):
+        yield LoggedExchange.from_log(dict(zip(EXPORT_FIELDS, row)))
+
+
+def ndjson_exchanges(lines):
+    """The exchanges of exported NDJSON lines."""
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            yield LoggedExchange.from_log(json.loads(line))
+        except (ValueError, KeyError, TypeError, AttributeError) as exc:
+            raise ValueError(f"line {number}: {exc}") from exc
+
+
+class InProcessTarget:
+    """
+    Answer through the engine with a route table, as ``serve`` does.
+
+    Response delays are not applied and nothing is logged. Requests that
+    match no mock get the 404 answer, even when the collection proxies.
+    """
+
+    def __init__(self, table):
+        self.table = table
+
+    def send(self, exchange):
+        """Return ``(status, headers, body)`` with the body as logs store it."""
+        table = self.table
+        headers = CaseInsensitiveMapping(exchange.headers)
+        route = match_route(table, exchange.method, exchange.path)
+        if route is None:
+            if exchange.method == "OPTIONS" and table.allowed_methods(exchange.path):
+                result = options_result(table, exchange.path, headers)
+            else:
+                result = not_found_result(
+                    table, exchange.method, exchange.path, headers.get("Origin")
+                )
+        else:
+            result = build_result(
+                table,
+                route,
+                exchange.method,
+                headers,
+                exchange.path,
+                exchange.query,
+                exchange.body,
+            )
+        return result.status, result.headers, logged_body(result)
+
+
+class HttpTarget:
+    """
+    Send requests to a running server at ``base_url`` (``runserver``,
+    ``serve`` or a deployment) over pooled keep-alive connections.
+    """
+
+    def __init__(self, base_url, slug, pool_size=10, timeout=30.0):
+        self.base_url = base_url.rstrip("/")
+        self.slug = slug
+        self.pool = UpstreamPool(max_idle=pool_size, timeout=timeout)
+
+    def send(self, exchange):
+        url = f"{self.base_url}/{self.slug}/{quote(exchange.path)}"
+        if exchange.query:
+            url = f"{url}?{urlencode(exchange.query, doseq=True)}"
+        headers = {
+            name: value
+            for name, value in exchange.headers.items()
+            if not is_hop_by_hop(name)
+            and name.lower() not in ("host", "content-length")
+        }
+        response = self.pool.request(
+            exchange.method, url, headers, exchange.body or None
+        )
+        # Logs hold the body before content coding
+        body = decompress(b"".join(response), response.header("Content-Encoding") or "")
+        return response.status, dict(response.headers), body.decode("utf-8", "replace")
+
+    def close(self):
+        self.pool.clear()
+
+
+@dataclass
+class ReplayReport:
+    """Outcome of a replay: counts, the changes found and latencies."""
+
+    max_diffs: int = 100
+    requests: int = 0
+    matched: int = 0
+    changed: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+    diffs: list = field(default_factory=list)
+    errors: list = field(default_factory=list)
+    latencies: list = field(default_factory=list)
+    logged_latencies: list = field(default_factory=list)
+
+    def add(self, exchange, changes, error, latency_ms):
+        self.requests += 1
+        self.logged_latencies.append(exchange.response_time_ms)
+        request = {"id": exchange.id, "method": exchange.method, "path": exchange.path}
+        if error is not None:
+            self.failed += 1
+            if len(self.errors) < self.max_diffs:
+                self.errors.append({**request, "error": error})
+            return
+        self.latencies.append(latency_ms)
+        if not changes:
+            self.matched += 1
+            return
+        self.changed += 1
+        if len(self.diffs) < self.max_diffs:
+            self.diffs.append({**request, **changes})
+
+    def as_dict(self):
+        return {
+            "requests": self.requests,
+            "matched": self.matched,
+            "changed": self.changed,
+            "failed": self.failed,
+            "elapsed": round(self.elapsed, 3),
+            "latency_ms": latency_stats(self.latencies),
+            "logged_latency_ms": latency_stats(self.logged_latencies),
+            "diffs": self.diffs,
+            "errors": self.errors,
+        }
+
+
+def replay(
+    exchanges, target, concurrency=8, rate=None, ignore_headers=(), max_diffs=100
+):
+    """
+    Send ``exchanges`` to ``target`` from ``concurrency`` threads and return
+    a ``ReplayReport``.
+
+    With ``rate`` (requests per second), requests start on a fixed schedule.
+    At most twice ``concurrency`` requests are queued, so the source is read
+    only as fast as the target answers.
+    """
+    ignored = IGNORED_HEADERS | {name.lower() for name in ignore_headers}
+    report = ReplayReport(max_diffs=max_diffs)
+    interval = 1.0 / rate if rate else 0.0
+    start = time.monotonic()
+    pending = set()
+
+    def collect(futures):
+        for future in futures:
+            report.add(*future.result())
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for index, exchange in enumerate(exchanges):
+            if interval:
+                delay = start + index * interval - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            if len(pending) >= concurrency * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending.add(pool.submit(_replay_one, target, exchange, ignored))
+        collect(wait(pending).done)
+    report.elapsed = time.monotonic() - start
+    return report
+
+
+def _replay_one(target, exchange, ignored):
+    started = time.perf_counter()
+    try:
+        status, headers, body = target.send(exchange)
+    except Exception as exc:  # Reported, so one bad request does not stop a run
+        return exchange, None, f"{type(exc).__name__}: {exc}", 0.0
+    latency_ms = (time.perf_counter() - started) * 1000
+    return exchange, compare(exchange, status, headers, body, ignored), None, latency_ms
+
+
+def compare(exchange, status, headers, body, ignored=IGNORED_HEADERS):
+    """
+    The differences between a logged answer and a new one, as a dict with
+    ``status``, ``headers`` and ``body`` keys for what changed.
+
+    Only headers that were logged are compared, since servers add their own.
+    """
+    changes = {}
+    if status != exchange.status:
+        changes["status"] = [exchange.status, status]
+
+    current = {name.lower(): str(value) for name, value in headers.items()}
+    changed_headers = {}
+    for name, value in exchange.response_headers.items():
+        if name.lower() in ignored:
+            continue
+        now = current.get(name.lower())
+        if now != str(value):
+            changed_headers[name] = [value, now]
+    if changed_headers:
+        changes["headers"] = changed_headers
+
+    diff = body_diff(exchange.response_body, body)
+    if diff:
+        changes["body"] = diff
+    return changes
+
+
+def body_diff(old, new):
+    """Unified diff lines of two bodies, or [] when they are equivalent."""
+    if old == new or _is_file_marker(old) and not _is_file_marker(new):
+        # Logged file bodies are "<file name>"; over HTTP the content arrives
+        return []
+    try:
+        old_value, new_value = json.loads(old), json.loads(new)
+    except ValueError:
+        old_lines, new_lines = old.splitlines(), new.splitlines()
+    else:
+        if old_value == new_value:
+            return []
+        old_lines = json.dumps(old_value, indent=2, sort_keys=True).splitlines()
+        new_lines = json.dumps(new_value, indent=2, sort_keys=True).splitlines()
+    diff = difflib.unified_diff(old_lines, new_lines, "logged", "now", lineterm="")
+    lines = list(diff)
+    if len(lines) > DIFF_LINES:
+        lines = lines[:DIFF_LINES] + [f"... {len(lines) - DIFF_LINES} more lines"]
+    return lines or ["(whitespace only)"]
+
+
+def latency_stats(values):
+    """Count, mean, percentiles (nearest rank) and maximum, in milliseconds."""
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def percentile(p):
+        return round(ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)], 3)
+
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 3),
+        "p50": percentile(50),
+        "p90": percentile(90),
+        "p99": percentile(99),
+        "max": round(ordered[-1], 3),
+    }
+
+
+def _is_file_marker(body):
+    return body.startswith("<file ") and body.endswith(">")
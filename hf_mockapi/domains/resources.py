@@ -0,0 +1,431 @@
+"""
+Stateful resource endpoints: in-memory CRUD stores.
+
+A ``MockEndpoint`` with ``endpoint_type = "resource"`` at path ``items``
+answers every method itself instead of with a fixed response::
+
+    GET    items              list (?field=value filters, ?limit=, ?offset=)
+    POST   items              create; an id is assigned unless given
+    GET    items/{id}         read
+    PUT    items/{id}         replace
+    PATCH  items/{id}         merge
+    DELETE items/{id}         delete
+    GET    items/_snapshot    the whole state; PUT restores one
+    POST   items/_reset       back to the seed records
+
+Records live in a ``ResourceStore`` per endpoint and process, indexed by id
+and by the fields listed in ``resource_config["indexes"]``. The endpoint's
+``response_body``, when it is a JSON array, seeds the store; seed records
+repeating an id are dropped. With ``resource_config["persist"]`` set, the
+state is also written to a file under ``MOCKAPI_RESOURCE_STATE_DIR`` after
+every change and loaded from it on startup; the database is never involved
+per request.
+"""
+
+import json
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+
+# Resource lists are never longer than this
+MAX_PAGE_SIZE = 1000
+
+# Query parameters that are not filters
+PAGINATION_PARAMS = ("limit", "offset")
+
+SNAPSHOT = "_snapshot"
+RESET = "_reset"
+
+# Methods answered at the resource path and at item paths
+METHODS = ("DELETE", "GET", "HEAD", "OPTIONS", "PATCH", "POST", "PUT")
+
+
+class ResourceError(Exception):
+    """A request the store cannot carry out; ``status`` is the HTTP status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass(frozen=True)
+class ResourceRoute:
+    """A resource endpoint compiled for request-time matching."""
+
+    endpoint_id: int
+    path: str
+    collection_slug: str
+    id_field: str
+    indexes: tuple
+    seed: str
+    persist: bool
+    page_size: int
+    custom_headers: dict
+    enable_request_logger: bool
+    response_delay: int
+    updated_at: datetime
+
+    def __str__(self):
+        return f"RESOURCE /{self.collection_slug}/{self.path}"
+
+    @classmethod
+    def from_endpoint(cls, endpoint, collection_slug):
+        config = endpoint.resource_config or {}
+        return cls(
+            endpoint_id=endpoint.pk,
+            path=endpoint.path.strip("/"),
+            collection_slug=collection_slug,
+            id_field=config.get("id_field", "id"),
+            indexes=tuple(config.get("indexes", ())),
+            seed=endpoint.response_body,
+            persist=config.get("persist", False),
+            page_size=min(config.get("page_size", 100), MAX_PAGE_SIZE),
+            custom_headers=endpoint.custom_headers or {},
+            enable_request_logger=endpoint.enable_request_logger,
+            response_delay=endpoint.response_delay,
+            updated_at=endpoint.updated_at,
+        )
+
+    def as_dict(self):
+        """Serialize for releases and snapshots (see ``from_dict``)."""
+        return {
+            "endpoint_id": self.endpoint_id,
+            "path": self.path,
+            "id_field": self.id_field,
+            "indexes": list(self.indexes),
+            "seed": self.seed,
+            "persist": self.persist,
+            "page_size": self.page_size,
+            "custom_headers": self.custom_headers,
+            "enable_request_logger": self.enable_request_logger,
+            "response_delay": self.response_delay,
+            "updated_at": self.updated_at.isoformat(),
+        }
+
+    @classmethod
+    def from_dict(cls, data, collection_slug, **overrides):
+        """Rebuild a route serialized by ``as_dict``."""
+        return cls(
+            **{
+                **data,
+                "collection_slug": collection_slug,
+                "indexes": tuple(data["indexes"]),
+                "updated_at": datetime.fromisoformat(data["updated_at"]),
+                **overrides,
+            }
+        )
+
+    @property
+    def signature(self):
+        """Settings that require a new store when changed."""
+        return (self.id_field, self.indexes, self.seed, self.persist)
+
+    def seed_records(self):
+        try:
+            records = json.loads(self.seed)
+        except ValueError:
+            return []
+        if not isinstance(records, list):
+            return []
+        return [record for record in records if isinstance(record, dict)]
+
+
+def record_key(value):
+    """Index key of a field value; query string values compare as text."""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, sort_keys=True, separators=(",", ":"))
+
+
+class ResourceStore:
+    """
+    Records of one resource, in insertion order, with an id index and
+    secondary indexes. Stored records are never modified in place, so they
+    can be serialized after the lock is released.
+    """
+
+    def __init__(self, id_field="id", indexes=(), seed=(), path=None):
+        self.id_field = id_field
+        self.index_fields = tuple(field for field in indexes if field != id_field)
+        self.path = Path(path) if path else None
+        self.lock = threading.RLock()
+        self.load({"records": []})
+        self.seed = []
+        for record in seed:
+            try:
+                self.insert(dict(record))
+            except ResourceError:
+                continue  # A seed record repeating an id is dropped
+            self.seed.append(record)
+        if self.path is not None and self.path.exists():
+            try:
+                with open(self.path, encoding="utf-8") as file_obj:
+                    self.load(json.load(file_obj))
+            except (ValueError, ResourceError):
+                pass  # An unreadable state file starts over from the seed
+
+    def load(self, snapshot):
+        """Replace the state with a snapshot (``{"records": [...]}`` or a list)."""
+        if isinstance(snapshot, list):
+            snapshot = {"records": snapshot}
+        records = snapshot.get("records") if isinstance(snapshot, dict) else None
+        if not isinstance(records, list) or not all(
+            isinstance(record, dict) for record in records
+        ):
+            raise ResourceError(400, "A snapshot is a list of objects")
+        with self.lock:
+            previous = dict(vars(self))
+            self.records = {}
+            self.order = {}
+            self.indexes = {field: {} for field in self.index_fields}
+            self.sequence = 0
+            self.next_id = 1
+            try:
+                for record in records:
+                    self.insert(dict(record))
+            except ResourceError:
+                vars(self).update(previous)  # Keep the current state
+                raise
+            next_id = snapshot.get("next_id")
+            if isinstance(next_id, int):
+                self.next_id = max(self.next_id, next_id)
+
+    def reset(self):
+        self.load({"records": self.seed})
+        self.save()
+
+    def snapshot(self):
+        with self.lock:
+            return {"next_id": self.next_id, "records": list(self.records.values())}
+
+    def restore(self, snapshot):
+        self.load(snapshot)
+        self.save()
+
+    def insert(self, record):
+        """Add a record, assigning the next id if it has none."""
+        if record.get(self.id_field) is None:
+            record[self.id_field] = self.next_id
+        record_id = record[self.id_field]
+        key = record_key(record_id)
+        if key in self.records:
+            raise ResourceError(409, f"{self.id_field} {key} already exists")
+        if isinstance(record_id, int) and not isinstance(record_id, bool):
+            self.next_id = max(self.next_id, record_id + 1)
+        self.records[key] = record
+        self.order[key] = self.sequence
+        self.sequence += 1
+        self.index(key, record)
+        return record
+
+    def index(self, key, record):
+        for field in self.index_fields:
+            if field in record:
+                value = record_key(record[field])
+                self.indexes[field].setdefault(value, set()).add(key)
+
+    def unindex(self, key, record):
+        for field in self.index_fields:
+            if field in record:
+                keys = self.indexes[field].get(record_key(record[field]))
+                if keys is not None:
+                    keys.discard(key)
+
+    def get(self, key):
+        record = self.records.get(key)
+        if record is None:
+            raise ResourceError(404, f"No record with {self.id_field} {key}")
+        return record
+
+    def create(self, data):
+        with self.lock:
+            record = self.insert(dict(data))
+            self.save()
+            return record
+
+    def replace(self, key, data, partial=False):
+        """Replace (or with ``partial``, merge into) a record; the id stays."""
+        with self.lock:
+            old = self.get(key)
+            record = {**old, **data} if partial else dict(data)
+            record[self.id_field] = old[self.id_field]
+            self.unindex(key, old)
+            self.records[key] = record
+            self.index(key, record)
+            self.save()
+            return record
+
+    def delete(self, key):
+        with self.lock:
+            record = self.get(key)
+            self.unindex(key, record)
+            del self.records[key]
+            del self.order[key]
+            self.save()
+
+    def list(self, filters, offset=0, limit=MAX_PAGE_SIZE):
+        """
+        Return ``(records, total)`` matching every ``field=value`` filter.
+
+        The id and indexed fields narrow the candidates through their
+        indexes; other fields are compared record by record.
+        """
+        with self.lock:
+            candidates = None
+            scanned = {}
+            for field, value in filters.items():
+                if field == self.id_field:
+                    keys = {value} if value in self.records else set()
+                elif field in self.indexes:
+                    keys = self.indexes[field].get(value, set())
+                else:
+                    scanned[field] = value
+                    continue
+                candidates = keys if candidates is None else candidates & keys
+
+            if candidates is None:
+                records = self.records.values()
+            else:
+                records = [
+                    self.records[key] for key in sorted(candidates, key=self.order.get)
+                ]
+            if scanned:
+                records = [
+                    record
+                    for record in records
+                    if all(
+                        field in record and record_key(record[field]) == value
+                        for field, value in scanned.items()
+                    )
+                ]
+            records = list(records)
+            return records[offset : offset + limit], len(records)
+
+    def save(self):
+        """Write the state to ``path`` (atomically), if the store persists."""
+        if self.path is None:
+            return
+        with self.lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temporary = self.path.with_suffix(".tmp")
+            with open(temporary, "w", encoding="utf-8") as file_obj:
+                json.dump(self.snapshot(), file_obj, separators=(",", ":"))
+            os.replace(temporary, self.path)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def state_path(endpoint_id):
+    directory = getattr(settings, "MOCKAPI_RESOURCE_STATE_DIR", "resource_state")
+    return Path(directory) / f"resource-{endpoint_id}.json"
+
+
+def get_store(resource):
+    """
+    The store of a resource endpoint in this process.
+
+    Kept across route table rebuilds; a new one is made (from the state
+    file, if the resource persists) when the resource settings change.
+    """
+    with _stores_lock:
+        entry = _stores.get(resource.endpoint_id)
+        if entry is None or entry[0] != resource.signature:
+            store = ResourceStore(
+                resource.id_field,
+                resource.indexes,
+                resource.seed_records(),
+                state_path(resource.endpoint_id) if resource.persist else None,
+            )
+            entry = _stores[resource.endpoint_id] = (resource.signature, store)
+        return entry[1]
+
+
+def discard_store(endpoint_id):
+    """Forget a deleted endpoint's state, including its state file."""
+    with _stores_lock:
+        _stores.pop(endpoint_id, None)
+    state_path(endpoint_id).unlink(missing_ok=True)
+
+
+def handle(resource, method, path, query, body):
+    """
+    Carry out a request on a resource; returns ``(status, data, headers)``
+    where ``data`` is JSON-serializable, or None for an empty body.
+    """
+    store = get_store(resource)
+    item = path[len(resource.path) :].strip("/")
+    try:
+        if item == SNAPSHOT:
+            if method in ("GET", "HEAD"):
+                return 200, store.snapshot(), {}
+            if method == "PUT":
+                store.restore(_json_body(body))
+                return 200, store.snapshot(), {}
+            return _not_allowed("GET, HEAD, PUT")
+        if item == RESET:
+            if method == "POST":
+                store.reset()
+                return 200, store.snapshot(), {}
+            return _not_allowed("POST")
+
+        if not item:
+            if method in ("GET", "HEAD"):
+                return _list(resource, store, query)
+            if method == "POST":
+                record = store.create(_json_object(body))
+                location = f"/{resource.collection_slug}/{resource.path}/"
+                location += record_key(record[store.id_field])
+                return 201, record, {"Location": location}
+            return _not_allowed("GET, HEAD, POST")
+
+        if method in ("GET", "HEAD"):
+            with store.lock:
+                return 200, store.get(item), {}
+        if method in ("PUT", "PATCH"):
+            record = store.replace(item, _json_object(body), partial=method == "PATCH")
+            return 200, record, {}
+        if method == "DELETE":
+            store.delete(item)
+            return 204, None, {}
+        return _not_allowed("DELETE, GET, HEAD, PATCH, PUT")
+    except ResourceError as error:
+        return error.status, {"error": str(error)}, {}
+
+
+def _list(resource, store, query):
+    try:
+        limit = int(query.get("limit", resource.page_size))
+        offset = int(query.get("offset", 0))
+        if limit < 0 or offset < 0:
+            raise ValueError
+    except ValueError:
+        raise ResourceError(400, "limit and offset must be non-negative integers")
+    filters = {
+        field: value for field, value in query.items() if field not in PAGINATION_PARAMS
+    }
+    records, total = store.list(filters, offset, min(limit, MAX_PAGE_SIZE))
+    return 200, records, {"X-Total-Count": str(total)}
+
+
+def _not_allowed(allow):
+    return 405, {"error": "Method not allowed"}, {"Allow": allow}
+
+
+def _json_body(body):
+    try:
+        return json.loads(body or b"null")
+    except ValueError:
+        raise ResourceError(400, "The request body is not valid JSON")
+
+
+def _json_object(body):
+    data = _json_body(body)
+    if not isinstance(data, dict):
+        raise ResourceError(400, "The request body must be a JSON object")
+    return data
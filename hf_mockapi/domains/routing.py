@@ -0,0 +1,407 @@
+"""In-memory route tables for serving mock collections."""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+
+from .cors import CorsPolicy
+from .models import Collection, CollectionRelease, EndpointResponse
+from .proxy import ProxyPolicy
+from .resources import METHODS as RESOURCE_METHODS
+from .resources import ResourceRoute
+from .validation import RequestValidator, validator_for_collection
+
+
+@dataclass(frozen=True)
+class ResponseSpec:
+    """The response a route answers with."""
+
+    cache_key: tuple
+    status: int
+    content_type: str
+    response_body: str
+    response_file: str
+    custom_headers: dict
+    updated_at: datetime
+    # Pre-encoded body (RenderedBody) for routes loaded from a snapshot
+    rendered: object = None
+
+    @classmethod
+    def from_instance(cls, instance):
+        """Build a spec from a MockEndpoint or EndpointResponse."""
+        return cls(
+            cache_key=(instance._meta.label, instance.pk, instance.updated_at),
+            status=instance.response_status,
+            content_type=instance.content_type,
+            response_body=instance.response_body,
+            response_file=instance.response_file.name or "",
+            custom_headers=instance.custom_headers or {},
+            updated_at=instance.updated_at,
+        )
+
+
+@dataclass(frozen=True)
+class Route:
+    """An active endpoint compiled for request-time matching."""
+
+    endpoint_id: int
+    method: str
+    path: str
+    collection_slug: str
+    response: ResponseSpec
+    content_encoding: str
+    enable_compression: bool
+    enable_conditional_requests: bool
+    enable_request_logger: bool
+    response_delay: int
+    updated_at: datetime
+
+    def __str__(self):
+        return f"{self.method} /{self.collection_slug}/{self.path}"
+
+    @property
+    def last_modified(self):
+        """Timestamp of the latest edit affecting the served representation."""
+        return max(self.updated_at, self.response.updated_at).timestamp()
+
+
+@dataclass
+class RouteTable:
+    """
+    All active routes of one collection, keyed by ``(method, path)``, and
+    its resource endpoints, keyed by path.
+    """
+
+    collection_id: int
+    slug: str
+    cors: CorsPolicy
+    routes: dict = field(default_factory=dict)
+    methods: dict = field(default_factory=dict)
+    resources: dict = field(default_factory=dict)
+    config_version: int = 0
+    log_sink: str = "database"
+    # Served at a release URL, whose responses never change
+    immutable: bool = False
+    # Where requests matching no route are forwarded (see domains.proxy)
+    proxy: ProxyPolicy = None
+    # Checks requests against the OpenAPI schema (see domains.validation)
+    validator: RequestValidator = None
+    validation_status: int = 400
+
+    def add(self, route):
+        self.routes[(route.method, route.path)] = route
+        self.methods.setdefault(route.path, set()).add(route.method)
+
+    def match(self, method, path):
+        """Return the route for ``method`` and ``path``, or None."""
+        return self.routes.get((method, path))
+
+    def match_resource(self, path):
+        """Return the resource answering ``path`` or its items, or None."""
+        if not self.resources:
+            return None
+        resource = self.resources.get(path)
+        if resource is None:
+            base, _, item = path.rpartition("/")
+            if item:
+                resource = self.resources.get(base)
+        return resource
+
+    def allowed_methods(self, path):
+        """Methods answered for ``path``, including automatic HEAD/OPTIONS."""
+        methods = self.methods.get(path)
+        if not methods:
+            return list(RESOURCE_METHODS) if self.match_resource(path) else []
+        allowed = set(methods) | {"OPTIONS"}
+        if "GET" in methods:
+            allowed.add("HEAD")
+        return sorted(allowed)
+
+
+def build_route_table(collection, live=False):
+    """
+    Compile the active endpoints of a collection (two queries).
+
+    A collection with a pinned release serves that release instead, unless
+    ``live`` is set.
+    """
+    if collection.pinned_release_id is not None and not live:
+        return release_table(collection.pinned_release, collection)
+
+    table = RouteTable(
+        collection_id=collection.pk,
+        slug=collection.slug,
+        cors=CorsPolicy.for_collection(collection),
+        config_version=collection.config_version,
+        log_sink=collection.log_sink,
+        proxy=ProxyPolicy.for_collection(collection),
+        validator=validator_for_collection(collection),
+        validation_status=collection.validation_status,
+    )
+
+    # Same choice as endpoint.responses.filter(is_default=True).first()
+    defaults = {}
+    for response in EndpointResponse.objects.filter(
+        endpoint__collection=collection, endpoint__is_active=True, is_default=True
+    ):
+        defaults.setdefault(response.endpoint_id, response)
+
+    for endpoint in collection.endpoints.filter(is_active=True):
+        if endpoint.endpoint_type == endpoint.RESOURCE:
+            resource = ResourceRoute.from_endpoint(endpoint, collection.slug)
+            table.resources[resource.path] = resource
+            continue
+        source = defaults.get(endpoint.pk, endpoint)
+        table.add(
+            Route(
+                endpoint_id=endpoint.pk,
+                method=endpoint.http_method,
+                path=endpoint.path.strip("/"),
+                collection_slug=collection.slug,
+                response=ResponseSpec.from_instance(source),
+                content_encoding=endpoint.content_encoding,
+                enable_compression=endpoint.enable_compression,
+                enable_conditional_requests=endpoint.enable_conditional_requests,
+                enable_request_logger=endpoint.enable_request_logger,
+                response_delay=endpoint.response_delay,
+                updated_at=endpoint.updated_at,
+            )
+        )
+    return table
+
+
+def release_routes(table):
+    """Serialize the routes of ``table`` for ``CollectionRelease.routes``."""
+    return [
+        {
+            "endpoint_id": route.endpoint_id,
+            "method": route.method,
+            "path": route.path,
+            "status": route.response.status,
+            "content_type": route.response.content_type,
+            "response_body": route.response.response_body,
+            "response_file": route.response.response_file,
+            "custom_headers": route.response.custom_headers,
+            "content_encoding": route.content_encoding,
+            "enable_compression": route.enable_compression,
+            "enable_conditional_requests": route.enable_conditional_requests,
+            "enable_request_logger": route.enable_request_logger,
+            "response_delay": route.response_delay,
+            "updated_at": route.updated_at.isoformat(),
+            "response_updated_at": route.response.updated_at.isoformat(),
+        }
+        for route in table.routes.values()
+    ]
+
+
+def release_resources(table):
+    """Serialize the resources of ``table`` for ``CollectionRelease.resources``."""
+    return [resource.as_dict() for resource in table.resources.values()]
+
+
+def release_table(release, collection=None, immutable=False):
+    """
+    Compile a ``CollectionRelease`` (one query).
+
+    Everything served comes from the release; the collection only supplies
+    the slug, log sink, upstream for requests matching no route and request
+    validation. Routes of endpoints deleted since the release are logged
+    without an endpoint.
+    """
+    collection = collection or release.collection
+    enabled, origins, headers, credentials, max_age = release.cors
+    table = RouteTable(
+        collection_id=collection.pk,
+        slug=collection.slug,
+        cors=CorsPolicy(enabled, tuple(origins), tuple(headers), credentials, max_age),
+        config_version=collection.config_version,
+        log_sink=collection.log_sink,
+        immutable=immutable,
+        proxy=ProxyPolicy.for_collection(collection),
+        validator=validator_for_collection(collection),
+        validation_status=collection.validation_status,
+    )
+    existing = set(collection.endpoints.values_list("pk", flat=True))
+    for row in release.routes:
+        endpoint_id = row["endpoint_id"]
+        table.add(
+            Route(
+                endpoint_id=endpoint_id if endpoint_id in existing else None,
+                method=row["method"],
+                path=row["path"],
+                collection_slug=collection.slug,
+                response=ResponseSpec(
+                    cache_key=("release", release.pk, row["method"], row["path"]),
+                    status=row["status"],
+                    content_type=row["content_type"],
+                    response_body=row["response_body"],
+                    response_file=row["response_file"],
+                    custom_headers=row["custom_headers"],
+                    updated_at=parse_datetime(row["response_updated_at"]),
+                ),
+                content_encoding=row["content_encoding"],
+                enable_compression=row["enable_compression"],
+                enable_conditional_requests=row["enable_conditional_requests"],
+                enable_request_logger=row["enable_request_logger"],
+                response_delay=row["response_delay"],
+                updated_at=parse_datetime(row["updated_at"]),
+            )
+        )
+    for row in release.resources:
+        endpoint_id = row["endpoint_id"]
+        resource = ResourceRoute.from_dict(
+            row,
+            collection.slug,
+            endpoint_id=endpoint_id if endpoint_id in existing else None,
+        )
+        table.resources[resource.path] = resource
+    return table
+
+
+def collection_tables(collection):
+    """
+    The tables served for a collection, as ``(key, table)`` pairs: its own
+    under the slug, and each release under ``"{slug}@{number}"``.
+    """
+    yield collection.slug, build_route_table(collection)
+    for release in collection.releases.all():
+        key = f"{collection.slug}@{release.number}"
+        yield key, release_table(release, collection, immutable=True)
+
+
+def load_route_tables(slugs=None):
+    """Build route tables for the given (or all) active collections and their releases."""
+    collections = Collection.objects.filter(is_active=True).defer("openapi_schema")
+    if slugs:
+        collections = collections.filter(slug__in=slugs)
+    return {
+        key: table
+        for collection in collections.prefetch_related("releases")
+        for key, table in collection_tables(collection)
+    }
+
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+def config_versions(slugs=None):
+    """Return ``{slug: config_version}`` of active collections (one query)."""
+    collections = Collection.objects.filter(is_active=True)
+    if slugs:
+        collections = collections.filter(slug__in=slugs)
+    return dict(collections.values_list("slug", "config_version"))
+
+
+def refresh_route_tables(tables, slugs=None):
+    """
+    Bring preloaded tables up to date with the database.
+
+    Only collections whose ``config_version`` changed are rebuilt, releases
+    included; returns ``tables`` itself when nothing changed.
+    """
+    versions = config_versions(slugs)
+    loaded = {
+        key.partition("@")[0]: table.config_version for key, table in tables.items()
+    }
+    changed = [
+        slug for slug, version in versions.items() if loaded.get(slug) != version
+    ]
+    if not changed and versions.keys() == loaded.keys():
+        return tables
+    fresh = {
+        key: table
+        for key, table in tables.items()
+        if key.partition("@")[0] in versions and key.partition("@")[0] not in changed
+    }
+    if changed:
+        fresh.update(load_route_tables(changed))
+    return fresh
+
+
+def get_route_table(slug):
+    """
+    Return the cached route table of an active collection, or None.
+
+    Tables are dropped after local edits (see ``signals``). Edits made by
+    other processes are noticed through ``Collection.config_version``: at
+    most every ``MOCKAPI_CONFIG_CHECK_INTERVAL_MS`` the cached version is
+    compared with the indexed row, and only a changed collection is rebuilt.
+    """
+
+    def build():
+        collection = (
+            Collection.objects.filter(slug=slug, is_active=True)
+            .select_related("pinned_release")
+            # Only loaded for collections that validate requests
+            .defer("openapi_schema")
+            .first()
+        )
+        return build_route_table(collection) if collection else None
+
+    return _cached_table(slug, slug, build)
+
+
+def get_release_table(slug, number):
+    """
+    Return the cached table of release ``number`` of a collection, or None.
+
+    The release itself never changes; the version check only notices a
+    deleted collection or release, and endpoints deleted since.
+    """
+
+    def build():
+        release = (
+            CollectionRelease.objects.filter(
+                collection__slug=slug, collection__is_active=True, number=number
+            )
+            .select_related("collection")
+            .first()
+        )
+        return release_table(release, immutable=True) if release else None
+
+    return _cached_table(f"{slug}@{number}", slug, build)
+
+
+def _cached_table(key, slug, build):
+    now = time.monotonic()
+    interval = getattr(settings, "MOCKAPI_CONFIG_CHECK_INTERVAL_MS", 500) / 1000
+    entry = _tables.get(key)
+    if entry is not None and now - entry[1] < interval:
+        return entry[0]
+
+    version = (
+        Collection.objects.filter(slug=slug, is_active=True)
+        .values_list("config_version", flat=True)
+        .first()
+    )
+    table = entry[0] if entry is not None else None
+    if version is None:
+        table = None
+    elif table is None or table.config_version != version:
+        table = build()
+    with _tables_lock:
+        # Misses are not cached: unknown slugs would pile up without bound
+        if table is None:
+            _tables.pop(key, None)
+        else:
+            _tables[key] = (table, now)
+    return table
+
+
+def invalidate_route_tables(collection_id=None, slug=None):
+    """Drop cached tables for a collection, or every table when none is given."""
+    with _tables_lock:
+        if collection_id is None and slug is None:
+            _tables.clear()
+            return
+        for key, (table, _) in list(_tables.items()):
+            # Release tables are cached as "<slug>@<number>"
+            if key.partition("@")[0] == slug or (
+                table is not None and table.collection_id == collection_id
+            ):
+                del _tables[key]
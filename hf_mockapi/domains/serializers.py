@@ -1,7 +1,37 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
 
-from .models import Collection, EndpointResponse, MockEndpoint
+from .models import (Collection, CollectionRelease, EndpointResponse,
+                     MockEndpoint)
+
+
+class SparseFieldsetMixin:
+    """
+    Let clients choose fields with ``?fields=a,b`` or ``?exclude=a,b``.
+
+    Only applies to the top-level serializer of a request; unknown names
+    are ignored.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None or self.parent is not None:
+            return
+        for name in self.omitted_fields(request, self.fields):
+            self.fields.pop(name)
+
+    @staticmethod
+    def omitted_fields(request, names):
+        """Names among ``names`` that the request leaves out."""
+        params = request.query_params
+        names = set(names)
+        omitted = set()
+        if params.get("fields"):
+            omitted |= names - set(params["fields"].split(","))
+        if params.get("exclude"):
+            omitted |= names & set(params["exclude"].split(","))
+        return omitted
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -12,6 +42,7 @@ class UserSerializer(serializers.ModelSerializer):
 
 class CollectionSerializer(serializers.ModelSerializer):
     endpoint_count = serializers.SerializerMethodField()
+    pinned_release = serializers.SerializerMethodField()
 
     class Meta:
         model = Collection
@@ -22,15 +53,57 @@ class CollectionSerializer(serializers.ModelSerializer):
             "description",
             "openapi_schema",
             "is_active",
+            "cors_enabled",
+            "cors_allowed_origins",
+            "cors_allowed_headers",
+            "cors_allow_credentials",
+            "cors_max_age",
+            "log_sink",
+            "proxy_mode",
+            "upstream_url",
+            "record_filters",
+            "validate_requests",
+            "validation_status",
             "created_by",
             "created_at",
             "updated_at",
+            "config_version",
+            "pinned_release",
             "endpoint_count",
         ]
-        read_only_fields = ["created_at", "updated_at"]
+        read_only_fields = ["created_at", "updated_at", "config_version"]
 
     def get_endpoint_count(self, obj):
-        return obj.endpoints.count()
+        count = getattr(obj, "endpoints_count", None)
+        return obj.endpoints.count() if count is None else count
+
+    def get_pinned_release(self, obj):
+        release = obj.pinned_release
+        return release.number if release else None
+
+
+class CollectionCloneSerializer(serializers.Serializer):
+    slug = serializers.SlugField(max_length=100)
+    name = serializers.CharField(max_length=200, required=False)
+
+    def validate_slug(self, value):
+        if Collection.objects.filter(slug=value).exists():
+            raise serializers.ValidationError(
+                "collection with this slug already exists."
+            )
+        return value
+
+
+class CollectionReleaseSerializer(serializers.ModelSerializer):
+    url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = CollectionRelease
+        fields = ["id", "number", "notes", "url", "created_by", "created_at"]
+        read_only_fields = ["number", "created_by", "created_at"]
+
+    def get_url(self, obj):
+        return f"/{obj.collection.slug}@{obj.number}/"
 
 
 class EndpointResponseSerializer(serializers.ModelSerializer):
@@ -44,6 +117,7 @@ class EndpointResponseSerializer(serializers.ModelSerializer):
             "response_status",
             "content_type",
             "response_body",
+            "response_file",
             "custom_headers",
             "is_default",
             "position",
@@ -53,7 +127,7 @@ class EndpointResponseSerializer(serializers.ModelSerializer):
         read_only_fields = ["created_at", "updated_at"]
 
 
-class MockEndpointSerializer(serializers.ModelSerializer):
+class MockEndpointSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     collection_slug = serializers.CharField(source="collection.slug", read_only=True)
     full_path = serializers.SerializerMethodField()
     responses = EndpointResponseSerializer(many=True, read_only=True)
@@ -66,16 +140,21 @@ class MockEndpointSerializer(serializers.ModelSerializer):
             "collection_slug",
             "display_name",
             "description",
+            "endpoint_type",
             "path",
             "http_method",
             "response_status",
             "content_type",
             "content_encoding",
             "response_body",
+            "response_file",
             "custom_headers",
             "enable_dynamic_response",
             "enable_request_logger",
             "response_delay",
+            "enable_compression",
+            "enable_conditional_requests",
+            "resource_config",
             "position",
             "is_active",
             "created_at",
@@ -94,3 +173,31 @@ class MockEndpointDetailSerializer(MockEndpointSerializer):
 
     class Meta(MockEndpointSerializer.Meta):
         fields = MockEndpointSerializer.Meta.fields + ["collection_name"]
+
+
+class MockEndpointSummarySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Endpoint listing without bodies, headers or responses."""
+
+    collection_slug = serializers.CharField(source="collection.slug", read_only=True)
+    full_path = serializers.SerializerMethodField()
+
+    class Meta:
+        model = MockEndpoint
+        fields = [
+            "id",
+            "collection",
+            "collection_slug",
+            "display_name",
+            "endpoint_type",
+            "path",
+            "http_method",
+            "response_status",
+            "position",
+            "is_active",
+            "updated_at",
+            "full_path",
+        ]
+        read_only_fields = fields
+
+    def get_full_path(self, obj):
+        return obj.get_full_path()
@@ -0,0 +1,412 @@
+"""
+Standalone asyncio HTTP/1.1 server for high-throughput mock serving.
+
+Route tables are loaded into memory up front and requests never touch the
+ORM: matching, response selection, delays, content negotiation and
+conditional requests go through ``engine`` exactly as in
+``views.mock_api_handler``. Request logs are handed to a non-blocking sink.
+Requests matching no route of a proxying collection are forwarded with
+``proxy`` from the default executor, whose threads also record responses.
+"""
+
+import asyncio
+import functools
+import http.client
+import json
+import logging
+import time
+from email.utils import formatdate
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote
+
+from django.core.files.storage import default_storage
+from django.utils.datastructures import CaseInsensitiveMapping
+
+from .engine import (MOCK_PATH_RE, build_result, log_fields, match_route,
+                     merge_vary, not_found_result, options_result)
+from .file_bodies import (RangeNotSatisfiable, file_validators,
+                          if_range_matches, parse_range_header)
+from .proxy import forward, proxy_body, response_headers, upstream_error_result
+
+MAX_HEADER_LINES = 100
+MAX_BODY_SIZE = 64 * 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+class BadRequest(Exception):
+    """Raised for requests the server cannot parse."""
+
+
+class ResponseWriter:
+    """A ``StreamWriter`` that records whether a response was started."""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.started = False
+
+    def write(self, data):
+        self.started = True
+        self.writer.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.writer, name)
+
+
+class MockServer:
+    """
+    Serve mock collections from preloaded route tables.
+
+    Connections are persistent (HTTP/1.1 keep-alive, or HTTP/1.0 with
+    ``Connection: keep-alive``) and pipelined requests are answered in order.
+    ``tables`` maps collection slugs (``"{slug}@{number}"`` for releases) to
+    ``routing.RouteTable`` objects and can be replaced at any time with
+    ``set_tables``; requests already in flight finish on the tables they
+    started with.
+
+    Request logs go to ``log_sinks[table.log_sink]``, or to ``log_sink`` for
+    collections whose sink is not in ``log_sinks``; no logs are written when
+    neither applies.
+    """
+
+    def __init__(self, tables, log_sink=None, keepalive_timeout=75.0, log_sinks=None):
+        self.tables = dict(tables)
+        self.log_sink = log_sink
+        self.log_sinks = log_sinks or {}
+        self.keepalive_timeout = keepalive_timeout
+        self.closing = False
+        self._idle = set()
+        self._date = (0, "")
+
+    def set_tables(self, tables):
+        """Atomically switch to a new set of route tables."""
+        self.tables = dict(tables)
+
+    async def start(self, host="0.0.0.0", port=8009, reuse_port=False, sock=None):
+        """Start listening and return the ``asyncio.Server``."""
+        if sock is not None:
+            return await asyncio.start_server(self.handle_connection, sock=sock)
+        return await asyncio.start_server(
+            self.handle_connection, host, port, reuse_port=reuse_port or None
+        )
+
+    def close_idle(self):
+        """
+        Stop keeping connections alive, e.g. before a worker exits.
+
+        Idle keep-alive connections are closed right away; busy ones are
+        closed after their current response.
+        """
+        self.closing = True
+        for writer in list(self._idle):
+            writer.close()
+
+    async def handle_connection(self, reader, writer):
+        peer = writer.get_extra_info("peername")
+        client_ip = peer[0] if isinstance(peer, tuple) else None
+        try:
+            while not self.closing:
+                self._idle.add(writer)
+                try:
+                    request = await asyncio.wait_for(
+                        self.read_request(reader), self.keepalive_timeout
+                    )
+                except BadRequest as exc:
+                    self.write_error(writer, 400, str(exc))
+                    await writer.drain()
+                    break
+                finally:
+                    self._idle.discard(writer)
+                if request is None:
+                    break
+
+                response = ResponseWriter(writer)
+                try:
+                    keep_alive = await self.respond(response, request, client_ip)
+                except Exception:
+                    logger.exception("Error answering %s %s", request[0], request[1])
+                    # Past the status line the client can only see a cut-off
+                    if not response.started:
+                        self.write_error(writer, 500, "Internal server error")
+                    keep_alive = False
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def read_request(self, reader):
+        """Read one request; returns None when the client closed the connection."""
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode("latin-1").rstrip("\r\n").split(" ")
+        except ValueError:
+            raise BadRequest("Malformed request line")
+
+        headers = {}
+        raw_headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, sep, value = line.decode("latin-1").partition(":")
+            if not sep:
+                raise BadRequest("Malformed header line")
+            name, value = name.strip(), value.strip()
+            raw_headers[name] = value
+            headers[name.lower()] = value
+        else:
+            raise BadRequest("Too many headers")
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            body = await self.read_chunked(reader)
+        else:
+            try:
+                length = int(headers.get("content-length") or 0)
+            except ValueError:
+                raise BadRequest("Invalid Content-Length")
+            if length > MAX_BODY_SIZE:
+                raise BadRequest("Request body too large")
+            body = await reader.readexactly(length) if length else b""
+
+        return method, target, version, raw_headers, body
+
+    async def read_chunked(self, reader):
+        chunks = []
+        size = 0
+        while True:
+            line = await reader.readline()
+            try:
+                chunk_size = int(line.split(b";")[0].strip(), 16)
+            except ValueError:
+                raise BadRequest("Malformed chunk size")
+            if chunk_size == 0:
+                # Skip trailers
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+            size += chunk_size
+            if size > MAX_BODY_SIZE:
+                raise BadRequest("Request body too large")
+            chunks.append(await reader.readexactly(chunk_size))
+            await reader.readexactly(2)
+
+    async def respond(self, writer, request, client_ip):
+        """Answer one request; returns whether the connection stays open."""
+        start_time = time.time()
+        method, target, version, raw_headers, body = request
+        headers = CaseInsensitiveMapping(raw_headers)
+
+        connection = headers.get("Connection", "").lower()
+        if self.closing:
+            keep_alive = False
+        elif version == "HTTP/1.1":
+            keep_alive = connection != "close"
+        else:
+            keep_alive = connection == "keep-alive"
+
+        path, _, query = target.partition("?")
+        path = unquote(path)
+        match = MOCK_PATH_RE.match(path)
+        table = self.tables.get(match["table"]) if match else None
+        if table is None:
+            self.write_error(writer, 404, "Collection not found", keep_alive)
+            return keep_alive
+
+        # Same flow as views.mock_api_handler
+        endpoint_path = match["endpoint_path"].strip("/")
+        route = match_route(table, method, endpoint_path)
+        if route is None:
+            if method == "OPTIONS" and table.allowed_methods(endpoint_path):
+                result = options_result(table, endpoint_path, headers)
+            elif table.proxy is not None:
+                return await self.proxy(
+                    writer, table, request, endpoint_path, query, keep_alive
+                )
+            else:
+                result = not_found_result(
+                    table, method, endpoint_path, headers.get("Origin")
+                )
+            self.write_result(writer, result, keep_alive)
+            return keep_alive
+
+        if route.response_delay > 0:
+            await asyncio.sleep(route.response_delay)
+
+        # Blank values are kept, as in Django's request.GET
+        query_params = parse_qs(query, keep_blank_values=True)
+        result = build_result(
+            table, route, method, headers, endpoint_path, query_params, body
+        )
+        if result.file:
+            await self.write_file(writer, result, headers, keep_alive)
+        else:
+            self.write_result(writer, result, keep_alive)
+
+        sink = self.log_sinks.get(table.log_sink, self.log_sink)
+        logged = route.enable_request_logger and result.route is not None
+        if sink is not None and logged:
+            fields = log_fields(
+                route,
+                result,
+                method,
+                path,
+                query_params,
+                raw_headers,
+                body,
+            )
+            fields["ip_address"] = client_ip
+            fields["user_agent"] = headers.get("User-Agent", "")[:500]
+            fields["response_time_ms"] = int((time.time() - start_time) * 1000)
+            sink.emit(fields)
+        return keep_alive
+
+    async def proxy(self, writer, table, request, path, query, keep_alive):
+        """
+        Forward a request that matched no mock to the collection's upstream,
+        as ``views.proxy_response`` does; returns whether the connection
+        stays open.
+
+        The upstream connection pool blocks, so the request and each body
+        chunk run in the default executor. Bodies of unknown length are sent
+        chunked, or until the connection closes for HTTP/1.0 clients.
+        """
+        method, _, version, raw_headers, body = request
+        origin = CaseInsensitiveMapping(raw_headers).get("Origin")
+        loop = asyncio.get_running_loop()
+        try:
+            upstream = await loop.run_in_executor(
+                None,
+                functools.partial(
+                    forward,
+                    table.proxy,
+                    method,
+                    path,
+                    query,
+                    raw_headers,
+                    body or None,
+                    # Recordings are stored uncompressed
+                    identity=table.proxy.recording,
+                ),
+            )
+        except (OSError, http.client.HTTPException) as error:
+            result = upstream_error_result(table, error, origin)
+            self.write_result(writer, result, keep_alive)
+            return keep_alive
+
+        stream = proxy_body(table, method, path, upstream)
+        headers = {
+            name: value
+            for name, value in response_headers(
+                upstream, table.cors.response_headers(origin)
+            ).items()
+            # Set by ``head``
+            if name.lower() != "date"
+        }
+        chunked = (
+            upstream.content_length is None
+            and method != "HEAD"
+            and upstream.status >= 200
+            and upstream.status not in (204, 304)
+        )
+        if chunked:
+            if version == "HTTP/1.1":
+                headers["Transfer-Encoding"] = "chunked"
+            else:
+                keep_alive = chunked = False
+        writer.write(self.head(upstream.status, headers, keep_alive))
+
+        chunks = iter(stream)
+        try:
+            while True:
+                chunk = await loop.run_in_executor(None, next, chunks, None)
+                if chunk is None:
+                    break
+                writer.write(
+                    b"%x\r\n%s\r\n" % (len(chunk), chunk) if chunked else chunk
+                )
+                await writer.drain()
+        except (OSError, http.client.HTTPException):
+            # The status line is out; all that is left is to drop the connection
+            return False
+        finally:
+            stream.close()
+        if chunked:
+            writer.write(b"0\r\n\r\n")
+        return keep_alive
+
+    def write_result(self, writer, result, keep_alive=True):
+        headers = dict(result.headers)
+        if "Content-Length" not in headers and result.status not in (204, 304):
+            headers["Content-Length"] = str(len(result.body))
+        if result.vary:
+            headers["Vary"] = merge_vary(headers.get("Vary"), result.vary)
+        writer.write(self.head(result.status, headers, keep_alive))
+        if result.body:
+            writer.write(result.body)
+
+    async def write_file(self, writer, result, request_headers, keep_alive=True):
+        """Send a file-backed body with ``loop.sendfile`` (zero-copy)."""
+        headers = dict(result.headers)
+        if result.vary:
+            headers["Vary"] = merge_vary(headers.get("Vary"), result.vary)
+        status = result.status
+
+        etag, last_modified, size = file_validators(result.file)
+        with open(default_storage.path(result.file), "rb") as file_obj:
+            offset, count = 0, size
+            if status == 200:
+                headers["Accept-Ranges"] = "bytes"
+                range_header = request_headers.get("Range")
+                if not if_range_matches(
+                    request_headers.get("If-Range"), etag, last_modified
+                ):
+                    range_header = None  # Changed since: the whole file
+                try:
+                    byte_range = parse_range_header(range_header, size)
+                except RangeNotSatisfiable:
+                    headers = {
+                        "Content-Range": f"bytes */{size}",
+                        "Content-Length": "0",
+                    }
+                    writer.write(self.head(416, headers, keep_alive))
+                    return
+                if byte_range is not None:
+                    status = 206
+                    offset, count = byte_range[0], byte_range[1] - byte_range[0] + 1
+                    headers["Content-Range"] = f"bytes {offset}-{byte_range[1]}/{size}"
+            headers["Content-Length"] = str(count)
+
+            writer.write(self.head(status, headers, keep_alive))
+            await writer.drain()
+            if count:
+                loop = asyncio.get_running_loop()
+                await loop.sendfile(writer.transport, file_obj, offset, count)
+
+    def write_error(self, writer, status, message, keep_alive=False):
+        body = json.dumps({"error": message}).encode("utf-8")
+        headers = {"Content-Type": "application/json", "Content-Length": str(len(body))}
+        writer.write(self.head(status, headers, keep_alive) + body)
+
+    def head(self, status, headers, keep_alive):
+        """Serialize the status line and headers of a response."""
+        try:
+            reason = HTTPStatus(status).phrase
+        except ValueError:
+            reason = ""
+        lines = [f"HTTP/1.1 {status} {reason}"]
+        lines.extend(f"{key}: {value}" for key, value in headers.items())
+        lines.append(f"Date: {self.http_date()}")
+        lines.append("Connection: keep-alive" if keep_alive else "Connection: close")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1", "replace")
+
+    def http_date(self):
+        # Formatting the Date header once per second is plenty
+        now = int(time.time())
+        if self._date[0] != now:
+            self._date = (now, formatdate(now, usegmt=True))
+        return self._date[1]
@@ -0,0 +1,89 @@
+"""
+Signal handlers keeping mock caches in sync with edits.
+
+Every change bumps ``Collection.config_version`` in the writing
+transaction, which is how other processes notice it (see
+``routing.get_route_table``); the local cache is dropped immediately.
+Changed rows are stamped with the new version and deletions leave
+tombstones for the change feed (see ``domains.changes``).
+"""
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .changes import record_deletion, stamp_endpoints, stamp_responses
+from .models import (Collection, CollectionRelease, EndpointResponse,
+                     MockEndpoint, Tombstone)
+from .resources import discard_store
+from .routing import invalidate_route_tables
+
+
+@receiver([post_save, post_delete], sender=Collection)
+def collection_changed(sender, instance, **kwargs):
+    # Collection.save bumps its own version
+    invalidate_route_tables(collection_id=instance.pk, slug=instance.slug)
+
+
+@receiver(post_delete, sender=Collection)
+def collection_deleted(sender, instance, **kwargs):
+    # Runs after the cascade, which recorded tombstones for the endpoints
+    Tombstone.objects.filter(collection_id=instance.pk).delete()
+
+
+@receiver(pre_save, sender=MockEndpoint)
+def endpoint_moving(sender, instance, **kwargs):
+    # Remember the previous collection so both sides see a move
+    instance._previous_collection_id = (
+        MockEndpoint.objects.filter(pk=instance.pk)
+        .values_list("collection_id", flat=True)
+        .first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver([post_save, post_delete], sender=MockEndpoint)
+def endpoint_changed(sender, instance, signal, **kwargs):
+    previous = getattr(instance, "_previous_collection_id", None)
+    Collection.bump_config_version(instance.collection_id, previous)
+    invalidate_route_tables(collection_id=instance.collection_id)
+    moved = previous is not None and previous != instance.collection_id
+    if moved:
+        invalidate_route_tables(collection_id=previous)
+
+    if signal is post_delete:
+        record_deletion(instance.collection_id, Tombstone.ENDPOINT, instance.pk)
+        if instance.endpoint_type == MockEndpoint.RESOURCE:
+            discard_store(instance.pk)
+        return
+    stamp_endpoints(MockEndpoint.objects.filter(pk=instance.pk))
+    if moved:
+        # Gone from the old collection; its responses are new to this one
+        record_deletion(previous, Tombstone.ENDPOINT, instance.pk)
+        stamp_responses(EndpointResponse.objects.filter(endpoint_id=instance.pk))
+
+
+@receiver([post_save, post_delete], sender=EndpointResponse)
+def response_changed(sender, instance, signal, **kwargs):
+    collection_id = (
+        MockEndpoint.objects.filter(pk=instance.endpoint_id)
+        .values_list("collection_id", flat=True)
+        .first()
+    )
+    # The endpoint is already gone during cascade deletes, where its own
+    # signal bumps the version; drop every local table in that case
+    Collection.bump_config_version(collection_id)
+    invalidate_route_tables(collection_id=collection_id)
+    if collection_id is None:
+        return
+    if signal is post_delete:
+        record_deletion(collection_id, Tombstone.RESPONSE, instance.pk)
+    else:
+        stamp_responses(EndpointResponse.objects.filter(pk=instance.pk))
+
+
+@receiver(post_delete, sender=CollectionRelease)
+def release_deleted(sender, instance, **kwargs):
+    # Also unpins it (SET_NULL runs as a plain UPDATE)
+    Collection.bump_config_version(instance.collection_id)
+    invalidate_route_tables(collection_id=instance.collection_id)
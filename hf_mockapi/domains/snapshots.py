@@ -0,0 +1,309 @@
+"""
+Compact on-disk snapshots of compiled route tables.
+
+A snapshot holds everything ``server.MockServer`` needs to answer traffic
+for one or more collections: the route metadata and every response body
+already encoded and compressed, the settings and seed records of resource
+endpoints, and the OpenAPI schema of collections that validate requests. Loading one maps the file into memory and
+parses only a small JSON index, so startup cost does not grow with body
+size and bodies are served straight from the page cache.
+
+Layout::
+
+    header   MAGIC, format version, flags, reserved, index offset/length
+    blobs    deduplicated body and variant bytes
+    index    UTF-8 JSON describing collections, routes and resources
+"""
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+from datetime import datetime, timezone
+
+from .cors import CorsPolicy
+from .proxy import ProxyPolicy
+from .rendering import RenderedBody, render_body
+from .resources import ResourceRoute
+from .routing import (ResponseSpec, Route, RouteTable, collection_tables,
+                      release_resources)
+from .validation import compile_schema
+
+MAGIC = b"MOCKSNP\0"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sHHIQQ")
+
+# Route flags
+COMPRESSION = 1
+CONDITIONAL_REQUESTS = 2
+REQUEST_LOGGER = 4
+
+
+class SnapshotError(Exception):
+    """Raised for files that are not readable snapshots."""
+
+
+def export_snapshot(collections, path):
+    """
+    Write a snapshot of ``collections`` to ``path``.
+
+    The file is written next to its destination and moved into place with
+    ``os.replace``, so a server watching ``path`` never sees a partial file.
+    Returns the number of routes written.
+    """
+    blobs = bytearray()
+    offsets = {}
+
+    def store(data):
+        # Identical bodies (and variants) are stored once
+        if data not in offsets:
+            offsets[data] = len(blobs)
+            blobs.extend(data)
+        return [HEADER.size + offsets[data], len(data)]
+
+    index = {"collections": []}
+    route_count = 0
+    tables = (
+        (collection, key, table)
+        for collection in collections
+        for key, table in collection_tables(collection)
+    )
+    for collection, key, table in tables:
+        routes = []
+        for route in table.routes.values():
+            spec = route.response
+            body, variants, forced_coding, digest = b"", {}, "", ""
+            if not spec.response_file:
+                rendered = render_body(
+                    spec, route.content_encoding, route.enable_compression
+                )
+                body = bytes(rendered.body)
+                variants = {
+                    coding: store(bytes(payload))
+                    for coding, payload in rendered.variants.items()
+                }
+                forced_coding = rendered.forced_coding
+                digest = rendered.digest
+            flags = (
+                (COMPRESSION if route.enable_compression else 0)
+                | (CONDITIONAL_REQUESTS if route.enable_conditional_requests else 0)
+                | (REQUEST_LOGGER if route.enable_request_logger else 0)
+            )
+            routes.append(
+                [
+                    route.endpoint_id,
+                    route.method,
+                    route.path,
+                    spec.status,
+                    spec.content_type,
+                    spec.custom_headers,
+                    spec.response_file,
+                    route.content_encoding,
+                    flags,
+                    route.response_delay,
+                    route.updated_at.timestamp(),
+                    spec.updated_at.timestamp(),
+                    digest,
+                    store(body),
+                    variants,
+                    forced_coding,
+                ]
+            )
+        cors = table.cors
+        index["collections"].append(
+            {
+                "id": table.collection_id,
+                "slug": table.slug,
+                # Release tables are served at "{slug}@{number}"
+                "key": key,
+                "immutable": table.immutable,
+                "log_sink": table.log_sink,
+                "cors": [
+                    cors.enabled,
+                    list(cors.allowed_origins),
+                    list(cors.allowed_headers),
+                    cors.allow_credentials,
+                    cors.max_age,
+                ],
+                "proxy": _proxy_entry(table.proxy),
+                # The schema text; compiled again on load
+                "validation": (
+                    [table.validation_status, collection.openapi_schema]
+                    if table.validator is not None
+                    else None
+                ),
+                "routes": routes,
+                "resources": release_resources(table),
+            }
+        )
+        route_count += len(routes)
+
+    index_bytes = json.dumps(index, separators=(",", ":")).encode("utf-8")
+    header = HEADER.pack(
+        MAGIC, FORMAT_VERSION, 0, 0, HEADER.size + len(blobs), len(index_bytes)
+    )
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".snapshot-")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(header)
+            tmp.write(blobs)
+            tmp.write(index_bytes)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return route_count
+
+
+def load_snapshot(path):
+    """
+    Map a snapshot into memory and return ``{key: RouteTable}``.
+
+    Response bodies are ``memoryview`` slices of the mapping, so nothing is
+    copied until a response is written. The mapping stays open for as long
+    as any route of the returned tables is referenced; requests still in
+    flight after a hot swap keep serving from the previous file.
+    """
+    with open(path, "rb") as file_obj:
+        try:
+            mapped = mmap.mmap(file_obj.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise SnapshotError(f"{path} is empty")
+
+    if len(mapped) < HEADER.size:
+        raise SnapshotError(f"{path} is not a snapshot")
+    magic, version, _, _, index_offset, index_length = HEADER.unpack_from(mapped)
+    if magic != MAGIC:
+        raise SnapshotError(f"{path} is not a snapshot")
+    if version != FORMAT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot version {version}")
+    if index_offset + index_length > len(mapped):
+        raise SnapshotError(f"{path} is truncated")
+
+    view = memoryview(mapped)
+    index = json.loads(bytes(view[index_offset : index_offset + index_length]))
+
+    def blob(location):
+        offset, length = location
+        return view[offset : offset + length]
+
+    tables = {}
+    for entry in index["collections"]:
+        enabled, origins, headers, credentials, max_age = entry["cors"]
+        table = RouteTable(
+            collection_id=entry["id"],
+            slug=entry["slug"],
+            cors=CorsPolicy(
+                enabled, tuple(origins), tuple(headers), credentials, max_age
+            ),
+            log_sink=entry.get("log_sink", "database"),
+            immutable=entry.get("immutable", False),
+            proxy=_proxy_policy(entry.get("proxy")),
+        )
+        if entry.get("validation"):
+            table.validation_status, schema = entry["validation"]
+            table.validator = compile_schema(schema)
+        for row in entry["routes"]:
+            (
+                endpoint_id,
+                method,
+                path,
+                status,
+                content_type,
+                custom_headers,
+                response_file,
+                content_encoding,
+                flags,
+                delay,
+                updated_ts,
+                response_updated_ts,
+                digest,
+                body,
+                variants,
+                forced_coding,
+            ) = row
+            rendered = None
+            if not response_file:
+                rendered = RenderedBody(
+                    blob(body),
+                    {coding: blob(location) for coding, location in variants.items()},
+                    forced_coding,
+                    digest,
+                )
+            response_updated_at = _timestamp(response_updated_ts)
+            table.add(
+                Route(
+                    endpoint_id=endpoint_id,
+                    method=method,
+                    path=path,
+                    collection_slug=table.slug,
+                    response=ResponseSpec(
+                        cache_key=("snapshot", endpoint_id, response_updated_ts),
+                        status=status,
+                        content_type=content_type,
+                        response_body="",
+                        response_file=response_file,
+                        custom_headers=custom_headers,
+                        updated_at=response_updated_at,
+                        rendered=rendered,
+                    ),
+                    content_encoding=content_encoding,
+                    enable_compression=bool(flags & COMPRESSION),
+                    enable_conditional_requests=bool(flags & CONDITIONAL_REQUESTS),
+                    enable_request_logger=bool(flags & REQUEST_LOGGER),
+                    response_delay=delay,
+                    updated_at=_timestamp(updated_ts),
+                )
+            )
+        for row in entry.get("resources", ()):
+            resource = ResourceRoute.from_dict(row, table.slug)
+            table.resources[resource.path] = resource
+        tables[entry.get("key", table.slug)] = table
+    return tables
+
+
+def load_snapshots(paths):
+    """Load several snapshot files into one ``{slug: RouteTable}`` mapping."""
+    tables = {}
+    for path in paths:
+        tables.update(load_snapshot(path))
+    return tables
+
+
+def _proxy_entry(policy):
+    if policy is None:
+        return None
+    return [
+        policy.mode,
+        policy.upstream,
+        sorted(policy.methods),
+        list(policy.include),
+        list(policy.exclude),
+        list(policy.statuses),
+        policy.max_body_bytes,
+    ]
+
+
+def _proxy_policy(entry):
+    if entry is None:
+        return None
+    mode, upstream, methods, include, exclude, statuses, max_body_bytes = entry
+    return ProxyPolicy(
+        mode,
+        upstream,
+        frozenset(methods),
+        tuple(include),
+        tuple(exclude),
+        tuple(statuses),
+        max_body_bytes,
+    )
+
+
+def _timestamp(value):
+    return datetime.fromtimestamp(value, tz=timezone.utc)
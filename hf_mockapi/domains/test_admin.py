@@ -0,0 +1,156 @@
+"""Tests for the collection admin on large collections."""
+
+from html.parser import HTMLParser
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from domains.models import Collection, MockEndpoint
+from domains.openapi_utils import cached_openapi_schema
+
+
+@pytest.fixture
+def collection(db):
+    cache.clear()
+    collection = Collection.objects.create(slug="admin-big", name="Admin big")
+    MockEndpoint.objects.bulk_create(
+        MockEndpoint(
+            collection=collection,
+            display_name=f"Item {number}",
+            path=f"items/{number}",
+            response_body='{"name": "<script>"}',
+        )
+        for number in range(5)
+    )
+    return collection
+
+
+def _change_page(client, collection):
+    url = reverse("admin:domains_collection_change", args=[collection.pk])
+    response = client.get(url)
+    assert response.status_code == 200
+    return response
+
+
+class FormValues(HTMLParser):
+    """Collect what a browser would submit for the forms of a page."""
+
+    def __init__(self):
+        super().__init__()
+        self.data = {}
+        self._select = self._textarea = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        name = attrs.get("name")
+        if tag == "input" and name and attrs.get("type") != "submit":
+            if attrs.get("type") not in ("checkbox", "radio"):
+                self.data[name] = attrs.get("value") or ""
+            elif "checked" in attrs:
+                self.data[name] = attrs.get("value", "on")
+        elif tag == "select":
+            self._select = name
+        elif tag == "option" and self._select and "selected" in attrs:
+            self.data[self._select] = attrs.get("value", "")
+        elif tag == "textarea" and name:
+            self._textarea = name
+            self.data[name] = ""
+
+    def handle_endtag(self, tag):
+        if tag == "select":
+            self._select = None
+        elif tag == "textarea":
+            self._textarea = None
+
+    def handle_data(self, data):
+        if self._textarea:
+            self.data[self._textarea] += data.removeprefix("\n")
+
+
+def test_inlines_are_paginated(admin_client, collection, settings):
+    """Test that endpoint inlines are rendered and saved one page at a time."""
+    settings.MOCKAPI_ADMIN_INLINE_ENDPOINTS = 10
+    settings.MOCKAPI_ADMIN_INLINE_PAGE_SIZE = 2
+    url = reverse("admin:domains_collection_change", args=[collection.pk])
+    response = admin_client.get(url + "?endpoints_page=2")
+    content = response.content.decode()
+    (formset,) = response.context["inline_admin_formsets"]
+    paths = [form.original.path for form in formset if form.original]
+    assert paths == ["items/2", "items/3"]
+    assert "Page 2 of 3" in content
+    assert 'href="?endpoints_page=1"' in content
+    assert 'href="?endpoints_page=3"' in content
+
+    parser = FormValues()
+    parser.feed(content)
+    data = parser.data
+    renamed = [name for name, value in data.items() if value.startswith("Item ")]
+    assert len(renamed) == 2
+    for name in renamed:
+        data[name] = data[name].replace("Item", "Page item")
+    response = admin_client.post(url + "?endpoints_page=2", data)
+    assert response.status_code == 302
+    names = dict(collection.endpoints.values_list("path", "display_name"))
+    assert names["items/2"] == "Page item 2"
+    assert names["items/3"] == "Page item 3"
+    assert names["items/4"] == "Item 4"
+    assert collection.endpoints.count() == 5
+
+    # Out-of-range pages show the last one
+    response = admin_client.get(url + "?endpoints_page=9")
+    (formset,) = response.context["inline_admin_formsets"]
+    paths = [form.original.path for form in formset if form.original]
+    assert paths == ["items/4"]
+
+
+def test_inlines_below_threshold(admin_client, collection, settings):
+    """Test that small collections keep their endpoint inlines."""
+    settings.MOCKAPI_ADMIN_INLINE_ENDPOINTS = 5
+    response = _change_page(admin_client, collection)
+    assert len(response.context["inline_admin_formsets"]) == 1
+    assert "Browse 5 endpoints" not in response.content.decode()
+
+
+def test_link_out_above_threshold(admin_client, collection, settings):
+    """Test that large collections link to the endpoint changelist instead."""
+    settings.MOCKAPI_ADMIN_INLINE_ENDPOINTS = 4
+    settings.MOCKAPI_ADMIN_SCHEMA_PREVIEW_LINES = 10
+    response = _change_page(admin_client, collection)
+    content = response.content.decode()
+    assert response.context["inline_admin_formsets"] == []
+    assert "Browse 5 endpoints" in content
+    assert f"?collection__id__exact={collection.pk}" in content
+    assert "Showing 10 of" in content
+    assert "<script>" not in content.split("<textarea", 1)[1].split("</textarea>")[0]
+
+    # Saving the collection does not touch its endpoints
+    data = {
+        "slug": collection.slug,
+        "name": "Renamed",
+        "description": "",
+        "cors_allowed_origins": '["*"]',
+        "cors_allowed_headers": "[]",
+        "cors_max_age": 600,
+        "is_active": "on",
+        "log_sink": "database",
+        "proxy_mode": "off",
+        "record_filters": "{}",
+        "validation_status": 400,
+    }
+    url = reverse("admin:domains_collection_change", args=[collection.pk])
+    response = admin_client.post(url, data)
+    assert response.status_code == 302, response.context["adminform"].form.errors
+    assert collection.endpoints.count() == 5
+
+
+def test_schema_preview_is_cached_per_version(collection, django_assert_num_queries):
+    """Test that the schema is generated once per config_version."""
+    collection.refresh_from_db()
+    schema = cached_openapi_schema(collection)
+    assert "/items/4" in schema
+    with django_assert_num_queries(0):
+        assert cached_openapi_schema(collection) == schema
+
+    MockEndpoint.objects.create(collection=collection, display_name="New", path="fresh")
+    collection.refresh_from_db()
+    assert "/fresh" in cached_openapi_schema(collection)
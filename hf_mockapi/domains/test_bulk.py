@@ -0,0 +1,170 @@
+"""Tests for the bulk endpoint and response API."""
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from domains.models import Collection, EndpointResponse, MockEndpoint
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def client(db):
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user("bulk", password="x"))
+    return client
+
+
+@pytest.fixture
+def collection(db):
+    return Collection.objects.create(slug="bulk", name="Bulk")
+
+
+def _items(collection, count, start=0):
+    return [
+        {
+            "collection": collection.pk,
+            "display_name": f"Item {number}",
+            "path": f"items/{number}",
+            "response_body": f'{{"id": {number}}}',
+        }
+        for number in range(start, start + count)
+    ]
+
+
+def test_bulk_create_is_constant_query(client, collection):
+    """Test that creating many endpoints takes a fixed number of queries."""
+    version = collection.config_version
+    with CaptureQueriesContext(connection) as small:
+        response = client.post("/api/endpoints/bulk/", _items(collection, 2), "json")
+    assert response.status_code == 201
+    # Small enough for one INSERT under SQLite's parameter limit
+    with CaptureQueriesContext(connection) as large:
+        response = client.post(
+            "/api/endpoints/bulk/", _items(collection, 40, start=2), "json"
+        )
+    assert response.status_code == 201
+    assert len(small) == len(large)
+
+    results = response.json()["results"]
+    assert [result["index"] for result in results] == list(range(40))
+    assert {result["status"] for result in results} == {"created"}
+    assert collection.endpoints.count() == 42
+    collection.refresh_from_db()
+    assert collection.config_version == version + 2
+
+
+def test_bulk_create_rejects_whole_batch(client, collection):
+    """Test per-item errors, including duplicates within the batch and table."""
+    MockEndpoint.objects.create(
+        collection=collection, display_name="Existing", path="items/0"
+    )
+    items = _items(collection, 4)
+    items[2]["path"] = "items/1"
+    items[3]["collection"] = 999999
+    response = client.post("/api/endpoints/bulk/", items, "json")
+    assert response.status_code == 400
+    results = response.json()["results"]
+    assert [result["status"] for result in results] == ["invalid"] * 4
+    assert "non_field_errors" in results[0]["errors"]
+    assert "collection" in results[3]["errors"]
+    assert collection.endpoints.count() == 1
+
+
+def test_bulk_update_and_delete(client, collection):
+    """Test partial updates, moves between collections and deletes."""
+    other = Collection.objects.create(slug="bulk-other", name="Other")
+    client.post("/api/endpoints/bulk/", _items(collection, 3), "json")
+    first, second, third = collection.endpoints.order_by("path")
+    versions = {c.pk: c.config_version for c in Collection.objects.all()}
+
+    response = client.patch(
+        "/api/endpoints/bulk/",
+        [
+            {"id": first.pk, "response_status": 201},
+            {"id": second.pk, "collection": other.pk},
+        ],
+        "json",
+    )
+    assert response.status_code == 200, response.json()
+    first.refresh_from_db()
+    second.refresh_from_db()
+    assert first.response_status == 201 and first.updated_at > third.updated_at
+    assert second.collection_id == other.pk
+    for c in Collection.objects.all():
+        assert c.config_version == versions[c.pk] + 1
+
+    # Paths still held by other rows are taken, even by rows in the batch
+    response = client.patch(
+        "/api/endpoints/bulk/",
+        [{"id": first.pk, "path": third.path}, {"id": third.pk, "path": first.path}],
+        "json",
+    )
+    assert response.status_code == 400
+    response = client.patch(
+        "/api/endpoints/bulk/",
+        [{"id": first.pk, "path": "items/2"}, {"id": 999999, "path": "x"}],
+        "json",
+    )
+    assert response.status_code == 400
+    errors = [result.get("errors") for result in response.json()["results"]]
+    assert "non_field_errors" in errors[0] and errors[1] == {"id": ["Not found."]}
+
+    response = client.delete("/api/endpoints/bulk/", [first.pk, third.pk], "json")
+    assert response.status_code == 200
+    assert not collection.endpoints.exists()
+
+
+def test_reorder_is_one_statement(client, collection):
+    """Test that reordering runs a single UPDATE for the positions."""
+    client.post("/api/endpoints/bulk/", _items(collection, 5), "json")
+    ids = list(collection.endpoints.order_by("-path").values_list("pk", flat=True))
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post("/api/endpoints/reorder/", ids, "json")
+    assert response.status_code == 200
+    updates = [
+        q for q in queries if q["sql"].startswith('UPDATE "domains_mockendpoint"')
+    ]
+    assert len(updates) == 1
+    assert (
+        list(collection.endpoints.order_by("position").values_list("pk", flat=True))
+        == ids
+    )
+
+
+def test_bulk_responses(client, collection):
+    """Test bulk response creation against preloaded endpoints."""
+    endpoint = MockEndpoint.objects.create(
+        collection=collection, display_name="Items", path="items"
+    )
+    version = Collection.objects.get(pk=collection.pk).config_version
+    items = [
+        {"endpoint": endpoint.pk, "name": f"Case {status}", "response_status": status}
+        for status in (400, 404, 500)
+    ]
+    response = client.post("/api/responses/bulk/", items, "json")
+    assert response.status_code == 201, response.json()
+    assert EndpointResponse.objects.filter(endpoint=endpoint).count() == 3
+    collection.refresh_from_db()
+    assert collection.config_version == version + 1
+
+    response = client.post("/api/responses/bulk/", {"not": "a list"}, "json")
+    assert response.status_code == 400
+
+
+def test_inactive_endpoints_are_not_found(client, collection):
+    """Test that bulk requests cannot reach endpoints the API hides."""
+    hidden = MockEndpoint.objects.create(
+        collection=collection, display_name="Hidden", path="hidden", is_active=False
+    )
+    assert client.get(f"/api/endpoints/{hidden.pk}/").status_code == 404
+    not_found = [{"id": ["Not found."]}]
+    for response in (
+        client.patch("/api/endpoints/bulk/", [{"id": hidden.pk, "path": "x"}], "json"),
+        client.delete("/api/endpoints/bulk/", [hidden.pk], "json"),
+        client.post("/api/endpoints/reorder/", [hidden.pk], "json"),
+    ):
+        assert response.status_code == 400
+        assert [r["errors"] for r in response.json()["results"]] == not_found
+    hidden.refresh_from_db()
+    assert hidden.path == "hidden" and hidden.position == 0
@@ -0,0 +1,120 @@
+"""Tests for the collection change feed and conditional list requests."""
+
+import pytest
+from django.contrib.auth.models import User
+from domains.models import (Collection, EndpointResponse, MockEndpoint,
+                            Tombstone)
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def client(db):
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user("sync", password="x"))
+    return client
+
+
+@pytest.fixture
+def collection(db):
+    collection = Collection.objects.create(slug="sync", name="Sync")
+    for number in range(3):
+        MockEndpoint.objects.create(
+            collection=collection, display_name=f"Item {number}", path=f"items/{number}"
+        )
+    collection.refresh_from_db()
+    return collection
+
+
+def _changes(client, since, slug="sync"):
+    response = client.get(f"/api/collections/{slug}/changes/?since={since}")
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_feed_returns_only_changes(client, collection):
+    """Test creates, updates, deletes and deactivations since a version."""
+    since = collection.config_version
+    assert _changes(client, since)["endpoints"] == []
+
+    first, second, third = collection.endpoints.order_by("path")
+    first.response_status = 201
+    first.save()
+    second_id = second.pk
+    second.delete()
+    third.is_active = False
+    third.save()
+    response = EndpointResponse.objects.create(endpoint=first, name="Error")
+    new = MockEndpoint.objects.create(
+        collection=collection, display_name="New", path="new"
+    )
+
+    changes = _changes(client, since)
+    assert not changes["reset"]
+    assert changes["version"] == Collection.objects.get(pk=collection.pk).config_version
+    assert [e["id"] for e in changes["endpoints"]] == [first.pk, new.pk]
+    assert "response_body" not in changes["endpoints"][0]
+    assert [r["id"] for r in changes["responses"]] == [response.pk]
+    assert sorted(changes["deleted"]["endpoints"]) == sorted([second_id, third.pk])
+
+    response_id = response.pk
+    response.delete()
+    later = _changes(client, changes["version"])
+    assert later["endpoints"] == [] and later["deleted"]["responses"] == [response_id]
+    assert _changes(client, later["version"])["deleted"] == {
+        "endpoints": [],
+        "responses": [],
+    }
+
+
+def test_bulk_changes_and_moves_reach_the_feed(client, collection):
+    """Test that bulk writes stamp rows and moves leave a tombstone behind."""
+    other = Collection.objects.create(slug="sync-other", name="Other")
+    since = collection.config_version
+    other_since = Collection.objects.get(pk=other.pk).config_version
+    first = collection.endpoints.order_by("path").first()
+
+    ids = list(collection.endpoints.order_by("-path").values_list("pk", flat=True))
+    assert client.post("/api/endpoints/reorder/", ids, "json").status_code == 200
+    changes = _changes(client, since)
+    assert {e["id"] for e in changes["endpoints"]} == set(ids)
+
+    since = changes["version"]
+    response = client.patch(
+        "/api/endpoints/bulk/", [{"id": first.pk, "collection": other.pk}], "json"
+    )
+    assert response.status_code == 200
+    assert _changes(client, since)["deleted"]["endpoints"] == [first.pk]
+    moved = _changes(client, other_since, slug="sync-other")
+    assert [e["id"] for e in moved["endpoints"]] == [first.pk]
+
+
+def test_reset_and_tombstone_cleanup(client, collection):
+    """Test that a future version asks for a reload and deletes clean up."""
+    changes = _changes(client, collection.config_version + 5)
+    assert changes["reset"]
+    assert client.get("/api/collections/sync/changes/?since=x").status_code == 400
+
+    collection.endpoints.first().delete()
+    assert Tombstone.objects.filter(collection=collection).exists()
+    collection.delete()
+    assert not Tombstone.objects.exists()
+
+
+def test_lists_answer_not_modified(client, collection):
+    """Test ETag revalidation of the collection and endpoint lists."""
+    for url in [
+        "/api/collections/",
+        "/api/endpoints/?collection=sync&view=summary",
+        "/api/collections/sync/endpoints/",
+    ]:
+        response = client.get(url)
+        etag = response["ETag"]
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+
+        MockEndpoint.objects.create(
+            collection=collection, display_name="Bump", path=f"bump{len(url)}"
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response["ETag"] != etag
@@ -0,0 +1,74 @@
+"""Tests for compressed mock response variants."""
+
+import gzip
+import json
+
+import pytest
+from domains.compression import negotiate_encoding
+from domains.models import Collection, MockEndpoint
+
+LARGE_BODY = json.dumps({"items": [{"id": i, "name": "item"} for i in range(200)]})
+
+
+@pytest.fixture
+def endpoint(db):
+    """Create an endpoint with a compressible JSON body."""
+    collection = Collection.objects.create(slug="zip", name="Zip")
+    return MockEndpoint.objects.create(
+        collection=collection,
+        display_name="Items",
+        path="items",
+        response_body=LARGE_BODY,
+    )
+
+
+def test_negotiate_encoding():
+    """Test Accept-Encoding negotiation with q-values and wildcards."""
+    available = ["br", "gzip"]
+    assert negotiate_encoding("", available) is None
+    assert negotiate_encoding("gzip, deflate", available) == "gzip"
+    assert negotiate_encoding("gzip;q=0.5, br", available) == "br"
+    assert negotiate_encoding("br;q=0, gzip", available) == "gzip"
+    assert negotiate_encoding("*", available) == "br"
+    assert negotiate_encoding("identity", available) is None
+
+
+def test_gzip_variant_served(client, endpoint):
+    """Test that a gzip client receives a compressed body."""
+    response = client.get("/zip/items", HTTP_ACCEPT_ENCODING="gzip")
+
+    assert response["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response["Vary"]
+    assert json.loads(gzip.decompress(response.content)) == json.loads(LARGE_BODY)
+
+
+def test_identity_without_accept_encoding(client, endpoint):
+    """Test that clients without Accept-Encoding get the plain body."""
+    response = client.get("/zip/items")
+
+    assert not response.has_header("Content-Encoding")
+    assert "Accept-Encoding" in response["Vary"]
+    assert json.loads(response.content) == json.loads(LARGE_BODY)
+
+
+def test_compression_disabled(client, endpoint):
+    """Test that endpoints can opt out of compression."""
+    endpoint.enable_compression = False
+    endpoint.save()
+
+    response = client.get("/zip/items", HTTP_ACCEPT_ENCODING="gzip")
+
+    assert not response.has_header("Content-Encoding")
+    assert "Accept-Encoding" not in response.get("Vary", "")
+
+
+def test_forced_content_encoding(client, endpoint):
+    """Test that an explicit content_encoding actually encodes the body."""
+    endpoint.content_encoding = "gzip"
+    endpoint.response_body = '{"small": true}'
+    endpoint.save()
+
+    response = client.get("/zip/items")
+
+    assert response["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(response.content)) == {"small": True}
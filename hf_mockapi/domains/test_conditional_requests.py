@@ -0,0 +1,84 @@
+"""Tests for ETag / Last-Modified conditional mock responses."""
+
+import pytest
+from domains.models import Collection, EndpointResponse, MockEndpoint
+
+
+@pytest.fixture
+def endpoint(db):
+    """Create a plain JSON endpoint."""
+    collection = Collection.objects.create(slug="poll", name="Poll")
+    return MockEndpoint.objects.create(
+        collection=collection,
+        display_name="Status",
+        path="status",
+        response_body='{"ok": true}',
+    )
+
+
+def test_validators_sent(client, endpoint):
+    """Test that responses carry a strong ETag and Last-Modified."""
+    response = client.get("/poll/status")
+
+    assert response.status_code == 200
+    assert response["ETag"].startswith('"')
+    assert response.has_header("Last-Modified")
+
+
+def test_if_none_match_returns_304(client, endpoint):
+    """Test that a matching If-None-Match is answered with 304."""
+    etag = client.get("/poll/status")["ETag"]
+
+    response = client.get("/poll/status", HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response["ETag"] == etag
+
+
+def test_if_modified_since_returns_304(client, endpoint):
+    """Test that an unchanged If-Modified-Since is answered with 304."""
+    last_modified = client.get("/poll/status")["Last-Modified"]
+
+    response = client.get("/poll/status", HTTP_IF_MODIFIED_SINCE=last_modified)
+
+    assert response.status_code == 304
+
+
+def test_etag_changes_with_body(client, endpoint):
+    """Test that a new default response produces a new ETag."""
+    etag = client.get("/poll/status")["ETag"]
+    EndpointResponse.objects.create(
+        endpoint=endpoint, name="Down", response_body='{"ok": false}', is_default=True
+    )
+
+    response = client.get("/poll/status", HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+
+def test_conditional_requests_disabled(client, endpoint):
+    """Test that endpoints can simulate servers without validators."""
+    etag = client.get("/poll/status")["ETag"]
+    endpoint.enable_conditional_requests = False
+    endpoint.save()
+
+    response = client.get("/poll/status", HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 200
+    assert not response.has_header("ETag")
+
+
+def test_errors_are_not_conditional(client, endpoint):
+    """Test that error responses carry no validators and are never 304."""
+    endpoint.response_status = 503
+    endpoint.save()
+
+    response = client.get(
+        "/poll/status", HTTP_IF_NONE_MATCH="*", HTTP_IF_MATCH='"stale"'
+    )
+
+    assert response.status_code == 503
+    assert not response.has_header("ETag")
+    assert not response.has_header("Last-Modified")
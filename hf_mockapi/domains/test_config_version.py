@@ -0,0 +1,93 @@
+"""Tests for collection config versions and cross-process cache coherence."""
+
+import pytest
+from domains.models import Collection, EndpointResponse, MockEndpoint
+from domains.routing import (_tables, get_route_table, invalidate_route_tables,
+                             load_route_tables, refresh_route_tables)
+
+
+@pytest.fixture
+def collection(db):
+    collection = Collection.objects.create(slug="versioned", name="Versioned")
+    MockEndpoint.objects.create(
+        collection=collection,
+        display_name="Items",
+        path="items",
+        response_body='{"v": 1}',
+    )
+    return collection
+
+
+def _version(collection):
+    return Collection.objects.values_list("config_version", flat=True).get(
+        pk=collection.pk
+    )
+
+
+def test_changes_bump_the_version(collection):
+    """Test that edits to any model of a collection bump its version."""
+    start = _version(collection)
+    endpoint = collection.endpoints.get()
+    endpoint.response_body = '{"v": 2}'
+    endpoint.save()
+    assert _version(collection) == start + 1
+
+    EndpointResponse.objects.create(endpoint=endpoint, name="Error", is_default=True)
+    assert _version(collection) == start + 2
+
+    collection.name = "Renamed"
+    collection.save()
+    assert _version(collection) == start + 3
+
+    # Moving an endpoint changes both collections
+    other = Collection.objects.create(slug="other", name="Other")
+    endpoint.collection = other
+    endpoint.save()
+    assert _version(collection) == start + 4
+    assert _version(other) == other.config_version + 1
+
+
+def test_route_table_follows_other_processes(collection, settings):
+    """Test that writes which bypass local signals are picked up by version."""
+    settings.MOCKAPI_CONFIG_CHECK_INTERVAL_MS = 0
+    invalidate_route_tables()
+    table = get_route_table("versioned")
+    assert get_route_table("versioned") is table
+
+    # Another process: a bulk update plus an explicit bump
+    MockEndpoint.objects.filter(collection=collection).update(path="renamed")
+    Collection.bump_config_version(collection.pk)
+
+    fresh = get_route_table("versioned")
+    assert fresh is not table
+    assert fresh.match("GET", "renamed") is not None
+
+
+def test_unchanged_tables_cost_one_query(
+    collection, settings, django_assert_num_queries
+):
+    """Test that checking a cached table reads a single row."""
+    settings.MOCKAPI_CONFIG_CHECK_INTERVAL_MS = 0
+    invalidate_route_tables()
+    table = get_route_table("versioned")
+    with django_assert_num_queries(1):
+        assert get_route_table("versioned") is table
+
+    tables = load_route_tables()
+    with django_assert_num_queries(1):
+        assert refresh_route_tables(tables) is tables
+
+
+def test_misses_are_not_cached(collection, settings):
+    """Test that unknown and deactivated collections leave no cache entry."""
+    settings.MOCKAPI_CONFIG_CHECK_INTERVAL_MS = 0
+    invalidate_route_tables()
+    for number in range(50):
+        assert get_route_table(f"missing-{number}") is None
+    assert get_route_table("versioned") is not None
+    assert list(_tables) == ["versioned"]
+
+    # Deactivated by another process: the cached table is dropped
+    Collection.objects.filter(pk=collection.pk).update(is_active=False)
+    assert get_route_table("versioned") is None
+    assert not _tables
@@ -0,0 +1,82 @@
+"""Tests for automatic HEAD and CORS preflight handling."""
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from domains.models import Collection, MockEndpoint
+
+
+@pytest.fixture
+def collection(db):
+    """Create a collection open to one browser origin."""
+    collection = Collection.objects.create(
+        slug="browser",
+        name="Browser",
+        cors_allowed_origins=["https://app.example.com"],
+        cors_max_age=600,
+    )
+    MockEndpoint.objects.create(
+        collection=collection,
+        display_name="List",
+        path="items",
+        http_method="GET",
+        response_body='{"items": [1, 2, 3]}',
+    )
+    MockEndpoint.objects.create(
+        collection=collection,
+        display_name="Create",
+        path="items",
+        http_method="POST",
+        response_status=201,
+    )
+    return collection
+
+
+def test_preflight_answered_without_queries(client, collection):
+    """Test that a preflight is answered from the cached route table."""
+    client.get("/browser/items")  # warm the route table
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.options(
+            "/browser/items",
+            HTTP_ORIGIN="https://app.example.com",
+            HTTP_ACCESS_CONTROL_REQUEST_METHOD="POST",
+            HTTP_ACCESS_CONTROL_REQUEST_HEADERS="content-type",
+        )
+
+    assert len(queries) == 0
+    assert response.status_code == 204
+    assert response["Access-Control-Allow-Origin"] == "https://app.example.com"
+    assert response["Access-Control-Allow-Methods"] == "GET, HEAD, OPTIONS, POST"
+    assert response["Access-Control-Max-Age"] == "600"
+
+
+def test_preflight_from_unknown_origin(client, collection):
+    """Test that preflights from other origins get no CORS grant."""
+    response = client.options(
+        "/browser/items",
+        HTTP_ORIGIN="https://evil.example.com",
+        HTTP_ACCESS_CONTROL_REQUEST_METHOD="POST",
+    )
+
+    assert response.status_code == 204
+    assert not response.has_header("Access-Control-Allow-Origin")
+
+
+def test_actual_response_has_cors_headers(client, collection):
+    """Test that mock responses carry the collection's CORS headers."""
+    response = client.get("/browser/items", HTTP_ORIGIN="https://app.example.com")
+
+    assert response["Access-Control-Allow-Origin"] == "https://app.example.com"
+    assert "Origin" in response["Vary"]
+
+
+def test_head_uses_get_headers(client, collection):
+    """Test that HEAD mirrors the GET headers and length without a body."""
+    get_response = client.get("/browser/items")
+    response = client.head("/browser/items")
+
+    assert response.status_code == 200
+    assert response.content == b""
+    assert response["Content-Length"] == str(len(get_response.content))
+    assert response["ETag"] == get_response["ETag"]
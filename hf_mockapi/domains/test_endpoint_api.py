@@ -0,0 +1,103 @@
+"""Tests for the paginated, sparse-field endpoint list API."""
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from domains.models import Collection, EndpointResponse, MockEndpoint
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def client(db):
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user("api", password="x"))
+    return client
+
+
+@pytest.fixture
+def collection(db):
+    collection = Collection.objects.create(slug="paged", name="Paged")
+    endpoints = MockEndpoint.objects.bulk_create(
+        MockEndpoint(
+            collection=collection,
+            display_name=f"Item {number}",
+            # Shared positions exercise the (position, path, id) tie-break
+            path=f"items/{number:02}",
+            position=number % 3,
+            response_body="x" * 1000,
+        )
+        for number in range(25)
+    )
+    EndpointResponse.objects.bulk_create(
+        EndpointResponse(endpoint=endpoint, name="Error", response_status=500)
+        for endpoint in endpoints
+    )
+    return collection
+
+
+def _walk(client, url):
+    """Follow ``next`` links, returning the results and the page count."""
+    results, pages = [], 0
+    while url:
+        data = client.get(url).json()
+        results.extend(data["results"])
+        url = data["next"]
+        pages += 1
+    return results, pages
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/api/endpoints/?collection=paged&page_size=10",
+        "/api/collections/paged/endpoints/?page_size=10",
+    ],
+)
+def test_cursor_pages_cover_every_endpoint(client, collection, url):
+    """Test that pages follow (position, path) order without gaps or repeats."""
+    results, pages = _walk(client, url)
+    assert pages == 3
+    expected = MockEndpoint.objects.order_by("position", "path", "id")
+    assert [item["id"] for item in results] == [e.pk for e in expected]
+
+
+def test_summary_and_sparse_fields(client, collection):
+    """Test the summary view and fields=/exclude= selection."""
+    data = client.get("/api/endpoints/?collection=paged&view=summary").json()
+    item = data["results"][0]
+    assert "response_body" not in item and "responses" not in item
+    assert item["full_path"].startswith("/paged/items/")
+
+    data = client.get("/api/endpoints/?collection=paged&fields=id,path").json()
+    assert set(data["results"][0]) == {"id", "path"}
+
+    data = client.get("/api/endpoints/?collection=paged&exclude=responses").json()
+    item = data["results"][0]
+    assert "responses" not in item and item["response_body"] == "x" * 1000
+
+
+@pytest.mark.parametrize(
+    "query,count",
+    [
+        # The ETag check reads the collection's version first
+        ("view=summary", 2),
+        ("exclude=responses", 2),
+        # Nested responses are prefetched in one more query
+        ("", 3),
+    ],
+)
+def test_query_count_is_constant(client, collection, query, count):
+    """Test that a page takes the same number of queries however large it is."""
+    url = f"/api/endpoints/?collection=paged&page_size=100&{query}"
+    with CaptureQueriesContext(connection) as queries:
+        assert len(client.get(url).json()["results"]) == 25
+    assert len(queries) == count
+    if "summary" in query:
+        assert "response_body" not in queries[-1]["sql"]
+
+
+def test_invalid_cursor(client, collection):
+    """Test that a malformed cursor is rejected."""
+    response = client.get("/api/endpoints/?collection=paged&cursor=nonsense")
+    assert response.status_code == 404
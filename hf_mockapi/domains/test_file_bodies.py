@@ -0,0 +1,136 @@
+"""Tests for file-backed mock response bodies."""
+
+import os
+
+import pytest
+from django.test import RequestFactory
+from domains.file_bodies import (RangeNotSatisfiable, parse_range_header,
+                                 serve_body_file)
+from domains.models import Collection, EndpointResponse, MockEndpoint
+
+PAYLOAD = bytes(range(256)) * 4
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    """Point MEDIA_ROOT at a temporary directory holding a body file."""
+    settings.MEDIA_ROOT = tmp_path
+    (tmp_path / "mock_bodies").mkdir()
+    (tmp_path / "mock_bodies" / "payload.bin").write_bytes(PAYLOAD)
+    return tmp_path
+
+
+@pytest.fixture
+def endpoint(db, media_root):
+    """Create an endpoint serving a binary file."""
+    collection = Collection.objects.create(slug="files", name="Files")
+    return MockEndpoint.objects.create(
+        collection=collection,
+        display_name="Download",
+        path="download",
+        http_method="GET",
+        content_type="application/octet-stream",
+        response_file="mock_bodies/payload.bin",
+    )
+
+
+def _content(response):
+    return b"".join(response.streaming_content)
+
+
+def test_parse_range_header():
+    """Test single-range parsing, suffix ranges and unsatisfiable ranges."""
+    assert parse_range_header(None, 100) is None
+    assert parse_range_header("bytes=0-9", 100) == (0, 9)
+    assert parse_range_header("bytes=90-", 100) == (90, 99)
+    assert parse_range_header("bytes=-10", 100) == (90, 99)
+    assert parse_range_header("bytes=0-1,5-6", 100) is None
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range_header("bytes=100-", 100)
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range_header("bytes=-10", 0)
+
+
+def test_full_file_response(client, endpoint):
+    """Test that the whole file is served with its length."""
+    response = client.get("/files/download")
+
+    assert response.status_code == 200
+    assert response["Content-Length"] == str(len(PAYLOAD))
+    assert response["Accept-Ranges"] == "bytes"
+    assert response["Content-Type"] == "application/octet-stream"
+    assert _content(response) == PAYLOAD
+
+
+def test_range_request(client, endpoint):
+    """Test that a Range request returns a 206 partial body."""
+    response = client.get("/files/download", HTTP_RANGE="bytes=10-19")
+
+    assert response.status_code == 206
+    assert response["Content-Range"] == f"bytes 10-19/{len(PAYLOAD)}"
+    assert response["Content-Length"] == "10"
+    assert _content(response) == PAYLOAD[10:20]
+
+    # Handed to wsgi.file_wrapper positioned at the range, for sendfile
+    request = RequestFactory().get("/files/download", HTTP_RANGE="bytes=10-19")
+    response = serve_body_file(
+        request, "mock_bodies/payload.bin", 200, "application/octet-stream"
+    )
+    wrapped = response.file_to_stream
+    assert os.lseek(wrapped.fileno(), 0, os.SEEK_CUR) == 10
+    assert _content(response) == PAYLOAD[10:20]
+
+
+def test_if_range(client, endpoint):
+    """Test that a Range is only honoured while If-Range still matches."""
+    full = client.get("/files/download")
+    etag, last_modified = full["ETag"], full["Last-Modified"]
+
+    for validator in (etag, last_modified):
+        response = client.get(
+            "/files/download", HTTP_RANGE="bytes=10-19", HTTP_IF_RANGE=validator
+        )
+        assert response.status_code == 206
+    for stale in ('"0-0"', "Mon, 01 Jan 2001 00:00:00 GMT"):
+        response = client.get(
+            "/files/download", HTTP_RANGE="bytes=10-19", HTTP_IF_RANGE=stale
+        )
+        assert response.status_code == 200
+        assert _content(response) == PAYLOAD
+
+
+def test_unsatisfiable_range(client, endpoint):
+    """Test that an out-of-bounds range returns 416."""
+    response = client.get("/files/download", HTTP_RANGE="bytes=5000-")
+
+    assert response.status_code == 416
+    assert response["Content-Range"] == f"bytes */{len(PAYLOAD)}"
+
+
+def test_default_response_file(client, endpoint):
+    """Test that a default EndpointResponse can serve a file too."""
+    EndpointResponse.objects.create(
+        endpoint=endpoint,
+        name="Image",
+        content_type="text/plain",
+        response_file="mock_bodies/payload.bin",
+        is_default=True,
+    )
+
+    response = client.get("/files/download")
+
+    assert response.status_code == 200
+    assert _content(response) == PAYLOAD
+
+
+def test_x_accel_redirect(client, endpoint, settings):
+    """Test that proxy delivery only sends the redirect header."""
+    settings.MOCKAPI_FILE_DELIVERY = "x-accel-redirect"
+
+    response = client.get("/files/download")
+
+    assert response.status_code == 200
+    assert (
+        response["X-Accel-Redirect"] == "/protected-mock-bodies/mock_bodies/payload.bin"
+    )
+    assert response.content == b""
@@ -0,0 +1,253 @@
+"""Tests for the HAR and Postman importers."""
+
+import base64
+import io
+import json
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from domains.importers import ImportFormatError, JsonStream, import_traffic
+from domains.models import Collection, EndpointResponse, MockEndpoint
+from rest_framework.test import APIClient
+
+
+def _entry(method, url, status, body, mime="application/json", **content):
+    return {
+        "startedDateTime": "2024-01-01T00:00:00Z",
+        "request": {"method": method, "url": url, "headers": []},
+        "response": {
+            "status": status,
+            "headers": [
+                {"name": "Content-Type", "value": mime},
+                {"name": "X-Request-Id", "value": "abc"},
+                {"name": "Date", "value": "Mon, 01 Jan 2024 00:00:00 GMT"},
+                {"name": ":status", "value": str(status)},
+            ],
+            "content": {"mimeType": mime, "text": body, **content},
+        },
+    }
+
+
+def _har(entries):
+    document = {
+        "log": {
+            "version": "1.2",
+            "creator": {"name": "test", "entries": "not these"},
+            "pages": [{"title": '["entries"]'}],
+            "entries": entries,
+        }
+    }
+    return io.BytesIO(json.dumps(document).encode())
+
+
+@pytest.fixture
+def collection(db, settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return Collection.objects.create(slug="captured", name="Captured")
+
+
+def test_har_import(collection):
+    """Test deduplication, variants, headers, skips and binary bodies."""
+    png = b"\x89PNG\r\n\x1a\n\xff"
+    har = _har(
+        [
+            _entry(
+                "GET", "https://api.example.com/v1/users?page=1", 200, '[{"id": 1}]'
+            ),
+            _entry(
+                "GET", "https://api.example.com/v1/users?page=2", 200, '[{"id": 2}]'
+            ),
+            _entry(
+                "GET", "https://api.example.com/v1/users?page=1", 200, '[{"id": 1}]'
+            ),
+            _entry("GET", "https://api.example.com/v1/users", 500, '{"error": "x"}'),
+            _entry("POST", "https://api.example.com/v1/users", 201, '{"id": 3}'),
+            _entry("HEAD", "https://api.example.com/v1/users", 200, ""),
+            _entry("GET", "https://api.example.com/v1/gone", 0, ""),
+            _entry("GET", "https://cdn.example.com/logo.png", 200, "", "image/png"),
+            _entry(
+                "GET",
+                "https://api.example.com/v1/logo",
+                200,
+                base64.b64encode(png).decode(),
+                "image/png",
+                encoding="base64",
+            ),
+        ]
+    )
+    result = import_traffic(collection, har, "har", strip_prefix="v1")
+    assert result.as_dict() == {
+        "entries": 9,
+        "endpoints": 3,
+        "responses": 2,
+        "duplicates": 1,
+        "skipped": 3,
+    }
+
+    users = collection.endpoints.get(path="users", http_method="GET")
+    assert json.loads(users.response_body) == [{"id": 1}]
+    assert users.custom_headers == {"X-Request-Id": "abc"}
+    variants = list(users.responses.order_by("position"))
+    assert [(v.response_status, v.position) for v in variants] == [(200, 1), (500, 2)]
+    assert users.version == collection.endpoints.get(path="logo").version > 0
+    assert all(variant.version == users.version for variant in variants)
+
+    logo = collection.endpoints.get(path="logo")
+    assert logo.response_file.read() == png
+    assert logo.content_type == "image/png"
+
+    # Served right away
+    assert Client().get("/captured/users").json() == [{"id": 1}]
+
+    # A second import only adds what is new
+    har = _har(
+        [
+            _entry("GET", "https://api.example.com/v1/users", 500, '{"error": "x"}'),
+            _entry("GET", "https://api.example.com/v1/users", 404, '{"error": "y"}'),
+            _entry("GET", "https://api.example.com/v1/logo", 200, "", "image/png"),
+        ]
+    )
+    result = import_traffic(collection, har, "har", strip_prefix="v1")
+    assert (result.endpoints, result.responses, result.duplicates) == (0, 2, 1)
+    assert users.responses.count() == 3
+
+
+def test_postman_import(collection):
+    """Test folders, saved responses and URL forms."""
+    document = {
+        "info": {"name": "Shop", "schema": "https://schema.getpostman.com/v2.1.0"},
+        "item": [
+            {
+                "name": "Users",
+                "item": [
+                    {
+                        "name": "List users",
+                        "request": {
+                            "method": "GET",
+                            "url": {"raw": "{{baseUrl}}/users", "path": ["users"]},
+                        },
+                        "response": [
+                            {
+                                "name": "OK",
+                                "code": 200,
+                                "header": [
+                                    {"key": "Content-Type", "value": "application/json"}
+                                ],
+                                "body": "[]",
+                            },
+                            {"name": "Unauthorized", "code": 401, "body": ""},
+                        ],
+                    }
+                ],
+            },
+            {
+                "name": "Health",
+                "request": {"method": "GET", "url": "{{baseUrl}}/health?verbose=1"},
+            },
+            {"name": "Bare", "request": "https://api.example.com/bare"},
+        ],
+    }
+    data = io.BytesIO(json.dumps(document).encode())
+    result = import_traffic(collection, data, "postman")
+    assert (result.endpoints, result.responses) == (3, 1)
+
+    users = collection.endpoints.get(path="users")
+    assert users.display_name == "OK"
+    assert users.response_body == "[]"
+    assert users.responses.get().name == "Unauthorized"
+    health = collection.endpoints.get(path="health")
+    assert (health.display_name, health.response_status) == ("Health", 200)
+    assert collection.endpoints.filter(path="bare").exists()
+
+
+def test_large_import_is_batched(collection):
+    """Test that queries grow with batches, not with entries."""
+    entries = [
+        _entry("GET", f"https://x.test/items/{n % 600}", 200, f'{{"n": {n}}}')
+        for n in range(3000)
+    ]
+    with CaptureQueriesContext(connection) as queries:
+        result = import_traffic(collection, _har(entries), "har")
+    assert (result.endpoints, result.responses) == (600, 2400)
+    assert MockEndpoint.objects.filter(collection=collection).count() == 600
+    assert EndpointResponse.objects.filter(endpoint__collection=collection).count() == (
+        2400
+    )
+    # SQLite splits each batch further by its parameter limit
+    assert len(queries) < 100
+
+    # Existing endpoints are loaded together, not per method and path
+    with CaptureQueriesContext(connection) as queries:
+        result = import_traffic(collection, _har(entries), "har")
+    assert (result.duplicates, result.endpoints, result.responses) == (3000, 0, 0)
+    assert len(queries) < 10
+
+
+def test_failed_import_writes_nothing(collection, tmp_path):
+    """Test that a malformed file leaves no rows and no files behind."""
+    png = base64.b64encode(b"\x89PNG\xff").decode()
+    entry = _entry("GET", "https://x.test/logo", 200, png, "image/png")
+    entry["response"]["content"]["encoding"] = "base64"
+    with pytest.raises(ImportFormatError):
+        import_traffic(collection, _har([entry, {"request": "GET /"}]), "har")
+    assert not collection.endpoints.exists()
+    assert not list((tmp_path / "mock_bodies").iterdir())
+
+    for item in (
+        {"request": {"url": "/a"}, "response": ["OK"]},
+        {"request": {"url": "/a"}, "response": {"code": 200}},
+        {"request": ["GET", "/a"]},
+        {"item": "folder"},
+        {"request": {"url": "/a"}, "response": [{"header": "Content-Type: x"}]},
+    ):
+        data = io.BytesIO(json.dumps({"item": [item]}).encode())
+        with pytest.raises(ImportFormatError):
+            import_traffic(collection, data, "postman")
+
+
+def test_json_stream_reads_incrementally():
+    """Test decoding across chunk boundaries with a tiny chunk size."""
+    document = {"skip": {"a": [1, 2, {"b": "}]"}]}, "items": [12345, "x y", {"k": []}]}
+    stream = JsonStream(io.BytesIO(json.dumps(document).encode()), chunk_size=3)
+    stream.enter("items")
+    assert list(stream.items()) == [12345, "x y", {"k": []}]
+
+    stream = JsonStream(io.BytesIO(b'{"items": [1, 2'), chunk_size=4)
+    stream.enter("items")
+    with pytest.raises(ImportFormatError):
+        list(stream.items())
+    with pytest.raises(ImportFormatError):
+        JsonStream(io.BytesIO(b'{"other": 1}')).enter("items")
+
+
+def test_import_api_and_command(collection, tmp_path):
+    """Test the upload endpoint and the management command."""
+    from django.core.files.uploadedfile import SimpleUploadedFile
+
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user("importer", password="x"))
+    har = _har([_entry("GET", "https://x.test/a", 200, "{}")]).getvalue()
+    response = client.post(
+        "/api/collections/captured/import-traffic/",
+        {"file": SimpleUploadedFile("capture.har", har), "format": "har"},
+        format="multipart",
+    )
+    assert response.status_code == 200
+    assert response.json()["endpoints"] == 1
+    response = client.post(
+        "/api/collections/captured/import-traffic/",
+        {"file": SimpleUploadedFile("capture.har", b"[1]"), "format": "har"},
+        format="multipart",
+    )
+    assert response.status_code == 400
+
+    path = tmp_path / "capture.har"
+    path.write_bytes(_har([_entry("GET", "https://x.test/b", 200, "{}")]).getvalue())
+    output = io.StringIO()
+    call_command("import_traffic", "captured", str(path), stdout=output)
+    assert "1 endpoints" in output.getvalue()
+    assert collection.endpoints.filter(path="b").exists()
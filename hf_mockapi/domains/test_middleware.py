@@ -0,0 +1,44 @@
+"""Tests for the mock fast-path middleware."""
+
+import pytest
+from domains.models import Collection, MockEndpoint
+
+
+@pytest.fixture
+def endpoint(db):
+    """Create a simple mock endpoint."""
+    collection = Collection.objects.create(slug="fast", name="Fast")
+    return MockEndpoint.objects.create(
+        collection=collection,
+        display_name="Ping",
+        path="ping",
+        http_method="POST",
+        response_body='{"pong": true}',
+    )
+
+
+def test_mock_traffic_skips_full_stack(client, endpoint):
+    """Test that mock responses bypass the clickjacking/security middleware."""
+    response = client.post("/fast/ping", data="{}", content_type="application/json")
+
+    assert response.status_code == 200
+    assert response.json() == {"pong": True}
+    assert response["Content-Length"] == str(len(response.content))
+    assert not response.has_header("X-Frame-Options")
+
+
+def test_api_traffic_uses_full_stack(client, endpoint):
+    """Test that management API requests still go through every middleware."""
+    response = client.get("/api/collections/")
+
+    assert response.has_header("X-Frame-Options")
+
+
+def test_fast_path_disabled(client, endpoint, settings):
+    """Test that the dispatcher can be switched off."""
+    settings.MOCKAPI_FAST_PATH = False
+
+    response = client.post("/fast/ping", data="{}", content_type="application/json")
+
+    assert response.status_code == 200
+    assert response.has_header("X-Frame-Options")
@@ -1,8 +1,13 @@
 """Tests for OpenAPI utilities."""
 
+import json
+import uuid
+
 import pytest
+import yaml
 from django.contrib.auth.models import User
-from domains.models import Collection, MockEndpoint
+from domains.examples import ExampleSynthesizer
+from domains.models import Collection, EndpointResponse, MockEndpoint
 from domains.openapi_utils import (generate_openapi_schema,
                                    import_openapi_schema,
                                    validate_openapi_schema)
@@ -148,3 +153,193 @@ def test_custom_schema_storage(collection):
 
     schema = generate_openapi_schema(collection)
     assert schema == custom_schema
+
+
+SYNTHESIS_SCHEMA = """
+openapi: 3.0.3
+info: {title: Shop, version: "1"}
+paths:
+  /orders/{id}:
+    get:
+      responses:
+        '200':
+          description: The order
+          content:
+            application/json:
+              schema: {$ref: "#/components/schemas/Order"}
+        '404':
+          description: Not found
+          content:
+            application/json:
+              examples:
+                missing: {value: {error: missing}}
+        '204':
+          description: Nothing
+        default:
+          description: Error
+components:
+  schemas:
+    Order:
+      allOf:
+        - {$ref: "#/components/schemas/Base"}
+        - type: object
+          properties:
+            status: {type: string, enum: [open, paid]}
+            email: {type: string, format: email}
+            total: {type: number, minimum: 10, maximum: 20}
+            quantity: {type: integer, minimum: 3, maximum: 5, multipleOf: 2}
+            code: {type: string, minLength: 8, maxLength: 8}
+            payment: {oneOf: [{type: boolean}, {type: string}]}
+            lines: {type: array, minItems: 3, items: {$ref: "#/components/schemas/Base"}}
+            parent: {$ref: "#/components/schemas/Order"}
+    Base:
+      type: object
+      properties:
+        id: {type: string, format: uuid}
+        created_at: {type: string, format: date-time}
+"""
+
+
+def test_import_synthesizes_examples(collection):
+    """Test that every declared response gets a body, given or generated."""
+    assert import_openapi_schema(collection, SYNTHESIS_SCHEMA)[0]
+    endpoint = collection.endpoints.get(path="orders/{id}")
+    order = json.loads(endpoint.response_body)
+    assert endpoint.response_status == 200
+    assert set(order) == {
+        "id",
+        "created_at",
+        "status",
+        "email",
+        "total",
+        "quantity",
+        "code",
+        "payment",
+        "lines",
+    }
+    assert order["status"] in ("open", "paid")
+    assert order["email"].endswith("@example.com")
+    assert 10 <= order["total"] <= 20
+    assert order["quantity"] == 4
+    assert len(order["code"]) == 8
+    assert isinstance(order["payment"], bool)
+    assert len(order["lines"]) == 3
+    assert str(uuid.UUID(order["id"])) == order["id"]
+    assert order["created_at"].endswith("Z")
+
+    variants = {r.response_status: r for r in endpoint.responses.all()}
+    assert json.loads(variants[404].response_body) == {"error": "missing"}
+    assert variants[404].name == "Not found"
+    assert variants[204].response_body == ""
+    assert set(variants) == {404, 204}
+
+    # Deterministic, and re-importing updates instead of duplicating
+    assert import_openapi_schema(collection, SYNTHESIS_SCHEMA)[0]
+    endpoint.refresh_from_db()
+    assert json.loads(endpoint.response_body) == order
+    assert endpoint.responses.count() == 2
+    assert import_openapi_schema(collection, SYNTHESIS_SCHEMA, seed=7)[0]
+    endpoint.refresh_from_db()
+    assert json.loads(endpoint.response_body) != order
+
+    # Only the variants an import writes are stamped for the change feed
+    other = MockEndpoint.objects.create(
+        collection=collection, display_name="Other", path="other"
+    )
+    untouched = other.responses.create(name="Kept", response_status=500)
+    version = EndpointResponse.objects.get(pk=untouched.pk).version
+    updated = {r.pk: r.updated_at for r in endpoint.responses.all()}
+    assert import_openapi_schema(collection, SYNTHESIS_SCHEMA, seed=8)[0]
+    assert EndpointResponse.objects.get(pk=untouched.pk).version == version
+    collection.refresh_from_db()
+    assert {r.version for r in endpoint.responses.all()} == {collection.config_version}
+    assert all(r.updated_at > updated[r.pk] for r in endpoint.responses.all())
+
+    # Served right away, variants included
+    from django.test import Client
+
+    assert Client().get("/testapi/orders/{id}").status_code == 200
+
+
+def test_shared_components_are_synthesized_once():
+    """Test the memoized resolver on a spec with many operations."""
+    calls = []
+
+    class CountingSynthesizer(ExampleSynthesizer):
+        def resolve(self, ref):
+            calls.append(ref)
+            return super().resolve(ref)
+
+    document = yaml.safe_load(SYNTHESIS_SCHEMA)
+    synthesizer = CountingSynthesizer(document)
+    schema = {"$ref": "#/components/schemas/Order"}
+    examples = [synthesizer.example(schema, f"op{n}") for n in range(500)]
+    assert all(example == examples[0] for example in examples)
+    assert sorted(set(calls)) == [
+        "#/components/schemas/Base",
+        "#/components/schemas/Order",
+    ]
+    assert len(calls) == 2
+
+
+def test_import_parses_once(collection, monkeypatch):
+    """Test that validation and import share one parse, JSON without YAML."""
+    from domains import openapi_utils
+
+    document = yaml.safe_load(SYNTHESIS_SCHEMA)
+    calls = []
+    real_load = yaml.load
+
+    def counting_load(stream, Loader):
+        calls.append(Loader)
+        return real_load(stream, Loader)
+
+    monkeypatch.setattr(openapi_utils.yaml, "load", counting_load)
+    assert import_openapi_schema(collection, SYNTHESIS_SCHEMA)[0]
+    assert calls == [openapi_utils.YAML_LOADER]
+
+    assert import_openapi_schema(collection, json.dumps(document).encode())[0]
+    assert len(calls) == 1
+    assert json.loads(collection.openapi_schema)["info"]["title"] == "Shop"
+
+
+def test_schema_is_stored_compressed(collection):
+    """Test the compressed column and that route tables skip loading it."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from domains.routing import get_route_table
+
+    text = SYNTHESIS_SCHEMA * 20
+    collection.openapi_schema = text
+    collection.save()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT openapi_schema FROM domains_collection WHERE id = %s",
+            [collection.pk],
+        )
+        stored = bytes(cursor.fetchone()[0])
+    assert len(stored) < len(text) / 10
+    assert Collection.objects.get(pk=collection.pk).openapi_schema == text
+
+    with CaptureQueriesContext(connection) as queries:
+        get_route_table(collection.slug)
+    assert not any("openapi_schema" in query["sql"] for query in queries)
+
+
+def test_import_api_accepts_files(collection, user):
+    """Test uploading a schema file to the import endpoint."""
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    client.force_authenticate(user)
+    upload = SimpleUploadedFile("spec.yaml", SYNTHESIS_SCHEMA.encode())
+    response = client.post(
+        "/api/collections/testapi/import-openapi/",
+        {"schema": upload, "seed": "3"},
+        format="multipart",
+    )
+    assert response.status_code == 200, response.json()
+    assert collection.endpoints.filter(path="orders/{id}").exists()
+    response = client.get("/api/collections/testapi/")
+    assert response.json()["openapi_schema"] == SYNTHESIS_SCHEMA
@@ -0,0 +1,140 @@
+"""Tests for prefork serving."""
+
+import os
+import queue
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from domains.models import Collection, MockEndpoint
+from domains.prefork import Supervisor
+from domains.snapshots import export_snapshot
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(socket, "SO_REUSEPORT"), reason="requires SO_REUSEPORT"
+)
+
+MANAGE_PY = Path(__file__).resolve().parent.parent / "manage.py"
+
+
+@pytest.fixture
+def supervisor(db, tmp_path):
+    """Run ``serve --workers 2`` from a snapshot in a subprocess."""
+    collection = Collection.objects.create(slug="forked", name="Forked")
+    MockEndpoint.objects.create(
+        collection=collection,
+        display_name="Ping",
+        path="ping",
+        response_body='{"pong": true}',
+    )
+    snapshot = tmp_path / "mocks.snap"
+    export_snapshot([collection], snapshot)
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            str(MANAGE_PY),
+            "serve",
+            "--snapshot",
+            str(snapshot),
+            "--workers",
+            "2",
+            "--no-log",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--watch-interval",
+            "0.2",
+            "--grace",
+            "2",
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+        env={**os.environ, "PYTHONUNBUFFERED": "1"},
+    )
+    lines = queue.Queue()
+    threading.Thread(
+        target=lambda: [lines.put(line.strip()) for line in process.stdout],
+        daemon=True,
+    ).start()
+    yield process, port, lines, snapshot
+
+    if process.poll() is None:
+        process.kill()
+    process.wait()
+
+
+def _started(lines, count, timeout=20):
+    """Wait for ``count`` "Worker <pid> started" lines and return the pids."""
+    pids = []
+    deadline = time.monotonic() + timeout
+    while len(pids) < count:
+        line = lines.get(timeout=max(deadline - time.monotonic(), 0.01))
+        if line.startswith("Worker ") and line.endswith(" started"):
+            pids.append(int(line.split()[1]))
+    return pids
+
+
+def _get(port, path):
+    request = f"GET {path} HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n"
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+        sock.sendall(request.encode())
+        data = b""
+        while chunk := sock.recv(65536):
+            data += chunk
+    return data
+
+
+def test_workers_restart_and_roll(supervisor):
+    """Test crash recovery, rolling restarts and graceful shutdown."""
+    process, port, lines, snapshot = supervisor
+    first = _started(lines, 2)
+    assert _get(port, "/forked/ping").endswith(b'{"pong": true}')
+
+    # A crashed worker is replaced
+    os.kill(first[0], signal.SIGKILL)
+    replacement = _started(lines, 1)
+    assert replacement[0] not in first
+    assert _get(port, "/forked/ping").startswith(b"HTTP/1.1 200 OK")
+
+    # Replacing the snapshot rolls every worker
+    endpoint = MockEndpoint.objects.get(path="ping")
+    endpoint.response_body = '{"pong": "v2"}'
+    endpoint.save()
+    export_snapshot([endpoint.collection], snapshot)
+    _started(lines, 2)
+    time.sleep(0.5)
+    for _ in range(10):
+        assert _get(port, "/forked/ping").endswith(b'{"pong": "v2"}')
+
+    process.send_signal(signal.SIGTERM)
+    assert process.wait(timeout=10) == 0
+
+
+def test_crash_backoff_does_not_block():
+    """Test that respawning after crashes waits in the loop, not in a sleep."""
+    supervisor = Supervisor(worker=None, workers=1)
+    spawned = []
+    supervisor.spawn = lambda: spawned.append(time.monotonic())
+    supervisor.failures = 3
+    supervisor.next_spawn = time.monotonic() + 60
+
+    start = time.monotonic()
+    supervisor.respawn()
+    assert not spawned
+    assert time.monotonic() - start < 1
+
+    supervisor.next_spawn = 0.0
+    supervisor.respawn()
+    assert len(spawned) == 1
+    assert supervisor.next_spawn >= spawned[0] + 2  # 0.5 s doubled twice
@@ -0,0 +1,289 @@
+"""Tests for upstream passthrough and recording of unmatched requests."""
+
+import asyncio
+import http.client
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from django.test import Client
+from domains.models import Collection, EndpointResponse, MockEndpoint
+from domains.proxy import ProxyPolicy, get_pool, record
+from domains.releases import create_release
+from domains.routing import get_route_table, release_table
+from domains.server import MockServer
+from domains.snapshots import export_snapshot, load_snapshot
+
+LARGE_BODY = b"x" * (3 * 1024 * 1024)
+
+
+class Upstream(BaseHTTPRequestHandler):
+    """Stand-in upstream with keep-alive; records what it received."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.requests.append((self.command, self.path, dict(self.headers)))
+        self.server.connections.add(self.client_address)
+        path = self.path.removeprefix("/v1")
+        if path.startswith("/large"):
+            # Chunked, so the size is only known at the end
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for start in range(0, len(LARGE_BODY), 256 * 1024):
+                chunk = LARGE_BODY[start : start + 256 * 1024]
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.write(b"0\r\n\r\n")
+            return
+        if path.startswith("/missing"):
+            self.reply(404, {"error": "missing"})
+            return
+        if path.startswith("/image"):
+            self.reply(200, b"\x89PNG\r\n\x1a\n\xff", "image/png")
+            return
+        self.reply(200, {"path": self.path, "count": len(self.server.requests)})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.requests.append((self.command, self.path, dict(self.headers)))
+        self.reply(201, {"received": len(body)})
+
+    def reply(self, status, data, content_type="application/json"):
+        body = data if isinstance(data, bytes) else json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-Upstream", "yes")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def upstream():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Upstream)
+    server.daemon_threads = True
+    server.requests = []
+    server.connections = set()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    get_pool().clear()
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def collection(db, upstream):
+    collection = Collection.objects.create(
+        slug="proxied",
+        name="Proxied",
+        proxy_mode=Collection.PROXY_PASSTHROUGH,
+        upstream_url=f"http://127.0.0.1:{upstream.server_port}/v1/",
+    )
+    MockEndpoint.objects.create(
+        collection=collection, display_name="Mocked", path="mocked"
+    )
+    return collection
+
+
+def _get(path, **headers):
+    response = Client().get(path, **headers)
+    body = b"".join(response.streaming_content) if response.streaming else None
+    return response, body
+
+
+def test_passthrough_forwards_misses(collection, upstream):
+    """Test that misses go upstream over one pooled connection."""
+    assert Client().get("/proxied/mocked").status_code == 200
+    assert upstream.requests == []
+
+    for _ in range(3):
+        response, body = _get("/proxied/users/1?page=2")
+        assert response.status_code == 200
+        assert json.loads(body)["path"] == "/v1/users/1?page=2"
+        assert response["X-Upstream"] == "yes"
+    assert len(upstream.connections) == 1
+    assert "Host" in upstream.requests[0][2]
+    assert upstream.requests[0][2]["Host"] == f"127.0.0.1:{upstream.server_port}"
+
+    response = Client().post(
+        "/proxied/orders", data=b"a" * 100_000, content_type="application/json"
+    )
+    assert response.status_code == 201
+    assert json.loads(b"".join(response.streaming_content)) == {"received": 100_000}
+
+    # Passthrough never records
+    assert collection.endpoints.count() == 1
+
+
+def test_large_bodies_are_streamed(collection, upstream):
+    """Test that a large chunked body is streamed through unchanged."""
+    response, body = _get("/proxied/large")
+    assert response.streaming
+    assert body == LARGE_BODY
+    # The connection is reused after a fully read chunked body
+    assert _get("/proxied/users")[0].status_code == 200
+    assert len(upstream.connections) == 1
+
+
+def test_record_mode_creates_mocks(collection, upstream, settings, tmp_path):
+    """Test recording, filters and deduplication."""
+    settings.MEDIA_ROOT = tmp_path
+    collection.proxy_mode = Collection.PROXY_RECORD
+    collection.record_filters = {"exclude": ["private/*"], "max_body_bytes": 1_000_000}
+    collection.save()
+
+    response, body = _get("/proxied/users/7", HTTP_ACCEPT_ENCODING="gzip")
+    assert response.status_code == 200
+    assert upstream.requests[-1][2]["Accept-Encoding"] == "identity"
+    endpoint = collection.endpoints.get(path="users/7")
+    assert endpoint.http_method == "GET"
+    assert json.loads(endpoint.response_body) == json.loads(body)
+    assert endpoint.custom_headers == {"X-Upstream": "yes"}
+
+    # Now served from the mock
+    count = len(upstream.requests)
+    response = Client().get("/proxied/users/7")
+    assert not response.streaming
+    assert json.loads(response.content) == json.loads(body)
+    assert len(upstream.requests) == count
+
+    # Filtered out: excluded path, non-2xx status, body over the limit
+    _get("/proxied/private/key")
+    _get("/proxied/missing")
+    _get("/proxied/large")
+    assert set(collection.endpoints.values_list("path", flat=True)) == {
+        "mocked",
+        "users/7",
+    }
+
+    # Binary bodies are recorded as files
+    _get("/proxied/image")
+    image = collection.endpoints.get(path="image")
+    assert image.response_file.read() == b"\x89PNG\r\n\x1a\n\xff"
+    assert image.content_type == "image/png"
+
+
+def test_recording_deduplicates(collection):
+    """Test that an inactive endpoint gets each distinct response once."""
+    collection.proxy_mode = Collection.PROXY_RECORD
+    collection.save()
+    endpoint = MockEndpoint.objects.create(
+        collection=collection, display_name="Off", path="off", is_active=False
+    )
+
+    _get("/proxied/off")
+    _get("/proxied/off")
+    # The upstream counts requests, so each answer differs
+    assert EndpointResponse.objects.filter(endpoint=endpoint).count() == 2
+
+    table = get_route_table("proxied")
+    headers = [("Content-Type", "text/plain")]
+    assert record(table, "GET", "same", 200, headers, b"one") is not None
+    assert record(table, "GET", "same", 200, headers, b"one") is None
+    assert record(table, "GET", "same", 200, headers, b"two") is not None
+    assert collection.endpoints.filter(path="same").count() == 1
+
+
+def test_unreachable_upstream(db):
+    """Test a 502 when the upstream refuses connections."""
+    Collection.objects.create(
+        slug="down",
+        name="Down",
+        proxy_mode=Collection.PROXY_PASSTHROUGH,
+        upstream_url="http://127.0.0.1:9/",
+    )
+    response = Client().get("/down/anything")
+    assert response.status_code == 502
+    assert response.json()["error"] == "Upstream request failed"
+
+
+def test_record_filters_are_validated(db):
+    """Test the record_filters validator."""
+    from django.core.exceptions import ValidationError
+
+    collection = Collection(slug="bad", name="Bad", record_filters={"statuses": [2]})
+    with pytest.raises(ValidationError):
+        collection.full_clean()
+    collection.record_filters = {"statuses": ["2xx"], "unknown": 1}
+    with pytest.raises(ValidationError):
+        collection.full_clean()
+    collection.record_filters = {"statuses": ["2xx", "404"], "methods": ["GET"]}
+    collection.full_clean()
+
+
+def test_recording_saves_each_binary_body_once(collection, settings, tmp_path):
+    """Test that duplicates are found before a file is written."""
+    settings.MEDIA_ROOT = tmp_path
+    collection.proxy_mode = Collection.PROXY_RECORD
+    collection.save()
+    table = get_route_table("proxied")
+    headers = [("Content-Type", "image/png")]
+    first = record(table, "GET", "logo", 200, headers, b"\x89PNG\xff")
+    assert record(table, "GET", "logo", 200, headers, b"\x89PNG\xff") is None
+    # Another path with the same bytes shares the file
+    other = record(table, "GET", "icon", 200, headers, b"\x89PNG\xff")
+    assert other.response_file.name == first.response_file.name
+    assert len(list((tmp_path / "mock_bodies").iterdir())) == 1
+
+
+def test_invalid_content_length_is_not_streamed(collection, upstream):
+    """Test that a malformed Content-Length does not break forwarding."""
+    response = Client().get("/proxied/users", CONTENT_LENGTH="abc")
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db(transaction=True)
+def test_standalone_server_proxies(collection, upstream, settings, tmp_path):
+    """Test forwarding and recording by MockServer from a snapshot."""
+    settings.MEDIA_ROOT = tmp_path
+    collection.proxy_mode = Collection.PROXY_RECORD
+    collection.save()
+    path = tmp_path / "proxied.snap"
+    export_snapshot([collection], path)
+    mock_server = MockServer(load_snapshot(path))
+
+    loop = asyncio.new_event_loop()
+    listener = loop.run_until_complete(mock_server.start("127.0.0.1", 0))
+    port = listener.sockets[0].getsockname()[1]
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        connection.request("GET", "/proxied/users/7")
+        response = connection.getresponse()
+        assert response.status == 200
+        assert response.getheader("X-Upstream") == "yes"
+        assert json.loads(response.read())["path"] == "/v1/users/7"
+        # Chunked upstream bodies arrive whole, on the same connection
+        connection.request("GET", "/proxied/large")
+        assert connection.getresponse().read() == LARGE_BODY
+        count = len(upstream.requests)
+        connection.request("GET", "/proxied/mocked")
+        assert connection.getresponse().status == 200
+        assert len(upstream.requests) == count
+        connection.close()
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        listener.close()
+        loop.run_until_complete(listener.wait_closed())
+        loop.close()
+
+    recorded = collection.endpoints.get(path="users/7")
+    assert json.loads(recorded.response_body)["path"] == "/v1/users/7"
+
+
+def test_release_tables_forward_misses(collection, upstream):
+    """Test that releases and pinned releases still proxy."""
+    release = create_release(collection)
+    table = release_table(release)
+    assert table.proxy == ProxyPolicy.for_collection(collection)
+    response, body = _get(f"/proxied@{release.number}/users")
+    assert json.loads(body)["path"] == "/v1/users"
@@ -0,0 +1,171 @@
+"""Tests for collection clones and releases."""
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from domains.engine import IMMUTABLE_CACHE_CONTROL
+from domains.models import (Collection, CollectionRelease, EndpointResponse,
+                            MockEndpoint)
+from domains.releases import clone_collection, create_release
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def api(db):
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user("release", password="x"))
+    return client
+
+
+@pytest.fixture
+def collection(db):
+    collection = Collection.objects.create(slug="shop", name="Shop")
+    for number in range(3):
+        endpoint = MockEndpoint.objects.create(
+            collection=collection,
+            display_name=f"Item {number}",
+            path=f"items/{number}",
+            response_body=f'{{"v": {number}}}',
+        )
+        EndpointResponse.objects.create(
+            endpoint=endpoint, name="Error", response_status=500
+        )
+    collection.refresh_from_db()
+    return collection
+
+
+def test_clone_copies_endpoints_and_responses(collection):
+    """Test a clone in a constant number of statements."""
+    with CaptureQueriesContext(connection) as queries:
+        clone = clone_collection(collection, "shop-copy")
+    small = len(queries)
+
+    assert clone.name == "Shop"
+    assert sorted(clone.endpoints.values_list("path", "response_body")) == [
+        ("items/0", '{"v": 0}'),
+        ("items/1", '{"v": 1}'),
+        ("items/2", '{"v": 2}'),
+    ]
+    responses = EndpointResponse.objects.filter(endpoint__collection=clone)
+    assert responses.count() == 3
+    assert {r.endpoint.collection_id for r in responses} == {clone.pk}
+    assert len({r.endpoint_id for r in responses}) == 3
+    assert set(clone.endpoints.values_list("version", flat=True)) == {
+        clone.config_version
+    }
+    # The source is untouched
+    assert EndpointResponse.objects.filter(endpoint__collection=collection).count() == 3
+
+    for number in range(3, 20):
+        MockEndpoint.objects.create(
+            collection=collection, display_name=f"Item {number}", path=f"items/{number}"
+        )
+    with CaptureQueriesContext(connection) as queries:
+        clone_collection(collection, "shop-copy-2")
+    assert len(queries) == small
+
+
+def test_clone_api(api, collection):
+    """Test the clone action and its slug validation."""
+    response = api.post("/api/collections/shop/clone/", {"slug": "shop-v2"})
+    assert response.status_code == 201
+    assert response.json()["endpoint_count"] == 3
+    assert Collection.objects.get(slug="shop-v2").created_by.username == "release"
+
+    response = api.post("/api/collections/shop/clone/", {"slug": "shop-v2"})
+    assert response.status_code == 400
+    assert "slug" in response.json()
+
+
+def test_release_is_served_unchanged(collection):
+    """Test that a release keeps serving what was live when it was made."""
+    release = create_release(collection, notes="first")
+    assert release.number == 1
+    assert create_release(collection).number == 2
+
+    endpoint = collection.endpoints.get(path="items/0")
+    endpoint.response_body = '{"v": "edited"}'
+    endpoint.save()
+    collection.endpoints.get(path="items/1").delete()
+
+    client = Client()
+    live = client.get("/shop/items/0")
+    assert live.json() == {"v": "edited"}
+    assert "Cache-Control" not in live
+
+    frozen = client.get("/shop@1/items/0")
+    assert frozen.status_code == 200
+    assert frozen.json() == {"v": 0}
+    assert frozen["Cache-Control"] == IMMUTABLE_CACHE_CONTROL
+    assert client.get("/shop@1/items/1").json() == {"v": 1}
+    assert client.get("/shop/items/1").status_code == 404
+
+    revalidated = client.get("/shop@1/items/0", HTTP_IF_NONE_MATCH=frozen["ETag"])
+    assert revalidated.status_code == 304
+    assert revalidated["Cache-Control"] == IMMUTABLE_CACHE_CONTROL
+
+    assert client.get("/shop@9/items/0").status_code == 404
+
+
+def test_release_logs_deleted_endpoints_without_link(collection):
+    """Test logging a request to a release route whose endpoint is gone."""
+    from logger.models import RequestLog
+
+    create_release(collection)
+    collection.endpoints.get(path="items/2").delete()
+    assert Client().get("/shop@1/items/2").status_code == 200
+    log = RequestLog.objects.get(path="/shop@1/items/2")
+    assert log.endpoint_id is None
+
+
+def test_rollback_pins_a_release(api, collection):
+    """Test rolling back to a release and back to the live endpoints."""
+    api.post("/api/collections/shop/releases/", {"notes": "stable"})
+    endpoint = collection.endpoints.get(path="items/0")
+    endpoint.response_body = '{"v": "broken"}'
+    endpoint.save()
+
+    client = Client()
+    assert client.get("/shop/items/0").json() == {"v": "broken"}
+
+    response = api.post(
+        "/api/collections/shop/rollback/", {"release": 1}, format="json"
+    )
+    assert response.status_code == 200
+    assert response.json()["pinned_release"] == 1
+    pinned = client.get("/shop/items/0")
+    assert pinned.json() == {"v": 0}
+    # Only release URLs are immutable
+    assert "Cache-Control" not in pinned
+
+    # Releases freeze the live endpoints, not the pinned release
+    response = api.post("/api/collections/shop/releases/", {})
+    assert response.json()["url"] == "/shop@2/"
+    assert client.get("/shop@2/items/0").json() == {"v": "broken"}
+
+    api.post("/api/collections/shop/rollback/", {"release": None}, format="json")
+    assert client.get("/shop/items/0").json() == {"v": "broken"}
+
+    assert api.post("/api/collections/shop/rollback/", {}).status_code == 400
+    response = api.post(
+        "/api/collections/shop/rollback/", {"release": 7}, format="json"
+    )
+    assert response.status_code == 404
+
+
+def test_release_list_and_delete(api, collection):
+    """Test listing releases and that deleting a pinned release unpins it."""
+    first = create_release(collection, notes="one")
+    create_release(collection, notes="two")
+    response = api.get("/api/collections/shop/releases/")
+    assert [r["number"] for r in response.json()] == [2, 1]
+    assert response.json()[1]["notes"] == "one"
+
+    api.post("/api/collections/shop/rollback/", {"release": 1}, format="json")
+    assert Client().get("/shop/items/0").json() == {"v": 0}
+    first.delete()
+    assert Collection.objects.get(pk=collection.pk).pinned_release is None
+    assert Client().get("/shop@1/items/0").status_code == 404
+    assert CollectionRelease.objects.count() == 1
@@ -0,0 +1,230 @@
+"""Tests for replaying logged traffic."""
+
+import asyncio
+import gzip
+import io
+import json
+import threading
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.test import Client
+from domains.compression import CODECS
+from domains.models import Collection, MockEndpoint
+from domains.replay import (HttpTarget, LoggedExchange, body_diff,
+                            latency_stats, ndjson_exchanges, replay)
+from domains.routing import load_route_tables
+from domains.server import MockServer
+from logger.models import RequestLog
+
+
+@pytest.fixture
+def collection(db):
+    collection = Collection.objects.create(slug="replayed", name="Replayed")
+    MockEndpoint.objects.create(
+        collection=collection,
+        display_name="Users",
+        path="users",
+        response_body='{"users": [], "total": 0}',
+        custom_headers={"X-Version": "1"},
+    )
+    MockEndpoint.objects.create(
+        collection=collection,
+        display_name="Create",
+        path="users",
+        http_method="POST",
+        response_status=201,
+        response_body='{"created": true}',
+    )
+    MockEndpoint.objects.create(
+        collection=collection,
+        display_name="Report",
+        path="report",
+        response_body=json.dumps({"rows": list(range(1000))}),
+    )
+    return collection
+
+
+def test_replay_in_process(collection, tmp_path):
+    """Test that unchanged mocks match and edits show up in the report."""
+    client = Client()
+    for page in range(5):
+        client.get("/replayed/users", {"page": page})
+    client.post("/replayed/users", "{}", content_type="application/json")
+    assert RequestLog.objects.count() == 6
+
+    report_path = tmp_path / "report.json"
+    call_command(
+        "replay_traffic", "replayed", "--report", str(report_path), stdout=io.StringIO()
+    )
+    report = json.loads(report_path.read_text())
+    assert (report["requests"], report["matched"], report["changed"]) == (6, 6, 0)
+    assert report["latency_ms"]["count"] == 6
+
+    # Reordering JSON keys is not a change; other edits are
+    endpoint = collection.endpoints.get(path="users", http_method="GET")
+    endpoint.response_body = '{"total": 0, "users": []}'
+    endpoint.save()
+    create = collection.endpoints.get(http_method="POST")
+    create.response_status = 200
+    create.response_body = '{"created": false}'
+    create.custom_headers = {"X-Version": "2"}
+    create.save()
+    endpoint.custom_headers = {"X-Version": "2"}
+    endpoint.save()
+
+    with pytest.raises(CommandError):
+        call_command(
+            "replay_traffic",
+            "replayed",
+            "--concurrency",
+            "3",
+            "--report",
+            str(report_path),
+            "--fail-on-diff",
+            stdout=io.StringIO(),
+        )
+    report = json.loads(report_path.read_text())
+    assert (report["matched"], report["changed"]) == (0, 6)
+    diff = next(diff for diff in report["diffs"] if diff["method"] == "POST")
+    assert diff["status"] == [201, 200]
+    assert '-  "created": true' in diff["body"]
+    gets = [diff for diff in report["diffs"] if diff["method"] == "GET"]
+    assert all(diff["headers"] == {"X-Version": ["1", "2"]} for diff in gets)
+    assert all("body" not in diff for diff in gets)
+
+    call_command(
+        "replay_traffic",
+        "replayed",
+        "--ignore-header",
+        "x-version",
+        "--method",
+        "GET",
+        "--report",
+        str(report_path),
+        "--fail-on-diff",
+        stdout=io.StringIO(),
+    )
+
+
+class ListSink:
+    """Collect log entries; ``logged`` is set on each one."""
+
+    def __init__(self):
+        self.entries = []
+        self.logged = threading.Event()
+
+    def emit(self, fields):
+        self.entries.append(fields)
+        self.logged.set()
+
+
+@pytest.fixture
+def server(collection):
+    """Serve the collection with the standalone server on an ephemeral port."""
+    sink = ListSink()
+    mock_server = MockServer(load_route_tables(["replayed"]), log_sink=sink)
+
+    loop = asyncio.new_event_loop()
+    listener = loop.run_until_complete(mock_server.start("127.0.0.1", 0))
+    port = listener.sockets[0].getsockname()[1]
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{port}", sink
+
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    listener.close()
+    loop.run_until_complete(listener.wait_closed())
+    loop.close()
+
+
+def test_replay_over_http(server, tmp_path):
+    """Test replaying an NDJSON export against a running server, paced."""
+    base_url, sink = server
+    target = HttpTarget(base_url, "replayed")
+    exchange = LoggedExchange(
+        id=1,
+        method="GET",
+        path="users",
+        query={"page": ["1"]},
+        headers={"Accept-Encoding": "gzip", "Host": "elsewhere"},
+        body=b"",
+        status=200,
+        response_headers={"X-Version": "1"},
+        response_body='{"users": [], "total": 0}',
+    )
+    status, headers, body = target.send(exchange)
+    assert (status, json.loads(body)) == (200, {"users": [], "total": 0})
+    # The server logs after it has answered
+    assert sink.logged.wait(5)
+    entries = sink.entries
+    entries[0]["id"] = 1
+
+    path = tmp_path / "logs.ndjson.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as output:
+        for _ in range(5):
+            output.write(json.dumps(entries[0], cls=DjangoJSONEncoder) + "\n")
+        output.write("\n")
+    with gzip.open(path, "rt", encoding="utf-8") as lines:
+        report = replay(ndjson_exchanges(lines), target, concurrency=2, rate=50)
+    target.close()
+    assert (report.requests, report.matched, report.failed) == (5, 5, 0)
+    assert report.elapsed >= 0.08  # Five requests 20 ms apart
+
+    report = replay([exchange], HttpTarget("http://127.0.0.1:9", "replayed"))
+    assert report.failed == 1
+    assert report.errors[0]["error"].startswith("ConnectionRefusedError")
+
+
+@pytest.mark.skipif(
+    not {"br", "zstd"} & set(CODECS), reason="Neither brotli nor zstd is installed"
+)
+def test_replay_decodes_responses(server):
+    """Test that br and zstd responses are compared decoded."""
+    base_url, _ = server
+    target = HttpTarget(base_url, "replayed")
+    exchange = LoggedExchange(
+        id=1,
+        method="GET",
+        path="report",
+        query={},
+        headers={"Accept-Encoding": "br, zstd, gzip;q=0.5"},
+        body=b"",
+        status=200,
+        response_headers={},
+        response_body="",
+    )
+    status, headers, body = target.send(exchange)
+    target.close()
+    assert headers["Content-Encoding"] in ("br", "zstd")
+    assert json.loads(body) == {"rows": list(range(1000))}
+
+
+def test_body_diff_and_stats():
+    """Test body comparison rules and latency percentiles."""
+    assert body_diff('{"a": 1, "b": 2}', '{"b":2,"a":1}') == []
+    assert body_diff("<file mock_bodies/x.bin>", "\x89PNG") == []
+    assert body_diff("one\ntwo", "one\nthree") == [
+        "--- logged",
+        "+++ now",
+        "@@ -1,2 +1,2 @@",
+        " one",
+        "-two",
+        "+three",
+    ]
+    lines = body_diff(json.dumps(list(range(50))), "[]")
+    assert len(lines) == 21 and lines[-1].startswith("... ")
+
+    stats = latency_stats([float(n) for n in range(1, 101)])
+    assert stats == {
+        "count": 100,
+        "mean": 50.5,
+        "p50": 50.0,
+        "p90": 90.0,
+        "p99": 99.0,
+        "max": 100.0,
+    }
+    assert latency_stats([]) == {"count": 0}
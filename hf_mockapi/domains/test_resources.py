@@ -0,0 +1,187 @@
+"""Tests for stateful resource endpoints."""
+
+import json
+
+import pytest
+from django.test import Client
+from django.utils.datastructures import CaseInsensitiveMapping
+from domains.engine import build_result, match_route
+from domains.models import Collection, MockEndpoint
+from domains.releases import create_release
+from domains.resources import ResourceStore, discard_store
+from domains.routing import build_route_table, release_table
+from domains.snapshots import export_snapshot, load_snapshots
+
+SEED = [
+    {"id": 1, "name": "Ada", "team": "core"},
+    {"id": 2, "name": "Linus", "team": "kernel"},
+]
+
+
+@pytest.fixture
+def resource(db, settings, tmp_path):
+    settings.MOCKAPI_RESOURCE_STATE_DIR = tmp_path
+    collection = Collection.objects.create(slug="crud", name="CRUD")
+    endpoint = MockEndpoint.objects.create(
+        collection=collection,
+        display_name="Users",
+        path="users",
+        endpoint_type=MockEndpoint.RESOURCE,
+        resource_config={"indexes": ["team"], "page_size": 2},
+        response_body=json.dumps(SEED),
+    )
+    yield endpoint
+    discard_store(endpoint.pk)
+
+
+def _send(method, path, data=None):
+    client = Client()
+    body = json.dumps(data) if data is not None else ""
+    return getattr(client, method)(path, body, content_type="application/json")
+
+
+def test_crud(resource):
+    """Test create, read, update, delete and their errors."""
+    client = Client()
+    assert client.get("/crud/users/1").json() == SEED[0]
+
+    created = _send("post", "/crud/users", {"name": "Grace", "team": "core"})
+    assert created.status_code == 201
+    assert created.json() == {"name": "Grace", "team": "core", "id": 3}
+    assert created["Location"] == "/crud/users/3"
+    assert client.get("/crud/users/3").json()["name"] == "Grace"
+
+    updated = _send("patch", "/crud/users/3", {"team": "compilers", "id": 99})
+    assert updated.json() == {"id": 3, "name": "Grace", "team": "compilers"}
+    replaced = _send("put", "/crud/users/3", {"name": "G. Hopper"})
+    assert replaced.json() == {"id": 3, "name": "G. Hopper"}
+
+    assert client.delete("/crud/users/3").status_code == 204
+    assert client.get("/crud/users/3").status_code == 404
+    assert _send("post", "/crud/users", {"id": 1}).status_code == 409
+    assert _send("post", "/crud/users", [1]).status_code == 400
+    assert client.post("/crud/users/1").status_code == 405
+    assert client.head("/crud/users/1").status_code == 200
+
+    # CORS preflights are answered for resource paths
+    preflight = client.options(
+        "/crud/users/1",
+        HTTP_ORIGIN="https://app.example.com",
+        HTTP_ACCESS_CONTROL_REQUEST_METHOD="PATCH",
+    )
+    assert "PATCH" in preflight["Allow"]
+
+
+def test_list_filters_and_pages(resource):
+    """Test filtering on indexed and other fields, and pagination."""
+    client = Client()
+    for name in ("Grace", "Barbara", "Ken"):
+        _send("post", "/crud/users", {"name": name, "team": "core"})
+
+    page = client.get("/crud/users?team=core")
+    assert [user["name"] for user in page.json()] == ["Ada", "Grace"]
+    assert page["X-Total-Count"] == "4"
+    page = client.get("/crud/users?team=core&offset=2&limit=5")
+    assert [user["name"] for user in page.json()] == ["Barbara", "Ken"]
+
+    assert [u["id"] for u in client.get("/crud/users?name=Linus").json()] == [2]
+    assert client.get("/crud/users?team=core&name=Ken").json()[0]["id"] == 5
+    assert client.get("/crud/users?id=2").json() == [SEED[1]]
+    assert client.get("/crud/users?limit=x").status_code == 400
+
+    # Updates move records between index entries
+    _send("patch", "/crud/users/1", {"team": "kernel"})
+    assert client.get("/crud/users?team=kernel").headers["X-Total-Count"] == "2"
+
+
+def test_snapshot_and_reset(resource):
+    """Test reading, restoring and resetting the whole state."""
+    client = Client()
+    _send("post", "/crud/users", {"name": "Grace"})
+    snapshot = client.get("/crud/users/_snapshot").json()
+    assert snapshot["next_id"] == 4
+    assert len(snapshot["records"]) == 3
+
+    assert client.post("/crud/users/_reset").json()["records"] == SEED
+    assert client.get("/crud/users/3").status_code == 404
+
+    assert _send("put", "/crud/users/_snapshot", snapshot).status_code == 200
+    assert client.get("/crud/users/3").json()["name"] == "Grace"
+    bad = [{"id": 1}, {"id": 1}]
+    assert _send("put", "/crud/users/_snapshot", bad).status_code == 409
+    assert client.get("/crud/users/3").status_code == 200
+
+
+def test_state_survives_route_table_rebuilds(resource):
+    """Test that edits to other endpoints keep the state."""
+    _send("post", "/crud/users", {"name": "Grace"})
+    MockEndpoint.objects.create(
+        collection=resource.collection, display_name="Health", path="health"
+    )
+    assert Client().get("/crud/users/3").status_code == 200
+
+    # New seed data starts over
+    resource.response_body = "[]"
+    resource.save()
+    assert Client().get("/crud/users").json() == []
+
+
+def test_persistence(resource, tmp_path):
+    """Test that a persisted store is reloaded from its file."""
+    resource.resource_config = {"persist": True}
+    resource.save()
+    _send("post", "/crud/users", {"name": "Grace"})
+    state = tmp_path / f"resource-{resource.pk}.json"
+    assert len(json.loads(state.read_text())["records"]) == 3
+
+    store = ResourceStore(seed=SEED, path=state)
+    assert store.get("3")["name"] == "Grace"
+    assert store.next_id == 4
+
+    resource.delete()
+    assert not state.exists()
+
+
+def test_snapshots_and_releases_keep_resources(resource, tmp_path):
+    """Test that resources are served from snapshots and releases."""
+    expected = build_route_table(resource.collection).resources
+    path = tmp_path / "crud.snap"
+    export_snapshot([resource.collection], path)
+    table = load_snapshots([path])["crud"]
+    assert table.resources == expected
+    route = match_route(table, "GET", "users/2")
+    result = build_result(table, route, "GET", CaseInsensitiveMapping({}), "users/2")
+    assert json.loads(result.body)["name"] == "Linus"
+
+    release = create_release(resource.collection)
+    assert release_table(release).resources == expected
+    response = Client().get("/crud@1/users", {"team": "core"})
+    assert [user["name"] for user in response.json()] == ["Ada"]
+
+    resource.delete()
+    assert release_table(release).resources["users"].endpoint_id is None
+
+
+def test_store_indexes():
+    """Test index lookups against a scan."""
+    store = ResourceStore(indexes=["kind"])
+    for number in range(100):
+        store.create({"kind": f"k{number % 5}", "n": number})
+    records, total = store.list({"kind": "k3"}, limit=3)
+    assert total == 20
+    assert [record["n"] for record in records] == [3, 8, 13]
+    assert store.indexes["kind"]["k3"] == {str(n + 1) for n in range(3, 100, 5)}
+    store.delete("4")
+    assert store.list({"kind": "k3"})[1] == 19
+
+
+def test_duplicate_seed_ids_are_dropped(resource):
+    """Test that a seed repeating an id still serves its other records."""
+    resource.response_body = json.dumps(SEED + [{"id": 1, "name": "Again"}])
+    resource.save()
+    client = Client()
+
+    response = client.get("/crud/users?limit=10")
+    assert response.status_code == 200
+    assert response.json() == SEED
+    assert client.post("/crud/users/_reset").json()["records"] == SEED
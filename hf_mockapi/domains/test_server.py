@@ -0,0 +1,163 @@
+"""Tests for the standalone asyncio mock server."""
+
+import asyncio
+import re
+import socket
+import threading
+import time
+
+import pytest
+from domains.models import Collection, MockEndpoint
+from domains.releases import create_release
+from domains.routing import load_route_tables
+from domains.server import MockServer
+
+
+class ListSink:
+    """Collect log entries in memory."""
+
+    def __init__(self):
+        self.entries = []
+
+    def emit(self, fields):
+        self.entries.append(fields)
+
+
+@pytest.fixture
+def server(db):
+    """Run a MockServer on an ephemeral port in a background thread."""
+    collection = Collection.objects.create(slug="standalone", name="Standalone")
+    MockEndpoint.objects.create(
+        collection=collection,
+        display_name="Users",
+        path="users",
+        response_body='{"users": []}',
+    )
+    MockEndpoint.objects.create(
+        collection=collection,
+        display_name="Create",
+        path="users",
+        http_method="POST",
+        response_status=201,
+        response_body='{"created": true}',
+    )
+    create_release(collection)
+    sink = ListSink()
+    mock_server = MockServer(load_route_tables(["standalone"]), log_sink=sink)
+
+    loop = asyncio.new_event_loop()
+    listener = loop.run_until_complete(mock_server.start("127.0.0.1", 0))
+    port = listener.sockets[0].getsockname()[1]
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield port, sink
+
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    listener.close()
+    loop.run_until_complete(listener.wait_closed())
+    loop.close()
+
+
+def _exchange(port, payload, responses, head=False):
+    """Send raw bytes and read until ``responses`` responses have arrived."""
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+        sock.sendall(payload)
+        data = b""
+        while data.count(b"HTTP/1.1 ") < responses or not _complete(data, head):
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    return data
+
+
+def _complete(data, head=False):
+    if head:
+        return data.endswith(b"\r\n\r\n")
+    headers, _, body = data.rpartition(b"\r\n\r\n")
+    for line in headers.split(b"\r\n"):
+        if line.lower().startswith(b"content-length:"):
+            return len(body) >= int(line.split(b":")[1])
+    return True
+
+
+def test_get_and_log(server):
+    """Test a plain GET and that it reaches the log sink."""
+    port, sink = server
+    data = _exchange(
+        port, b"GET /standalone/users?page=2 HTTP/1.1\r\nHost: x\r\n\r\n", 1
+    )
+
+    assert data.startswith(b"HTTP/1.1 200 OK\r\n")
+    assert b"Connection: keep-alive" in data
+    assert data.endswith(b'{"users": []}')
+    # The entry is emitted right after the response is written
+    deadline = time.monotonic() + 5
+    while not sink.entries and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sink.entries[0]["query_params"] == {"page": ["2"]}
+    assert sink.entries[0]["response_status"] == 200
+
+
+def test_release(server):
+    """Test that releases are served, frozen, at /{slug}@{number}/."""
+    port, _ = server
+    data = _exchange(port, b"GET /standalone@1/users HTTP/1.1\r\nHost: x\r\n\r\n", 1)
+
+    assert data.startswith(b"HTTP/1.1 200 OK\r\n")
+    assert b"Cache-Control: public, max-age=31536000, immutable" in data
+    assert data.endswith(b'{"users": []}')
+
+
+def test_errors_are_answered_with_500(server, monkeypatch, caplog):
+    """Test that a failing request gets a 500 and is logged, not dropped."""
+    port, _ = server
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("broken")
+
+    monkeypatch.setattr("domains.server.build_result", fail)
+    data = _exchange(port, b"GET /standalone/users HTTP/1.1\r\nHost: x\r\n\r\n", 1)
+
+    assert data.startswith(b"HTTP/1.1 500 Internal Server Error\r\n")
+    assert b"Connection: close" in data
+    assert "Error answering GET /standalone/users" in caplog.text
+
+
+def test_pipelined_requests(server):
+    """Test that pipelined requests on one connection are answered in order."""
+    port, _ = server
+    payload = (
+        b"POST /standalone/users HTTP/1.1\r\nHost: x\r\nContent-Length: 2\r\n\r\n{}"
+        b"GET /standalone/users HTTP/1.1\r\nHost: x\r\n\r\n"
+        b"GET /standalone/missing HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n"
+    )
+    data = _exchange(port, payload, 3)
+
+    statuses = re.findall(rb"HTTP/1\.1 (\d{3}) ", data)
+    assert statuses == [b"201", b"200", b"404"]
+    assert data.count(b"Connection: close") == 1
+
+
+def test_head_and_conditional(server):
+    """Test that HEAD and If-None-Match behave as in the Django handler."""
+    port, _ = server
+    head = _exchange(
+        port, b"HEAD /standalone/users HTTP/1.1\r\nHost: x\r\n\r\n", 1, head=True
+    )
+    etag = [
+        line.split(b": ", 1)[1]
+        for line in head.split(b"\r\n")
+        if line.startswith(b"ETag:")
+    ][0]
+
+    data = _exchange(
+        port,
+        b"GET /standalone/users HTTP/1.1\r\nIf-None-Match: " + etag + b"\r\n\r\n",
+        1,
+    )
+
+    assert head.endswith(b"\r\n\r\n")
+    assert b"Content-Length: 13" in head
+    assert data.startswith(b"HTTP/1.1 304 Not Modified\r\n")
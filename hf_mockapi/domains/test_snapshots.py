@@ -0,0 +1,96 @@
+"""Tests for collection snapshots."""
+
+import pytest
+from django.utils.datastructures import CaseInsensitiveMapping
+from domains.engine import build_result, log_fields
+from domains.models import Collection, MockEndpoint
+from domains.releases import create_release
+from domains.routing import build_route_table
+from domains.snapshots import SnapshotError, export_snapshot, load_snapshot
+
+
+@pytest.fixture
+def collection(db):
+    collection = Collection.objects.create(
+        slug="snap", name="Snap", cors_allowed_origins=["https://app.example"]
+    )
+    MockEndpoint.objects.create(
+        collection=collection,
+        display_name="Large",
+        path="large",
+        response_body='{"items": [%s]}' % ", ".join(["1"] * 2000),
+        custom_headers={"X-Mock": "yes"},
+    )
+    MockEndpoint.objects.create(
+        collection=collection,
+        display_name="Copy",
+        path="copy",
+        http_method="POST",
+        response_status=201,
+        response_body='{"items": [%s]}' % ", ".join(["1"] * 2000),
+    )
+    return collection
+
+
+def test_snapshot_matches_database_tables(collection, tmp_path):
+    """Test that snapshot routes answer exactly like freshly built tables."""
+    path = tmp_path / "mocks.snap"
+    assert export_snapshot([collection], path) == 2
+
+    tables = load_snapshot(path)
+    expected = build_route_table(collection)
+    table = tables["snap"]
+    assert table.cors == expected.cors
+    assert table.allowed_methods("copy") == expected.allowed_methods("copy")
+
+    headers = CaseInsensitiveMapping(
+        {"Accept-Encoding": "gzip", "Origin": "https://app.example"}
+    )
+    for key, route in expected.routes.items():
+        want = build_result(expected, route, route.method, headers)
+        got = build_result(table, table.routes[key], route.method, headers)
+        assert got.status == want.status
+        assert got.headers == want.headers
+        assert bytes(got.body) == bytes(want.body)
+        assert got.vary == want.vary
+
+
+def test_snapshot_keeps_releases(collection, tmp_path):
+    """Test that releases are exported and served immutable at slug@number."""
+    create_release(collection)
+    MockEndpoint.objects.filter(path="large").update(response_body="{}")
+    path = tmp_path / "mocks.snap"
+    export_snapshot([Collection.objects.get(pk=collection.pk)], path)
+
+    tables = load_snapshot(path)
+    assert set(tables) == {"snap", "snap@1"}
+    assert tables["snap@1"].immutable and not tables["snap"].immutable
+    release = tables["snap@1"].match("GET", "large").response.rendered
+    live = tables["snap"].match("GET", "large").response.rendered
+    assert bytes(release.body).startswith(b'{"items"')
+    assert bytes(live.body) == b"{}"
+
+
+def test_snapshot_deduplicates_bodies(collection, tmp_path):
+    """Test that identical bodies are stored once and logged decoded."""
+    path = tmp_path / "mocks.snap"
+    export_snapshot([collection], path)
+    table = load_snapshot(path)["snap"]
+
+    large = table.match("GET", "large").response.rendered
+    copy = table.match("POST", "copy").response.rendered
+    assert large.body.tobytes() == copy.body.tobytes()
+    assert path.stat().st_size < 2 * len(large.body)
+
+    route = table.match("GET", "large")
+    result = build_result(table, route, "GET", CaseInsensitiveMapping({}))
+    fields = log_fields(route, result, "GET", "/snap/large", {}, {}, b"")
+    assert fields["response_body"].startswith('{"items": [1, 1')
+
+
+def test_rejects_invalid_files(tmp_path):
+    """Test that files without the snapshot header are refused."""
+    path = tmp_path / "bogus.snap"
+    path.write_bytes(b"not a snapshot at all, clearly")
+    with pytest.raises(SnapshotError):
+        load_snapshot(path)
@@ -0,0 +1,212 @@
+"""Tests for request validation against the OpenAPI schema."""
+
+import json
+
+import pytest
+from django.test import Client
+from domains.models import Collection, MockEndpoint
+from domains.releases import create_release
+from domains.routing import get_route_table, release_table
+from domains.snapshots import export_snapshot, load_snapshot
+from domains.validation import RequestValidator, compile_schema
+
+SCHEMA = """
+openapi: 3.0.3
+info: {title: Pets, version: "1"}
+paths:
+  /pets:
+    get:
+      parameters:
+        - {name: limit, in: query, schema: {type: integer, minimum: 1, maximum: 50}}
+        - {name: tags, in: query, schema: {type: array, maxItems: 2, items: {type: string}}}
+        - {name: ids, in: query, explode: false, schema: {type: array, items: {type: integer}}}
+        - {name: sizes, in: query, style: pipeDelimited, schema: {type: array, items: {type: integer}}}
+    post:
+      requestBody:
+        required: true
+        content:
+          application/json:
+            schema: {$ref: "#/components/schemas/Pet"}
+  /pets/{petId}:
+    parameters:
+      - {name: petId, in: path, required: true, schema: {type: integer}}
+    get:
+      parameters:
+        - {$ref: "#/components/parameters/Trace"}
+  /pets/mine:
+    get: {}
+components:
+  parameters:
+    Trace: {name: X-Trace, in: header, required: true, schema: {type: string, pattern: "^[a-f0-9]+$"}}
+  schemas:
+    Pet:
+      type: object
+      required: [name]
+      additionalProperties: false
+      properties:
+        name: {type: string, minLength: 1}
+        kind: {type: string, enum: [cat, dog], nullable: true}
+        parent: {$ref: "#/components/schemas/Pet"}
+        weight: {oneOf: [{type: integer}, {type: string, pattern: "kg$"}]}
+"""
+
+
+@pytest.fixture
+def collection(db):
+    collection = Collection.objects.create(
+        slug="pets", name="Pets", openapi_schema=SCHEMA, validate_requests=True
+    )
+    for method, path in [
+        ("GET", "pets"),
+        ("POST", "pets"),
+        ("GET", "pets/1"),
+        ("GET", "pets/mine"),
+        ("GET", "other"),
+    ]:
+        MockEndpoint.objects.create(
+            collection=collection,
+            display_name=f"{method} {path}",
+            path=path,
+            http_method=method,
+            response_body="{}",
+        )
+    return collection
+
+
+def _post(data, content_type="application/json"):
+    body = json.dumps(data) if content_type == "application/json" else data
+    return Client().post("/pets/pets", body, content_type=content_type)
+
+
+def test_parameters(collection):
+    """Test query, path and header parameters."""
+    client = Client()
+    assert client.get("/pets/pets?limit=10&tags=a,b").status_code == 200
+    # Arrays repeat the parameter unless explode is false
+    assert client.get("/pets/pets?tags=a&tags=b").status_code == 200
+    response = client.get("/pets/pets?tags=a&tags=b&tags=c")
+    assert response.json()["details"] == [
+        {"location": "query.tags", "message": "must have at most 2 items"}
+    ]
+    assert client.get("/pets/pets?ids=1,2&sizes=3|4").status_code == 200
+    response = client.get("/pets/pets?ids=1&ids=x,2&sizes=3,4")
+    assert response.json()["details"] == [
+        {"location": "query.ids", "message": "must be integer"},
+        {"location": "query.sizes", "message": "must be integer"},
+    ]
+    # The last of repeated scalar values counts
+    assert client.get("/pets/pets?limit=x&limit=10").status_code == 200
+
+    response = client.get("/pets/pets?limit=x")
+    assert response.status_code == 400
+    assert response.json() == {
+        "error": "Request validation failed",
+        "details": [{"location": "query.limit", "message": "must be integer"}],
+    }
+    assert client.get("/pets/pets?limit=51").json()["details"][0]["message"] == (
+        "must be <= 50"
+    )
+
+    assert client.get("/pets/pets/1", HTTP_X_TRACE="ab12").status_code == 200
+    response = client.get("/pets/pets/1")
+    assert response.json()["details"] == [
+        {"location": "header.X-Trace", "message": "is required"}
+    ]
+    response = client.get("/pets/pets/1", HTTP_X_TRACE="XYZ")
+    assert response.json()["details"][0]["location"] == "header.X-Trace"
+    # A literal path wins over the template, and HEAD is checked as GET
+    assert client.get("/pets/pets/mine").status_code == 200
+    assert client.head("/pets/pets/1").status_code == 400
+    # Operations missing from the schema are not checked
+    assert client.get("/pets/other?limit=x").status_code == 200
+
+
+def test_request_body(collection):
+    """Test the request body against a recursive referenced schema."""
+    assert _post({"name": "Rex", "parent": {"name": "Max"}}).status_code == 200
+    assert _post({"name": "Rex", "kind": None, "weight": "4kg"}).status_code == 200
+
+    details = _post({"parent": {"name": "", "color": "red"}}).json()["details"]
+    assert details == [
+        {"location": "body.name", "message": "is required"},
+        {"location": "body.parent.name", "message": "must be at least 1 long"},
+        {"location": "body.parent.color", "message": "is not allowed"},
+    ]
+    details = _post({"name": "Rex", "kind": "fish", "weight": True}).json()["details"]
+    assert [detail["location"] for detail in details] == ["body.kind", "body.weight"]
+
+    assert _post("{", "application/json").status_code == 400
+    assert _post("name=Rex", "application/x-www-form-urlencoded").json() == {
+        "error": "Request validation failed",
+        "details": [
+            {
+                "location": "body",
+                "message": "content type application/x-www-form-urlencoded "
+                "is not accepted",
+            }
+        ],
+    }
+    assert _post("", "text/plain").json()["details"] == [
+        {"location": "body", "message": "is required"}
+    ]
+
+
+def test_opt_in_and_status(collection):
+    """Test that validation is off by default and the status configurable."""
+    collection.validation_status = 422
+    collection.save()
+    assert Client().get("/pets/pets?limit=x").status_code == 422
+
+    collection.validate_requests = False
+    collection.save()
+    assert Client().get("/pets/pets?limit=x").status_code == 200
+
+    # A broken schema disables validation rather than the collection
+    collection.validate_requests = True
+    collection.openapi_schema = "paths: ["
+    collection.save()
+    assert Client().get("/pets/pets?limit=x").status_code == 200
+
+
+def test_validator_is_compiled_once(collection):
+    """Test that rebuilt route tables share the compiled validator."""
+    validator = get_route_table("pets").validator
+    assert isinstance(validator, RequestValidator)
+    MockEndpoint.objects.create(
+        collection=collection, display_name="New", path="new", response_body="{}"
+    )
+    collection.refresh_from_db()
+    table = get_route_table("pets")
+    assert table.config_version == collection.config_version
+    assert table.validator is validator
+    assert compile_schema(SCHEMA) is validator
+
+
+def test_invalid_requests_are_logged(collection):
+    """Test that rejected requests are logged like any other."""
+    from logger.models import RequestLog
+
+    MockEndpoint.objects.filter(path="pets", http_method="GET").update(
+        enable_request_logger=True
+    )
+    Collection.bump_config_version(collection.pk)
+    Client().get("/pets/pets?limit=0")
+    log = RequestLog.objects.get()
+    assert log.response_status == 400
+    assert "must be >= 1" in log.response_body
+
+
+def test_snapshots_and_releases_validate(collection, tmp_path):
+    """Test that snapshot and release tables keep checking requests."""
+    collection.validation_status = 422
+    collection.save()
+    path = tmp_path / "pets.snap"
+    export_snapshot([collection], path)
+    table = load_snapshot(path)["pets"]
+    assert table.validator is compile_schema(SCHEMA)
+    assert table.validation_status == 422
+
+    create_release(collection)
+    assert release_table(collection.releases.get()).validator is table.validator
+    assert Client().get("/pets@1/pets?limit=x").status_code == 422
+    assert Client().get("/pets@1/pets?limit=1").status_code == 200
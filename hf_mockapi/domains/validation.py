@@ -0,0 +1,619 @@
+"""
+Checking of mock requests against a collection's OpenAPI schema.
+
+With ``Collection.validate_requests`` set, a request to an operation that
+``Collection.openapi_schema`` describes is checked against the operation's
+path, query and header parameters and its ``requestBody`` before a mock
+answers it. A request that does not match gets ``validation_status`` (400
+or 422) and a list of what is wrong::
+
+    {"error": "Request validation failed",
+     "details": [{"location": "query.limit", "message": "must be integer"}]}
+
+Schemas are compiled into plain closures, with every ``$ref`` resolved at
+compile time, once per schema text (see ``compile_schema``); the compiled
+``RequestValidator`` lives on the route table, so a request only runs the
+checks. The JSON Schema keywords understood are ``type`` (and
+``nullable``), ``enum``, ``const``, ``properties``, ``required``,
+``additionalProperties``, ``min/maxProperties``, ``items``,
+``min/maxItems``, ``uniqueItems``, ``minimum``, ``maximum`` and their
+exclusive forms, ``multipleOf``, ``min/maxLength``, ``pattern``, ``allOf``,
+``anyOf``, ``oneOf`` and ``not``; others are ignored.
+"""
+
+import functools
+import json
+import logging
+import re
+
+import yaml
+
+from .openapi_utils import parse_openapi_document
+
+logger = logging.getLogger(__name__)
+
+# At most this many problems are reported per request
+MAX_ERRORS = 20
+
+HTTP_METHODS = {"GET", "PUT", "POST", "DELETE", "OPTIONS", "HEAD", "PATCH", "TRACE"}
+
+# Header parameters that OpenAPI says to ignore
+IGNORED_HEADERS = {"accept", "content-type", "authorization"}
+
+# Separators of array values by parameter style (non-exploded query arrays,
+# and path and header arrays, which are always comma-separated)
+SEPARATORS = {"form": ",", "simple": ",", "spaceDelimited": " ", "pipeDelimited": "|"}
+
+TYPE_TESTS = {
+    "string": lambda value: isinstance(value, str),
+    "integer": lambda value: (isinstance(value, int) and not isinstance(value, bool))
+    or (isinstance(value, float) and value.is_integer()),
+    "number": lambda value: isinstance(value, (int, float))
+    and not isinstance(value, bool),
+    "boolean": lambda value: isinstance(value, bool),
+    "array": lambda value: isinstance(value, list),
+    "object": lambda value: isinstance(value, dict),
+    "null": lambda value: value is None,
+}
+
+
+class SchemaError(Exception):
+    """An OpenAPI document that cannot be compiled."""
+
+
+def _accept(value, where, errors):
+    pass
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class SchemaCompiler:
+    """
+    Compile JSON Schemas of one OpenAPI document into check functions.
+
+    A check is called as ``check(value, where, errors)`` and appends a
+    ``{"location", "message"}`` dict to ``errors`` for every problem.
+    ``$ref`` targets are compiled once and shared; recursive schemas refer
+    to themselves through a placeholder.
+    """
+
+    def __init__(self, document):
+        self.document = document
+        self.refs = {}
+
+    def resolve(self, ref):
+        if not isinstance(ref, str) or not ref.startswith("#"):
+            raise SchemaError(f"Only local references are supported: {ref!r}")
+        node = self.document
+        for part in ref[1:].split("/")[1:]:
+            part = part.replace("~1", "/").replace("~0", "~")
+            try:
+                node = node[int(part)] if isinstance(node, list) else node[part]
+            except (KeyError, IndexError, TypeError, ValueError):
+                raise SchemaError(f"Unresolvable reference {ref!r}")
+        return node
+
+    def deref(self, node):
+        """Follow ``$ref`` until a node that is not a reference."""
+        seen = set()
+        while isinstance(node, dict) and "$ref" in node:
+            ref = node["$ref"]
+            if ref in seen:
+                raise SchemaError(f"Circular reference {ref!r}")
+            seen.add(ref)
+            node = self.resolve(ref)
+        return node
+
+    def compile(self, schema):
+        if schema is True or schema is None:
+            return _accept
+        if schema is False:
+            return lambda value, where, errors: errors.append(
+                _error(where, "is not allowed")
+            )
+        if not isinstance(schema, dict):
+            raise SchemaError(f"A schema must be an object, not {schema!r}")
+        if "$ref" in schema:
+            return self.ref(schema["$ref"])
+
+        checks = [
+            check
+            for check in (
+                self.type_check(schema),
+                self.enum_check(schema),
+                self.string_check(schema),
+                self.number_check(schema),
+                self.array_check(schema),
+                self.object_check(schema),
+                self.combinator_check(schema),
+            )
+            if check is not None
+        ]
+        if not checks:
+            return _accept
+        if len(checks) == 1:
+            return checks[0]
+
+        def check_all(value, where, errors):
+            for check in checks:
+                check(value, where, errors)
+
+        return check_all
+
+    def ref(self, ref):
+        check = self.refs.get(ref)
+        if check is None:
+            compiled = []
+            # Recursive references reach the check through the placeholder
+            self.refs[ref] = lambda value, where, errors: compiled[0](
+                value, where, errors
+            )
+            compiled.append(self.compile(self.resolve(ref)))
+            check = self.refs[ref] = compiled[0]
+        return check
+
+    def type_check(self, schema):
+        types = schema.get("type")
+        if types is None:
+            return None
+        types = [types] if isinstance(types, str) else list(types)
+        if schema.get("nullable"):
+            types.append("null")
+        try:
+            tests = tuple(TYPE_TESTS[name] for name in types)
+        except KeyError as error:
+            raise SchemaError(f"Unknown type {error.args[0]!r}")
+        message = f"must be {' or '.join(types)}"
+
+        def check_type(value, where, errors):
+            for test in tests:
+                if test(value):
+                    return
+            errors.append(_error(where, message))
+
+        return check_type
+
+    def enum_check(self, schema):
+        if "const" in schema:
+            options = [schema["const"]]
+        elif "enum" in schema:
+            options = list(schema["enum"])
+        else:
+            return None
+        if schema.get("nullable"):
+            options.append(None)
+        message = f"must be one of {json.dumps(options)}"
+
+        def check_enum(value, where, errors):
+            # True == 1 in Python, but not in JSON
+            if not any(
+                value == option
+                and type(value) is type(option)
+                or (_is_number(value) and _is_number(option) and value == option)
+                for option in options
+            ):
+                errors.append(_error(where, message))
+
+        return check_enum
+
+    def string_check(self, schema):
+        min_length = schema.get("minLength")
+        max_length = schema.get("maxLength")
+        pattern = schema.get("pattern")
+        if min_length is None and max_length is None and pattern is None:
+            return None
+        try:
+            regex = re.compile(pattern) if pattern is not None else None
+        except re.error as error:
+            raise SchemaError(f"Invalid pattern {pattern!r}: {error}")
+
+        def check_string(value, where, errors):
+            if not isinstance(value, str):
+                return
+            if min_length is not None and len(value) < min_length:
+                errors.append(_error(where, f"must be at least {min_length} long"))
+            if max_length is not None and len(value) > max_length:
+                errors.append(_error(where, f"must be at most {max_length} long"))
+            if regex is not None and not regex.search(value):
+                errors.append(_error(where, f"must match {pattern}"))
+
+        return check_string
+
+    def number_check(self, schema):
+        # OpenAPI 3.0 has boolean exclusive* flags, 3.1 numeric limits
+        limits = []
+        minimum, maximum = schema.get("minimum"), schema.get("maximum")
+        exclusive_min = schema.get("exclusiveMinimum")
+        exclusive_max = schema.get("exclusiveMaximum")
+        if exclusive_min is True:
+            exclusive_min, minimum = minimum, None
+        if exclusive_max is True:
+            exclusive_max, maximum = maximum, None
+        if _is_number(minimum):
+            limits.append((lambda v, n=minimum: v >= n, f"must be >= {minimum}"))
+        if _is_number(maximum):
+            limits.append((lambda v, n=maximum: v <= n, f"must be <= {maximum}"))
+        if _is_number(exclusive_min):
+            limits.append(
+                (lambda v, n=exclusive_min: v > n, f"must be > {exclusive_min}")
+            )
+        if _is_number(exclusive_max):
+            limits.append(
+                (lambda v, n=exclusive_max: v < n, f"must be < {exclusive_max}")
+            )
+        multiple_of = schema.get("multipleOf")
+        if _is_number(multiple_of) and multiple_of > 0:
+            limits.append(
+                (
+                    lambda v, n=multiple_of: (v / n).is_integer(),
+                    f"must be a multiple of {multiple_of}",
+                )
+            )
+        if not limits:
+            return None
+
+        def check_number(value, where, errors):
+            if not _is_number(value):
+                return
+            for test, message in limits:
+                if not test(value):
+                    errors.append(_error(where, message))
+
+        return check_number
+
+    def array_check(self, schema):
+        min_items = schema.get("minItems")
+        max_items = schema.get("maxItems")
+        unique = schema.get("uniqueItems", False)
+        items = self.compile(schema["items"]) if "items" in schema else None
+        if min_items is None and max_items is None and not unique and items is None:
+            return None
+
+        def check_array(value, where, errors):
+            if not isinstance(value, list):
+                return
+            if min_items is not None and len(value) < min_items:
+                errors.append(_error(where, f"must have at least {min_items} items"))
+            if max_items is not None and len(value) > max_items:
+                errors.append(_error(where, f"must have at most {max_items} items"))
+            if unique:
+                keys = [json.dumps(item, sort_keys=True) for item in value]
+                if len(set(keys)) != len(keys):
+                    errors.append(_error(where, "must not contain duplicates"))
+            if items is not None:
+                for index, item in enumerate(value):
+                    items(item, f"{where}[{index}]", errors)
+
+        return check_array
+
+    def object_check(self, schema):
+        properties = {
+            name: self.compile(subschema)
+            for name, subschema in (schema.get("properties") or {}).items()
+        }
+        required = tuple(schema.get("required") or ())
+        additional = schema.get("additionalProperties", True)
+        extra = None if additional is True else self.compile(additional)
+        min_properties = schema.get("minProperties")
+        max_properties = schema.get("maxProperties")
+        if (
+            not properties
+            and not required
+            and extra is None
+            and min_properties is None
+            and max_properties is None
+        ):
+            return None
+
+        def check_object(value, where, errors):
+            if not isinstance(value, dict):
+                return
+            for name in required:
+                if name not in value:
+                    errors.append(_error(f"{where}.{name}", "is required"))
+            for name, item in value.items():
+                check = properties.get(name, extra)
+                if check is not None:
+                    check(item, f"{where}.{name}", errors)
+            if min_properties is not None and len(value) < min_properties:
+                errors.append(
+                    _error(where, f"must have at least {min_properties} properties")
+                )
+            if max_properties is not None and len(value) > max_properties:
+                errors.append(
+                    _error(where, f"must have at most {max_properties} properties")
+                )
+
+        return check_object
+
+    def combinator_check(self, schema):
+        all_of = [self.compile(item) for item in schema.get("allOf") or ()]
+        any_of = [self.compile(item) for item in schema.get("anyOf") or ()]
+        one_of = [self.compile(item) for item in schema.get("oneOf") or ()]
+        negated = self.compile(schema["not"]) if "not" in schema else None
+        if not (all_of or any_of or one_of or negated):
+            return None
+
+        def passes(check, value, where):
+            found = []
+            check(value, where, found)
+            return not found
+
+        def check_combinators(value, where, errors):
+            for check in all_of:
+                check(value, where, errors)
+            if any_of and not any(passes(check, value, where) for check in any_of):
+                errors.append(_error(where, "must match at least one schema"))
+            if one_of and sum(passes(check, value, where) for check in one_of) != 1:
+                errors.append(_error(where, "must match exactly one schema"))
+            if negated is not None and passes(negated, value, where):
+                errors.append(_error(where, "must not match the schema"))
+
+        return check_combinators
+
+    def kind(self, schema):
+        """The first non-null ``type`` of a schema, or None."""
+        types = (self.deref(schema) or {}).get("type")
+        if isinstance(types, str):
+            return types
+        return next((name for name in types or () if name != "null"), None)
+
+    def coercer(self, schema, separator=","):
+        """
+        Convert a parameter's text to the schema's type; raises ValueError.
+
+        Arrays are split on ``separator``; with ``separator`` None they
+        arrive as a list of texts (repeated query parameters).
+        """
+        schema = self.deref(schema) or {}
+        kind = self.kind(schema)
+        if kind == "integer":
+
+            def to_integer(text):
+                try:
+                    return int(text)
+                except ValueError:
+                    raise ValueError("must be integer")
+
+            return to_integer
+        if kind == "number":
+
+            def to_number(text):
+                try:
+                    return int(text)
+                except ValueError:
+                    pass
+                try:
+                    return float(text)
+                except ValueError:
+                    raise ValueError("must be number")
+
+            return to_number
+        if kind == "boolean":
+
+            def to_boolean(text):
+                if text in ("true", "false"):
+                    return text == "true"
+                raise ValueError("must be boolean")
+
+            return to_boolean
+        if kind == "array":
+            item = self.coercer(schema.get("items") or {})
+            if separator is None:
+                return lambda texts: [item(text) for text in texts]
+            return lambda text: (
+                [item(part) for part in text.split(separator)] if text else []
+            )
+        return lambda text: text
+
+
+class Operation:
+    """The compiled parameters and request body of one operation."""
+
+    def __init__(self, compiler, shared_parameters, operation):
+        parameters = {}
+        for parameter in [*shared_parameters, *(operation.get("parameters") or ())]:
+            parameter = compiler.deref(parameter)
+            location, name = parameter.get("in"), parameter.get("name")
+            if location not in ("path", "query", "header") or not name:
+                continue
+            if location == "header" and name.lower() in IGNORED_HEADERS:
+                continue
+            schema = parameter.get("schema")
+            style = parameter.get("style") or (
+                "form" if location == "query" else "simple"
+            )
+            # Exploded query arrays repeat the parameter: ?id=1&id=2
+            repeated = (
+                location == "query"
+                and parameter.get("explode", style == "form")
+                and compiler.kind(schema) == "array"
+            )
+            # Operation parameters override path-level ones
+            parameters[location, name] = (
+                location,
+                name,
+                location == "path" or bool(parameter.get("required")),
+                repeated,
+                compiler.coercer(
+                    schema, None if repeated else SEPARATORS.get(style, ",")
+                ),
+                compiler.compile(schema),
+            )
+        self.parameters = tuple(parameters.values())
+
+        body = compiler.deref(operation.get("requestBody"))
+        self.body_required = bool(body and body.get("required"))
+        self.content = None
+        if body and body.get("content"):
+            self.content = {
+                media_type.lower(): (
+                    compiler.compile((media or {}).get("schema"))
+                    if _is_json(media_type)
+                    else None
+                )
+                for media_type, media in body["content"].items()
+            }
+
+    def validate(self, path_values, query, headers, body):
+        errors = []
+        for location, name, required, repeated, coerce, check in self.parameters:
+            if location == "path":
+                raw = path_values.get(name)
+            elif location == "query":
+                raw = query.get(name)
+                if raw and not repeated:
+                    # The last value counts, as with Django's QueryDict
+                    raw = raw[-1]
+            else:
+                raw = headers.get(name)
+            where = f"{location}.{name}"
+            if raw is None:
+                if required:
+                    errors.append(_error(where, "is required"))
+                continue
+            try:
+                value = coerce(raw)
+            except ValueError as error:
+                errors.append(_error(where, str(error)))
+                continue
+            check(value, where, errors)
+
+        if self.content is not None or self.body_required:
+            self.validate_body(headers.get("Content-Type") or "", body, errors)
+        return errors[:MAX_ERRORS]
+
+    def validate_body(self, content_type, body, errors):
+        if not body:
+            if self.body_required:
+                errors.append(_error("body", "is required"))
+            return
+        if self.content is None:
+            return
+        media_type = content_type.partition(";")[0].strip().lower()
+        major = media_type.partition("/")[0]
+        for candidate in (media_type, f"{major}/*", "*/*"):
+            if candidate in self.content:
+                check = self.content[candidate]
+                break
+        else:
+            errors.append(
+                _error("body", f"content type {media_type or '(none)'} is not accepted")
+            )
+            return
+        if check is None or not _is_json(media_type):
+            return
+        try:
+            data = json.loads(body)
+        except ValueError:
+            errors.append(_error("body", "is not valid JSON"))
+            return
+        check(data, "body", errors)
+
+
+class RequestValidator:
+    """The compiled operations of an OpenAPI document, by method and path."""
+
+    def __init__(self, document):
+        if not isinstance(document, dict):
+            raise SchemaError("An OpenAPI document must be an object")
+        compiler = SchemaCompiler(document)
+        self.exact = {}
+        self.templates = []
+        for raw_path, item in (document.get("paths") or {}).items():
+            item = compiler.deref(item) or {}
+            shared = item.get("parameters") or ()
+            operations = {
+                method.upper(): Operation(compiler, shared, operation or {})
+                for method, operation in item.items()
+                if method.upper() in HTTP_METHODS
+            }
+            path = raw_path.strip("/")
+            if "{" in path:
+                regex, names = _path_template(path)
+                self.templates.append((regex, names, operations))
+            else:
+                for method, operation in operations.items():
+                    self.exact[method, path] = operation
+        # Paths with fewer parameters win, e.g. users/me over users/{id}
+        self.templates.sort(key=lambda template: len(template[1]))
+
+    def find(self, method, path):
+        """Return ``(operation, path parameter values)``, or ``(None, {})``."""
+        operation = self.exact.get((method, path))
+        if operation is not None:
+            return operation, {}
+        for regex, names, operations in self.templates:
+            if method not in operations:
+                continue
+            match = regex.match(path)
+            if match:
+                return operations[method], dict(zip(names, match.groups()))
+        return None, {}
+
+    def validate(self, method, path, query, headers, body):
+        """
+        Problems with a request, as a list of ``{"location", "message"}``;
+        empty when it is valid or the schema does not describe it.
+
+        ``query`` maps each parameter name to the list of its values.
+        """
+        operation, path_values = self.find(method, path)
+        if operation is None and method == "HEAD":
+            operation, path_values = self.find("GET", path)
+        if operation is None:
+            return []
+        return operation.validate(path_values, query, headers, body)
+
+
+@functools.lru_cache(maxsize=64)
+def compile_schema(text):
+    """
+    Compile an OpenAPI document (YAML or JSON text).
+
+    Cached by the text itself, so route tables rebuilt after edits that do
+    not touch the schema reuse the compiled validator.
+    """
+    try:
+        return RequestValidator(parse_openapi_document(text))
+    except (AttributeError, TypeError, ValueError) as error:
+        raise SchemaError(str(error))
+
+
+def validator_for_collection(collection):
+    """The RequestValidator of a Collection, or None when it does not validate."""
+    if not collection.validate_requests or not collection.openapi_schema:
+        return None
+    try:
+        return compile_schema(collection.openapi_schema)
+    except (yaml.YAMLError, SchemaError, RecursionError) as error:
+        logger.warning(
+            "Not validating requests to %s: invalid OpenAPI schema (%s)",
+            collection.slug,
+            error,
+        )
+        return None
+
+
+def _path_template(path):
+    names = []
+    parts = []
+    for literal, name in re.findall(r"([^{]*)(?:\{([^}]*)\})?", path):
+        parts.append(re.escape(literal))
+        if name:
+            names.append(name)
+            parts.append("([^/]+)")
+    return re.compile("".join(parts) + r"\Z"), tuple(names)
+
+
+def _is_json(media_type):
+    media_type = media_type.partition(";")[0].strip().lower()
+    return media_type in ("application/json", "*/*", "application/*") or (
+        media_type.endswith("+json")
+    )
+
+
+def _error(location, message):
+    return {"location": location, "message": message}
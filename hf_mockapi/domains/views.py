@@ -1,117 +1,147 @@
-import json
+import http.client
 import time
 
-from django.http import HttpResponse, JsonResponse
-from django.shortcuts import get_object_or_404
-from django.utils import timezone
+from django.http import (Http404, HttpResponse, HttpResponseNotModified,
+                         StreamingHttpResponse)
+from django.utils.cache import patch_vary_headers
 from django.views.decorators.csrf import csrf_exempt
-from logger.models import RequestLog
+from logger.sinks import get_sink
 
-from .models import Collection, MockEndpoint
+from .engine import (build_result, log_fields, match_route, not_found_result,
+                     options_result)
+from .file_bodies import serve_body_file
+from .proxy import (STREAM_REQUEST_BODY_SIZE, forward, proxy_body,
+                    response_headers, upstream_error_result)
+from .routing import get_release_table, get_route_table
 
 
 @csrf_exempt
-def mock_api_handler(request, collection_slug, endpoint_path=""):
+def mock_api_handler(request, collection_slug, endpoint_path="", release=None):
     """
     Main handler for all mock API requests
 
-    URL structure: /{collection_slug}/{endpoint_path}
+    URL structure: /{collection_slug}/{endpoint_path}, or
+    /{collection_slug}@{release}/{endpoint_path} for a release
     """
     start_time = time.time()
 
-    # Find the collection
-    collection = get_object_or_404(Collection, slug=collection_slug, is_active=True)
+    # Find the collection's (or release's) compiled routes
+    if release is None:
+        table = get_route_table(collection_slug)
+    else:
+        table = get_release_table(collection_slug, int(release))
+    if table is None:
+        raise Http404("No Collection matches the given query.")
 
     # Normalize endpoint path
     endpoint_path = endpoint_path.strip("/")
 
     # Find matching endpoint
-    try:
-        endpoint = MockEndpoint.objects.get(
-            collection=collection,
-            path=endpoint_path,
-            http_method=request.method,
-            is_active=True,
-        )
-    except MockEndpoint.DoesNotExist:
-        error_message = {
-            "error": "Endpoint not found",
-            "details": f"No mock found for {request.method} /{collection_slug}/{endpoint_path}",
-        }
-        return JsonResponse(error_message, status=404)
+    route = match_route(table, request.method, endpoint_path)
+    if route is None:
+        if request.method == "OPTIONS" and table.allowed_methods(endpoint_path):
+            result = options_result(table, endpoint_path, request.headers)
+        elif table.proxy is not None:
+            return proxy_response(request, table, endpoint_path)
+        else:
+            result = not_found_result(
+                table, request.method, endpoint_path, request.headers.get("Origin")
+            )
+        return to_http_response(request, result)
 
     # Apply response delay if configured
-    if endpoint.response_delay > 0:
-        time.sleep(endpoint.response_delay)
-
-    # Check for alternative responses (use default if exists, otherwise use endpoint's default)
-    response_to_use = None
-    default_response = endpoint.responses.filter(is_default=True).first()
-
-    if default_response:
-        # Use the marked default response
-        response_status = default_response.response_status
-        content_type = default_response.content_type
-        response_body = default_response.response_body
-        custom_headers = default_response.custom_headers or {}
-    else:
-        # Use endpoint's built-in default response
-        response_status = endpoint.response_status
-        content_type = endpoint.content_type
-        response_body = endpoint.response_body
-        custom_headers = endpoint.custom_headers or {}
+    if route.response_delay > 0:
+        time.sleep(route.response_delay)
+
+    result = build_result(
+        table,
+        route,
+        request.method,
+        request.headers,
+        endpoint_path,
+        dict(request.GET.lists()),
+        request.body,
+    )
+    response = to_http_response(request, result)
 
-    # Prepare response headers
-    response_headers = {"Content-Type": content_type}
-    if endpoint.content_encoding:
-        response_headers["Content-Encoding"] = endpoint.content_encoding
+    # Log request if enabled
+    if route.enable_request_logger and result.route is not None:
+        response_time = int((time.time() - start_time) * 1000)  # Convert to ms
 
-    # Add custom headers
-    response_headers.update(custom_headers)
+        try:
+            request_body = request.body
+        except Exception:
+            request_body = b""
+
+        fields = log_fields(
+            route,
+            result,
+            request.method,
+            request.path,
+            dict(request.GET),
+            dict(request.headers),
+            request_body,
+        )
+        fields["ip_address"] = get_client_ip(request)
+        fields["user_agent"] = request.META.get("HTTP_USER_AGENT", "")
+        fields["response_time_ms"] = response_time
+        get_sink(table.log_sink).emit(fields)
 
-    # Parse and create response
-    try:
-        if content_type == "application/json":
-            response_data = json.loads(response_body)
-            response = JsonResponse(response_data, status=response_status, safe=False)
-        else:
-            response = HttpResponse(
-                response_body, status=response_status, content_type=content_type
-            )
-    except json.JSONDecodeError:
-        # If JSON parsing fails, return as-is
-        response = HttpResponse(
-            response_body, status=response_status, content_type=content_type
+    return response
+
+
+def to_http_response(request, result):
+    """Turn a MockResult into a Django response."""
+    if result.status == 304:
+        response = HttpResponseNotModified()
+    elif result.file:
+        # Serve file-backed bodies straight from disk
+        response = serve_body_file(
+            request, result.file, result.status, result.headers["Content-Type"]
         )
+    else:
+        response = HttpResponse(result.body, status=result.status)
 
-    # Add custom headers to response
-    for key, value in response_headers.items():
+    for key, value in result.headers.items():
         response[key] = value
+    if result.vary:
+        patch_vary_headers(response, result.vary)
+    return response
 
-    # Log request if enabled
-    if endpoint.enable_request_logger:
-        response_time = int((time.time() - start_time) * 1000)  # Convert to ms
 
-        try:
-            request_body = request.body.decode("utf-8")
-        except:
-            request_body = ""
-
-        RequestLog.objects.create(
-            endpoint=endpoint,
-            method=request.method,
-            path=request.path,
-            query_params=dict(request.GET),
-            request_headers=dict(request.headers),
-            request_body=request_body,
-            response_status=response_status,
-            response_headers=response_headers,
-            response_body=response_body,
-            ip_address=get_client_ip(request),
-            user_agent=request.META.get("HTTP_USER_AGENT", ""),
-            response_time_ms=response_time,
+def proxy_response(request, table, endpoint_path):
+    """Forward a request that matched no mock to the collection's upstream."""
+    try:
+        length = int(request.META.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        # WSGI reads no body then, and request.body would raise
+        length = 0
+    if length > STREAM_REQUEST_BODY_SIZE:
+        body = request  # Streamed from the client to the upstream
+    else:
+        body = request.body if length else None
+    try:
+        upstream = forward(
+            table.proxy,
+            request.method,
+            endpoint_path,
+            request.META.get("QUERY_STRING", ""),
+            request.headers,
+            body,
+            # Recordings are stored uncompressed
+            identity=table.proxy.recording,
         )
-
+    except (OSError, http.client.HTTPException) as error:
+        result = upstream_error_result(table, error, request.headers.get("Origin"))
+        return to_http_response(request, result)
+
+    response = StreamingHttpResponse(
+        proxy_body(table, request.method, endpoint_path, upstream),
+        status=upstream.status,
+    )
+    cors = table.cors.response_headers(request.headers.get("Origin"))
+    for key, value in response_headers(upstream, cors).items():
+        response[key] = value
     return response
 
 
@@ -126,9 +156,9 @@ def get_client_ip(request):
 
 
 @csrf_exempt
-def collection_root_handler(request, collection_slug):
+def collection_root_handler(request, collection_slug, release=None):
     """
     Handler for root collection path (e.g., /collection1/)
     Looks for an endpoint with empty path
     """
-    return mock_api_handler(request, collection_slug, "")
+    return mock_api_handler(request, collection_slug, "", release)
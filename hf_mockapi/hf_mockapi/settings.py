@@ -48,6 +48,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "domains.middleware.MockFastPathMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -67,17 +68,24 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+# django-cors-headers only handles the management API; mock traffic uses the
+# per-collection policies answered from the route table.
+CORS_URLS_REGEX = r"^/(api|admin|_nested_admin)/.*$"
+
 CORS_ALLOW_HEADERS = [
     "accept",
     "accept-encoding",
     "authorization",
     "content-type",
     "dnt",
+    "if-none-match",
     "origin",
     "user-agent",
     "x-csrftoken",
     "x-requested-with",
 ]
+# The dashboard revalidates full lists with If-None-Match
+CORS_EXPOSE_HEADERS = ["etag"]
 
 ROOT_URLCONF = "hf_mockapi.urls"
 
@@ -147,6 +155,10 @@ USE_TZ = True
 STATIC_URL = "static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+# Uploaded files (file-backed mock response bodies)
+MEDIA_URL = "media/"
+MEDIA_ROOT = BASE_DIR / "media"
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -182,3 +194,56 @@ SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
     "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
 }
+
+
+# Mock serving
+# How file-backed response bodies are delivered: "django" streams them with
+# FileResponse, "x-accel-redirect" (nginx) and "x-sendfile" (Apache/lighttpd)
+# hand the transfer off to a fronting proxy.
+MOCKAPI_FILE_DELIVERY = "django"
+MOCKAPI_X_ACCEL_PREFIX = "/protected-mock-bodies/"
+
+# Bodies smaller than this are never compressed
+MOCKAPI_COMPRESSION_MIN_SIZE = 1024
+# How often a cached route table is compared with Collection.config_version
+MOCKAPI_CONFIG_CHECK_INTERVAL_MS = 500
+# Number of rendered bodies (with their compressed variants) kept per process
+MOCKAPI_RENDER_CACHE_SIZE = 1024
+
+# Upstream connections of collections in passthrough/record mode: idle
+# keep-alive connections kept per upstream host, and the socket timeout
+MOCKAPI_PROXY_POOL_SIZE = 10
+MOCKAPI_PROXY_TIMEOUT = 30
+
+# State files of resource endpoints with resource_config["persist"] set
+MOCKAPI_RESOURCE_STATE_DIR = BASE_DIR / "resource_state"
+
+# Collections with more endpoints than this are edited through the endpoint
+# changelist instead of inlines, and show a truncated OpenAPI preview
+MOCKAPI_ADMIN_INLINE_ENDPOINTS = 50
+# Endpoint inlines are shown this many at a time
+MOCKAPI_ADMIN_INLINE_PAGE_SIZE = 20
+MOCKAPI_ADMIN_SCHEMA_PREVIEW_LINES = 200
+
+# Request log destinations, selected per collection with Collection.log_sink
+MOCKAPI_LOG_SINKS = {
+    "database": {"BACKEND": "logger.sinks.DatabaseSink"},
+    "file": {
+        "BACKEND": "logger.sinks.NDJSONFileSink",
+        "OPTIONS": {
+            "directory": BASE_DIR / "request_logs",
+            "max_bytes": 64 * 1024 * 1024,
+            "max_age": 3600,
+        },
+    },
+    "stdout": {"BACKEND": "logger.sinks.StdoutSink"},
+    "null": {"BACKEND": "logger.sinks.NullSink"},
+}
+
+# Mock-collection URLs bypass the MIDDLEWARE stack above (see
+# domains.middleware.MockFastPathMiddleware). Prefixes listed here are routed
+# through the full stack instead; keep them in sync with hf_mockapi/urls.py.
+MOCKAPI_FAST_PATH = True
+MOCKAPI_RESERVED_PREFIXES = ["admin", "_nested_admin", "api", "static", "media"]
+# Middleware still applied to mock traffic, outermost first
+MOCKAPI_FAST_PATH_MIDDLEWARE = []
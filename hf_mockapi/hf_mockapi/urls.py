@@ -21,6 +21,7 @@ from domains import views
 from domains.api_views import (CollectionViewSet, EndpointResponseViewSet,
                                MockEndpointViewSet, current_user,
                                register_user)
+from logger.api_views import RequestLogViewSet
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import (TokenObtainPairView,
                                             TokenRefreshView)
@@ -34,6 +35,7 @@ router = DefaultRouter()
 router.register(r"collections", CollectionViewSet, basename="collection")
 router.register(r"endpoints", MockEndpointViewSet, basename="endpoint")
 router.register(r"responses", EndpointResponseViewSet, basename="response")
+router.register(r"logs", RequestLogViewSet, basename="log")
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -46,11 +48,13 @@ urlpatterns = [
     path("api/", include(router.urls)),
     # Mock API catch-all routes (must come last)
     re_path(
-        r"^(?P<collection_slug>[-\w]+)/(?P<endpoint_path>.+)$",
+        r"^(?P<collection_slug>[-\w]+)(?:@(?P<release>\d+))?/(?P<endpoint_path>.+)$",
         views.mock_api_handler,
         name="mock_api_handler",
     ),
-    path(
-        "<slug:collection_slug>/", views.collection_root_handler, name="collection_root"
+    re_path(
+        r"^(?P<collection_slug>[-\w]+)(?:@(?P<release>\d+))?/$",
+        views.collection_root_handler,
+        name="collection_root",
     ),
 ]
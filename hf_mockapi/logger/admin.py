@@ -1,7 +1,194 @@
+from datetime import datetime, timezone
+
 from django.contrib import admin
+from django.contrib.admin.views.main import ORDER_VAR, PAGE_VAR, ChangeList
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Q
+from django.utils.functional import cached_property
 from django.utils.html import format_html
 
 from .models import RequestLog
+from .search import search_logs
+
+# Parameter carrying the keyset position of the next changelist page
+CURSOR_VAR = "cursor"
+
+# Filtered result sets are counted up to this many rows
+COUNT_LIMIT = 10_000
+
+# Never loaded for the changelist
+HEAVY_FIELDS = (
+    "query_params",
+    "request_headers",
+    "request_body",
+    "response_headers",
+    "response_body",
+    "user_agent",
+)
+
+HTTP_METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"]
+
+
+def estimate_count(queryset, limit=COUNT_LIMIT):
+    """
+    Count ``queryset`` without scanning a large table.
+
+    Returns ``(count, exact)``. Unfiltered querysets use the planner
+    statistics on PostgreSQL and the primary key range elsewhere (both
+    index-only); filtered ones are counted up to ``limit`` rows.
+    """
+    if not queryset.query.where:
+        table = queryset.model._meta.db_table
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                    [table],
+                )
+            else:
+                pk = queryset.model._meta.pk.column
+                cursor.execute(f"SELECT MAX({pk}) - MIN({pk}) + 1 FROM {table}")
+            row = cursor.fetchone()
+        estimate = row[0] if row else None
+        if estimate is not None and estimate > limit:
+            return estimate, False
+    count = queryset.order_by()[: limit + 1].count()
+    return min(count, limit), count <= limit
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that never runs an unbounded COUNT(*)."""
+
+    @cached_property
+    def count(self):
+        count, self.exact = estimate_count(self.object_list)
+        return count
+
+    def validate_number(self, number):
+        # The count may be an estimate; let pages past it come back empty
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            number = 1
+        return max(number, 1)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(
+            self.object_list[bottom : bottom + self.per_page], number, self
+        )
+
+
+class RequestLogChangeList(ChangeList):
+    """
+    Changelist that stays fast on very large log tables.
+
+    Heavy columns are deferred, and in the default ``-timestamp`` order
+    pages are addressed by a keyset cursor (``?cursor=<timestamp>_<id>``)
+    that walks the timestamp index instead of using OFFSET.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        self.cursor = parse_cursor(request.GET.get(CURSOR_VAR))
+        super().__init__(request, *args, **kwargs)
+
+    @property
+    def keyset_paging(self):
+        return not self.query and ORDER_VAR not in self.params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # Links that change the filters or ordering start from the first page
+        if not new_params or CURSOR_VAR not in new_params:
+            remove = [*(remove or []), CURSOR_VAR]
+        return super().get_query_string(new_params, remove)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        return queryset.defer(*HEAVY_FIELDS)
+
+    def get_results(self, request):
+        self.next_cursor_url = None
+        if not self.keyset_paging:
+            return super().get_results(request)
+
+        self.queryset = self.queryset.order_by("-timestamp", "-pk")
+        paginator = self.model_admin.get_paginator(
+            request, self.queryset, self.list_per_page
+        )
+        page = self.queryset
+        if self.cursor is not None:
+            timestamp, pk = self.cursor
+            page = page.filter(
+                Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, pk__lt=pk)
+            )
+        rows = list(page[: self.list_per_page])
+        if len(rows) == self.list_per_page:
+            last = rows[-1]
+            self.next_cursor_url = self.get_query_string(
+                {CURSOR_VAR: format_cursor(last.timestamp, last.pk)}, [PAGE_VAR]
+            )
+
+        self.result_count = paginator.count
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.full_result_count = None
+        self.result_list = rows
+        self.can_show_all = False
+        self.multi_page = bool(self.next_cursor_url or self.cursor)
+        self.paginator = paginator
+
+
+def parse_cursor(value):
+    """Parse ``<unix timestamp>_<id>``; invalid cursors are ignored."""
+    try:
+        timestamp, pk = value.split("_")
+        return datetime.fromtimestamp(float(timestamp), tz=timezone.utc), int(pk)
+    except (AttributeError, ValueError, OverflowError, OSError):
+        return None
+
+
+def format_cursor(timestamp, pk):
+    return f"{timestamp.timestamp():.6f}_{pk}"
+
+
+class MethodFilter(admin.SimpleListFilter):
+    """Method filter with fixed choices (no SELECT DISTINCT over the table)."""
+
+    title = "method"
+    parameter_name = "method"
+
+    def lookups(self, request, model_admin):
+        return [(method, method) for method in HTTP_METHODS]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(method=self.value())
+        return queryset
+
+
+class StatusClassFilter(admin.SimpleListFilter):
+    """Filter by status class (2xx, 4xx, ...) with fixed choices."""
+
+    title = "response status"
+    parameter_name = "status"
+
+    def lookups(self, request, model_admin):
+        return [(str(code), f"{code}xx") for code in (1, 2, 3, 4, 5)]
+
+    def queryset(self, request, queryset):
+        if self.value() in {"1", "2", "3", "4", "5"}:
+            low = int(self.value()) * 100
+            return queryset.filter(
+                response_status__gte=low, response_status__lt=low + 100
+            )
+        return queryset
 
 
 @admin.register(RequestLog)
@@ -15,8 +202,14 @@ class RequestLogAdmin(admin.ModelAdmin):
         "ip_address",
         "endpoint_link",
     )
-    list_filter = ("method", "response_status", "timestamp")
+    list_filter = (MethodFilter, StatusClassFilter, "timestamp")
     search_fields = ("path", "ip_address", "user_agent")
+    date_hierarchy = "timestamp"
+    list_select_related = ("endpoint__collection",)
+    list_per_page = 100
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    change_list_template = "admin/logger/requestlog/change_list.html"
     readonly_fields = (
         "endpoint",
         "method",
@@ -61,6 +254,19 @@ class RequestLogAdmin(admin.ModelAdmin):
         ("Client Information", {"fields": ("ip_address", "user_agent", "timestamp")}),
     )
 
+    def get_changelist(self, request, **kwargs):
+        return RequestLogChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        # search_fields only enables the search box; match with the FTS index
+        if not search_term.strip():
+            return queryset, False
+        results = search_logs(queryset, search_term)
+        if ORDER_VAR in request.GET:
+            # Keep the column the user sorted by instead of relevance
+            results = results.order_by(*queryset.query.order_by)
+        return results, False
+
     def short_path(self, obj):
         return obj.path[:50] + "..." if len(obj.path) > 50 else obj.path
 
@@ -0,0 +1,84 @@
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .export import FORMATS, export_logs, filter_logs
+from .models import RequestLog
+from .search import search_logs
+from .serializers import RequestLogSerializer
+
+
+class RequestLogPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
+class RequestLogViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Browse request logs.
+
+    ``?q=`` runs a full-text search over paths, headers and bodies; results
+    are ordered by relevance. ``?endpoint=`` and ``?collection=`` narrow the
+    logs to one endpoint or collection slug.
+    """
+
+    queryset = RequestLog.objects.all()
+    serializer_class = RequestLogSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = RequestLogPagination
+
+    def get_queryset(self):
+        queryset = RequestLog.objects.all()
+        endpoint_id = self.request.query_params.get("endpoint", None)
+        collection_slug = self.request.query_params.get("collection", None)
+        search = self.request.query_params.get("q", "").strip()
+
+        if endpoint_id:
+            queryset = queryset.filter(endpoint_id=endpoint_id)
+        if collection_slug:
+            queryset = queryset.filter(endpoint__collection__slug=collection_slug)
+        if search:
+            return search_logs(queryset, search)
+
+        return queryset.order_by("-timestamp", "-id")
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """
+        Stream matching logs as gzip-compressed NDJSON or CSV.
+
+        ``?output=ndjson|csv`` picks the format; ``since``/``until`` (ISO date
+        or date/time), ``collection``, ``endpoint``, ``status``, ``method``
+        and ``q`` filter the rows.
+        """
+        params = request.query_params
+        fmt = params.get("output", "ndjson")
+        if fmt not in FORMATS:
+            return Response(
+                {"error": f"output must be one of {', '.join(FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            queryset = filter_logs(
+                since=params.get("since"),
+                until=params.get("until"),
+                collection=params.get("collection"),
+                endpoint=params.get("endpoint"),
+                status=params.get("status"),
+                method=params.get("method"),
+                search=params.get("q"),
+            )
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        filename = f"request-logs-{timezone.now():%Y%m%dT%H%M%S}.{fmt}.gz"
+        response = StreamingHttpResponse(
+            export_logs(queryset, fmt), content_type="application/gzip"
+        )
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
@@ -1,7 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class LoggerConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "logger"
     verbose_name = "Request Inspector"
+
+    def ready(self):
+        from .search import ensure_search_triggers
+
+        post_migrate.connect(ensure_search_triggers, sender=self)
@@ -0,0 +1,158 @@
+"""
+Streaming export of request logs.
+
+Rows are read in keyset ranges over the primary key (``id > last``), each
+range with ``.values_list().iterator()``, and encoded and gzip-compressed
+incrementally, so memory use does not depend on how many logs are exported.
+"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import RequestLog
+from .search import search_logs
+
+EXPORT_FIELDS = [
+    "id",
+    "endpoint_id",
+    "method",
+    "path",
+    "query_params",
+    "request_headers",
+    "request_body",
+    "response_status",
+    "response_headers",
+    "response_body",
+    "ip_address",
+    "user_agent",
+    "timestamp",
+    "response_time_ms",
+]
+JSON_FIELDS = {"query_params", "request_headers", "response_headers"}
+FORMATS = ("ndjson", "csv")
+
+# Compressed output is handed out in pieces of at least this size
+FLUSH_SIZE = 64 * 1024
+
+
+def filter_logs(
+    since=None,
+    until=None,
+    collection=None,
+    endpoint=None,
+    status=None,
+    method=None,
+    search=None,
+):
+    """Build the queryset of logs to export; string arguments are parsed."""
+    queryset = RequestLog.objects.all()
+    if since:
+        queryset = queryset.filter(timestamp__gte=_datetime(since))
+    if until:
+        queryset = queryset.filter(timestamp__lt=_datetime(until))
+    if collection:
+        queryset = queryset.filter(endpoint__collection__slug=collection)
+    if endpoint:
+        queryset = queryset.filter(endpoint_id=endpoint)
+    if status:
+        queryset = queryset.filter(response_status=status)
+    if method:
+        queryset = queryset.filter(method=method.upper())
+    if search:
+        queryset = search_logs(queryset, search)
+    return queryset
+
+
+def iter_rows(queryset, chunk_size=2000):
+    """Yield tuples of ``EXPORT_FIELDS`` in primary key order."""
+    queryset = queryset.order_by("pk").values_list(*EXPORT_FIELDS)
+    last_id = 0
+    while True:
+        count = 0
+        for row in queryset.filter(pk__gt=last_id)[:chunk_size].iterator(
+            chunk_size=chunk_size
+        ):
+            count += 1
+            yield row
+        if count < chunk_size:
+            return
+        last_id = row[0]
+
+
+def encode_ndjson(rows):
+    """Encode rows as newline-delimited JSON objects."""
+    encoder = DjangoJSONEncoder(separators=(",", ":"))
+    for row in rows:
+        yield (encoder.encode(dict(zip(EXPORT_FIELDS, row))) + "\n").encode("utf-8")
+
+
+def encode_csv(rows):
+    """Encode rows as CSV with a header line; JSON fields stay JSON."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    json_columns = [
+        index for index, name in enumerate(EXPORT_FIELDS) if name in JSON_FIELDS
+    ]
+
+    def take():
+        data = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    writer.writerow(EXPORT_FIELDS)
+    yield take()
+    for row in rows:
+        row = list(row)
+        for index in json_columns:
+            row[index] = json.dumps(row[index], cls=DjangoJSONEncoder)
+        writer.writerow(row)
+        yield take()
+
+
+def gzip_stream(chunks, level=6):
+    """Compress an iterable of bytes into a gzip stream, incrementally."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    pending = []
+    size = 0
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            pending.append(data)
+            size += len(data)
+            if size >= FLUSH_SIZE:
+                yield b"".join(pending)
+                pending, size = [], 0
+    pending.append(compressor.flush())
+    yield b"".join(pending)
+
+
+def export_logs(queryset, fmt="ndjson", compress=True, chunk_size=2000):
+    """Yield the encoded (and by default gzip-compressed) export."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}")
+    encode = encode_ndjson if fmt == "ndjson" else encode_csv
+    chunks = encode(iter_rows(queryset, chunk_size))
+    return gzip_stream(chunks) if compress else chunks
+
+
+def _datetime(value):
+    """Parse an ISO date or date/time; naive values use the current time zone."""
+    if not isinstance(value, str):
+        return value
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Invalid date/time {value!r}")
+        parsed = datetime.combine(day, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
@@ -0,0 +1,64 @@
+"""Stream request logs to a gzip-compressed NDJSON or CSV file."""
+
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from logger.export import FORMATS, export_logs, filter_logs
+
+
+class Command(BaseCommand):
+    help = (
+        "Export request logs with constant memory: rows are read in keyset "
+        "ranges and compressed as they are written. Use '-' to write to "
+        "standard output."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="Output file, or '-' for stdout")
+        parser.add_argument("--format", choices=FORMATS, default="ndjson")
+        parser.add_argument("--since", help="Only logs at or after this ISO date/time")
+        parser.add_argument("--until", help="Only logs before this ISO date/time")
+        parser.add_argument("--collection", help="Collection slug")
+        parser.add_argument("--endpoint", type=int, help="Endpoint id")
+        parser.add_argument("--status", type=int, help="Response status")
+        parser.add_argument("--method", help="HTTP method")
+        parser.add_argument("--search", help="Full-text search query")
+        parser.add_argument(
+            "--no-compress", action="store_true", help="Write plain NDJSON/CSV"
+        )
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        try:
+            queryset = filter_logs(
+                since=options["since"],
+                until=options["until"],
+                collection=options["collection"],
+                endpoint=options["endpoint"],
+                status=options["status"],
+                method=options["method"],
+                search=options["search"],
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        chunks = export_logs(
+            queryset,
+            options["format"],
+            compress=not options["no_compress"],
+            chunk_size=options["chunk_size"],
+        )
+        if options["output"] == "-":
+            self.write(sys.stdout.buffer, chunks)
+            return
+        with open(options["output"], "wb") as output:
+            size = self.write(output, chunks)
+        self.stderr.write(f"Wrote {size} bytes to {options['output']}")
+
+    def write(self, output, chunks):
+        size = 0
+        for chunk in chunks:
+            output.write(chunk)
+            size += len(chunk)
+        output.flush()
+        return size
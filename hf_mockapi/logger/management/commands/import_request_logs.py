@@ -0,0 +1,88 @@
+"""Load NDJSON request log segments back into the database."""
+
+import glob
+import gzip
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+from domains.models import MockEndpoint
+from logger.models import RequestLog
+
+FIELDS = {
+    field.attname for field in RequestLog._meta.concrete_fields if not field.primary_key
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Import request logs written by the NDJSON file sink (gzip or plain "
+        "NDJSON). Directories are scanned for finished *.ndjson.gz and "
+        "*.ndjson segments; each file is imported in one transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="+", help="Segment files or directories")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        files = []
+        for path in options["paths"]:
+            if os.path.isdir(path):
+                files.extend(sorted(glob.glob(os.path.join(path, "*.ndjson.gz"))))
+                files.extend(sorted(glob.glob(os.path.join(path, "*.ndjson"))))
+            elif os.path.exists(path):
+                files.append(path)
+            else:
+                raise CommandError(f"No such file or directory: {path}")
+
+        total = 0
+        for path in files:
+            with transaction.atomic():
+                count = self.import_file(path, options["batch_size"])
+            self.stdout.write(f"{path}: {count} logs")
+            total += count
+        self.stdout.write(
+            self.style.SUCCESS(f"Imported {total} logs from {len(files)} files")
+        )
+
+    def import_file(self, path, batch_size):
+        opener = gzip.open if path.endswith(".gz") else open
+        count = 0
+        batch = []
+        with opener(path, "rt", encoding="utf-8") as lines:
+            for number, line in enumerate(lines, 1):
+                if not line.strip():
+                    continue
+                try:
+                    batch.append(self.build(json.loads(line)))
+                except (ValueError, TypeError) as exc:
+                    raise CommandError(f"{path}:{number}: {exc}")
+                if len(batch) >= batch_size:
+                    count += self.write(batch)
+                    batch = []
+        if batch:
+            count += self.write(batch)
+        return count
+
+    def build(self, data):
+        fields = {key: value for key, value in data.items() if key in FIELDS}
+        if fields.get("timestamp"):
+            fields["timestamp"] = parse_datetime(fields["timestamp"])
+        return RequestLog(**fields)
+
+    def write(self, batch):
+        # Endpoints may have been deleted since the logs were written
+        endpoint_ids = {log.endpoint_id for log in batch} - {None}
+        existing = set(
+            MockEndpoint.objects.filter(pk__in=endpoint_ids).values_list(
+                "pk", flat=True
+            )
+        )
+        for log in batch:
+            if log.endpoint_id not in existing:
+                log.endpoint_id = None
+        RequestLog.objects.bulk_create(batch)
+        return len(batch)
@@ -0,0 +1,77 @@
+from django.db import migrations
+
+COLUMNS = (
+    "path, request_headers, request_body, response_headers, response_body, "
+    "user_agent, ip_address"
+)
+NEW_VALUES = ", ".join(f"new.{column.strip()}" for column in COLUMNS.split(","))
+OLD_VALUES = ", ".join(f"old.{column.strip()}" for column in COLUMNS.split(","))
+
+CREATE = [
+    f"""
+    CREATE VIRTUAL TABLE logger_requestlog_fts USING fts5(
+        {COLUMNS},
+        content='logger_requestlog',
+        content_rowid='id',
+        tokenize='unicode61'
+    )
+    """,
+    f"""
+    CREATE TRIGGER logger_requestlog_fts_insert AFTER INSERT ON logger_requestlog
+    BEGIN
+        INSERT INTO logger_requestlog_fts(rowid, {COLUMNS})
+        VALUES (new.id, {NEW_VALUES});
+    END
+    """,
+    f"""
+    CREATE TRIGGER logger_requestlog_fts_delete AFTER DELETE ON logger_requestlog
+    BEGIN
+        INSERT INTO logger_requestlog_fts(logger_requestlog_fts, rowid, {COLUMNS})
+        VALUES ('delete', old.id, {OLD_VALUES});
+    END
+    """,
+    f"""
+    CREATE TRIGGER logger_requestlog_fts_update AFTER UPDATE ON logger_requestlog
+    BEGIN
+        INSERT INTO logger_requestlog_fts(logger_requestlog_fts, rowid, {COLUMNS})
+        VALUES ('delete', old.id, {OLD_VALUES});
+        INSERT INTO logger_requestlog_fts(rowid, {COLUMNS})
+        VALUES (new.id, {NEW_VALUES});
+    END
+    """,
+    # Index the logs written before this migration
+    "INSERT INTO logger_requestlog_fts(logger_requestlog_fts) VALUES ('rebuild')",
+]
+
+DROP = [
+    "DROP TRIGGER IF EXISTS logger_requestlog_fts_insert",
+    "DROP TRIGGER IF EXISTS logger_requestlog_fts_delete",
+    "DROP TRIGGER IF EXISTS logger_requestlog_fts_update",
+    "DROP TABLE IF EXISTS logger_requestlog_fts",
+]
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is SQLite-only; other databases use icontains (see logger.search)
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for statement in CREATE:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for statement in DROP:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("logger", "0002_requestlog_timestamp_default"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
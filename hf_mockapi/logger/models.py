@@ -1,8 +1,16 @@
 from django.db import models
+from django.utils import timezone
 
 
 class RequestLog(models.Model):
-    """Logs all requests made to mock endpoints"""
+    """
+    Logs all requests made to mock endpoints
+
+    On SQLite the table is indexed for full-text search by triggers created
+    in migration 0003 (see ``logger.search``). Table rebuilds done by later
+    schema migrations drop those triggers; a ``post_migrate`` receiver
+    recreates them and rebuilds the index.
+    """
 
     endpoint = models.ForeignKey(
         "domains.MockEndpoint",  # Use string reference instead of direct import
@@ -27,7 +35,8 @@ class RequestLog(models.Model):
     # Metadata
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.CharField(max_length=500, blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add, so imported logs keep their original time
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
     response_time_ms = models.IntegerField(
         default=0, help_text="Response time in milliseconds"
     )
@@ -0,0 +1,144 @@
+"""
+Full-text search over request logs.
+
+On SQLite, logs are indexed in the FTS5 table ``logger_requestlog_fts``
+(created by migration ``0003_requestlog_search``), an external-content index
+over ``logger_requestlog`` that triggers keep up to date as rows are
+inserted, updated or deleted. Other databases fall back to ``icontains``
+filters.
+
+Migrations that rebuild ``logger_requestlog`` (SQLite has no ALTER COLUMN)
+drop its triggers with it. ``ensure_search_triggers`` runs after every
+``migrate`` and recreates missing triggers, then rebuilds the index.
+"""
+
+import logging
+
+from django.db import connection, connections
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "logger_requestlog_fts"
+SEARCHED_FIELDS = (
+    "path",
+    "request_headers",
+    "request_body",
+    "response_headers",
+    "response_body",
+    "user_agent",
+    "ip_address",
+)
+COLUMNS = ", ".join(SEARCHED_FIELDS)
+NEW_VALUES = ", ".join(f"new.{field}" for field in SEARCHED_FIELDS)
+OLD_VALUES = ", ".join(f"old.{field}" for field in SEARCHED_FIELDS)
+
+# Same triggers as migration 0003_requestlog_search
+TRIGGERS = {
+    "logger_requestlog_fts_insert": f"""
+    CREATE TRIGGER logger_requestlog_fts_insert AFTER INSERT ON logger_requestlog
+    BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {COLUMNS})
+        VALUES (new.id, {NEW_VALUES});
+    END
+    """,
+    "logger_requestlog_fts_delete": f"""
+    CREATE TRIGGER logger_requestlog_fts_delete AFTER DELETE ON logger_requestlog
+    BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {COLUMNS})
+        VALUES ('delete', old.id, {OLD_VALUES});
+    END
+    """,
+    "logger_requestlog_fts_update": f"""
+    CREATE TRIGGER logger_requestlog_fts_update AFTER UPDATE ON logger_requestlog
+    BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {COLUMNS})
+        VALUES ('delete', old.id, {OLD_VALUES});
+        INSERT INTO {FTS_TABLE}(rowid, {COLUMNS})
+        VALUES (new.id, {NEW_VALUES});
+    END
+    """,
+}
+
+_available = None
+
+
+def fts_available():
+    """Whether the FTS5 index exists on the default database."""
+    global _available
+    if _available is None:
+        _available = (
+            connection.vendor == "sqlite"
+            and FTS_TABLE in connection.introspection.table_names()
+        )
+    return _available
+
+
+def to_fts_query(text):
+    """
+    Turn free text into an FTS5 query matching every term.
+
+    Terms are quoted so FTS5 operators in user input are taken literally; a
+    trailing ``*`` keeps its meaning as a prefix search.
+    """
+    terms = []
+    for term in text.split():
+        prefix = term.endswith("*")
+        term = term.rstrip("*").replace('"', '""')
+        if term:
+            terms.append(f'"{term}"*' if prefix else f'"{term}"')
+    return " ".join(terms)
+
+
+def search_logs(queryset, text):
+    """
+    Filter ``queryset`` to logs matching ``text``.
+
+    With the FTS5 index, the result carries a ``search_rank`` (bm25, lower
+    is better) and is ordered by it; callers may re-order.
+    """
+    query = to_fts_query(text)
+    if not query:
+        return queryset
+    if not fts_available():
+        condition = Q()
+        for term in text.split():
+            term_condition = Q()
+            for field in SEARCHED_FIELDS:
+                term_condition |= Q(**{f"{field}__icontains": term.rstrip("*")})
+            condition &= term_condition
+        return queryset.filter(condition)
+
+    table = queryset.model._meta.db_table
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[f"{FTS_TABLE}.rowid = {table}.id", f"{FTS_TABLE} MATCH %s"],
+        params=[query],
+        select={"search_rank": f"{FTS_TABLE}.rank"},
+        order_by=["search_rank"],
+    )
+
+
+def ensure_search_triggers(using="default", **kwargs):
+    """
+    Recreate the index triggers a table rebuild dropped (a ``post_migrate``
+    receiver). Returns the names of the recreated triggers.
+    """
+    db = connections[using]
+    if db.vendor != "sqlite" or FTS_TABLE not in db.introspection.table_names():
+        return []
+    with db.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s",
+            ["logger_requestlog"],
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        missing = [name for name in TRIGGERS if name not in existing]
+        if not missing:
+            return []
+        logger.warning("Recreating request log search triggers: %s", missing)
+        for name in missing:
+            cursor.execute(TRIGGERS[name])
+        # Rows written while the triggers were missing are not indexed
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return missing
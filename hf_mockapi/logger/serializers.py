@@ -0,0 +1,28 @@
+from rest_framework import serializers
+
+from .models import RequestLog
+
+
+class RequestLogSerializer(serializers.ModelSerializer):
+    search_rank = serializers.FloatField(read_only=True, required=False)
+
+    class Meta:
+        model = RequestLog
+        fields = [
+            "id",
+            "endpoint",
+            "method",
+            "path",
+            "query_params",
+            "request_headers",
+            "request_body",
+            "response_status",
+            "response_headers",
+            "response_body",
+            "ip_address",
+            "user_agent",
+            "timestamp",
+            "response_time_ms",
+            "search_rank",
+        ]
+        read_only_fields = fields
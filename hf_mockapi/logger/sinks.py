@@ -0,0 +1,338 @@
+"""
+Destinations for mock request logs.
+
+Each collection names the sink its requests are logged to
+(``Collection.log_sink``); names map to sink classes in
+``MOCKAPI_LOG_SINKS``, configured like ``CACHES``::
+
+    MOCKAPI_LOG_SINKS = {
+        "file": {
+            "BACKEND": "logger.sinks.NDJSONFileSink",
+            "OPTIONS": {"directory": "/var/log/mockapi"},
+        },
+    }
+
+A sink receives the field values of one ``RequestLog`` row per ``emit``.
+"""
+
+import atexit
+import gzip
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, connection
+from django.utils.module_loading import import_string
+
+from .models import RequestLog
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SINK = "database"
+
+
+class LogSink:
+    """Base class of request log sinks."""
+
+    def emit(self, fields):
+        """Record the field values of one RequestLog row."""
+        raise NotImplementedError
+
+    def flush(self):
+        """Push buffered entries to their destination."""
+
+    def close(self):
+        """Flush and release resources."""
+        self.flush()
+
+
+class NullSink(LogSink):
+    """Discard every entry."""
+
+    def emit(self, fields):
+        pass
+
+
+class DatabaseSink(LogSink):
+    """Insert one RequestLog row per request, in the caller's thread."""
+
+    def emit(self, fields):
+        RequestLog.objects.create(**fields)
+
+
+class StdoutSink(LogSink):
+    """Write one JSON object per line (structured logs for log collectors)."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def emit(self, fields):
+        line = json.dumps(fields, cls=DjangoJSONEncoder, separators=(",", ":"))
+        with self._lock:
+            self.stream.write(line + "\n")
+
+    def flush(self):
+        with self._lock:
+            self.stream.flush()
+
+
+class NDJSONFileSink(LogSink):
+    """
+    Append entries to gzip-compressed NDJSON segment files.
+
+    Lines are buffered in memory and written in chunks of ``buffer_size``
+    bytes, and at least every ``flush_interval`` seconds by a background
+    thread, so quiet collections do not keep lines in memory. A segment is
+    rotated once ``max_bytes`` of NDJSON have been written to it or it is
+    older than ``max_age`` seconds, whether or not requests arrive. Open
+    segments end
+    in ``.part`` and are renamed when complete, so shippers and
+    ``import_request_logs`` only pick up finished files. Names include the
+    process id, so several workers can share ``directory``.
+    """
+
+    def __init__(
+        self,
+        directory,
+        prefix="requests",
+        max_bytes=64 * 1024 * 1024,
+        max_age=3600,
+        buffer_size=256 * 1024,
+        compresslevel=6,
+        flush_interval=5.0,
+    ):
+        self.directory = os.fspath(directory)
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.buffer_size = buffer_size
+        self.compresslevel = compresslevel
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._buffered = 0
+        self._file = None
+        self._path = None
+        self._written = 0
+        self._opened = 0.0
+        self._sequence = 0
+        self._unflushed = False
+        self.flush_interval = flush_interval
+        self._stop = threading.Event()
+        os.makedirs(self.directory, exist_ok=True)
+        atexit.register(self.close)
+        if flush_interval:
+            threading.Thread(
+                target=self._run_timer, name="request-log-flusher", daemon=True
+            ).start()
+
+    def emit(self, fields):
+        line = json.dumps(fields, cls=DjangoJSONEncoder, separators=(",", ":"))
+        data = (line + "\n").encode("utf-8")
+        with self._lock:
+            self._buffer.append(data)
+            self._buffered += len(data)
+            if self._buffered >= self.buffer_size:
+                self._write_buffer()
+
+    def flush(self):
+        with self._lock:
+            self._write_buffer()
+            if self._file is not None:
+                self._file.flush()
+                self._unflushed = False
+
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            self._write_buffer()
+            self._finish_segment()
+
+    def _run_timer(self):
+        while not self._stop.wait(self.flush_interval):
+            with self._lock:
+                self._write_buffer()
+                if self._file is None:
+                    continue
+                if time.monotonic() - self._opened >= self.max_age:
+                    self._finish_segment()
+                elif self._unflushed:
+                    # Sync flush: what was written so far can be decompressed
+                    self._file.flush()
+                    self._unflushed = False
+
+    def _write_buffer(self):
+        if not self._buffer:
+            return
+        if self._file is not None and (
+            self._written >= self.max_bytes
+            or time.monotonic() - self._opened >= self.max_age
+        ):
+            self._finish_segment()
+        if self._file is None:
+            self._open_segment()
+        data = b"".join(self._buffer)
+        self._buffer = []
+        self._buffered = 0
+        self._file.write(data)
+        self._written += len(data)
+        self._unflushed = True
+
+    def _open_segment(self):
+        self._sequence += 1
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+        name = f"{self.prefix}-{stamp}-{os.getpid()}-{self._sequence}.ndjson.gz"
+        self._path = os.path.join(self.directory, name)
+        self._file = gzip.open(
+            self._path + ".part", "wb", compresslevel=self.compresslevel
+        )
+        self._written = 0
+        self._opened = time.monotonic()
+
+    def _finish_segment(self):
+        if self._file is None:
+            return
+        self._file.close()
+        os.replace(self._path + ".part", self._path)
+        self._file = None
+
+
+class QueuedDatabaseSink(LogSink):
+    """
+    Write RequestLog rows in batches from a background thread.
+
+    ``emit`` never blocks the caller: entries go onto a bounded queue and a
+    worker thread flushes them with ``bulk_create``. When the queue is full
+    the entry is dropped and counted in ``dropped`` instead of stalling the
+    server. A batch that fails is written again row by row, so one bad entry
+    only loses itself; rows that still fail are counted in ``failed``.
+    """
+
+    def __init__(self, batch_size=500, flush_interval=1.0, max_queue=100_000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.failed = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="request-log-writer", daemon=True
+        )
+        self._thread.start()
+
+    def emit(self, fields):
+        """Queue the field values of one RequestLog row."""
+        try:
+            self._queue.put_nowait(fields)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout=5.0):
+        """Flush pending entries and stop the worker thread."""
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def _run(self):
+        try:
+            while not (self._stop.is_set() and self._queue.empty()):
+                batch = self._next_batch()
+                if batch:
+                    self._write(batch)
+        finally:
+            connection.close()
+
+    def _write(self, batch):
+        close_old_connections()
+        try:
+            RequestLog.objects.bulk_create([RequestLog(**fields) for fields in batch])
+            return
+        except Exception:
+            logger.warning(
+                "Failed to write %d request logs in one batch, retrying one by one",
+                len(batch),
+                exc_info=True,
+            )
+        for fields in batch:
+            try:
+                RequestLog.objects.create(**fields)
+            except Exception:
+                self.failed += 1
+                logger.exception(
+                    "Failed to write request log for %s %s",
+                    fields.get("method"),
+                    fields.get("path"),
+                )
+
+    def _next_batch(self):
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=self.flush_interval))
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+
+_sinks = {}
+_sinks_lock = threading.Lock()
+
+
+def sink_names():
+    """Names of the configured sinks."""
+    return list(getattr(settings, "MOCKAPI_LOG_SINKS", {DEFAULT_SINK: None}))
+
+
+def create_sink(name):
+    """Instantiate the sink configured under ``name``."""
+    config = getattr(settings, "MOCKAPI_LOG_SINKS", {}).get(name)
+    if config is None:
+        if name == DEFAULT_SINK:
+            return DatabaseSink()
+        raise KeyError(name)
+    return import_string(config["BACKEND"])(**config.get("OPTIONS", {}))
+
+
+def get_sink(name):
+    """
+    Return the shared per-process sink configured under ``name``.
+
+    Unknown names fall back to the database sink, so a typo in a collection
+    never loses its logs.
+    """
+    sink = _sinks.get(name)
+    if sink is not None:
+        return sink
+    with _sinks_lock:
+        if name not in _sinks:
+            try:
+                _sinks[name] = create_sink(name)
+            except KeyError:
+                logger.warning("Unknown log sink %r; using %r", name, DEFAULT_SINK)
+                _sinks[name] = _default_sink()
+        return _sinks[name]
+
+
+def close_sinks():
+    """Flush and close every sink created by ``get_sink``."""
+    with _sinks_lock:
+        sinks = {id(sink): sink for sink in _sinks.values()}
+        _sinks.clear()
+    for sink in sinks.values():
+        try:
+            sink.close()
+        except Exception:
+            logger.exception("Failed to close log sink %r", sink)
+
+
+def _default_sink():
+    sink = _sinks.get(DEFAULT_SINK)
+    if sink is None:
+        sink = _sinks[DEFAULT_SINK] = create_sink(DEFAULT_SINK)
+    return sink
@@ -0,0 +1,135 @@
+"""Changelist tags for RequestLogAdmin that avoid full-table queries."""
+
+import calendar
+
+from django import template
+from django.utils import formats, timezone
+from django.utils.text import capfirst
+
+from ..admin import COUNT_LIMIT
+
+register = template.Library()
+
+
+@register.inclusion_tag("admin/logger/requestlog/pagination.html")
+def request_log_pagination(cl):
+    """ "Next page" navigation over the keyset cursor, with an estimated count."""
+    exact = getattr(cl.paginator, "exact", True)
+    return {
+        "cl": cl,
+        "first_url": cl.get_query_string() if cl.cursor else None,
+        "next_url": cl.next_cursor_url,
+        "exact": exact,
+        "capped": not exact and cl.result_count == COUNT_LIMIT,
+    }
+
+
+@register.inclusion_tag("admin/date_hierarchy.html")
+def indexed_date_hierarchy(cl):
+    """
+    Date drill-down built from the first and last timestamps.
+
+    Django's ``date_hierarchy`` runs ``SELECT DISTINCT`` over the truncated
+    dates of every matching row. Here the bounds come from two
+    ``ORDER BY ... LIMIT 1`` queries on the timestamp index and the years,
+    months or days in between are listed from the calendar, so a bucket may
+    occasionally be empty.
+    """
+    field_name = cl.date_hierarchy
+    year_field = f"{field_name}__year"
+    month_field = f"{field_name}__month"
+    day_field = f"{field_name}__day"
+    year_lookup = cl.params.get(year_field)
+    month_lookup = cl.params.get(month_field)
+    day_lookup = cl.params.get(day_field)
+
+    def link(filters):
+        return cl.get_query_string(filters, [f"{field_name}__"])
+
+    first, last = _bounds(cl.queryset, field_name)
+    if first is None:
+        return {"show": False}
+
+    if not (year_lookup or month_lookup or day_lookup):
+        # Start at the coarsest level that has more than one choice
+        if first.year == last.year:
+            year_lookup = first.year
+            if first.month == last.month:
+                month_lookup = first.month
+
+    if year_lookup and month_lookup and day_lookup:
+        day = first.date().replace(
+            year=int(year_lookup), month=int(month_lookup), day=int(day_lookup)
+        )
+        return {
+            "show": True,
+            "back": {
+                "link": link({year_field: year_lookup, month_field: month_lookup}),
+                "title": capfirst(formats.date_format(day, "YEAR_MONTH_FORMAT")),
+            },
+            "choices": [
+                {"title": capfirst(formats.date_format(day, "MONTH_DAY_FORMAT"))}
+            ],
+        }
+    if year_lookup and month_lookup:
+        year, month = int(year_lookup), int(month_lookup)
+        days = range(first.day, last.day + 1)
+        if (first.year, first.month) != (last.year, last.month):
+            days = range(1, calendar.monthrange(year, month)[1] + 1)
+        return {
+            "show": True,
+            "back": {"link": link({year_field: year_lookup}), "title": str(year)},
+            "choices": [
+                {
+                    "link": link(
+                        {year_field: year, month_field: month, day_field: day}
+                    ),
+                    "title": capfirst(
+                        formats.date_format(
+                            first.date().replace(year=year, month=month, day=day),
+                            "MONTH_DAY_FORMAT",
+                        )
+                    ),
+                }
+                for day in days
+            ],
+        }
+    if year_lookup:
+        year = int(year_lookup)
+        months = range(first.month, last.month + 1)
+        if first.year != last.year:
+            months = range(1, 13)
+        return {
+            "show": True,
+            "back": {"link": link({}), "title": "All dates"},
+            "choices": [
+                {
+                    "link": link({year_field: year, month_field: month}),
+                    "title": capfirst(
+                        formats.date_format(
+                            first.date().replace(year=year, month=month, day=1),
+                            "YEAR_MONTH_FORMAT",
+                        )
+                    ),
+                }
+                for month in months
+            ],
+        }
+    return {
+        "show": True,
+        "back": None,
+        "choices": [
+            {"link": link({year_field: year}), "title": str(year)}
+            for year in range(first.year, last.year + 1)
+        ],
+    }
+
+
+def _bounds(queryset, field_name):
+    """First and last values of ``field_name``, in local time."""
+    values = queryset.order_by().values_list(field_name, flat=True)
+    first = values.order_by(field_name).first()
+    last = values.order_by(f"-{field_name}").first()
+    if first is None or last is None:
+        return None, None
+    return timezone.localtime(first), timezone.localtime(last)
@@ -0,0 +1,96 @@
+"""Tests for full-text search over request logs."""
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management.sql import emit_post_migrate_signal
+from django.db import connection
+from logger.models import RequestLog
+from logger.search import (TRIGGERS, ensure_search_triggers, fts_available,
+                           search_logs)
+from rest_framework.test import APIClient
+
+
+def _log(**fields):
+    return RequestLog(
+        **{"method": "GET", "path": "/shop/items", "response_status": 200, **fields}
+    )
+
+
+@pytest.fixture
+def logs(db):
+    RequestLog.objects.bulk_create(
+        [
+            _log(response_body='{"sku": "alpha-42"}'),
+            _log(path="/shop/alpha", response_body='{"sku": "alpha-42"}'),
+            _log(request_headers={"X-Trace": "zebra"}),
+            *[_log(response_body=f'{{"n": {n}}}') for n in range(30)],
+        ]
+    )
+
+
+def test_index_follows_writes(logs):
+    """Test that inserts, updates and deletes are reflected in search."""
+    assert fts_available()
+    assert search_logs(RequestLog.objects.all(), "zebra").count() == 1
+
+    log = RequestLog.objects.create(
+        method="POST", path="/shop/orders", response_status=201, request_body="kiwi"
+    )
+    assert list(search_logs(RequestLog.objects.all(), "kiwi")) == [log]
+
+    RequestLog.objects.filter(pk=log.pk).update(request_body="mango")
+    assert not search_logs(RequestLog.objects.all(), "kiwi").exists()
+    log.delete()
+    assert not search_logs(RequestLog.objects.all(), "mango").exists()
+
+
+def test_migrate_restores_dropped_triggers(logs):
+    """Test that triggers dropped by a table rebuild come back after migrate."""
+    with connection.cursor() as cursor:
+        for name in TRIGGERS:
+            cursor.execute(f"DROP TRIGGER {name}")
+    RequestLog.objects.create(
+        method="GET", path="/shop/lost", response_status=200, request_body="papaya"
+    )
+    assert not search_logs(RequestLog.objects.all(), "papaya").exists()
+
+    emit_post_migrate_signal(0, False, "default")
+    assert ensure_search_triggers() == []
+    assert search_logs(RequestLog.objects.all(), "papaya").count() == 1
+
+
+def test_ranking_and_query_syntax(logs):
+    """Test relevance ordering, prefixes and that user input is quoted."""
+    results = list(search_logs(RequestLog.objects.all(), "alpha"))
+    assert [log.path for log in results] == ["/shop/alpha", "/shop/items"]
+    assert results[0].search_rank <= results[1].search_rank
+
+    assert search_logs(RequestLog.objects.all(), "zeb*").count() == 1
+    assert search_logs(RequestLog.objects.all(), 'alpha OR "zebra" (').count() == 0
+
+
+def test_api_search_is_paginated(logs):
+    """Test ?q= on the log API."""
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user("reader"))
+    response = client.get("/api/logs/", {"q": "alpha"})
+    assert response.status_code == 200
+    assert response.data["count"] == 2
+    assert response.data["results"][0]["path"] == "/shop/alpha"
+
+    response = client.get("/api/logs/", {"q": "shop", "page_size": 10, "page": 2})
+    assert response.data["count"] == 33
+    assert len(response.data["results"]) == 10
+
+
+def test_admin_search(logs, admin_client):
+    """Test the admin search box uses the index."""
+    response = admin_client.get("/admin/logger/requestlog/", {"q": "zebra"})
+    assert response.status_code == 200
+    assert response.context["cl"].result_count == 1
+
+    response = admin_client.get("/admin/logger/requestlog/", {"q": "alpha"})
+    assert [log.path for log in response.context["cl"].result_list] == [
+        "/shop/alpha",
+        "/shop/items",
+    ]